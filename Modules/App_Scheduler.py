@@ -12,10 +12,24 @@ Versión: 2.0 - Migración a SQLite3
 ===================================================================
 """
 
-import requests
-from database.SliceManagerDB import SliceManagerDB
+import logging
+from conf.Conexion import Conexion
 from conf.ConfigManager import config
-lista_worker_general_filtrada=[]
+from database.capacity_ledger import get_capacity_ledger
+from database.reservations import ReservationManager, ReservationError
+
+try:
+    from scheduler import (
+        BatchScheduler, CapacityArrays, NumpyPlacementEngine, build_edges, get_strategy, placement_report
+    )
+except ImportError:  # NumPy no instalado: solo backend 'python' y estrategia 'coeficiente'
+    NumpyPlacementEngine = None
+
+logger = logging.getLogger(__name__)
+
+# Intentos de planificar y reservar antes de rendirse (otra corrida
+# concurrente puede tomar la capacidad entre el snapshot y la reserva)
+RESERVATION_ATTEMPTS = 3
 
 class Worker:
     """
@@ -61,48 +75,38 @@ def filtrado(zona_disponibilidad, FACTOR):
     """
     Filtra workers por zona de disponibilidad y aplica factor de recursos.
     
+    Los workers se construyen a partir de un snapshot del libro de
+    capacidad en memoria (sin consultar la base de datos en cada
+    corrida). Cada llamada devuelve objetos Worker nuevos.
+    
     Args:
         zona_disponibilidad (str): Nombre de la zona de disponibilidad
-        FACTOR (float): Factor de multiplicación para recursos disponibles
+        FACTOR: Factor de multiplicación para recursos disponibles (número o
+                OvercommitFactors por worker y recurso)
         
     Returns:
         List[Worker]: Lista de workers filtrados y configurados
     """
-    # Query adaptada a SQLite3
-    query = """
-    SELECT s.id_servidor, r.ram_available, r.storage_available, r.vcpu_available, 
-           r.ram, r.storage, r.vcpu 
-    FROM recursos r 
-    INNER JOIN servidor s ON s.id_recurso = r.id_recursos 
-    INNER JOIN zona_disponibilidad zd ON zd.idzona_disponibilidad = s.id_zona 
-    WHERE zd.nombre = ?
-    """
-
-    db = SliceManagerDB()
-    resultado = []
-    
     try:
-        # Ejecutar consulta con parámetro SQLite3
-        results = db.execute_query(query, (zona_disponibilidad,))
-        
-        for row in results:
-            worker = Worker(
-                row[0],                    # id_servidor
-                float(row[1]) * FACTOR,    # ram_disponible
-                float(row[2]) * FACTOR,    # storage_disponible  
-                float(row[3]) * FACTOR,    # vcpu_disponible
-                float(row[4]) * FACTOR,    # ram_total
-                float(row[5]) * FACTOR,    # storage_total
-                float(row[6]) * FACTOR     # vcpu_total
-            )
-            lista_worker_general_filtrada.append(worker)
-            
-        return lista_worker_general_filtrada
+        snapshot = get_capacity_ledger().snapshot(zona_disponibilidad, FACTOR)
+        return workers_desde_snapshot(snapshot)
         
     except Exception as e:
         print(f"Error en filtrado de workers: {e}")
         return []
 
+def workers_desde_snapshot(snapshot):
+    """
+    Construye objetos Worker a partir de un snapshot del libro de capacidad.
+    
+    Args:
+        snapshot (LedgerSnapshot): Snapshot de una zona
+        
+    Returns:
+        List[Worker]: Workers de la zona con el factor ya aplicado
+    """
+    return [Worker(*row) for row in snapshot.rows]
+
 def takeSecond(elem):
     return elem[0]
 
@@ -143,6 +147,7 @@ def ordenamiento_coeficiente(lista_worker_general_filtrada,vm):
     # print(f"** Orden de prioridad: {new_list} ==> {new_list[0]} es el tentativo servidor físico")
     # print("-- Evaluacion de recursos: ")
     contador1 = 0
+    worker_elegido = None
     # print(f"Se necesita {vm.ram_requerida} de RAM, {vm.disco_requerido} de disco y {vm.vcpu_requeridas} vcpus")
     for worker in lista_worker_ordenada:
         # print(f"Worker {worker.id_servidor} tiene de {worker.ram_disponible} RAM, {worker.disco_disponible} de disco y {worker.vcpu_disponible} vcpus")
@@ -170,10 +175,137 @@ def ordenamiento_coeficiente(lista_worker_general_filtrada,vm):
     return worker_elegido
 
 
-def scheduler_main(data, FACTOR):
-    conn = Conexion()
-    #Actualizamos los valores en base de datos: mas adelante esto lo hara el validador
-    # x = requests.get('http://10.20.12.58:8081/cpu-metrics')
+def asignar_vms(lista_workers, lista_vms, backend=None):
+    """
+    Asigna cada VM a un worker con el backend configurado.
+    
+    Args:
+        lista_workers (List[Worker]): Workers candidatos (se actualizan sus recursos)
+        lista_vms (List[Vm]): VMs en el orden en que deben asignarse
+        backend (str, optional): 'numpy' o 'python' (por defecto SCHEDULER_BACKEND)
+        
+    Returns:
+        List[Worker]: Worker elegido por VM; termina en None si una VM no cabe
+    """
+    backend = backend or config.get_scheduler_config()['backend']
+    if backend == 'numpy':
+        if NumpyPlacementEngine is not None:
+            return NumpyPlacementEngine().place_all(lista_workers, lista_vms)
+        logger.warning("NumPy no disponible; se usa el backend 'python' del scheduler")
+
+    elegidos = []
+    for vm in lista_vms:
+        worker_elegido = ordenamiento_coeficiente(lista_workers, vm)
+        elegidos.append(worker_elegido)
+        if worker_elegido is None:
+            break
+    return elegidos
+
+
+def planificar(lista_workers, lista_vms, estrategia=None, nodos=None):
+    """
+    Asigna las VMs con la estrategia de placement configurada.
+    
+    Args:
+        lista_workers (List[Worker]): Workers candidatos (se actualizan sus recursos)
+        lista_vms (List[Vm]): VMs del slice
+        estrategia (str, optional): Nombre de la estrategia (por defecto SCHEDULER_STRATEGY)
+        nodos (dict, optional): data['nodos'] del slice, para considerar los enlaces
+        
+    Returns:
+        Tuple[List[Worker], Dict]: Worker elegido por VM (None si no cupo) y
+                                   reporte de eficiencia (None sin NumPy)
+    """
+    estrategia = estrategia or config.get_scheduler_config()['strategy']
+    if NumpyPlacementEngine is None:
+        if estrategia != 'coeficiente':
+            logger.warning(f"NumPy no disponible; se usa la estrategia 'coeficiente' en lugar de '{estrategia}'")
+        elegidos = asignar_vms(lista_workers, lista_vms, backend='python')
+        return elegidos + [None] * (len(lista_vms) - len(elegidos)), None
+
+    capacidades = CapacityArrays.from_workers(lista_workers)
+    enlaces = build_edges(nodos, [vm.nodo_nombre for vm in lista_vms]) if nodos is not None else None
+    if estrategia == 'coeficiente':
+        elegidos = asignar_vms(lista_workers, lista_vms)
+        elegidos = elegidos + [None] * (len(lista_vms) - len(elegidos))
+    else:
+        elegidos = get_strategy(estrategia).place(lista_workers, lista_vms, enlaces=enlaces)
+
+    indices = {id(worker): i for i, worker in enumerate(lista_workers)}
+    asignados = [indices[id(w)] if w is not None else None for w in elegidos]
+    return elegidos, placement_report(capacidades, lista_vms, asignados, estrategia, enlaces=enlaces)
+
+
+def items_reserva(lista_vms, elegidos, nodos):
+    """
+    Nodos a reservar: las VMs asignadas cuyos nodos aún no están instanciados.
+    """
+    items = []
+    for vm, worker_elegido in zip(lista_vms, elegidos):
+        if worker_elegido is None or nodos[vm.nodo_nombre].get('instanciado') == 'true':
+            continue
+        items.append({'nodo': vm.nodo_nombre, 'worker_id': worker_elegido.id_servidor,
+                      'ram': vm.ram_requerida, 'disk': vm.disco_requerido, 'vcpu': vm.vcpu_requeridas})
+    return items
+
+def cerrar_reserva(data, creadas=None, registradas_en_uow=False):
+    """
+    Confirma la reserva de los nodos instanciados por el driver y libera
+    la del resto.
+
+    Los drivers legados (Modules/*Driver.py) escriben las VMs sin
+    SliceUnitOfWork, así que por defecto la reserva confirmada queda en
+    el libro de capacidad como consumo de la VM.
+
+    Args:
+        data: Slice con la reserva tomada por scheduler_main
+        creadas (optional): Clave del nodo -> nombre de la VM creada (por
+                            defecto se deduce de mapeo_nombres)
+        registradas_en_uow (optional): True si las VMs las registró una
+                                       SliceUnitOfWork, que ya las descuenta
+                                       del libro
+    """
+    token = (data.get('reserva') or {}).get('token')
+    if not token:
+        return None
+    if creadas is None:
+        mapeo = data.get('mapeo_nombres') or {}
+        creadas = {nodo_key: "vm-" + mapeo[nodo_key] for nodo_key, nodo in data['nodos'].items()
+                   if nodo.get('instanciado') == 'true' and nodo_key in mapeo}
+    resumen = ReservationManager().finish(token, creadas, consume_in_ledger=not registradas_en_uow)
+    data.pop('reserva', None)
+    return resumen
+
+def liberar_vms(nombres):
+    """
+    Devuelve la capacidad de las VMs que borraron los drivers legados
+    (Modules/*Driver.py), que eliminan sus filas con Conexion.Delete en
+    lugar de delete_vm_records: la reserva confirmada de cada VM vuelve
+    a recursos y el libro de capacidad se recarga desde la base de datos.
+
+    Args:
+        nombres: Nombres de las VMs eliminadas
+
+    Returns:
+        int: VMs cuya reserva se devolvió
+    """
+    reservas = ReservationManager()
+    devueltas = sum(1 for nombre in nombres if reservas.release_vm(nombre))
+    get_capacity_ledger().reload()
+    return devueltas
+
+def vms_del_slice(data, conn):
+    """
+    Arma las VMs de un slice a partir de la configuración de sus nodos
+    (manual o por flavor).
+    
+    Args:
+        data: Slice con sus nodos
+        conn (Conexion): Conexión para consultar los flavors
+        
+    Returns:
+        List[Vm]: VMs en el orden de los nodos
+    """
     #VCPU-RAM-STORAGE
     lista_vm_topologia=[]
     nodos=data['nodos']
@@ -189,23 +321,113 @@ def scheduler_main(data, FACTOR):
             vm_recursos = {"vcpu": int(recursos[0][0]), "ram": int(recursos[0][1]), "disk":int(recursos[0][2])}
             vm=Vm(nodo_key ,vm_recursos["ram"],vm_recursos["disk"],vm_recursos["vcpu"])
             lista_vm_topologia.append(vm)
+    return lista_vm_topologia
+
+def scheduler_main(data, FACTOR):
+    conn = Conexion()
+    #Actualizamos los valores en base de datos: mas adelante esto lo hara el validador
+    # x = requests.get('http://10.20.12.58:8081/cpu-metrics')
+    lista_vm_topologia = vms_del_slice(data, conn)
+    nodos=data['nodos']
 
     zona_disponibilidad= data['zona']['nombre']
-    lista_worker_general_filtrada=filtrado(zona_disponibilidad, FACTOR)
-    # print("** Los workers filtrados por zona de disponibilidad son:")
-    # for worker in lista_worker_general_filtrada:
-    #     print(f"- Worker {worker.id_servidor}")
-    # print("---------------------------------------------------")
-    
-    result = True
-    for vm in lista_vm_topologia:
-        worker_elegido= ordenamiento_coeficiente(lista_worker_general_filtrada,vm)
-        if worker_elegido==None:
-            result = False
+    ledger = get_capacity_ledger()
+    reservas = ReservationManager()
+    for intento in range(RESERVATION_ATTEMPTS):
+        rechazo = None
+        snapshot = ledger.snapshot(zona_disponibilidad, FACTOR)
+        lista_worker_general_filtrada=workers_desde_snapshot(snapshot)
+        # print("** Los workers filtrados por zona de disponibilidad son:")
+        # for worker in lista_worker_general_filtrada:
+        #     print(f"- Worker {worker.id_servidor}")
+        # print("---------------------------------------------------")
+
+        elegidos, reporte = planificar(lista_worker_general_filtrada, lista_vm_topologia, nodos=nodos)
+        result = all(worker_elegido is not None for worker_elegido in elegidos)
+        if not result:
             break
-        else:
+
+        # Reservar la capacidad elegida hasta que el driver cree las VMs
+        try:
+            token = reservas.hold(data.get('nombre'), items_reserva(lista_vm_topologia, elegidos, nodos), FACTOR)
+            data['reserva'] = {'token': token, 'ttl': reservas.ttl}
+            break
+        except ReservationError as e:
+            logger.warning(f"Reserva rechazada (intento {intento + 1}/{RESERVATION_ATTEMPTS}): {e}")
+            rechazo = str(e)
+            result = False
+            ledger.reload()
+
+    # Los workers se asignan solo si la reserva se tomó; un plan rechazado no se usa
+    if result:
+        for vm, worker_elegido in zip(lista_vm_topologia, elegidos):
             data["nodos"][vm.nodo_nombre]["id_worker"] = worker_elegido.id_servidor
-            # print(data)
-            # print("---------------------------------------------------")
+    elif rechazo:
+        data['reserva_rechazada'] = rechazo
+    if reporte is not None:
+        reporte['version_capacidad'] = snapshot.version
+        data['reporte_placement'] = reporte
+
+    return data, result
+
+def scheduler_batch(lista_data, FACTOR):
+    """
+    Planifica juntos los slices en cola: los de cada zona se ubican en
+    una sola pasada de BatchScheduler (prioridad, tamaño, lookahead y
+    reparación) y a cada slice aceptado se le toma su reserva.
+    
+    Args:
+        lista_data (List[dict]): Slices en cola; 'prioridad' (opcional,
+                                 mayor primero) ordena la cola
+        FACTOR: Factor de multiplicación para recursos disponibles (número o
+                OvercommitFactors por worker y recurso)
+        
+    Returns:
+        Tuple[List[Tuple[dict, bool]], Dict]: (slice, resultado) en el
+            orden de entrada y resumen de los lotes por zona
+    """
+    if NumpyPlacementEngine is None:
+        logger.warning("NumPy no disponible; los slices se planifican de a uno por prioridad")
+        orden = sorted(range(len(lista_data)), key=lambda i: -(lista_data[i].get('prioridad') or 0))
+        resultados = {i: scheduler_main(lista_data[i], FACTOR) for i in orden}
+        return [resultados[i] for i in range(len(lista_data))], {}
+
+    conn = Conexion()
+    ledger = get_capacity_ledger()
+    reservas = ReservationManager()
+    resultados = [None] * len(lista_data)
+    resumen = {}
+
+    zonas = {}
+    for i, data in enumerate(lista_data):
+        zonas.setdefault(data['zona']['nombre'], []).append(i)
+
+    for zona_disponibilidad, indices in zonas.items():
+        snapshot = ledger.snapshot(zona_disponibilidad, FACTOR)
+        lista_workers = workers_desde_snapshot(snapshot)
+        vms = {i: vms_del_slice(lista_data[i], conn) for i in indices}
+        pendientes = [{'nombre': lista_data[i].get('nombre'), 'prioridad': lista_data[i].get('prioridad'),
+                       'vms': vms[i]} for i in indices]
+        lote, resumen[zona_disponibilidad] = BatchScheduler().schedule(lista_workers, pendientes)
+
+        for i, resultado in zip(indices, lote):
+            data = lista_data[i]
+            result = resultado['aceptado']
+            if result:
+                try:
+                    token = reservas.hold(data.get('nombre'),
+                                          items_reserva(vms[i], resultado['workers'], data['nodos']), FACTOR)
+                    data['reserva'] = {'token': token, 'ttl': reservas.ttl}
+                except ReservationError as e:
+                    # Otra corrida tomó la capacidad después del snapshot
+                    logger.warning(f"Reserva rechazada para {data.get('nombre')}: {e}")
+                    data['reserva_rechazada'] = str(e)
+                    result = False
+                    ledger.reload()
+            if result:
+                for vm, worker_elegido in zip(vms[i], resultado['workers']):
+                    data["nodos"][vm.nodo_nombre]["id_worker"] = worker_elegido.id_servidor
+            data['reporte_lote'] = {'version_capacidad': snapshot.version, 'motivo': resultado['motivo']}
+            resultados[i] = (data, result)
 
-    return data, result
\ No newline at end of file
+    return resultados, resumen
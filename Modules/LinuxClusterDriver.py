@@ -4,6 +4,7 @@ import secrets as s
 import requests
 from conf.Conexion import *
 from conf.ConfigManager import config
+from Modules.App_Scheduler import liberar_vms
 from Modules.SliceAdministrator import *
 from datetime import datetime
 import json
@@ -40,6 +41,7 @@ def linux_driver_main(slice):
         id_slice=id_s[0][0]
     #print(id_slice)
     vm_nombres = generar_vm_token(slice["nodos"])
+    slice["mapeo_nombres"] = vm_nombres
     
     worker_list = [] #Para crear el flow
     for nodo_key in slice["nodos"]:
@@ -144,6 +146,7 @@ def borrar_slice(slice):
     vms=conn.Select("nombre,servidor_id_servidor","vm","topologia_id_topologia= "+str(id_s[0][0]))
     print(vms)
     i=0
+    borradas=[]
     for nodo in list(slice["nodos"]):
         print(nodo)
         nombre_vm= vms[i][0]
@@ -173,8 +176,11 @@ def borrar_slice(slice):
             conn2.Delete("vcpu","Nodo_id_nodo= "+str(id_nodo_cluster[0][0]))
             conn2.Delete("cpu","Nodo_id_nodo= "+str(id_nodo_cluster[0][0]))
             conn2.Delete("ram","Nodo_id_nodo= "+str(id_nodo_cluster[0][0]))
+            borradas.append(nombre_vm)
             
             i=i+1
+    # Devolver la capacidad de las VMs borradas a su worker y al libro del scheduler
+    liberar_vms(borradas)
     conn.Delete("slice", "nombre= "+"'"+slice["nombre"]+"'")
     conn2.Delete("nodo", "nombre= "+"'"+nombre_vm+"'")
             
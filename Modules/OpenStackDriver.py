@@ -2,6 +2,7 @@ import secrets as s
 import requests
 from conf.Conexion import *
 from conf.ConfigManager import config
+from Modules.App_Scheduler import liberar_vms
 from datetime import datetime
 import json
 import random
@@ -92,6 +93,7 @@ def OpenStack_main(slice):
     else:
         id_slice = id_s[0][0]
     vm_nombres = generar_vm_token(slice["nodos"])
+    slice["mapeo_nombres"] = vm_nombres
     nombre_flavor = 1
     for nodo_key in slice["nodos"]:
         nodo = slice["nodos"][nodo_key]
@@ -268,6 +270,7 @@ def borrar_slice_openstack(slice):
     id_s = conn.Select("id_slice", "slice", "nombre=" + "'" + slice["nombre"] + "'")
     vms = conn.Select("nombre,servidor_id_servidor", "vm", "topologia_id_topologia= " + str(id_s[0][0]))
     i = 0
+    borradas = []
     for nodo in list(slice["nodos"]):
         nombre_vm = vms[i][0]
         # print(nombre_vm +" -> nombre de la vm a borrar openstack")
@@ -290,8 +293,11 @@ def borrar_slice_openstack(slice):
             conn2.Delete("vcpu", "Nodo_id_nodo= " + str(id_nodo_cluster[0][0]))
             conn2.Delete("cpu", "Nodo_id_nodo= " + str(id_nodo_cluster[0][0]))
             conn2.Delete("ram", "Nodo_id_nodo= " + str(id_nodo_cluster[0][0]))
+            borradas.append(nombre_vm)
 
         i = i + 1
+    # Devolver la capacidad de las VMs borradas a su worker y al libro del scheduler
+    liberar_vms(borradas)
     conn.Delete("slice", "nombre= " + "'" + slice["nombre"] + "'")
     conn2.Delete("nodo", "nombre= " + "'" + nombre_vm + "'")
     print("Slice " + nombre_slice + " BORRADO EXITOSAMENTE!")
@@ -4,6 +4,7 @@ from Modules.LinuxClusterDriver import *
 from Modules.OpenStackDriver import *
 from conf.Conexion import *
 from conf.ConfigManager import config
+from database.overcommit import get_resource_factor
 from Modules.Validador import  *
 import json
 import os
@@ -13,15 +14,20 @@ class SliceAdministrator:
         pass
 
     def create_topology(self, grafo,tipo):
-        resource_factor = config.get('RESOURCE_FACTOR')
+        # Factor por worker y recurso según el uso observado (o RESOURCE_FACTOR)
+        resource_factor = get_resource_factor()
         slice, result = scheduler_main(grafo, resource_factor)
         if result:
             print("-----------------")
             print(slice)
-            if (tipo == "1"):
-                nuevo_slice = linux_driver_main(slice)
-            if (tipo == "2"):
-                nuevo_slice = OpenStack_main(slice)
+            try:
+                if (tipo == "1"):
+                    nuevo_slice = linux_driver_main(slice)
+                if (tipo == "2"):
+                    nuevo_slice = OpenStack_main(slice)
+            finally:
+                # Confirmar la reserva de las VMs creadas y liberar el resto
+                cerrar_reserva(slice)
             return nuevo_slice
         else:
             return False
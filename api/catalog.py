@@ -0,0 +1,173 @@
+"""
+===================================================================
+CATÁLOGOS CACHEADOS - API REST
+===================================================================
+
+Lectura de los catálogos (flavors, imágenes, zonas y workers) y de
+las estadísticas del dashboard, y respuesta de los endpoints que los
+exponen a través de la caché de catálogos: el valor se lee de SQLite
+solo cuando venció o fue invalidado, y cada respuesta lleva un ETag;
+si el cliente envía If-None-Match con el mismo ETag se responde 304
+sin cuerpo.
+
+Versión: 3.1
+===================================================================
+"""
+
+from typing import Any, Callable, Dict
+
+from fastapi import Request, Response
+
+from api.models import APIResponse
+from database.catalog_cache import etag_matches, get_catalog_cache
+
+
+def load_flavors() -> Dict[str, Any]:
+    """Lee los flavors de la base de datos."""
+    from conf.Conexion import Conexion
+
+    flavors = Conexion().Select(
+        "id_flavor,nombre,cpu,ram,storage,descripcion,fecha_creacion",
+        "flavor",
+        "-1"
+    )
+
+    flavor_list = []
+    for flavor_row in flavors:
+        (flavor_id, nombre, cpu, ram, storage, descripcion, fecha_creacion) = flavor_row
+        flavor_list.append({
+            "id": flavor_id,
+            "nombre": nombre,
+            "cpu": cpu,
+            "ram": ram,
+            "storage": storage,
+            "descripcion": descripcion,
+            "fecha_creacion": str(fecha_creacion) if fecha_creacion else None
+        })
+
+    return {"flavors": flavor_list, "total": len(flavor_list)}
+
+
+def load_images() -> Dict[str, Any]:
+    """Lee las imágenes de la base de datos."""
+    from conf.Conexion import Conexion
+
+    images = Conexion().Select(
+        "id_imagen,nombre,descripcion,fecha_creacion",
+        "imagen",
+        "-1"
+    )
+
+    image_list = []
+    for image_row in images:
+        (image_id, nombre, descripcion, fecha_creacion) = image_row
+        image_list.append({
+            "id": image_id,
+            "nombre": nombre,
+            "descripcion": descripcion,
+            "fecha_creacion": str(fecha_creacion) if fecha_creacion else None
+        })
+
+    return {"images": image_list, "total": len(image_list)}
+
+
+def load_zones() -> Dict[str, Any]:
+    """Lee las zonas de disponibilidad con su cantidad de servidores."""
+    from conf.Conexion import Conexion
+
+    zones = Conexion().Select(
+        "z.idzona_disponibilidad,z.nombre,z.descripcion,z.activa,z.fecha_creacion,"
+        "COUNT(s.id_servidor) as total_servidores",
+        "zona_disponibilidad z "
+        "LEFT JOIN servidor s ON z.idzona_disponibilidad = s.id_zona",
+        "-1 GROUP BY z.idzona_disponibilidad,z.nombre,z.descripcion,z.activa,z.fecha_creacion"
+    )
+
+    zone_list = []
+    for zone_row in zones:
+        (zone_id, nombre, descripcion, activa, fecha_creacion, total_servidores) = zone_row
+        zone_list.append({
+            "id": zone_id,
+            "nombre": nombre,
+            "descripcion": descripcion,
+            "activa": bool(activa),
+            "fecha_creacion": str(fecha_creacion) if fecha_creacion else None,
+            "total_servidores": total_servidores
+        })
+
+    return {"zones": zone_list, "total": len(zone_list)}
+
+
+def load_workers() -> Dict[str, Any]:
+    """Lee los workers con su zona y sus recursos totales y disponibles."""
+    from conf.Conexion import Conexion
+
+    workers = Conexion().Select(
+        "s.id_servidor,s.nombre,s.ip,s.descripcion,"
+        "z.nombre as zona_nombre,r.ram,r.vcpu,r.storage,"
+        "r.ram_available,r.vcpu_available,r.storage_available",
+        "servidor s "
+        "LEFT JOIN zona_disponibilidad z ON s.id_zona = z.idzona_disponibilidad "
+        "LEFT JOIN recursos r ON s.id_recurso = r.id_recursos",
+        "-1"
+    )
+
+    worker_list = []
+    for worker_row in workers:
+        (worker_id, nombre, ip, descripcion, zona_nombre,
+         ram_total, vcpu_total, storage_total,
+         ram_available, vcpu_available, storage_available) = worker_row
+        worker_list.append({
+            "id": worker_id,
+            "nombre": nombre,
+            "ip": ip,
+            "descripcion": descripcion,
+            "zona": zona_nombre,
+            "recursos": {
+                "ram_total": ram_total,
+                "ram_disponible": ram_available,
+                "vcpu_total": vcpu_total,
+                "vcpu_disponible": vcpu_available,
+                "storage_total": storage_total,
+                "storage_disponible": storage_available
+            }
+        })
+
+    return {"workers": worker_list, "total": len(worker_list)}
+
+
+def load_stats() -> Dict[str, Any]:
+    """Calcula las estadísticas del dashboard en una sola consulta."""
+    from database.DatabaseManager import DatabaseManager
+    from drivers.registry import get_driver_registry
+
+    return DatabaseManager().get_system_stats(get_driver_registry().names())
+
+
+def catalog_response(request: Request, response: Response, key: str,
+                     loader: Callable[[], Dict[str, Any]], message: str):
+    """
+    Responde un catálogo desde la caché con su ETag.
+
+    Args:
+        request: Request (para leer If-None-Match)
+        response: Response de FastAPI (para agregar el ETag)
+        key: Clave del catálogo en la caché
+        loader: Función que lee el catálogo si no está cacheado
+        message: Mensaje de la respuesta; se formatea con los datos ({total})
+
+    Returns:
+        APIResponse con los datos, o Response 304 si el cliente ya los tiene
+    """
+    entry = get_catalog_cache().get(key, loader)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return APIResponse(
+        success=True,
+        message=message.format(**entry.value),
+        data=entry.value
+    )
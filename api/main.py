@@ -11,8 +11,14 @@ Versión: 1.0
 ===================================================================
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from api.routes import system, slices, linux_cluster, openstack
+from api.routes import system, slices, linux_cluster, openstack, jobs
+from drivers.jobs import close_job_managers, get_job_manager
+from drivers.metrics_ingest import close_metrics_ingestors
+from drivers.registry import close_driver_registry, get_driver_registry
 
 # Metadatos para la documentación de la API
 tags_metadata = [
@@ -32,10 +38,32 @@ tags_metadata = [
         "name": "openstack",
         "description": "Endpoints específicos para el driver de OpenStack.",
     },
+    {
+        "name": "jobs",
+        "description": "Estado de los trabajos asíncronos de creación y eliminación de slices.",
+    },
 ]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crea el registro de drivers al iniciar (los drivers se cargan en su
+    primer uso y se comparten entre requests) y el gestor de trabajos,
+    que retoma los trabajos pendientes de la ejecución anterior. Al
+    apagar espera los trabajos en ejecución, escribe las métricas que
+    quedan en el buffer de ingesta y cierra el registro.
+    """
+    app.state.drivers = get_driver_registry()
+    app.state.jobs = get_job_manager()
+    yield
+    await asyncio.to_thread(close_job_managers)
+    await asyncio.to_thread(close_metrics_ingestors)
+    close_driver_registry()
+
+
 # Creación de la aplicación FastAPI
 app = FastAPI(
+    lifespan=lifespan,
     title="Gestor de Slices y Recursos Cloud",
     description="API para la orquestación de infraestructura virtualizada en clusters Linux y OpenStack.",
     version="1.0.0",
@@ -54,6 +82,7 @@ app = FastAPI(
 # Inclusión de los routers de los diferentes módulos
 app.include_router(system.router)
 app.include_router(slices.router)
+app.include_router(jobs.router)
 app.include_router(linux_cluster.router)
 app.include_router(openstack.router)
 app.include_router(linux_cluster.router)
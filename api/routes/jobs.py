@@ -0,0 +1,97 @@
+"""
+===================================================================
+RUTAS DE TRABAJOS - API REST
+===================================================================
+
+Consulta de los trabajos asíncronos de creación y eliminación de
+slices (estado, avance por nodo y resultado).
+
+Versión: 3.1
+===================================================================
+"""
+
+from fastapi import APIRouter, HTTPException, Path, Query
+from typing import Optional
+import logging
+import sys
+from pathlib import Path as PathLib
+
+# Agregar el directorio raíz al path
+root_dir = PathLib(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from api.models import APIResponse
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/", response_model=APIResponse)
+async def list_jobs(
+    estado: Optional[str] = Query(None, description="Filtrar por estado"),
+    slice_name: Optional[str] = Query(None, description="Filtrar por slice"),
+    limit: int = Query(default=50, ge=1, le=500, description="Límite de registros")
+):
+    """
+    Lista los trabajos más recientes.
+    
+    Returns:
+        APIResponse con los trabajos (sin parámetros ni resultado)
+    """
+    try:
+        from drivers.jobs import get_job_manager
+        
+        jobs = get_job_manager().list(estado, slice_name, limit)
+        
+        return APIResponse(
+            success=True,
+            message=f"{len(jobs)} trabajos",
+            data={"jobs": jobs}
+        )
+        
+    except Exception as e:
+        logger.error(f"Error listando trabajos: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/{job_id}", response_model=APIResponse)
+async def get_job(
+    job_id: str = Path(..., description="ID del trabajo")
+):
+    """
+    Obtiene el estado de un trabajo con el avance de cada nodo.
+    
+    Args:
+        job_id: ID devuelto al encolar el trabajo
+    
+    Returns:
+        APIResponse con el trabajo; si terminó con error incluye
+        codigo_error (código HTTP equivalente)
+    
+    Raises:
+        HTTPException: Si el trabajo no existe
+    """
+    try:
+        from drivers.jobs import get_job_manager
+        
+        job = get_job_manager().get(job_id)
+        if job is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Trabajo {job_id} no encontrado"
+            )
+        
+        progreso = job.get('progreso') or {}
+        return APIResponse(
+            success=job['estado'] not in ('error', 'interrumpido'),
+            message=f"Trabajo {job['estado']} ({progreso.get('completados', 0)}/"
+                    f"{progreso.get('total_nodos') or '?'} nodos)",
+            data=job,
+            error=job.get('error')
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error obteniendo trabajo {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
@@ -10,7 +10,7 @@ Versión: 3.0
 ===================================================================
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import List, Optional
 import logging
 import sys
@@ -21,7 +21,7 @@ root_dir = PathLib(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
 from api.models import APIResponse, WorkerInfo
-from drivers.linux_cluster_driver import LinuxClusterDriver
+from drivers.metrics_ingest import IngestBusy, IngestError, get_metrics_ingestor
 
 router = APIRouter(prefix="/linux-cluster", tags=["linux-cluster"])
 logger = logging.getLogger(__name__)
@@ -192,8 +192,9 @@ async def get_cluster_metrics(
         APIResponse con métricas del cluster
     """
     try:
-        driver = LinuxClusterDriver()
-        metrics = driver.get_cluster_metrics_summary(hours)
+        from database.DatabaseManager import DatabaseManager
+        
+        metrics = DatabaseManager().get_cluster_metrics_summary(hours)
         
         if not metrics:
             return APIResponse(
@@ -213,6 +214,41 @@ async def get_cluster_metrics(
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
+@router.get("/cluster-metrics/series", response_model=APIResponse)
+async def get_cluster_metrics_series(
+    hours: int = Query(default=24, ge=1, le=24 * 365, description="Horas hacia atrás"),
+    tipo_metrica: Optional[str] = Query(default=None, description="Tipo de métrica"),
+    nodo_id: Optional[int] = Query(default=None, description="ID del nodo")
+):
+    """
+    Obtiene la serie temporal de métricas del cluster Linux, con la
+    resolución del nivel de rollup que cubre la ventana pedida.
+    
+    Args:
+        hours: Número de horas hacia atrás
+        tipo_metrica: Filtrar por tipo de métrica
+        nodo_id: Filtrar por nodo
+        
+    Returns:
+        APIResponse con los puntos de la serie
+    """
+    try:
+        from database.DatabaseManager import DatabaseManager
+        from database.metrics_retention import metric_series
+        
+        series = metric_series(DatabaseManager(), hours, tipo_metrica, nodo_id)
+        
+        return APIResponse(
+            success=True,
+            message=f"{len(series['puntos'])} puntos con resolución de {series['resolucion_segundos']} segundos",
+            data={**series, "periodo_horas": hours}
+        )
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo serie de métricas del cluster: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
 @router.get("/network-status", response_model=APIResponse)
 async def get_network_status():
     """
@@ -282,12 +318,13 @@ async def test_cluster_connection():
     try:
         import requests
         from conf.ConfigManager import config
+        from drivers.http_client import get_http_client
         
         cluster_config = config.get_cluster_config()
         api_url = cluster_config['api_url']
         
         # Probar conectividad básica
-        response = requests.get(f"{api_url}/health", timeout=10)
+        response = get_http_client().get(f"{api_url}/health", timeout=10)
         
         if response.status_code == 200:
             return APIResponse(
@@ -324,4 +361,36 @@ async def test_cluster_connection():
         )
     except Exception as e:
         logger.error(f"Error probando conexión del cluster: {e}")
-        raise HTTPException(status_code=500, detail="Error interno del servidor")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.post("/metrics", response_model=APIResponse, status_code=202)
+async def ingest_metrics(request: Request):
+    """
+    Recibe un lote de métricas de los agentes de Linux Cluster, en NDJSON
+    (application/x-ndjson) o como lista JSON de objetos o de listas
+    [nodo, tipo_metrica, valor, timestamp, unidad].
+    
+    Las muestras se encolan y se escriben en segundo plano. Si el buffer
+    está lleno se responde 429 con Retry-After y el lote no se encola.
+    
+    Returns:
+        APIResponse con las muestras aceptadas e inválidas
+    """
+    try:
+        body = await request.body()
+        result = get_metrics_ingestor().submit(body, request.headers.get("content-type", ""), "linux_cluster")
+        
+        return APIResponse(
+            success=True,
+            message=f"{result['aceptadas']} métricas encoladas",
+            data=result
+        )
+        
+    except IngestBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error recibiendo métricas: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
@@ -10,7 +10,7 @@ Versión: 3.0
 ===================================================================
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Optional
 import logging
 import sys
@@ -21,7 +21,8 @@ root_dir = PathLib(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
 from api.models import APIResponse, HypervisorInfo, FlavorInfo
-from drivers.openstack_driver import OpenStackDriver
+from drivers.registry import get_driver
+from drivers.metrics_ingest import IngestBusy, IngestError, get_metrics_ingestor
 
 router = APIRouter(prefix="/openstack", tags=["openstack"])
 logger = logging.getLogger(__name__)
@@ -33,10 +34,11 @@ async def get_hypervisors():
     Obtiene información de todos los hipervisores de OpenStack.
     
     Returns:
-        APIResponse con lista de hipervisores
+        APIResponse con lista de hipervisores, o 304 si If-None-Match
+        coincide con el ETag
     """
     try:
-        driver = OpenStackDriver()
+        driver = get_driver('openstack')
         hypervisors = driver.get_hypervisor_info()
         
         return APIResponse(
@@ -88,14 +90,16 @@ async def get_hypervisor_vms(hypervisor_name: str):
         )
         
         vm_list = []
-        driver = OpenStackDriver()
+        driver = get_driver('openstack')
+        
+        # Estados de OpenStack de todas las VMs con una sola consulta
+        statuses = driver.get_vm_statuses([vm_row[1] for vm_row in vms])
         
         for vm_row in vms:
             (vm_id, vm_nombre, estado, fecha_creacion,
              slice_nombre, slice_tipo, ram, vcpu, storage) = vm_row
             
-            # Obtener estado de OpenStack
-            openstack_status = driver._get_vm_status_from_openstack(vm_nombre)
+            openstack_status = statuses[vm_nombre]
             
             vm_info = {
                 "id": vm_id,
@@ -131,45 +135,20 @@ async def get_hypervisor_vms(hypervisor_name: str):
 
 
 @router.get("/flavors", response_model=APIResponse)
-async def get_flavors():
+async def get_flavors(request: Request, response: Response):
     """
     Obtiene todos los flavors disponibles en la base de datos local.
     
     Returns:
-        APIResponse con lista de flavors
+        APIResponse con lista de flavors, o 304 si If-None-Match
+        coincide con el ETag
     """
     try:
-        from conf.Conexion import Conexion
+        from api.catalog import catalog_response, load_flavors
+        from database.catalog_cache import FLAVORS
         
-        conn = Conexion()
-        
-        flavors = conn.Select(
-            "id_flavor,nombre,cpu,ram,storage,descripcion,fecha_creacion",
-            "flavor",
-            "-1"
-        )
-        
-        flavor_list = []
-        for flavor_row in flavors:
-            (flavor_id, nombre, cpu, ram, storage, descripcion, fecha_creacion) = flavor_row
-            
-            flavor_info = {
-                "id": flavor_id,
-                "nombre": nombre,
-                "cpu": cpu,
-                "ram": ram,
-                "storage": storage,
-                "descripcion": descripcion,
-                "fecha_creacion": str(fecha_creacion) if fecha_creacion else None
-            }
-            
-            flavor_list.append(flavor_info)
-        
-        return APIResponse(
-            success=True,
-            message=f"Se encontraron {len(flavor_list)} flavors",
-            data={"flavors": flavor_list, "total": len(flavor_list)}
-        )
+        return catalog_response(request, response, FLAVORS, load_flavors,
+                                "Se encontraron {total} flavors")
         
     except Exception as e:
         logger.error(f"Error obteniendo flavors: {e}")
@@ -177,92 +156,75 @@ async def get_flavors():
 
 
 @router.get("/flavors/openstack", response_model=APIResponse)
-async def get_openstack_flavors():
+async def get_openstack_flavors(request: Request, response: Response):
     """
     Obtiene flavors directamente de OpenStack.
     
+    La lista se guarda en la caché de catálogos (se invalida cuando el
+    driver crea un flavor); responde 304 si If-None-Match coincide con
+    el ETag actual.
+    
     Returns:
         APIResponse con flavors de OpenStack
     """
     try:
-        import requests
-        from conf.ConfigManager import config
+        from api.catalog import catalog_response
+        from database.catalog_cache import OPENSTACK_FLAVORS
         
-        driver = OpenStackDriver()
-        token = driver._get_token()
-        
-        openstack_config = config.get_openstack_config()
-        headers = {"X-Auth-Token": token}
-        
-        response = requests.get(
-            f"{openstack_config['nova_url']}/flavors/detail",
-            headers=headers,
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        openstack_flavors = response.json()["flavors"]
-        
-        flavor_list = []
-        for flavor in openstack_flavors:
-            flavor_info = {
-                "id": flavor["id"],
-                "nombre": flavor["name"],
-                "vcpus": flavor["vcpus"],
-                "ram": flavor["ram"],
-                "disk": flavor["disk"],
-                "public": flavor.get("os-flavor-access:is_public", True)
-            }
-            flavor_list.append(flavor_info)
-        
-        return APIResponse(
-            success=True,
-            message=f"Se encontraron {len(flavor_list)} flavors en OpenStack",
-            data={"flavors": flavor_list, "total": len(flavor_list)}
-        )
+        return catalog_response(request, response, OPENSTACK_FLAVORS, _load_openstack_flavors,
+                                "Se encontraron {total} flavors en OpenStack")
         
     except Exception as e:
         logger.error(f"Error obteniendo flavors de OpenStack: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
+def _load_openstack_flavors():
+    """Consulta los flavors de Nova."""
+    from conf.ConfigManager import config
+    
+    driver = get_driver('openstack')
+    openstack_config = config.get_openstack_config()
+    
+    response = driver.authenticated_request(
+        "GET",
+        f"{openstack_config['nova_url']}/flavors/detail",
+        timeout=30
+    )
+    response.raise_for_status()
+    
+    openstack_flavors = response.json()["flavors"]
+    
+    flavor_list = []
+    for flavor in openstack_flavors:
+        flavor_info = {
+            "id": flavor["id"],
+            "nombre": flavor["name"],
+            "vcpus": flavor["vcpus"],
+            "ram": flavor["ram"],
+            "disk": flavor["disk"],
+            "public": flavor.get("os-flavor-access:is_public", True)
+        }
+        flavor_list.append(flavor_info)
+    
+    return {"flavors": flavor_list, "total": len(flavor_list)}
+
+
 @router.get("/images", response_model=APIResponse)
-async def get_images():
+async def get_images(request: Request, response: Response):
     """
     Obtiene todas las imágenes disponibles en la base de datos local.
     
     Returns:
-        APIResponse con lista de imágenes
+        APIResponse con lista de imágenes, o 304 si If-None-Match
+        coincide con el ETag
     """
     try:
-        from conf.Conexion import Conexion
+        from api.catalog import catalog_response, load_images
+        from database.catalog_cache import IMAGES
         
-        conn = Conexion()
-        
-        images = conn.Select(
-            "id_imagen,nombre,descripcion,fecha_creacion",
-            "imagen",
-            "-1"
-        )
-        
-        image_list = []
-        for image_row in images:
-            (image_id, nombre, descripcion, fecha_creacion) = image_row
-            
-            image_info = {
-                "id": image_id,
-                "nombre": nombre,
-                "descripcion": descripcion,
-                "fecha_creacion": str(fecha_creacion) if fecha_creacion else None
-            }
-            
-            image_list.append(image_info)
-        
-        return APIResponse(
-            success=True,
-            message=f"Se encontraron {len(image_list)} imágenes",
-            data={"images": image_list, "total": len(image_list)}
-        )
+        return catalog_response(request, response, IMAGES, load_images,
+                                "Se encontraron {total} imágenes")
         
     except Exception as e:
         logger.error(f"Error obteniendo imágenes: {e}")
@@ -275,21 +237,18 @@ async def get_networks():
     Obtiene todas las redes de OpenStack.
     
     Returns:
-        APIResponse con lista de redes
+        APIResponse con lista de redes, o 304 si If-None-Match
+        coincide con el ETag
     """
     try:
-        import requests
         from conf.ConfigManager import config
         
-        driver = OpenStackDriver()
-        token = driver._get_token()
-        
+        driver = get_driver('openstack')
         openstack_config = config.get_openstack_config()
-        headers = {"X-Auth-Token": token}
         
-        response = requests.get(
+        response = driver.authenticated_request(
+            "GET",
             f"{openstack_config['neutron_url']}/networks",
-            headers=headers,
             timeout=30
         )
         response.raise_for_status()
@@ -330,7 +289,7 @@ async def test_openstack_connection():
         APIResponse con resultado de la prueba
     """
     try:
-        driver = OpenStackDriver()
+        driver = get_driver('openstack')
         
         # Probar autenticación
         start_time = __import__('time').time()
@@ -348,14 +307,13 @@ async def test_openstack_connection():
         
         # Test Nova
         try:
-            import requests
             from conf.ConfigManager import config
             
             openstack_config = config.get_openstack_config()
             headers = {"X-Auth-Token": token}
             
             start_time = __import__('time').time()
-            nova_response = requests.get(
+            nova_response = driver.http.get(
                 f"{openstack_config['nova_url']}/",
                 headers=headers,
                 timeout=10
@@ -376,7 +334,7 @@ async def test_openstack_connection():
         # Test Neutron
         try:
             start_time = __import__('time').time()
-            neutron_response = requests.get(
+            neutron_response = driver.http.get(
                 f"{openstack_config['neutron_url']}/",
                 headers=headers,
                 timeout=10
@@ -427,7 +385,7 @@ async def refresh_hypervisors():
         APIResponse con resultado de la actualización
     """
     try:
-        driver = OpenStackDriver()
+        driver = get_driver('openstack')
         hypervisors = driver.get_hypervisor_info()
         
         return APIResponse(
@@ -441,4 +399,36 @@ async def refresh_hypervisors():
         
     except Exception as e:
         logger.error(f"Error actualizando hipervisores: {e}")
-        raise HTTPException(status_code=500, detail="Error interno del servidor")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.post("/metrics", response_model=APIResponse, status_code=202)
+async def ingest_metrics(request: Request):
+    """
+    Recibe un lote de métricas de los agentes de OpenStack, en NDJSON
+    (application/x-ndjson) o como lista JSON de objetos o de listas
+    [nodo, tipo_metrica, valor, timestamp, unidad].
+    
+    Las muestras se encolan y se escriben en segundo plano. Si el buffer
+    está lleno se responde 429 con Retry-After y el lote no se encola.
+    
+    Returns:
+        APIResponse con las muestras aceptadas e inválidas
+    """
+    try:
+        body = await request.body()
+        result = get_metrics_ingestor().submit(body, request.headers.get("content-type", ""), "openstack")
+        
+        return APIResponse(
+            success=True,
+            message=f"{result['aceptadas']} métricas encoladas",
+            data=result
+        )
+        
+    except IngestBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error recibiendo métricas: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
@@ -10,8 +10,10 @@ Versión: 3.0
 ===================================================================
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Path
+from fastapi import APIRouter, HTTPException, Depends, Query, Path, Request, Header
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+import json
 import logging
 import sys
 from pathlib import Path as PathLib
@@ -24,8 +26,10 @@ from api.models import (
     SliceCreate, SliceUpdate, SliceResponse, SliceStatus, 
     APIResponse, SliceListParams, DriverType
 )
-from drivers.linux_cluster_driver import LinuxClusterDriver
-from drivers.openstack_driver import OpenStackDriver
+from drivers.registry import UnknownDriver, get_driver_registry
+from drivers.jobs import JobConflict, get_job_manager
+from drivers import events
+from conf.ConfigManager import config
 
 router = APIRouter(prefix="/slices", tags=["slices"])
 logger = logging.getLogger(__name__)
@@ -33,7 +37,8 @@ logger = logging.getLogger(__name__)
 
 def get_driver(driver_type: DriverType):
     """
-    Factory para obtener el driver apropiado.
+    Obtiene el driver compartido del tipo indicado (se crea una sola vez
+    por proceso en el registro de drivers).
     
     Args:
         driver_type: Tipo de driver solicitado
@@ -44,36 +49,31 @@ def get_driver(driver_type: DriverType):
     Raises:
         HTTPException: Si el tipo de driver no es válido
     """
-    if driver_type == DriverType.LINUX_CLUSTER:
-        return LinuxClusterDriver()
-    elif driver_type == DriverType.OPENSTACK:
-        return OpenStackDriver()
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Tipo de driver no soportado: {driver_type}"
-        )
+    try:
+        return get_driver_registry().get(driver_type)
+    except UnknownDriver as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.post("/", response_model=APIResponse, status_code=201)
+@router.post("/", response_model=APIResponse, status_code=202)
 async def create_slice(slice_data: SliceCreate):
     """
-    Crea un nuevo slice usando el driver especificado.
+    Encola la creación de un slice con el driver especificado.
+    
+    El driver se ejecuta en segundo plano; el avance por nodo y el
+    resultado se consultan con GET /jobs/{job_id}.
     
     Args:
         slice_data: Datos del slice a crear
         
     Returns:
-        APIResponse con el slice creado
+        APIResponse con el ID del trabajo
         
     Raises:
-        HTTPException: Si hay errores en la creación
+        HTTPException: Si el slice ya tiene un trabajo en curso o hay errores
     """
     try:
-        logger.info(f"Creando slice {slice_data.nombre} con driver {slice_data.driver_type}")
-        
-        # Obtener driver apropiado
-        driver = get_driver(slice_data.driver_type)
+        logger.info(f"Encolando creación de slice {slice_data.nombre} con driver {slice_data.driver_type}")
         
         # Convertir modelo Pydantic a dict para el driver
         slice_dict = {
@@ -98,15 +98,19 @@ async def create_slice(slice_data: SliceCreate):
                 "id_worker": node_data.id_worker
             }
         
-        # Crear slice usando el driver
-        created_slice = driver.create_slice(slice_dict)
+        # Crear slice en segundo plano
+        job_id = get_job_manager().submit(
+            'crear_slice', slice_data.nombre, slice_data.driver_type.value, {"slice": slice_dict}
+        )
         
         return APIResponse(
             success=True,
-            message=f"Slice {slice_data.nombre} creado exitosamente",
-            data=created_slice
+            message=f"Creación del slice {slice_data.nombre} encolada",
+            data={"job_id": job_id, "estado": "pendiente", "slice_name": slice_data.nombre}
         )
         
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         logger.error(f"Error de validación creando slice: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -220,15 +224,7 @@ async def get_slice(
         slice_id, nombre, tipo, vlan_id, estado, fecha_creacion = slice_info[0]
         
         # Determinar tipo de driver y obtener estado detallado
-        if tipo == "linux_cluster":
-            driver = LinuxClusterDriver()
-        elif tipo == "openstack":
-            driver = OpenStackDriver()
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Tipo de driver desconocido: {tipo}"
-            )
+        driver = get_driver(tipo)
         
         # Obtener estado detallado del driver
         detailed_status = driver.get_slice_status(slice_name)
@@ -307,25 +303,27 @@ async def update_slice(
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
-@router.delete("/{slice_name}", response_model=APIResponse)
+@router.delete("/{slice_name}", response_model=APIResponse, status_code=202)
 async def delete_slice(
     slice_name: str = Path(..., description="Nombre del slice")
 ):
     """
-    Elimina un slice y todos sus recursos asociados.
+    Encola la eliminación de un slice y todos sus recursos asociados.
+    
+    El driver se ejecuta en segundo plano; el avance por VM y el
+    resultado se consultan con GET /jobs/{job_id}.
     
     Args:
         slice_name: Nombre del slice a eliminar
         
     Returns:
-        APIResponse con resultado de la eliminación
+        APIResponse con el ID del trabajo
         
     Raises:
-        HTTPException: Si el slice no existe o hay errores
+        HTTPException: Si el slice no existe, ya tiene un trabajo en curso o hay errores
     """
     try:
         from conf.Conexion import Conexion
-        from drivers.base_driver import BaseDriver
         
         conn = Conexion()
         
@@ -339,42 +337,25 @@ async def delete_slice(
         
         slice_id, driver_type = slice_info[0]
         
-        # Cargar slice desde archivo para tener datos completos
-        base_driver = BaseDriver()
-        slice_data = base_driver.load_slice_from_file(slice_name)
-        
-        if not slice_data:
-            # Si no hay archivo, crear estructura mínima
-            slice_data = {"nombre": slice_name, "nodos": {}}
-        
-        # Obtener driver apropiado
-        if driver_type == "linux_cluster":
-            driver = LinuxClusterDriver()
-        elif driver_type == "openstack":
-            driver = OpenStackDriver()
-        else:
+        if driver_type not in ("linux_cluster", "openstack"):
             raise HTTPException(
                 status_code=400,
                 detail=f"Tipo de driver desconocido: {driver_type}"
             )
         
-        # Eliminar usando el driver
-        success = driver.delete_slice(slice_data)
+        # Eliminar en segundo plano
+        job_id = get_job_manager().submit('eliminar_slice', slice_name, driver_type)
         
-        if success:
-            return APIResponse(
-                success=True,
-                message=f"Slice {slice_name} eliminado exitosamente",
-                data={"slice_name": slice_name}
-            )
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error eliminando slice {slice_name}"
-            )
+        return APIResponse(
+            success=True,
+            message=f"Eliminación del slice {slice_name} encolada",
+            data={"job_id": job_id, "estado": "pendiente", "slice_name": slice_name}
+        )
         
     except HTTPException:
         raise
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error eliminando slice {slice_name}: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
@@ -412,15 +393,7 @@ async def get_slice_status(
         driver_type = slice_info[0][0]
         
         # Obtener driver apropiado
-        if driver_type == "linux_cluster":
-            driver = LinuxClusterDriver()
-        elif driver_type == "openstack":
-            driver = OpenStackDriver()
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Tipo de driver desconocido: {driver_type}"
-            )
+        driver = get_driver(driver_type)
         
         # Obtener estado detallado
         status = driver.get_slice_status(slice_name)
@@ -441,4 +414,56 @@ async def get_slice_status(
         raise
     except Exception as e:
         logger.error(f"Error obteniendo estado del slice {slice_name}: {e}")
-        raise HTTPException(status_code=500, detail="Error interno del servidor")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+def _sse_frame(event: dict) -> str:
+    """Formatea un evento de slice como mensaje server-sent events."""
+    tipo = "nodo" if event["nodo"] is not None else "slice"
+    return f"id: {event['id']}\nevent: {tipo}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.get("/{slice_name}/events")
+async def stream_slice_events(
+    request: Request,
+    slice_name: str = Path(..., description="Nombre del slice"),
+    follow: bool = Query(default=False, description="Seguir abierto después de que termine la operación"),
+    last_event_id: Optional[int] = Header(default=None, alias="Last-Event-ID")
+):
+    """
+    Stream (server-sent events) del avance de la creación o eliminación
+    de un slice, nodo por nodo, a medida que los drivers lo publican.
+    
+    Cada mensaje lleva el ID del evento, el tipo (nodo o slice) y el
+    evento en JSON. Al conectarse se envían primero los eventos recientes
+    guardados (o los posteriores a Last-Event-ID al reconectarse). El
+    stream se cierra cuando el slice llega a creado, eliminado o error,
+    salvo con follow=true.
+    
+    Args:
+        slice_name: Nombre del slice (puede no existir todavía)
+        follow: No cerrar al terminar la operación
+        last_event_id: Último evento recibido (cabecera Last-Event-ID)
+        
+    Returns:
+        StreamingResponse de tipo text/event-stream
+    """
+    keepalive = float(config.get_events_config()['keepalive'])
+    
+    async def event_source():
+        with events.EventStream(slice_name, last_event_id or 0) as stream:
+            while not await request.is_disconnected():
+                event = await stream.get(timeout=keepalive)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                
+                yield _sse_frame(event)
+                if not follow and event['nodo'] is None and event['estado'] in events.SLICE_DONE:
+                    break
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
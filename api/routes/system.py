@@ -11,7 +11,8 @@ Versión: 3.0
 ===================================================================
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Optional
 from datetime import datetime
 import logging
 import sys
@@ -54,13 +55,14 @@ async def health_check():
         except Exception as e:
             config_status = f"error: {str(e)}"
         
-        # Verificar drivers
+        # Verificar drivers (sin cargar los que todavía no se usaron)
         drivers_status = "ok"
         try:
-            from drivers.linux_cluster_driver import LinuxClusterDriver
-            from drivers.openstack_driver import OpenStackDriver
-            LinuxClusterDriver()
-            OpenStackDriver()
+            from drivers.registry import get_driver_registry
+            errors = [f"{name} {status}" for name, status in get_driver_registry().get_status().items()
+                      if status.startswith("error")]
+            if errors:
+                drivers_status = "; ".join(errors)
         except Exception as e:
             drivers_status = f"error: {str(e)}"
         
@@ -159,196 +161,285 @@ async def get_system_info():
 
 
 @router.get("/workers", response_model=APIResponse)
-async def get_all_workers():
+async def get_all_workers(request: Request, response: Response):
     """
     Obtiene todos los workers/servidores del sistema.
     
     Returns:
-        APIResponse con lista de workers
+        APIResponse con lista de workers, o 304 si If-None-Match
+        coincide con el ETag
     """
     try:
-        from conf.Conexion import Conexion
+        from api.catalog import catalog_response, load_workers
+        from database.catalog_cache import WORKERS
         
-        conn = Conexion()
+        return catalog_response(request, response, WORKERS, load_workers,
+                                "Se encontraron {total} workers")
         
-        workers = conn.Select(
-            "s.id_servidor,s.nombre,s.ip,s.descripcion,"
-            "z.nombre as zona_nombre,r.ram,r.vcpu,r.storage,"
-            "r.ram_available,r.vcpu_available,r.storage_available",
-            "servidor s "
-            "LEFT JOIN zona_disponibilidad z ON s.id_zona = z.idzona_disponibilidad "
-            "LEFT JOIN recursos r ON s.id_recurso = r.id_recursos",
-            "-1"
-        )
+    except Exception as e:
+        logger.error(f"Error obteniendo workers: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/flavors", response_model=APIResponse)
+async def get_all_flavors(request: Request, response: Response):
+    """
+    Obtiene todos los flavors disponibles.
+    
+    Returns:
+        APIResponse con lista de flavors, o 304 si If-None-Match
+        coincide con el ETag
+    """
+    try:
+        from api.catalog import catalog_response, load_flavors
+        from database.catalog_cache import FLAVORS
         
-        worker_list = []
-        for worker_row in workers:
-            (worker_id, nombre, ip, descripcion, zona_nombre,
-             ram_total, vcpu_total, storage_total,
-             ram_available, vcpu_available, storage_available) = worker_row
-            
-            worker_info = {
-                "id": worker_id,
-                "nombre": nombre,
-                "ip": ip,
-                "descripcion": descripcion,
-                "zona": zona_nombre,
-                "recursos": {
-                    "ram_total": ram_total,
-                    "ram_disponible": ram_available,
-                    "vcpu_total": vcpu_total,
-                    "vcpu_disponible": vcpu_available,
-                    "storage_total": storage_total,
-                    "storage_disponible": storage_available
-                }
-            }
-            
-            worker_list.append(worker_info)
+        return catalog_response(request, response, FLAVORS, load_flavors,
+                                "Se encontraron {total} flavors")
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo flavors: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/images", response_model=APIResponse)
+async def get_all_images(request: Request, response: Response):
+    """
+    Obtiene todas las imágenes disponibles.
+    
+    Returns:
+        APIResponse con lista de imágenes, o 304 si If-None-Match
+        coincide con el ETag
+    """
+    try:
+        from api.catalog import catalog_response, load_images
+        from database.catalog_cache import IMAGES
+        
+        return catalog_response(request, response, IMAGES, load_images,
+                                "Se encontraron {total} imágenes")
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo imágenes: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/zones", response_model=APIResponse)
+async def get_availability_zones(request: Request, response: Response):
+    """
+    Obtiene todas las zonas de disponibilidad.
+    
+    Returns:
+        APIResponse con lista de zonas, o 304 si If-None-Match
+        coincide con el ETag
+    """
+    try:
+        from api.catalog import catalog_response, load_zones
+        from database.catalog_cache import ZONES
+        
+        return catalog_response(request, response, ZONES, load_zones,
+                                "Se encontraron {total} zonas")
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo zonas: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/db-pool", response_model=APIResponse)
+async def get_db_pool_stats():
+    """
+    Obtiene estadísticas del pool de conexiones a la base de datos.
+    
+    Returns:
+        APIResponse con hits, esperas y conexiones abiertas por base de datos
+    """
+    try:
+        from conf.Conexion import Conexion
+        from database.connection_pool import get_all_pool_stats
+        
+        # Asegurar que el pool principal exista aunque aún no se haya usado
+        Conexion()
+        pools = get_all_pool_stats()
         
         return APIResponse(
             success=True,
-            message=f"Se encontraron {len(worker_list)} workers",
-            data={"workers": worker_list, "total": len(worker_list)}
+            message=f"Estadísticas de {len(pools)} pools de conexiones",
+            data={"pools": list(pools.values()), "total": len(pools)}
         )
         
     except Exception as e:
-        logger.error(f"Error obteniendo workers: {e}")
+        logger.error(f"Error obteniendo estadísticas del pool: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
-@router.get("/flavors", response_model=APIResponse)
-async def get_all_flavors():
+@router.get("/catalog-cache", response_model=APIResponse)
+async def get_catalog_cache_stats():
     """
-    Obtiene todos los flavors disponibles.
+    Obtiene estadísticas de la caché de catálogos.
     
     Returns:
-        APIResponse con lista de flavors
+        APIResponse con aciertos, fallos, invalidaciones y antigüedad
+        de cada catálogo
     """
     try:
-        from conf.Conexion import Conexion
+        from database.catalog_cache import get_catalog_cache
         
-        conn = Conexion()
+        stats = get_catalog_cache().get_stats()
         
-        flavors = conn.Select(
-            "id_flavor,nombre,cpu,ram,storage,descripcion,fecha_creacion",
-            "flavor",
-            "-1"
+        return APIResponse(
+            success=True,
+            message=f"Estadísticas de {len(stats['catalogs'])} catálogos",
+            data=stats
         )
+    
+    except Exception as e:
+        logger.error(f"Error obteniendo estadísticas de la caché de catálogos: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/http-client", response_model=APIResponse)
+async def get_http_client_stats():
+    """
+    Obtiene estadísticas del cliente HTTP compartido por los drivers.
+    
+    Returns:
+        APIResponse con configuración de reintentos, latencia por endpoint
+        y estado de la caché de tokens de Keystone
+    """
+    try:
+        from drivers.http_client import get_http_client
+        from drivers.token_cache import get_token_cache
         
-        flavor_list = []
-        for flavor_row in flavors:
-            (flavor_id, nombre, cpu, ram, storage, descripcion, fecha_creacion) = flavor_row
-            
-            flavor_info = {
-                "id": flavor_id,
-                "nombre": nombre,
-                "cpu": cpu,
-                "ram": ram,
-                "storage": storage,
-                "descripcion": descripcion,
-                "fecha_creacion": str(fecha_creacion) if fecha_creacion else None
-            }
-            
-            flavor_list.append(flavor_info)
+        stats = get_http_client().get_stats()
+        stats['keystone_tokens'] = get_token_cache().get_stats()
         
         return APIResponse(
             success=True,
-            message=f"Se encontraron {len(flavor_list)} flavors",
-            data={"flavors": flavor_list, "total": len(flavor_list)}
+            message=f"Estadísticas de {len(stats['endpoints'])} endpoints HTTP",
+            data=stats
         )
         
     except Exception as e:
-        logger.error(f"Error obteniendo flavors: {e}")
+        logger.error(f"Error obteniendo estadísticas del cliente HTTP: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
-@router.get("/images", response_model=APIResponse)
-async def get_all_images():
+@router.get("/metrics-ingest", response_model=APIResponse)
+async def get_metrics_ingest_stats():
     """
-    Obtiene todas las imágenes disponibles.
+    Obtiene estadísticas de la ingesta de métricas enviadas por los agentes.
     
     Returns:
-        APIResponse con lista de imágenes
+        APIResponse con muestras aceptadas, rechazadas y escritas, y la
+        ocupación del buffer
     """
     try:
-        from conf.Conexion import Conexion
+        from drivers.metrics_ingest import get_metrics_ingestor
         
-        conn = Conexion()
+        stats = get_metrics_ingestor().get_stats()
         
-        images = conn.Select(
-            "id_imagen,nombre,descripcion,fecha_creacion",
-            "imagen",
-            "-1"
+        return APIResponse(
+            success=True,
+            message=f"{stats['en_buffer']} métricas en el buffer de ingesta",
+            data=stats
         )
         
-        image_list = []
-        for image_row in images:
-            (image_id, nombre, descripcion, fecha_creacion) = image_row
-            
-            image_info = {
-                "id": image_id,
-                "nombre": nombre,
-                "descripcion": descripcion,
-                "fecha_creacion": str(fecha_creacion) if fecha_creacion else None
-            }
-            
-            image_list.append(image_info)
+    except Exception as e:
+        logger.error(f"Error obteniendo estadísticas de la ingesta de métricas: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/overcommit", response_model=APIResponse)
+async def get_overcommit_factors():
+    """
+    Obtiene los factores de sobreasignación por worker y recurso que usa
+    el scheduler, con el uso observado del que salen.
+    
+    Returns:
+        APIResponse con los factores (o RESOURCE_FACTOR si el overcommit
+        dinámico está desactivado)
+    """
+    try:
+        from database.overcommit import get_resource_factor
+        
+        factor = get_resource_factor()
+        if hasattr(factor, 'to_dict'):
+            data = factor.to_dict()
+            data['dinamico'] = True
+        else:
+            data = {'default': factor, 'workers': {}, 'dinamico': False}
         
         return APIResponse(
             success=True,
-            message=f"Se encontraron {len(image_list)} imágenes",
-            data={"images": image_list, "total": len(image_list)}
+            message=f"Factores de sobreasignación de {len(data['workers'])} workers",
+            data=data
         )
         
     except Exception as e:
-        logger.error(f"Error obteniendo imágenes: {e}")
+        logger.error(f"Error obteniendo factores de sobreasignación: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
-@router.get("/zones", response_model=APIResponse)
-async def get_availability_zones():
+@router.post("/rebalance", response_model=APIResponse, status_code=202)
+async def request_rebalance_plan(
+    zona: Optional[str] = Query(None, description="Zona a rebalancear (por defecto todas)"),
+    max_moves: Optional[int] = Query(None, ge=1, le=500, description="Máximo de migraciones"),
+    moves_per_minute: Optional[int] = Query(None, ge=1, le=60, description="Migraciones por minuto"),
+    hot_threshold: Optional[float] = Query(None, gt=0, le=1, description="Carga de un worker caliente")
+):
     """
-    Obtiene todas las zonas de disponibilidad.
+    Encola el cálculo de un plan de desfragmentación y rebalanceo.
+    El plan se calcula en segundo plano; consultar su resultado con
+    GET /system/rebalance/{plan_id}.
     
     Returns:
-        APIResponse con lista de zonas
+        APIResponse con el ID del plan
     """
     try:
-        from conf.Conexion import Conexion
+        from scheduler.rebalancer import submit_plan
         
-        conn = Conexion()
+        plan_id = submit_plan(zona=zona, max_moves=max_moves, moves_per_minute=moves_per_minute,
+                              hot_threshold=hot_threshold)
         
-        zones = conn.Select(
-            "z.idzona_disponibilidad,z.nombre,z.descripcion,z.activa,z.fecha_creacion,"
-            "COUNT(s.id_servidor) as total_servidores",
-            "zona_disponibilidad z "
-            "LEFT JOIN servidor s ON z.idzona_disponibilidad = s.id_zona",
-            "-1 GROUP BY z.idzona_disponibilidad,z.nombre,z.descripcion,z.activa,z.fecha_creacion"
+        return APIResponse(
+            success=True,
+            message=f"Plan de rebalanceo {plan_id} encolado",
+            data={"plan_id": plan_id, "estado": "pendiente"}
         )
         
-        zone_list = []
-        for zone_row in zones:
-            (zone_id, nombre, descripcion, activa, fecha_creacion, total_servidores) = zone_row
-            
-            zone_info = {
-                "id": zone_id,
-                "nombre": nombre,
-                "descripcion": descripcion,
-                "activa": bool(activa),
-                "fecha_creacion": str(fecha_creacion) if fecha_creacion else None,
-                "total_servidores": total_servidores
-            }
-            
-            zone_list.append(zone_info)
+    except Exception as e:
+        logger.error(f"Error encolando plan de rebalanceo: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+
+@router.get("/rebalance/{plan_id}", response_model=APIResponse)
+async def get_rebalance_plan(plan_id: str):
+    """
+    Obtiene el estado de un plan de rebalanceo y, si terminó, sus
+    migraciones ordenadas y la ganancia esperada.
+    
+    Returns:
+        APIResponse con el plan
+    """
+    try:
+        from scheduler.rebalancer import get_plan
+        
+        job = get_plan(plan_id)
+        if not job:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Plan de rebalanceo {plan_id} no encontrado"
+            )
         
         return APIResponse(
             success=True,
-            message=f"Se encontraron {len(zone_list)} zonas",
-            data={"zones": zone_list, "total": len(zone_list)}
+            message=f"Plan de rebalanceo {plan_id}: {job['estado']}",
+            data=job
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error obteniendo zonas: {e}")
+        logger.error(f"Error obteniendo plan de rebalanceo {plan_id}: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
@@ -403,94 +494,23 @@ async def get_system_config():
 
 
 @router.get("/stats", response_model=APIResponse)
-async def get_system_stats():
+async def get_system_stats(request: Request, response: Response):
     """
     Obtiene estadísticas detalladas del sistema.
     
+    Las estadísticas salen de una sola consulta y se reutilizan durante
+    STATS_CACHE_TTL segundos.
+    
     Returns:
-        APIResponse con estadísticas del sistema
+        APIResponse con estadísticas del sistema, o 304 si If-None-Match
+        coincide con el ETag
     """
     try:
-        from conf.Conexion import Conexion
-        
-        conn = Conexion()
-        
-        # Estadísticas por driver
-        stats_by_driver = {}
-        for driver_type in ['linux_cluster', 'openstack']:
-            slices_count = conn.Select("COUNT(*)", "slice", f"tipo='{driver_type}'")[0][0]
-            
-            # VMs por driver (basado en slices)
-            vms_count = conn.Select(
-                "COUNT(*)",
-                "vm v JOIN slice s ON v.topologia_id_topologia = s.id_slice",
-                f"s.tipo='{driver_type}'"
-            )[0][0]
-            
-            stats_by_driver[driver_type] = {
-                "slices": slices_count,
-                "vms": vms_count
-            }
-        
-        # Utilización de recursos por zona
-        zone_stats = conn.Select(
-            "z.nombre,COUNT(s.id_servidor) as servidores,"
-            "SUM(r.ram) as ram_total,SUM(r.ram_available) as ram_disponible,"
-            "SUM(r.vcpu) as vcpu_total,SUM(r.vcpu_available) as vcpu_disponible",
-            "zona_disponibilidad z "
-            "LEFT JOIN servidor s ON z.idzona_disponibilidad = s.id_zona "
-            "LEFT JOIN recursos r ON s.id_recurso = r.id_recursos",
-            "-1 GROUP BY z.idzona_disponibilidad,z.nombre"
-        )
-        
-        zone_utilization = []
-        for zone_row in zone_stats:
-            (zona_nombre, servidores, ram_total, ram_disponible, vcpu_total, vcpu_disponible) = zone_row
-            
-            ram_uso_pct = 0
-            vcpu_uso_pct = 0
-            
-            if ram_total and ram_disponible:
-                ram_uso_pct = ((ram_total - ram_disponible) / ram_total) * 100
-            if vcpu_total and vcpu_disponible:
-                vcpu_uso_pct = ((vcpu_total - vcpu_disponible) / vcpu_total) * 100
-            
-            zone_utilization.append({
-                "zona": zona_nombre,
-                "servidores": servidores,
-                "ram_uso_pct": round(ram_uso_pct, 2),
-                "vcpu_uso_pct": round(vcpu_uso_pct, 2)
-            })
-        
-        # Slices más recientes
-        recent_slices = conn.Select(
-            "nombre,tipo,estado,fecha_creacion",
-            "slice",
-            "-1 ORDER BY fecha_creacion DESC LIMIT 5"
-        )
-        
-        recent_list = []
-        for slice_row in recent_slices:
-            nombre, tipo, estado, fecha_creacion = slice_row
-            recent_list.append({
-                "nombre": nombre,
-                "tipo": tipo,
-                "estado": estado,
-                "fecha_creacion": str(fecha_creacion) if fecha_creacion else None
-            })
-        
-        stats = {
-            "drivers": stats_by_driver,
-            "zone_utilization": zone_utilization,
-            "recent_slices": recent_list
-        }
+        from api.catalog import catalog_response, load_stats
+        from database.catalog_cache import STATS
         
-        return APIResponse(
-            success=True,
-            message="Estadísticas del sistema",
-            data=stats
-        )
+        return catalog_response(request, response, STATS, load_stats, "Estadísticas del sistema")
         
     except Exception as e:
         logger.error(f"Error obteniendo estadísticas: {e}")
-        raise HTTPException(status_code=500, detail="Error interno del servidor")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
@@ -75,6 +75,11 @@ class ConfigManager:
             'DB_MAIN_PATH': './data/system.db',
             'DB_CLUSTER_PATH': './data/system.db',
             'DB_UNIFIED_PATH': './data/system.db',
+            'DB_POOL_SIZE': 8,
+            'DB_POOL_TIMEOUT': 30,
+            'DB_POOL_HEALTH_CHECK_INTERVAL': 60,
+            'DB_CACHE_SIZE': 20000,
+            'DB_STATEMENT_CACHE_SIZE': 256,
             
             # OpenStack
             'OPENSTACK_KEYSTONE_URL': 'http://10.20.12.54:5000/v3/auth/tokens',
@@ -85,6 +90,13 @@ class ConfigManager:
             'OPENSTACK_DOMAIN_ID': 'default',
             'OPENSTACK_DOMAIN_NAME': 'Default',
             'OPENSTACK_PROJECT_NAME': 'admin',
+            'OPENSTACK_TOKEN_REFRESH_MARGIN': 300,
+            'OPENSTACK_TOKEN_CACHE_FILE': '',
+            'OPENSTACK_INVENTORY_TTL': 30,
+            'OPENSTACK_INVENTORY_PAGE_SIZE': 200,
+            'CATALOG_CACHE_TTL': 300,
+            'CATALOG_CACHE_WORKERS_TTL': 30,
+            'STATS_CACHE_TTL': 5,
             
             # Linux Cluster
             'CLUSTER_API_URL': 'http://10.20.12.58:8081',
@@ -92,17 +104,64 @@ class ConfigManager:
             'CLUSTER_VM_DELETE_ENDPOINT': '/vm/borrar',
             'CLUSTER_FLOWS_ENDPOINT': '/OFS/flows',
             'CLUSTER_METRICS_ENDPOINT': '/cpu-metrics',
+            'PROVISIONING_MAX_CONCURRENCY': 8,
+            'PROVISIONING_MAX_PER_WORKER': 2,
+            'JOBS_MAX_WORKERS': 2,
+            'EVENTS_HISTORY_SIZE': 200,
+            'EVENTS_KEEPALIVE': 15,
             
             # Factores y algoritmos
             'RESOURCE_FACTOR': 2,
             'SCHEDULER_RAM_WEIGHT': 0.5,
             'SCHEDULER_DISK_WEIGHT': 0.25,
             'SCHEDULER_VCPU_WEIGHT': 0.25,
+            'SCHEDULER_BACKEND': 'numpy',
+            'SCHEDULER_STRATEGY': 'coeficiente',
+            'SCHEDULER_HEADROOM_RAM': 0.1,
+            'SCHEDULER_HEADROOM_DISK': 0.1,
+            'SCHEDULER_HEADROOM_VCPU': 0.1,
+            'SCHEDULER_BATCH_LOOKAHEAD': 3,
+            'SCHEDULER_BATCH_REPAIR': True,
+            'RESERVATION_TTL': 300,
+            'OVERCOMMIT_DYNAMIC': True,
+            'OVERCOMMIT_PERCENTILE': 95,
+            'OVERCOMMIT_WINDOW_HOURS': 24,
+            'OVERCOMMIT_TARGET_UTILIZATION': 0.8,
+            'OVERCOMMIT_MIN_FACTOR': 1.0,
+            'OVERCOMMIT_MAX_RAM': 2.0,
+            'OVERCOMMIT_MAX_VCPU': 4.0,
+            'OVERCOMMIT_MIN_SAMPLES': 30,
+            'OVERCOMMIT_REFRESH': 300,
+            'REBALANCE_MAX_MOVES': 20,
+            'REBALANCE_MOVES_PER_MINUTE': 4,
+            'REBALANCE_HOT_THRESHOLD': 0.85,
+            'REBALANCE_METRICS_WINDOW': 15,
+            
+            # Monitoreo
+            'MONITORING_INTERVAL': 60,
+            'METRICS_TIMEOUT': 5,
+            'METRICS_JITTER': 2,
+            'METRICS_SOURCES': [],
+            'METRICS_RAW_RETENTION_HOURS': 48,
+            'METRICS_5M_RETENTION_DAYS': 7,
+            'METRICS_RETENTION_DAYS': 30,
+            'METRICS_PRUNE_BATCH': 500,
+            'METRICS_PRUNE_INTERVAL': 3600,
+            'METRICS_INGEST_QUEUE_SIZE': 50000,
+            'METRICS_INGEST_FLUSH_SIZE': 5000,
+            'METRICS_INGEST_FLUSH_INTERVAL': 2,
+            'METRICS_INGEST_MAX_BATCH': 10000,
             
             # Rutas
             'SLICES_CONFIG_PATH': './Modules/Slices/',
             'SLICE_FILE_EXTENSION': '.json',
             
+            # Timeouts y cliente HTTP
+            'API_TIMEOUT': 30,
+            'MAX_RETRIES': 3,
+            'HTTP_RETRY_BACKOFF': 0.5,
+            'HTTP_POOL_MAXSIZE': 20,
+            
             # Puertos
             'VNC_BASE_PORT': 5900,
             
@@ -132,6 +191,11 @@ class ConfigManager:
             'db_path': self.get('DB_PATH', self.get('DB_UNIFIED_PATH')),
             'unified_db_path': self.get('DB_PATH', self.get('DB_UNIFIED_PATH')),
             'data_dir': self.get('DB_DATA_DIR'),
+            'pool_size': self.get('DB_POOL_SIZE', 8),
+            'pool_timeout': self.get('DB_POOL_TIMEOUT', 30),
+            'pool_health_check_interval': self.get('DB_POOL_HEALTH_CHECK_INTERVAL', 60),
+            'cache_size': self.get('DB_CACHE_SIZE', 20000),
+            'statement_cache_size': self.get('DB_STATEMENT_CACHE_SIZE', 256),
             # Configuraciones legacy para compatibilidad
             'main_db_path': self.get('DB_MAIN_PATH'),
             'cluster_db_path': self.get('DB_CLUSTER_PATH')
@@ -152,7 +216,11 @@ class ConfigManager:
             'project_name': self.get('OPENSTACK_PROJECT_NAME'),
             'image_id': self.get('OPENSTACK_IMAGE_ID'),
             'ssh_key_name': self.get('OPENSTACK_SSH_KEY_NAME'),
-            'security_group': self.get('OPENSTACK_SECURITY_GROUP')
+            'security_group': self.get('OPENSTACK_SECURITY_GROUP'),
+            'token_refresh_margin': self.get('OPENSTACK_TOKEN_REFRESH_MARGIN', 300),
+            'token_cache_file': self.get('OPENSTACK_TOKEN_CACHE_FILE', ''),
+            'inventory_ttl': self.get('OPENSTACK_INVENTORY_TTL', 30),
+            'inventory_page_size': self.get('OPENSTACK_INVENTORY_PAGE_SIZE', 200)
         }
     
     def get_cluster_config(self) -> Dict[str, Any]:
@@ -164,7 +232,9 @@ class ConfigManager:
             'vm_create_endpoint': self.get('CLUSTER_VM_CREATE_ENDPOINT'),
             'vm_delete_endpoint': self.get('CLUSTER_VM_DELETE_ENDPOINT'),
             'flows_endpoint': self.get('CLUSTER_FLOWS_ENDPOINT'),
-            'metrics_endpoint': self.get('CLUSTER_METRICS_ENDPOINT')
+            'metrics_endpoint': self.get('CLUSTER_METRICS_ENDPOINT'),
+            'provisioning_max_concurrency': self.get('PROVISIONING_MAX_CONCURRENCY', 8),
+            'provisioning_max_per_worker': self.get('PROVISIONING_MAX_PER_WORKER', 2)
         }
     
     def get_scheduler_config(self) -> Dict[str, Any]:
@@ -175,7 +245,117 @@ class ConfigManager:
             'resource_factor': self.get('RESOURCE_FACTOR'),
             'ram_weight': self.get('SCHEDULER_RAM_WEIGHT'),
             'disk_weight': self.get('SCHEDULER_DISK_WEIGHT'),
-            'vcpu_weight': self.get('SCHEDULER_VCPU_WEIGHT')
+            'vcpu_weight': self.get('SCHEDULER_VCPU_WEIGHT'),
+            'backend': self.get('SCHEDULER_BACKEND', 'numpy'),
+            'strategy': self.get('SCHEDULER_STRATEGY', 'coeficiente'),
+            'batch_lookahead': self.get('SCHEDULER_BATCH_LOOKAHEAD', 3),
+            'batch_repair': self.get('SCHEDULER_BATCH_REPAIR', True),
+            'reservation_ttl': self.get('RESERVATION_TTL', 300),
+            'headroom': {
+                'ram': self.get('SCHEDULER_HEADROOM_RAM', 0.1),
+                'disco': self.get('SCHEDULER_HEADROOM_DISK', 0.1),
+                'vcpu': self.get('SCHEDULER_HEADROOM_VCPU', 0.1)
+            },
+            'rebalance': {
+                'max_moves': self.get('REBALANCE_MAX_MOVES', 20),
+                'moves_per_minute': self.get('REBALANCE_MOVES_PER_MINUTE', 4),
+                'hot_threshold': self.get('REBALANCE_HOT_THRESHOLD', 0.85),
+                'metrics_window': self.get('REBALANCE_METRICS_WINDOW', 15)
+            }
+        }
+    
+    def get_overcommit_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración del overcommit dinámico por worker
+        """
+        return {
+            'enabled': self.get('OVERCOMMIT_DYNAMIC', True),
+            'default_factor': self.get('RESOURCE_FACTOR', 2),
+            'percentile': self.get('OVERCOMMIT_PERCENTILE', 95),
+            'window_hours': self.get('OVERCOMMIT_WINDOW_HOURS', 24),
+            'target_utilization': self.get('OVERCOMMIT_TARGET_UTILIZATION', 0.8),
+            'min_factor': self.get('OVERCOMMIT_MIN_FACTOR', 1.0),
+            'max_ram': self.get('OVERCOMMIT_MAX_RAM', 2.0),
+            'max_vcpu': self.get('OVERCOMMIT_MAX_VCPU', 4.0),
+            'min_samples': self.get('OVERCOMMIT_MIN_SAMPLES', 30),
+            'refresh': self.get('OVERCOMMIT_REFRESH', 300)
+        }
+    
+    def get_monitoring_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración del recolector de métricas
+        """
+        sources = self.get('METRICS_SOURCES') or []
+        if isinstance(sources, str):
+            sources = [sources]
+        if not sources and self.get('CLUSTER_API_URL'):
+            sources = [f"{self.get('CLUSTER_API_URL')}{self.get('CLUSTER_METRICS_ENDPOINT', '/cpu-metrics')}"]
+        return {
+            'interval': self.get('MONITORING_INTERVAL', 60),
+            'timeout': self.get('METRICS_TIMEOUT', 5),
+            'jitter': self.get('METRICS_JITTER', 2),
+            'sources': sources
+        }
+    
+    def get_metrics_retention_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de retención y poda de métricas
+        """
+        return {
+            'raw_hours': self.get('METRICS_RAW_RETENTION_HOURS', 48),
+            '5m_days': self.get('METRICS_5M_RETENTION_DAYS', 7),
+            'retention_days': self.get('METRICS_RETENTION_DAYS', 30),
+            'prune_batch': self.get('METRICS_PRUNE_BATCH', 500),
+            'prune_interval': self.get('METRICS_PRUNE_INTERVAL', 3600)
+        }
+    
+    def get_metrics_ingest_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de la ingesta de métricas enviadas por los agentes
+        """
+        return {
+            'queue_size': self.get('METRICS_INGEST_QUEUE_SIZE', 50000),
+            'flush_size': self.get('METRICS_INGEST_FLUSH_SIZE', 5000),
+            'flush_interval': self.get('METRICS_INGEST_FLUSH_INTERVAL', 2),
+            'max_batch': self.get('METRICS_INGEST_MAX_BATCH', 10000)
+        }
+    
+    def get_jobs_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de los trabajos asíncronos de slices
+        """
+        return {
+            'max_workers': self.get('JOBS_MAX_WORKERS', 2)
+        }
+    
+    def get_events_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de los eventos de despliegue de slices
+        """
+        return {
+            'history_size': self.get('EVENTS_HISTORY_SIZE', 200),
+            'keepalive': self.get('EVENTS_KEEPALIVE', 15)
+        }
+    
+    def get_catalog_cache_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de la caché de catálogos (flavors, imágenes, zonas, workers, estadísticas)
+        """
+        return {
+            'ttl': self.get('CATALOG_CACHE_TTL', 300),
+            'workers_ttl': self.get('CATALOG_CACHE_WORKERS_TTL', 30),
+            'stats_ttl': self.get('STATS_CACHE_TTL', 5)
+        }
+    
+    def get_http_config(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración del cliente HTTP compartido
+        """
+        return {
+            'timeout': self.get('API_TIMEOUT', 30),
+            'max_retries': self.get('MAX_RETRIES', 3),
+            'backoff_factor': self.get('HTTP_RETRY_BACKOFF', 0.5),
+            'pool_maxsize': self.get('HTTP_POOL_MAXSIZE', 20)
         }
     
     def get_network_config(self) -> Dict[str, Any]:
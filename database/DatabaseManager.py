@@ -18,6 +18,10 @@ import logging
 from typing import List, Tuple, Any, Optional, Union, Dict
 from pathlib import Path
 from conf.ConfigManager import config
+from database.connection_pool import get_pool, ConnectionPool
+from database.query_builder import (
+    parameterize, build_select, build_insert, build_update, build_delete
+)
 
 
 class DatabaseManager:
@@ -38,13 +42,16 @@ class DatabaseManager:
     - Backup y restore centralizado
     """
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None):
         """
         Inicializa el gestor de base de datos.
         Crea el directorio de datos si no existe.
+        
+        Args:
+            db_path (optional): Ruta alternativa a la base de datos configurada
         """
         self.db_config = config.get_db_config()
-        self.db_path = self.db_config.get('db_path', './data/system.db')
+        self.db_path = db_path or self.db_config.get('db_path', './data/system.db')
         self.data_dir = self.db_config.get('data_dir', './data/')
         
         # Crear directorio de datos si no existe
@@ -52,31 +59,50 @@ class DatabaseManager:
         
         # Configurar logging
         self.logger = logging.getLogger(__name__)
+        
+        # Pool compartido por todas las instancias que usan la misma BD
+        self.pool: ConnectionPool = get_pool(
+            self.db_path,
+            max_size=self.db_config.get('pool_size', 8),
+            timeout=self.db_config.get('pool_timeout', 30),
+            health_check_interval=self.db_config.get('pool_health_check_interval', 60),
+            cache_size=self.db_config.get('cache_size', 20000),
+            cached_statements=self.db_config.get('statement_cache_size', 256)
+        )
     
     def get_connection(self) -> sqlite3.Connection:
         """
-        Establece y configura una conexión a la base de datos.
+        Establece y configura una conexión independiente del pool.
+        El llamador es responsable de cerrarla; para operaciones normales
+        usar connection().
         
         Returns:
             sqlite3.Connection: Conexión configurada a la base de datos
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            # Configurar para devolver filas como diccionarios
-            conn.row_factory = sqlite3.Row
-            # Habilitar claves foráneas
-            conn.execute("PRAGMA foreign_keys = ON")
-            # Configurar WAL mode para mejor concurrencia
-            conn.execute("PRAGMA journal_mode = WAL")
-            # Optimizar para consultas complejas
-            conn.execute("PRAGMA cache_size = 20000")
-            conn.execute("PRAGMA synchronous = NORMAL")
-            conn.execute("PRAGMA temp_store = MEMORY")
-            return conn
+            return self.pool._create_connection()
         except Exception as e:
             self.logger.error(f"Error conectando a la base de datos: {e}")
             raise
     
+    def connection(self):
+        """
+        Presta una conexión del pool para usar en un bloque with.
+        
+        Returns:
+            Context manager que entrega una sqlite3.Connection configurada
+        """
+        return self.pool.connection()
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las estadísticas del pool de conexiones.
+        
+        Returns:
+            Dict: Hits, esperas y conexiones abiertas del pool
+        """
+        return self.pool.get_stats()
+    
     def execute_query(self, query: str, params: Optional[Union[Tuple, List]] = None) -> List[sqlite3.Row]:
         """
         Ejecuta una consulta SELECT y retorna los resultados.
@@ -88,18 +114,18 @@ class DatabaseManager:
         Returns:
             List[sqlite3.Row]: Lista de filas resultado
         """
-        conn = None
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
+            with self.connection() as conn:
+                cursor = conn.cursor()
                 
-            results = cursor.fetchall()
-            return results
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                self.pool.note_statement(conn, query)
+                    
+                results = cursor.fetchall()
+                return results
             
         except Exception as e:
             self.logger.error(f"Error ejecutando consulta: {e}")
@@ -107,9 +133,6 @@ class DatabaseManager:
             if params:
                 self.logger.error(f"Params: {params}")
             raise
-        finally:
-            if conn:
-                conn.close()
     
     def execute_transaction(self, operations: List[Dict[str, Any]]) -> List[Any]:
         """
@@ -122,42 +145,75 @@ class DatabaseManager:
         Returns:
             List[Any]: Lista de resultados de cada operación
         """
-        conn = None
         results = []
         
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                
+                for operation in operations:
+                    op_type = operation.get('type', 'query')
+                    sql = operation['sql']
+                    params = operation.get('params')
+                    
+                    if params:
+                        cursor.execute(sql, params)
+                    else:
+                        cursor.execute(sql)
+                    self.pool.note_statement(conn, sql)
+                    
+                    if op_type == 'query':
+                        results.append(cursor.fetchall())
+                    elif op_type in ['insert', 'update', 'delete']:
+                        if op_type == 'insert':
+                            results.append(cursor.lastrowid)
+                        else:
+                            results.append(cursor.rowcount)
+                
+                # Dentro de una transacción exterior confirma quien la abrió
+                if not self.pool.is_nested():
+                    conn.commit()
+                return results
+                
+            except Exception as e:
+                if not self.pool.is_nested():
+                    conn.rollback()
+                self.logger.error(f"Error en transacción: {e}")
+                raise
+    
+    def _execute_write(self, query: str, params: Optional[Tuple], operation: str) -> sqlite3.Cursor:
+        """
+        Ejecuta una sentencia de escritura y confirma la transacción,
+        salvo que se ejecute dentro de una transacción exterior.
+        
+        Args:
+            query (str): Sentencia SQL
+            params (optional): Parámetros de la sentencia
+            operation (str): Nombre de la operación para el log de errores
             
-            for operation in operations:
-                op_type = operation.get('type', 'query')
-                sql = operation['sql']
-                params = operation.get('params')
+        Returns:
+            sqlite3.Cursor: Cursor con lastrowid/rowcount de la sentencia
+        """
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
                 
                 if params:
-                    cursor.execute(sql, params)
+                    cursor.execute(query, params)
                 else:
-                    cursor.execute(sql)
+                    cursor.execute(query)
+                self.pool.note_statement(conn, query)
                 
-                if op_type == 'query':
-                    results.append(cursor.fetchall())
-                elif op_type in ['insert', 'update', 'delete']:
-                    if op_type == 'insert':
-                        results.append(cursor.lastrowid)
-                    else:
-                        results.append(cursor.rowcount)
-            
-            conn.commit()
-            return results
-            
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            self.logger.error(f"Error en transacción: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+                # Dentro de una transacción exterior confirma quien la abrió
+                if not self.pool.is_nested():
+                    conn.commit()
+                return cursor
+                
+            except Exception as e:
+                if not self.pool.is_nested():
+                    conn.rollback()
+                self.logger.error(f"Error en {operation}: {e}")
+                raise
     
     def execute_insert(self, table: str, columns: str, values: str, params: Optional[Tuple] = None) -> int:
         """
@@ -172,30 +228,8 @@ class DatabaseManager:
         Returns:
             int: ID del registro insertado
         """
-        conn = None
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            query = f"INSERT INTO {table} ({columns}) VALUES ({values})"
-            
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-                
-            row_id = cursor.lastrowid
-            conn.commit()
-            return row_id
-            
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            self.logger.error(f"Error en inserción: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+        query = f"INSERT INTO {table} ({columns}) VALUES ({values})"
+        return self._execute_write(query, params, "inserción").lastrowid
     
     def execute_update(self, table: str, set_clause: str, where_clause: str, params: Optional[Tuple] = None) -> int:
         """
@@ -210,30 +244,8 @@ class DatabaseManager:
         Returns:
             int: Número de filas afectadas
         """
-        conn = None
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
-            
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-                
-            rows_affected = cursor.rowcount
-            conn.commit()
-            return rows_affected
-            
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            self.logger.error(f"Error en actualización: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+        query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
+        return self._execute_write(query, params, "actualización").rowcount
     
     def execute_delete(self, table: str, where_clause: str, params: Optional[Tuple] = None) -> int:
         """
@@ -247,35 +259,207 @@ class DatabaseManager:
         Returns:
             int: Número de filas eliminadas
         """
-        conn = None
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+        query = f"DELETE FROM {table} WHERE {where_clause}"
+        return self._execute_write(query, params, "eliminación").rowcount
+    
+    # ===================================================================
+    # CONSTRUCTOR DE CONSULTAS PARAMETRIZADAS
+    # ===================================================================
+    
+    def select(
+        self,
+        table: str,
+        columns: Union[str, List[str], Tuple[str, ...]] = '*',
+        where: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[sqlite3.Row]:
+        """
+        Consulta una tabla con condiciones de igualdad parametrizadas.
+        
+        Args:
+            table (str): Nombre de la tabla
+            columns: Columna o lista de columnas a devolver
+            where (optional): Condiciones {columna: valor}
+            order_by (optional): Columna de ordenamiento ("fecha DESC")
+            limit (optional): Máximo de filas
+            
+        Returns:
+            List[sqlite3.Row]: Filas resultado
+        """
+        if isinstance(columns, str):
+            columns = [c.strip() for c in columns.split(',')]
+        query, params = build_select(table, columns, where, order_by, limit)
+        return self.execute_query(query, params)
+    
+    def select_one(self, table: str, columns: Union[str, List[str]] = '*',
+                   where: Optional[Dict[str, Any]] = None) -> Optional[sqlite3.Row]:
+        """
+        Consulta una única fila.
+        
+        Returns:
+            Optional[sqlite3.Row]: Primera fila o None si no hay resultados
+        """
+        rows = self.select(table, columns, where, limit=1)
+        return rows[0] if rows else None
+    
+    def insert(self, table: str, values: Dict[str, Any]) -> int:
+        """
+        Inserta un registro a partir de un diccionario de valores.
+        
+        Args:
+            table (str): Nombre de la tabla
+            values (Dict): {columna: valor}
             
-            query = f"DELETE FROM {table} WHERE {where_clause}"
+        Returns:
+            int: ID del registro insertado
+        """
+        query, params = build_insert(table, values)
+        return self._execute_write(query, params, "inserción").lastrowid
+    
+    def update(self, table: str, values: Dict[str, Any], where: Dict[str, Any]) -> int:
+        """
+        Actualiza registros que cumplen las condiciones dadas.
+        
+        Args:
+            table (str): Nombre de la tabla
+            values (Dict): {columna: nuevo_valor}
+            where (Dict): Condiciones {columna: valor}
             
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-                
-            rows_affected = cursor.rowcount
-            conn.commit()
-            return rows_affected
+        Returns:
+            int: Número de filas afectadas
+        """
+        query, params = build_update(table, values, where)
+        return self._execute_write(query, params, "actualización").rowcount
+    
+    def delete(self, table: str, where: Dict[str, Any]) -> int:
+        """
+        Elimina registros que cumplen las condiciones dadas.
+        
+        Args:
+            table (str): Nombre de la tabla
+            where (Dict): Condiciones {columna: valor}
             
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            self.logger.error(f"Error en eliminación: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+        Returns:
+            int: Número de filas eliminadas
+        """
+        query, params = build_delete(table, where)
+        return self._execute_write(query, params, "eliminación").rowcount
     
     # ===================================================================
     # MÉTODOS ESPECÍFICOS PARA SLICES Y VMs
     # ===================================================================
     
+    def delete_vm_records(self, vm_name: str) -> int:
+        """
+        Elimina en una sola transacción las filas de una VM: vm, recursos
+        y nodo_cluster (sus métricas y enlaces se borran en cascada), y
+        devuelve sus recursos al libro de capacidad y a su worker.
+        
+        Args:
+            vm_name (str): Nombre de la VM
+            
+        Returns:
+            int: Número de filas vm eliminadas
+        """
+        rows = self.execute_query(
+            "SELECT v.id_vm, v.recursos_id_estado, v.servidor_id_servidor, r.ram, r.storage, r.vcpu "
+            "FROM vm v LEFT JOIN recursos r ON r.id_recursos = v.recursos_id_estado "
+            "WHERE v.nombre = ?", (vm_name,)
+        )
+        vm_row = rows[0] if rows else None
+        
+        operations = [
+            {'type': 'delete', 'sql': "DELETE FROM nodo_cluster WHERE nombre = ?", 'params': (vm_name,)}
+        ]
+        if vm_row:
+            operations.append({'type': 'delete', 'sql': "DELETE FROM vm WHERE id_vm = ?",
+                               'params': (vm_row['id_vm'],)})
+            if vm_row['recursos_id_estado'] is not None:
+                operations.append({'type': 'delete', 'sql': "DELETE FROM recursos WHERE id_recursos = ?",
+                                   'params': (vm_row['recursos_id_estado'],)})
+        
+        results = self.execute_transaction(operations)
+        
+        # Devolver los recursos de la VM al libro de capacidad del scheduler
+        # y la capacidad de su reserva confirmada a la base de datos
+        if vm_row and results[1] and vm_row['servidor_id_servidor'] is not None:
+            from database.capacity_ledger import get_capacity_ledger
+            from database.reservations import ReservationManager
+            get_capacity_ledger(self.db_path).release(
+                vm_row['servidor_id_servidor'], vm_row['ram'], vm_row['storage'], vm_row['vcpu']
+            )
+            ReservationManager(self).release_vm(vm_name)
+        
+        return results[1] if vm_row else 0
+    
+    def create_slice_record(self, nombre: str, tipo: str) -> Tuple[int, int]:
+        """
+        Crea la fila de un slice con la próxima VLAN libre. La VLAN se
+        calcula en la misma sentencia que inserta el slice, así dos slices
+        creados a la vez nunca reciben la misma.
+        
+        Args:
+            nombre (str): Nombre del slice
+            tipo (str): Tipo de driver del slice
+            
+        Returns:
+            Tuple[int, int]: (id_slice, vlan_id)
+        """
+        with self.connection() as conn:
+            try:
+                row = conn.execute(
+                    "INSERT INTO slice (nombre, tipo, vlan_id, fecha_creacion, fecha_modificacion) "
+                    "SELECT ?, ?, COALESCE(MAX(vlan_id), 0) + 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+                    "FROM slice RETURNING id_slice, vlan_id",
+                    (nombre, tipo)
+                ).fetchall()[0]
+                if not self.pool.is_nested():
+                    conn.commit()
+            except Exception as e:
+                if not self.pool.is_nested():
+                    conn.rollback()
+                self.logger.error(f"Error creando el slice {nombre}: {e}")
+                raise
+        
+        return row[0], row[1]
+    
+    def allocate_vnc_port(self, server_id: int, base_port: int = 5900) -> int:
+        """
+        Reserva el próximo puerto VNC de un servidor en una transacción corta.
+        El incremento de max_vnc y su lectura son una sola sentencia, así dos
+        despliegues concurrentes en el mismo worker nunca reciben el mismo
+        puerto. Un puerto reservado para una VM que luego falla no se reutiliza.
+        
+        Args:
+            server_id (int): ID del servidor
+            base_port (int): Puerto base (el primero asignado es base_port + 1)
+            
+        Returns:
+            int: Puerto VNC reservado
+            
+        Raises:
+            ValueError: Si el servidor no existe
+        """
+        with self.connection() as conn:
+            try:
+                rows = conn.execute(
+                    "UPDATE servidor SET max_vnc = MAX(COALESCE(max_vnc, 0), ?) + 1 "
+                    "WHERE id_servidor = ? RETURNING max_vnc",
+                    (base_port, server_id)
+                ).fetchall()
+                if not self.pool.is_nested():
+                    conn.commit()
+            except Exception as e:
+                if not self.pool.is_nested():
+                    conn.rollback()
+                self.logger.error(f"Error reservando puerto VNC del servidor {server_id}: {e}")
+                raise
+        
+        if not rows:
+            raise ValueError(f"Servidor {server_id} no encontrado")
+        return rows[0][0]
+    
     def get_slice_with_vms(self, slice_id: int) -> Dict[str, Any]:
         """
         Obtiene un slice completo con todas sus VMs y recursos.
@@ -420,17 +604,10 @@ class DatabaseManager:
             Dict: Resumen de métricas
         """
         try:
-            # Métricas promedio por tipo
-            metrics_query = """
-            SELECT tipo_metrica, 
-                   AVG(valor) as promedio,
-                   MAX(valor) as maximo,
-                   MIN(valor) as minimo,
-                   COUNT(*) as total_registros
-            FROM metricas_tiempo_real
-            WHERE timestamp >= datetime('now', '-{} hours')
-            GROUP BY tipo_metrica
-            """.format(hours)
+            from .metrics_retention import summarize
+
+            # Métricas por tipo, del nivel de rollup que cubre la ventana
+            metrics = summarize(self, hours)
             
             # Nodos activos
             nodes_query = """
@@ -448,12 +625,13 @@ class DatabaseManager:
             ORDER BY cantidad DESC
             """.format(hours)
             
-            metrics_results = self.execute_query(metrics_query)
             nodes_results = self.execute_query(nodes_query)
             events_results = self.execute_query(events_query)
             
             return {
-                'metricas_por_tipo': [dict(row) for row in metrics_results],
+                'metricas_por_tipo': metrics['metricas_por_tipo'],
+                'nivel': metrics['nivel'],
+                'resolucion_segundos': metrics['resolucion_segundos'],
                 'resumen_nodos': dict(nodes_results[0]) if nodes_results else {},
                 'eventos_recientes': [dict(row) for row in events_results],
                 'periodo_horas': hours
@@ -462,10 +640,108 @@ class DatabaseManager:
         except Exception as e:
             self.logger.error(f"Error obteniendo resumen de métricas: {e}")
             return {}
-    
+
+    def get_system_stats(self, driver_types: Optional[List[str]] = None,
+                         recent: int = 5) -> Dict[str, Any]:
+        """
+        Obtiene las estadísticas del dashboard en una sola consulta:
+        slices y VMs por driver, uso de recursos por zona y slices recientes.
+        
+        Args:
+            driver_types (optional): Drivers a incluir aunque no tengan slices
+            recent (int): Cantidad de slices recientes
+        
+        Returns:
+            Dict: {'drivers', 'zone_utilization', 'recent_slices'}
+        """
+        query = """
+        WITH vms AS (
+            SELECT topologia_id_topologia AS id_slice, COUNT(*) AS vms
+            FROM vm
+            GROUP BY topologia_id_topologia
+        ),
+        por_driver AS (
+            SELECT COALESCE(s.tipo, 'desconocido') AS tipo, COUNT(*) AS slices,
+                   COALESCE(SUM(v.vms), 0) AS vms
+            FROM slice s
+            LEFT JOIN vms v ON v.id_slice = s.id_slice
+            GROUP BY COALESCE(s.tipo, 'desconocido')
+        ),
+        por_zona AS (
+            SELECT z.idzona_disponibilidad AS id_zona, z.nombre, COUNT(s.id_servidor) AS servidores,
+                   SUM(r.ram) AS ram_total, SUM(r.ram_available) AS ram_disponible,
+                   SUM(r.vcpu) AS vcpu_total, SUM(r.vcpu_available) AS vcpu_disponible
+            FROM zona_disponibilidad z
+            LEFT JOIN servidor s ON z.idzona_disponibilidad = s.id_zona
+            LEFT JOIN recursos r ON s.id_recurso = r.id_recursos
+            GROUP BY z.idzona_disponibilidad, z.nombre
+        ),
+        recientes AS (
+            SELECT nombre, tipo, estado, fecha_creacion,
+                   ROW_NUMBER() OVER (ORDER BY fecha_creacion DESC, id_slice DESC) AS orden
+            FROM slice
+            ORDER BY fecha_creacion DESC, id_slice DESC
+            LIMIT ?
+        )
+        SELECT 1 AS seccion, 0 AS orden, tipo AS nombre, slices AS valor_1, vms AS valor_2,
+               NULL AS valor_3, NULL AS valor_4
+        FROM por_driver
+        UNION ALL
+        SELECT 2, id_zona, nombre, servidores,
+               CASE WHEN ram_total > 0
+                    THEN ROUND((ram_total - COALESCE(ram_disponible, ram_total)) * 100.0 / ram_total, 2)
+                    ELSE 0 END,
+               CASE WHEN vcpu_total > 0
+                    THEN ROUND((vcpu_total - COALESCE(vcpu_disponible, vcpu_total)) * 100.0 / vcpu_total, 2)
+                    ELSE 0 END,
+               NULL
+        FROM por_zona
+        UNION ALL
+        SELECT 3, orden, nombre, tipo, estado, fecha_creacion, NULL
+        FROM recientes
+        ORDER BY seccion, orden
+        """
+        
+        try:
+            rows = self.execute_query(query, (recent,))
+        except Exception as e:
+            self.logger.error(f"Error obteniendo estadísticas del sistema: {e}")
+            raise
+        
+        drivers = {driver_type: {"slices": 0, "vms": 0} for driver_type in (driver_types or [])}
+        zones = []
+        recent_slices = []
+        for row in rows:
+            if row['seccion'] == 1:
+                drivers[row['nombre']] = {"slices": row['valor_1'], "vms": row['valor_2']}
+            elif row['seccion'] == 2:
+                zones.append({
+                    "zona": row['nombre'],
+                    "servidores": row['valor_1'],
+                    "ram_uso_pct": row['valor_2'],
+                    "vcpu_uso_pct": row['valor_3']
+                })
+            else:
+                recent_slices.append({
+                    "nombre": row['nombre'],
+                    "tipo": row['valor_1'],
+                    "estado": row['valor_2'],
+                    "fecha_creacion": str(row['valor_3']) if row['valor_3'] else None
+                })
+        
+        return {
+            "drivers": drivers,
+            "zone_utilization": zones,
+            "recent_slices": recent_slices
+        }
+
     # ===================================================================
     # MÉTODOS DE COMPATIBILIDAD CON LA API ANTERIOR
     # ===================================================================
+    # Los fragmentos recibidos (condiciones, valores, SET) se construyen
+    # con f-strings en el código anterior. Antes de ejecutarlos se extraen
+    # sus literales como parámetros enlazados para que el texto SQL sea
+    # estable y la sentencia preparada se reutilice entre llamadas.
     
     def Select(self, campos: str, tabla: str, condicion: str) -> List[Tuple]:
         """
@@ -485,8 +761,9 @@ class DatabaseManager:
                 query = f"SELECT {campos} FROM {tabla}"
                 results = self.execute_query(query)
             else:
-                query = f"SELECT {campos} FROM {tabla} WHERE {condicion}"
-                results = self.execute_query(query)
+                where, params = parameterize(condicion)
+                query = f"SELECT {campos} FROM {tabla} WHERE {where}"
+                results = self.execute_query(query, params)
             
             # Convertir sqlite3.Row a tuplas para compatibilidad
             return [tuple(row) for row in results]
@@ -509,17 +786,8 @@ class DatabaseManager:
             int: ID del registro insertado
         """
         try:
-            # Convertir al formato SQLite
-            query = f"INSERT INTO {tabla} ({columnas}) VALUES ({valores})"
-            
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query)
-            row_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            return row_id
+            placeholders, params = parameterize(valores)
+            return self.execute_insert(tabla, columnas, placeholders, tuple(params))
             
         except Exception as e:
             self.logger.error(f"Error en Insert: {e}")
@@ -536,7 +804,9 @@ class DatabaseManager:
             condicion (str): Cláusula WHERE
         """
         try:
-            self.execute_update(tabla, valores, condicion)
+            set_clause, set_params = parameterize(valores)
+            where, where_params = parameterize(condicion)
+            self.execute_update(tabla, set_clause, where, tuple(set_params + where_params))
         except Exception as e:
             self.logger.error(f"Error en Update: {e}")
             raise
@@ -551,7 +821,8 @@ class DatabaseManager:
             condicion (str): Cláusula WHERE
         """
         try:
-            self.execute_delete(tabla, condicion)
+            where, params = parameterize(condicion)
+            self.execute_delete(tabla, where, tuple(params))
         except Exception as e:
             self.logger.error(f"Error en Delete: {e}")
             raise
@@ -592,7 +863,8 @@ class DatabaseManager:
     def close(self):
         """
         Método para cerrar conexiones si es necesario.
-        En SQLite3 no es crítico ya que cada operación maneja su propia conexión.
+        Las conexiones pertenecen al pool compartido y se reutilizan entre
+        instancias, por lo que no se cierran aquí.
         """
         pass
     
@@ -8,6 +8,14 @@ de administración de slices.
 
 Componentes:
 - DatabaseManager: Gestor principal de base de datos
+- connection_pool: Pool de conexiones SQLite3 de larga duración
+- query_builder: Construcción de sentencias parametrizadas
+- unit_of_work: Escrituras de despliegue en una sola transacción
+- capacity_ledger: Capacidad de los workers en memoria para el scheduler
+- reservations: Reservas de recursos en dos fases (reservar/confirmar)
+- overcommit: Factor de recursos por worker según el uso observado
+- metrics_retention: Rollups de 5 minutos y 1 hora y retención de métricas
+- catalog_cache: Caché de catálogos con TTL, invalidación y ETag
 - db_initializer: Inicializador de la base de datos
 
 Autor: Generado por Claude Code
@@ -17,8 +25,26 @@ Versión: 3.0
 
 from .DatabaseManager import DatabaseManager
 from .db_initializer import DatabaseInitializer
+from .connection_pool import ConnectionPool, get_pool, get_all_pool_stats
+from .query_builder import parameterize
+from .unit_of_work import SliceUnitOfWork
+from .capacity_ledger import CapacityLedger, get_capacity_ledger
+from .reservations import ReservationManager, ReservationError
+from .overcommit import OvercommitFactors, compute_overcommit, get_resource_factor
 
 __all__ = [
     'DatabaseManager',
-    'DatabaseInitializer'
+    'DatabaseInitializer',
+    'ConnectionPool',
+    'get_pool',
+    'get_all_pool_stats',
+    'parameterize',
+    'SliceUnitOfWork',
+    'CapacityLedger',
+    'get_capacity_ledger',
+    'ReservationManager',
+    'ReservationError',
+    'OvercommitFactors',
+    'compute_overcommit',
+    'get_resource_factor'
 ]
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+===================================================================
+BENCHMARK DE CONSULTAS - SQLite3
+===================================================================
+
+Compara el costo de las consultas de búsqueda y actualización más
+frecuentes según cómo se construye el SQL:
+
+- literal: texto con valores embebidos (comportamiento anterior)
+- legacy: API Select/Update con extracción automática de literales
+- builder: métodos select/update con parámetros enlazados
+
+Cada modo se ejecuta sobre una base de datos temporal propia creada
+desde schema.sql, y reporta la tasa de aciertos de la caché de
+sentencias y la latencia p50/p99 por operación.
+
+Uso:
+    python -m database.benchmark_queries --iterations 5000
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+import json
+import random
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Agregar el directorio raíz al path para imports
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from database.DatabaseManager import DatabaseManager
+from database.db_initializer import DatabaseInitializer
+from database.connection_pool import close_all_pools
+
+
+MODES = ('literal', 'legacy', 'builder')
+
+
+def seed_database(db: DatabaseManager, servers: int, slices: int, vms_per_slice: int):
+    """
+    Puebla una base de datos vacía con servidores, slices y VMs.
+    """
+    operations = []
+    for i in range(1, servers + 1):
+        operations.append({
+            'type': 'insert',
+            'sql': "INSERT INTO recursos (ram, vcpu, storage, ram_available, vcpu_available, storage_available) "
+                   "VALUES (?, ?, ?, ?, ?, ?)",
+            'params': (65536, 32, 1000, 65536, 32, 1000)
+        })
+        operations.append({
+            'type': 'insert',
+            'sql': "INSERT INTO servidor (nombre, ip, id_recurso) VALUES (?, ?, ?)",
+            'params': (f"worker{i}", f"10.0.0.{i}", i)
+        })
+
+    vm_id = 0
+    for s in range(1, slices + 1):
+        operations.append({
+            'type': 'insert',
+            'sql': "INSERT INTO slice (nombre, tipo, vlan_id) VALUES (?, ?, ?)",
+            'params': (f"slice{s}", 'linux_cluster', s)
+        })
+        for _ in range(vms_per_slice):
+            vm_id += 1
+            operations.append({
+                'type': 'insert',
+                'sql': "INSERT INTO vm (nombre, vnc, servidor_id_servidor, topologia_id_topologia) "
+                       "VALUES (?, ?, ?, ?)",
+                'params': (f"vm{vm_id}", 5900 + vm_id, (vm_id % servers) + 1, s)
+            })
+
+    db.execute_transaction(operations)
+    return vm_id
+
+
+def build_workload(mode: str, db: DatabaseManager, servers: int, slices: int,
+                   vms: int) -> List[Callable[[], Any]]:
+    """
+    Devuelve las operaciones a medir según el modo de construcción del SQL.
+    """
+    if mode == 'literal':
+        return [
+            lambda: db.execute_query(
+                f"SELECT id_slice FROM slice WHERE nombre='slice{random.randint(1, slices)}'"),
+            lambda: db.execute_query(
+                f"SELECT estado FROM vm WHERE nombre = 'vm{random.randint(1, vms)}'"),
+            lambda: db.execute_query(
+                f"SELECT id_recurso FROM servidor WHERE id_servidor={random.randint(1, servers)}"),
+            lambda: db.execute_update(
+                'recursos', f"ram_available={random.randint(0, 65536)}",
+                f"id_recursos={random.randint(1, servers)}"),
+        ]
+
+    if mode == 'legacy':
+        return [
+            lambda: db.Select("id_slice", "slice", f"nombre='slice{random.randint(1, slices)}'"),
+            lambda: db.Select("estado", "vm", f"nombre = 'vm{random.randint(1, vms)}'"),
+            lambda: db.Select("id_recurso", "servidor", f"id_servidor={random.randint(1, servers)}"),
+            lambda: db.Update('recursos', f"ram_available={random.randint(0, 65536)}",
+                              f"id_recursos={random.randint(1, servers)}"),
+        ]
+
+    return [
+        lambda: db.select('slice', 'id_slice', {'nombre': f"slice{random.randint(1, slices)}"}),
+        lambda: db.select('vm', 'estado', {'nombre': f"vm{random.randint(1, vms)}"}),
+        lambda: db.select('servidor', 'id_recurso', {'id_servidor': random.randint(1, servers)}),
+        lambda: db.update('recursos', {'ram_available': random.randint(0, 65536)},
+                          {'id_recursos': random.randint(1, servers)}),
+    ]
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """
+    Percentil por rango más cercano de una lista ordenada.
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(percentile / 100 * len(values))) - 1))
+    return values[index]
+
+
+def run_mode(mode: str, workdir: str, iterations: int, servers: int, slices: int,
+             vms_per_slice: int, seed: int) -> Dict[str, Any]:
+    """
+    Ejecuta el benchmark de un modo sobre una base de datos nueva.
+
+    Returns:
+        Dict con latencias (microsegundos) y estadísticas de la caché
+    """
+    db_path = os.path.join(workdir, f"benchmark_{mode}.db")
+    initializer = DatabaseInitializer()
+    schema_sql = initializer.load_schema_file(initializer.schema_path)
+    if not schema_sql or not initializer.execute_schema(Path(db_path), schema_sql):
+        raise RuntimeError("No se pudo crear el esquema de la base de datos temporal")
+
+    db = DatabaseManager(db_path)
+    vms = seed_database(db, servers, slices, vms_per_slice)
+    workload = build_workload(mode, db, servers, slices, vms)
+
+    # Descontar la carga inicial de las estadísticas de la caché
+    baseline = db.get_pool_stats()
+    random.seed(seed)
+    latencies = []
+    for i in range(iterations):
+        operation = workload[i % len(workload)]
+        start = time.perf_counter()
+        operation()
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+
+    stats = db.get_pool_stats()
+    hits = stats['statement_cache_hits'] - baseline['statement_cache_hits']
+    misses = stats['statement_cache_misses'] - baseline['statement_cache_misses']
+    latencies.sort()
+
+    return {
+        'operations': iterations,
+        'statement_cache_hits': hits,
+        'statement_cache_misses': misses,
+        'statement_cache_hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        'latency_us': {
+            'p50': round(_percentile(latencies, 50), 2),
+            'p99': round(_percentile(latencies, 99), 2),
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0
+        }
+    }
+
+
+def main():
+    """
+    Función principal para ejecutar el benchmark desde línea de comandos.
+    """
+    import argparse
+
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description='Benchmark de construcción de consultas SQLite3')
+    parser.add_argument('--iterations', type=int, default=2000, help='Operaciones por modo')
+    parser.add_argument('--servers', type=int, default=20, help='Servidores a crear')
+    parser.add_argument('--slices', type=int, default=200, help='Slices a crear')
+    parser.add_argument('--vms-per-slice', type=int, default=5, help='VMs por slice')
+    parser.add_argument('--mode', choices=MODES, action='append',
+                        help='Modo a medir (por defecto todos)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla aleatoria')
+
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.mode or MODES:
+            report[mode] = run_mode(mode, workdir, args.iterations, args.servers,
+                                    args.slices, args.vms_per_slice, args.seed)
+        close_all_pools()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+===================================================================
+LIBRO DE CAPACIDAD DE WORKERS - SCHEDULER
+===================================================================
+
+Copia en memoria de la capacidad de los servidores físicos, cargada
+una sola vez desde recursos/servidor/zona_disponibilidad y ajustada
+de forma incremental cuando se crean o eliminan VMs.
+
+El scheduler trabaja sobre snapshots: copias de la vista de una zona
+con el número de versión del libro en el momento de tomarlas. Una
+corrida de scheduling no consulta la base de datos ni modifica el
+libro, y la memoria usada no crece con el número de corridas.
+
+Características:
+- Carga perezosa y recarga explícita desde la base de datos
+- Vistas por zona de disponibilidad
+- Consumo y liberación incremental al crear/eliminar VMs
+- Versión que aumenta con cada cambio (detección de snapshots viejos)
+- Un libro compartido por base de datos
+
+Versión: 3.1
+===================================================================
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from conf.ConfigManager import config
+from database.DatabaseManager import DatabaseManager
+
+
+WORKERS_QUERY = """
+SELECT s.id_servidor, zd.nombre, r.ram_available, r.storage_available, r.vcpu_available,
+       r.ram, r.storage, r.vcpu
+FROM recursos r
+INNER JOIN servidor s ON s.id_recurso = r.id_recursos
+INNER JOIN zona_disponibilidad zd ON zd.idzona_disponibilidad = s.id_zona
+ORDER BY s.id_servidor
+"""
+
+
+def resource_factors(factor: Any, worker_id: Any) -> Tuple[float, float, float]:
+    """
+    Factores (ram, disco, vcpu) de un worker: el factor puede ser un
+    número (RESOURCE_FACTOR) o factores por worker (OvercommitFactors).
+    """
+    if hasattr(factor, 'for_worker'):
+        return factor.for_worker(worker_id)
+    factor = float(factor or 1)
+    return factor, factor, factor
+
+
+class LedgerSnapshot:
+    """
+    Copia de la capacidad de una zona para una corrida de scheduling.
+
+    Attributes:
+        version: Versión del libro al tomar el snapshot
+        zona: Nombre de la zona de disponibilidad
+        factor: Factor de recursos aplicado (número o factores por worker)
+        rows: Tuplas (id_servidor, ram_disponible, disco_disponible,
+              vcpu_disponible, ram, disco, vcpu) con el factor aplicado
+    """
+
+    def __init__(self, version: int, zona: str, factor: Any, rows: List[Tuple]):
+        self.version = version
+        self.zona = zona
+        self.factor = factor
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class CapacityLedger:
+    """
+    Libro de capacidad en memoria de los workers de una base de datos.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        """
+        Inicializa el libro (sin cargarlo).
+
+        Args:
+            db (optional): DatabaseManager a usar (por defecto uno nuevo)
+        """
+        self.db = db or DatabaseManager()
+        self.logger = logging.getLogger(__name__)
+
+        # id_servidor -> {'zona', 'base': [ram_av, disco_av, vcpu_av, ram, disco, vcpu],
+        #                 'consumido': [ram, disco, vcpu]}
+        self._workers: Dict[int, Dict[str, Any]] = {}
+        self._zones: Dict[str, List[int]] = {}
+        self._loaded = False
+        self._version = 0
+        self._lock = threading.RLock()
+        self._stats = {'loads': 0, 'snapshots': 0, 'consumed': 0, 'released': 0}
+
+    @property
+    def version(self) -> int:
+        """Versión actual del libro."""
+        return self._version
+
+    @property
+    def loaded(self) -> bool:
+        """Indica si el libro ya se cargó desde la base de datos."""
+        return self._loaded
+
+    def reload(self):
+        """
+        Carga (o recarga) la capacidad desde la base de datos, descartando
+        los ajustes incrementales acumulados.
+        """
+        rows = self.db.execute_query(WORKERS_QUERY)
+        workers: Dict[int, Dict[str, Any]] = {}
+        zones: Dict[str, List[int]] = {}
+        for row in rows:
+            worker_id = row[0]
+            workers[worker_id] = {
+                'zona': row[1],
+                'base': [float(value or 0) for value in row[2:8]],
+                'consumido': [0.0, 0.0, 0.0]
+            }
+            zones.setdefault(row[1], []).append(worker_id)
+
+        with self._lock:
+            self._workers = workers
+            self._zones = zones
+            self._loaded = True
+            self._version += 1
+            self._stats['loads'] += 1
+
+        self.logger.info(f"Libro de capacidad cargado: {len(workers)} workers en {len(zones)} zonas")
+
+    def _ensure_loaded(self):
+        """Carga el libro la primera vez que se usa."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.reload()
+
+    def snapshot(self, zona: str, factor: Any = 1) -> LedgerSnapshot:
+        """
+        Toma un snapshot de la capacidad disponible de una zona.
+
+        La capacidad disponible es la de la base de datos multiplicada
+        por el factor de recursos, menos lo consumido por las VMs creadas
+        desde la carga.
+
+        Args:
+            zona: Nombre de la zona de disponibilidad
+            factor: Factor de recursos (RESOURCE_FACTOR) o factores por
+                    worker y recurso (OvercommitFactors)
+
+        Returns:
+            LedgerSnapshot: Copia versionada de la zona
+        """
+        self._ensure_loaded()
+        with self._lock:
+            rows = []
+            for worker_id in self._zones.get(zona, []):
+                entry = self._workers[worker_id]
+                ram_av, disco_av, vcpu_av, ram, disco, vcpu = entry['base']
+                ram_used, disco_used, vcpu_used = entry['consumido']
+                ram_factor, disco_factor, vcpu_factor = resource_factors(factor, worker_id)
+                rows.append((
+                    worker_id,
+                    ram_av * ram_factor - ram_used,
+                    disco_av * disco_factor - disco_used,
+                    vcpu_av * vcpu_factor - vcpu_used,
+                    ram * ram_factor,
+                    disco * disco_factor,
+                    vcpu * vcpu_factor
+                ))
+            self._stats['snapshots'] += 1
+            return LedgerSnapshot(self._version, zona, factor, rows)
+
+    def is_current(self, snapshot: LedgerSnapshot) -> bool:
+        """
+        Indica si el libro no cambió desde que se tomó el snapshot.
+        """
+        return snapshot.version == self._version
+
+    def _adjust(self, worker_id: int, ram: float, disco: float, vcpu: float, sign: int) -> bool:
+        """
+        Aplica un consumo (sign=1) o una liberación (sign=-1) de recursos.
+        Si el libro aún no se cargó no hace nada: la carga leerá el
+        estado de la base de datos.
+        """
+        with self._lock:
+            if not self._loaded:
+                return False
+            entry = self._workers.get(worker_id)
+            if entry is None:
+                self.logger.warning(f"Worker {worker_id} no está en el libro de capacidad")
+                return False
+            consumed = entry['consumido']
+            consumed[0] += sign * float(ram or 0)
+            consumed[1] += sign * float(disco or 0)
+            consumed[2] += sign * float(vcpu or 0)
+            self._version += 1
+            self._stats['consumed' if sign > 0 else 'released'] += 1
+            return True
+
+    def consume(self, worker_id: int, ram: float, disco: float, vcpu: float) -> bool:
+        """
+        Registra los recursos de una VM creada en un worker.
+
+        Returns:
+            bool: True si el libro se actualizó
+        """
+        return self._adjust(worker_id, ram, disco, vcpu, 1)
+
+    def release(self, worker_id: int, ram: float, disco: float, vcpu: float) -> bool:
+        """
+        Devuelve al worker los recursos de una VM eliminada.
+
+        Returns:
+            bool: True si el libro se actualizó
+        """
+        return self._adjust(worker_id, ram, disco, vcpu, -1)
+
+    def consume_many(self, vms: Iterable[Dict[str, Any]]):
+        """
+        Registra varias VMs creadas ({'worker_id', 'ram', 'disk', 'vcpu'}).
+        """
+        for vm in vms:
+            self.consume(vm['worker_id'], vm['ram'], vm['disk'], vm['vcpu'])
+
+    def zones(self) -> List[str]:
+        """Nombres de las zonas conocidas."""
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._zones)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene contadores y tamaño del libro.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['version'] = self._version
+            stats['loaded'] = self._loaded
+            stats['workers'] = len(self._workers)
+            stats['zones'] = {zona: len(ids) for zona, ids in self._zones.items()}
+        return stats
+
+
+# ===================================================================
+# LIBROS COMPARTIDOS POR BASE DE DATOS
+# ===================================================================
+
+_ledgers: Dict[str, CapacityLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_capacity_ledger(db_path: Optional[str] = None) -> CapacityLedger:
+    """
+    Obtiene el libro de capacidad compartido de una base de datos.
+
+    Args:
+        db_path (optional): Ruta de la base de datos (por defecto la configurada)
+
+    Returns:
+        CapacityLedger: Libro compartido por todo el proceso
+    """
+    db_path = db_path or config.get_db_config().get('db_path', './data/system.db')
+    with _ledgers_lock:
+        ledger = _ledgers.get(db_path)
+        if ledger is None:
+            ledger = CapacityLedger(DatabaseManager(db_path))
+            _ledgers[db_path] = ledger
+        return ledger
@@ -0,0 +1,182 @@
+"""
+===================================================================
+CACHÉ DE CATÁLOGOS
+===================================================================
+
+Caché en memoria, compartida por el proceso, de los catálogos que
+cambian poco (flavors, imágenes, zonas, workers y flavors de Nova) y
+de las estadísticas del dashboard, para no consultar SQLite u
+OpenStack en cada request.
+
+Características:
+- TTL por clave (CATALOG_CACHE_TTL, CATALOG_CACHE_WORKERS_TTL y
+  STATS_CACHE_TTL)
+- Invalidación explícita desde quien escribe (imágenes nuevas,
+  reservas de capacidad, recursos de hipervisores, flavors de Nova)
+- ETag por valor para responder 304 a If-None-Match
+- Contadores de aciertos, fallos e invalidaciones por clave
+
+Una carga que empezó antes de una invalidación no se guarda, así una
+escritura nunca queda tapada por un valor leído antes de ella.
+
+Versión: 3.1
+===================================================================
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from conf.ConfigManager import config
+
+# Claves de los catálogos
+FLAVORS = 'flavors'
+IMAGES = 'images'
+ZONES = 'zones'
+WORKERS = 'workers'
+OPENSTACK_FLAVORS = 'openstack_flavors'
+STATS = 'stats'
+
+
+def compute_etag(value: Any) -> str:
+    """ETag fuerte del contenido JSON de un valor."""
+    payload = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return f'"{hashlib.sha1(payload).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Indica si la cabecera If-None-Match incluye el ETag (o es *).
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+class CatalogEntry:
+    """
+    Valor cacheado de un catálogo con su ETag.
+    """
+
+    __slots__ = ('value', 'etag', 'loaded_at', 'expires_at')
+
+    def __init__(self, value: Any, ttl: float):
+        self.value = value
+        self.etag = compute_etag(value)
+        self.loaded_at = time.monotonic()
+        self.expires_at = self.loaded_at + ttl
+
+
+class CatalogCache:
+    """
+    Caché de catálogos con TTL por clave e invalidación explícita.
+    """
+
+    def __init__(self, ttl: float = 300, ttls: Optional[Dict[str, float]] = None):
+        """
+        Inicializa la caché.
+
+        Args:
+            ttl (optional): Segundos de validez por defecto
+            ttls (optional): Segundos de validez de claves puntuales
+        """
+        self.ttl = float(ttl)
+        self.ttls = {key: float(value) for key, value in (ttls or {}).items()}
+        self.logger = logging.getLogger(__name__)
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._versions: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, counter: str):
+        stats = self._stats.setdefault(key, {'hits': 0, 'misses': 0, 'invalidations': 0})
+        stats[counter] += 1
+
+    def get(self, key: str, loader: Callable[[], Any]) -> CatalogEntry:
+        """
+        Obtiene un catálogo, cargándolo con loader si no está o venció.
+
+        Args:
+            key: Clave del catálogo
+            loader: Función sin argumentos que lee el catálogo
+
+        Returns:
+            CatalogEntry: Valor y ETag
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._count(key, 'hits')
+                return entry
+            self._count(key, 'misses')
+            version = self._versions.get(key, 0)
+
+        entry = CatalogEntry(loader(), self.ttls.get(key, self.ttl))
+        with self._lock:
+            if self._versions.get(key, 0) == version:
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self, *keys: str):
+        """
+        Descarta los catálogos indicados (todos si no se indica ninguno).
+        """
+        with self._lock:
+            for key in keys or list(set(self._entries) | set(self._stats)):
+                self._versions[key] = self._versions.get(key, 0) + 1
+                if self._entries.pop(key, None) is not None:
+                    self._count(key, 'invalidations')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene los contadores por clave y la antigüedad de cada valor.
+        """
+        now = time.monotonic()
+        with self._lock:
+            catalogs = {}
+            for key in sorted(set(self._stats) | set(self._entries)):
+                stats = dict(self._stats.get(key, {'hits': 0, 'misses': 0, 'invalidations': 0}))
+                requests = stats['hits'] + stats['misses']
+                stats['hit_ratio'] = round(stats['hits'] / requests, 3) if requests else None
+                entry = self._entries.get(key)
+                stats['cached'] = entry is not None and entry.expires_at > now
+                stats['age_seconds'] = round(now - entry.loaded_at, 3) if entry else None
+                stats['ttl_seconds'] = self.ttls.get(key, self.ttl)
+                catalogs[key] = stats
+            return {'ttl_seconds': self.ttl, 'catalogs': catalogs}
+
+
+_cache: Optional[CatalogCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_catalog_cache() -> CatalogCache:
+    """
+    Obtiene la caché de catálogos del proceso, creándola con la
+    configuración la primera vez.
+
+    Returns:
+        CatalogCache: Caché compartida
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache_config = config.get_catalog_cache_config()
+                _cache = CatalogCache(
+                    ttl=cache_config['ttl'],
+                    ttls={WORKERS: cache_config['workers_ttl'], STATS: cache_config['stats_ttl']}
+                )
+    return _cache
+
+
+def invalidate_catalog(*keys: str):
+    """
+    Descarta catálogos de la caché compartida (para llamar después de
+    escribir en las tablas que los forman).
+    """
+    get_catalog_cache().invalidate(*keys)
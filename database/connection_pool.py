@@ -0,0 +1,410 @@
+"""
+===================================================================
+POOL DE CONEXIONES - SQLite3
+===================================================================
+
+Pool acotado de conexiones SQLite3 de larga duración. Cada conexión
+se configura una sola vez (PRAGMAs) y conserva su caché de páginas
+entre operaciones, en lugar de abrirse y cerrarse por sentencia.
+
+Características:
+- Una conexión por hilo mientras dure la operación (reentrante)
+- Tamaño máximo acotado con espera y timeout
+- Health check de conexiones inactivas
+- Estadísticas de uso (hits, esperas, conexiones abiertas)
+- Caché de sentencias preparadas configurable, con tasa de aciertos
+
+Versión: 3.1
+===================================================================
+"""
+
+import sqlite3
+import threading
+import time
+import logging
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """
+    Se lanza cuando no se obtiene una conexión libre dentro del timeout.
+    """
+    pass
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Conexión SQLite3 con metadatos usados por el pool.
+
+    sqlite3 no expone los aciertos de su caché de sentencias, así que la
+    conexión lleva un espejo LRU con la misma capacidad para estimarlos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.statement_capacity = kwargs.get('cached_statements', 128)
+        self._statements: OrderedDict = OrderedDict()
+
+    def note_statement(self, sql: str) -> bool:
+        """
+        Registra la ejecución de una sentencia en el espejo LRU.
+
+        Args:
+            sql: Texto exacto de la sentencia ejecutada
+
+        Returns:
+            bool: True si la sentencia ya estaba preparada en caché
+        """
+        if sql in self._statements:
+            self._statements.move_to_end(sql)
+            return True
+        self._statements[sql] = None
+        if len(self._statements) > self.statement_capacity:
+            self._statements.popitem(last=False)
+        return False
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones SQLite3 para una base de datos.
+
+    Una conexión se asigna al hilo que la solicita y se reutiliza si el
+    mismo hilo vuelve a pedir conexión antes de liberarla (llamadas
+    anidadas). Al terminar la operación la conexión vuelve al pool.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+        cache_size: int = 20000,
+        cached_statements: int = 256
+    ):
+        """
+        Inicializa el pool.
+
+        Args:
+            db_path: Ruta al archivo de base de datos
+            max_size: Número máximo de conexiones abiertas
+            timeout: Segundos máximos de espera por una conexión libre
+            health_check_interval: Segundos de inactividad tras los que
+                                   se verifica la conexión antes de usarla
+            cache_size: Páginas de caché por conexión (PRAGMA cache_size)
+            cached_statements: Sentencias preparadas que conserva cada conexión
+        """
+        self.db_path = db_path
+        self.max_size = max(1, int(max_size))
+        self.timeout = float(timeout)
+        self.health_check_interval = float(health_check_interval)
+        self.cache_size = int(cache_size)
+        self.cached_statements = max(0, int(cached_statements))
+
+        self._idle: deque = deque()
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+        self._local = threading.local()
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'reentrant': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'health_checks': 0,
+            'health_check_failures': 0,
+            'discarded': 0,
+            'statement_cache_hits': 0,
+            'statement_cache_misses': 0
+        }
+
+        self.logger = logging.getLogger(__name__)
+
+    def _create_connection(self) -> PooledConnection:
+        """
+        Abre una conexión nueva y aplica los PRAGMAs una única vez.
+
+        Returns:
+            PooledConnection: Conexión configurada
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            factory=PooledConnection,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        # Configurar para devolver filas como diccionarios
+        conn.row_factory = sqlite3.Row
+        # Habilitar claves foráneas
+        conn.execute("PRAGMA foreign_keys = ON")
+        # Configurar WAL mode para mejor concurrencia
+        conn.execute("PRAGMA journal_mode = WAL")
+        # Optimizar para consultas complejas
+        conn.execute(f"PRAGMA cache_size = {self.cache_size}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        """
+        Verifica una conexión que lleva tiempo inactiva.
+
+        Args:
+            conn: Conexión a verificar
+
+        Returns:
+            bool: True si la conexión responde
+        """
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+
+        self._stats['health_checks'] += 1
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            self._stats['health_check_failures'] += 1
+            self.logger.warning(f"Conexión del pool descartada tras health check: {e}")
+            return False
+
+    def _discard(self, conn: PooledConnection):
+        """
+        Cierra una conexión y libera su lugar en el pool.
+        Debe llamarse con el lock del pool tomado.
+        """
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._open -= 1
+        self._stats['discarded'] += 1
+        self._condition.notify()
+
+    def _acquire(self) -> PooledConnection:
+        """
+        Obtiene una conexión libre, creando una nueva si hay cupo
+        o esperando a que otra se libere.
+
+        Returns:
+            PooledConnection: Conexión lista para usar
+
+        Raises:
+            PoolTimeoutError: Si no hay conexión libre dentro del timeout
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+
+                while self._idle:
+                    conn = self._idle.pop()
+                    if self._is_healthy(conn):
+                        self._stats['hits'] += 1
+                        return conn
+                    self._discard(conn)
+
+                if self._open < self.max_size:
+                    self._open += 1
+                    break
+
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Timeout de {self.timeout}s esperando conexión del pool ({self.db_path})"
+                    )
+                self._condition.wait(remaining)
+
+        # Crear fuera del lock: abrir el archivo puede tardar
+        try:
+            conn = self._create_connection()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._stats['misses'] += 1
+        return conn
+
+    def _release(self, conn: PooledConnection):
+        """
+        Devuelve una conexión al pool, descartando transacciones abiertas.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        conn.last_used = time.monotonic()
+
+        with self._condition:
+            if self._closed or not healthy:
+                self._discard(conn)
+                return
+            self._idle.append(conn)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """
+        Context manager que presta una conexión al hilo actual.
+
+        Las llamadas anidadas desde el mismo hilo reutilizan la misma
+        conexión, de modo que una transacción abierta por el llamador
+        sigue activa en las operaciones internas.
+
+        Yields:
+            PooledConnection: Conexión del pool
+        """
+        local = self._local
+        current = getattr(local, 'conn', None)
+
+        if current is not None:
+            local.depth += 1
+            with self._condition:
+                self._stats['reentrant'] += 1
+            try:
+                yield current
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._acquire()
+        local.conn = conn
+        local.depth = 1
+        try:
+            yield conn
+        finally:
+            local.conn = None
+            local.depth = 0
+            self._release(conn)
+
+    def is_nested(self) -> bool:
+        """
+        Indica si el hilo actual usa una conexión prestada por un bloque
+        exterior. Las operaciones anidadas no deben confirmar ni deshacer
+        la transacción: eso corresponde al bloque que la abrió.
+
+        Returns:
+            bool: True si hay más de un préstamo activo en este hilo
+        """
+        return getattr(self._local, 'depth', 0) > 1
+
+    def note_statement(self, conn: sqlite3.Connection, sql: str):
+        """
+        Contabiliza un acierto o fallo de la caché de sentencias.
+
+        Args:
+            conn: Conexión en la que se ejecutó la sentencia
+            sql: Texto de la sentencia
+        """
+        if not isinstance(conn, PooledConnection):
+            return
+        key = 'statement_cache_hits' if conn.note_statement(sql) else 'statement_cache_misses'
+        with self._condition:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del pool.
+
+        Returns:
+            Dict con contadores y estado actual del pool
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+            open_connections = self._open
+
+        served = stats['hits'] + stats['misses']
+        statements = stats['statement_cache_hits'] + stats['statement_cache_misses']
+        stats.update({
+            'db_path': self.db_path,
+            'max_size': self.max_size,
+            'cached_statements': self.cached_statements,
+            'statement_cache_hit_rate': (
+                round(stats['statement_cache_hits'] / statements, 4) if statements else 0.0
+            ),
+            'open_connections': open_connections,
+            'idle_connections': idle,
+            'in_use_connections': open_connections - idle,
+            'hit_rate': round(stats['hits'] / served, 4) if served else 0.0
+        })
+        return stats
+
+    def close(self):
+        """
+        Cierra todas las conexiones inactivas. Las conexiones en uso
+        se cierran al ser devueltas.
+        """
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+
+
+# ===================================================================
+# REGISTRO DE POOLS POR BASE DE DATOS
+# ===================================================================
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, **options) -> ConnectionPool:
+    """
+    Obtiene el pool compartido de una base de datos, creándolo si no existe.
+
+    Args:
+        db_path: Ruta al archivo de base de datos
+        **options: Opciones de ConnectionPool (solo se usan al crearlo)
+
+    Returns:
+        ConnectionPool: Pool compartido por todo el proceso
+    """
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path, **options)
+            _pools[db_path] = pool
+        return pool
+
+
+def get_all_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Obtiene las estadísticas de todos los pools del proceso.
+
+    Returns:
+        Dict con estadísticas por ruta de base de datos
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.db_path: pool.get_stats() for pool in pools}
+
+
+def close_all_pools():
+    """
+    Cierra todos los pools del proceso (por ejemplo, al apagar la API).
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,298 @@
+"""
+===================================================================
+ROLLUPS Y RETENCIÓN DE MÉTRICAS
+===================================================================
+
+Reduce la resolución de metricas_tiempo_real a medida que envejece:
+
+- metricas_tiempo_real: muestras crudas (una por intervalo de
+  monitoreo), se conservan METRICS_RAW_RETENTION_HOURS horas.
+- metricas_rollup_5m: suma/mínimo/máximo/cantidad por nodo, métrica y
+  bloque de 5 minutos, se conserva METRICS_5M_RETENTION_DAYS días.
+- metricas_rollup_1h: lo mismo por hora, se conserva retention_days
+  días (configuracion_sistema, o METRICS_RETENTION_DAYS si no está).
+
+Los rollups se mantienen de forma incremental con triggers AFTER
+INSERT sobre metricas_tiempo_real (un UPSERT por muestra), así que no
+hace falta recalcularlos. La poda borra en lotes pequeños, con una
+transacción por lote, para no bloquear a los escritores.
+
+Las consultas (resumen y series) eligen el nivel más fino cuya
+retención cubre la ventana pedida.
+
+Versión: 3.1
+===================================================================
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from conf.ConfigManager import config
+from .DatabaseManager import DatabaseManager
+
+
+ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS metricas_rollup_5m (
+    nodo_id INTEGER NOT NULL,
+    tipo_metrica VARCHAR(30) NOT NULL,
+    bucket DATETIME NOT NULL,
+    suma REAL NOT NULL,
+    minimo REAL NOT NULL,
+    maximo REAL NOT NULL,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (nodo_id, tipo_metrica, bucket),
+    FOREIGN KEY (nodo_id) REFERENCES nodo_cluster(id_nodo) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS metricas_rollup_1h (
+    nodo_id INTEGER NOT NULL,
+    tipo_metrica VARCHAR(30) NOT NULL,
+    bucket DATETIME NOT NULL,
+    suma REAL NOT NULL,
+    minimo REAL NOT NULL,
+    maximo REAL NOT NULL,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (nodo_id, tipo_metrica, bucket),
+    FOREIGN KEY (nodo_id) REFERENCES nodo_cluster(id_nodo) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_5m_tipo_bucket ON metricas_rollup_5m(tipo_metrica, bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_5m_bucket ON metricas_rollup_5m(bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_1h_tipo_bucket ON metricas_rollup_1h(tipo_metrica, bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_1h_bucket ON metricas_rollup_1h(bucket);
+
+CREATE TRIGGER IF NOT EXISTS rollup_metricas_5m
+    AFTER INSERT ON metricas_tiempo_real
+BEGIN
+    INSERT INTO metricas_rollup_5m (nodo_id, tipo_metrica, bucket, suma, minimo, maximo, cantidad)
+    VALUES (NEW.nodo_id, NEW.tipo_metrica,
+            datetime((CAST(strftime('%s', NEW.timestamp) AS INTEGER) / 300) * 300, 'unixepoch'),
+            NEW.valor, NEW.valor, NEW.valor, 1)
+    ON CONFLICT (nodo_id, tipo_metrica, bucket) DO UPDATE SET
+        suma = suma + excluded.suma,
+        minimo = MIN(minimo, excluded.minimo),
+        maximo = MAX(maximo, excluded.maximo),
+        cantidad = cantidad + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_metricas_1h
+    AFTER INSERT ON metricas_tiempo_real
+BEGIN
+    INSERT INTO metricas_rollup_1h (nodo_id, tipo_metrica, bucket, suma, minimo, maximo, cantidad)
+    VALUES (NEW.nodo_id, NEW.tipo_metrica, strftime('%Y-%m-%d %H:00:00', NEW.timestamp),
+            NEW.valor, NEW.valor, NEW.valor, 1)
+    ON CONFLICT (nodo_id, tipo_metrica, bucket) DO UPDATE SET
+        suma = suma + excluded.suma,
+        minimo = MIN(minimo, excluded.minimo),
+        maximo = MAX(maximo, excluded.maximo),
+        cantidad = cantidad + 1;
+END;
+"""
+
+# Recalcula un nivel desde las muestras crudas (bases anteriores a los triggers)
+BACKFILL_SQL = {
+    'metricas_rollup_5m': """
+        INSERT OR REPLACE INTO metricas_rollup_5m (nodo_id, tipo_metrica, bucket, suma, minimo, maximo, cantidad)
+        SELECT nodo_id, tipo_metrica,
+               datetime((CAST(strftime('%s', timestamp) AS INTEGER) / 300) * 300, 'unixepoch') AS bucket,
+               SUM(valor), MIN(valor), MAX(valor), COUNT(*)
+        FROM metricas_tiempo_real
+        GROUP BY nodo_id, tipo_metrica, bucket
+    """,
+    'metricas_rollup_1h': """
+        INSERT OR REPLACE INTO metricas_rollup_1h (nodo_id, tipo_metrica, bucket, suma, minimo, maximo, cantidad)
+        SELECT nodo_id, tipo_metrica, strftime('%Y-%m-%d %H:00:00', timestamp) AS bucket,
+               SUM(valor), MIN(valor), MAX(valor), COUNT(*)
+        FROM metricas_tiempo_real
+        GROUP BY nodo_id, tipo_metrica, bucket
+    """
+}
+
+# Niveles de más fino a más grueso: (nombre, tabla, columna de tiempo, resolución en segundos)
+TIERS = [
+    ('raw', 'metricas_tiempo_real', 'timestamp', 60),
+    ('5m', 'metricas_rollup_5m', 'bucket', 300),
+    ('1h', 'metricas_rollup_1h', 'bucket', 3600)
+]
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def ensure_rollups(db: DatabaseManager) -> bool:
+    """
+    Crea las tablas y triggers de rollup si no existen. En una base con
+    muestras anteriores a los triggers, recalcula los rollups.
+
+    Returns:
+        bool: True si hubo que recalcular los rollups
+    """
+    with _schema_lock:
+        if db.db_path in _schema_ready:
+            return False
+        backfilled = False
+        with db.connection() as conn:
+            missing = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+                "AND name IN ('rollup_metricas_5m', 'rollup_metricas_1h')"
+            ).fetchone()[0] < 2
+            conn.executescript(ROLLUP_DDL)
+            if missing:
+                for sql in BACKFILL_SQL.values():
+                    backfilled = conn.execute(sql).rowcount > 0 or backfilled
+            conn.commit()
+        _schema_ready.add(db.db_path)
+        return backfilled
+
+
+def retention_settings(db: DatabaseManager) -> Dict[str, float]:
+    """
+    Retención de cada nivel en horas. La del nivel horario sale de
+    retention_days en configuracion_sistema si está definida.
+    """
+    settings = config.get_metrics_retention_config()
+    days = settings['retention_days']
+    try:
+        rows = db.execute_query("SELECT valor FROM configuracion_sistema WHERE clave = 'retention_days'")
+        if rows:
+            days = float(rows[0]['valor'])
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Error leyendo retention_days: {e}")
+    return {
+        'raw': float(settings['raw_hours']),
+        '5m': float(settings['5m_days']) * 24,
+        '1h': float(days) * 24
+    }
+
+
+def choose_tier(hours: float, retention: Dict[str, float]) -> tuple:
+    """Nivel más fino cuya retención cubre las últimas `hours` horas."""
+    for tier in TIERS:
+        if hours <= retention[tier[0]]:
+            return tier
+    return TIERS[-1]
+
+
+def summarize(db: DatabaseManager, hours: int) -> Dict[str, Any]:
+    """
+    Promedio, máximo, mínimo y cantidad de muestras por tipo de métrica en
+    las últimas horas, leídos del nivel que corresponde a la ventana.
+
+    Returns:
+        Dict: {'nivel', 'resolucion_segundos', 'metricas_por_tipo'}
+    """
+    ensure_rollups(db)
+    name, table, column, resolution = choose_tier(hours, retention_settings(db))
+    if name == 'raw':
+        query = f"""
+        SELECT tipo_metrica, AVG(valor) AS promedio, MAX(valor) AS maximo,
+               MIN(valor) AS minimo, COUNT(*) AS total_registros
+        FROM {table}
+        WHERE {column} >= datetime('now', ?)
+        GROUP BY tipo_metrica
+        """
+    else:
+        query = f"""
+        SELECT tipo_metrica, SUM(suma) / SUM(cantidad) AS promedio, MAX(maximo) AS maximo,
+               MIN(minimo) AS minimo, SUM(cantidad) AS total_registros
+        FROM {table}
+        WHERE {column} >= datetime('now', ?)
+        GROUP BY tipo_metrica
+        """
+    rows = db.execute_query(query, (f"-{int(hours)} hours",))
+    return {
+        'nivel': name,
+        'resolucion_segundos': resolution,
+        'metricas_por_tipo': [dict(row) for row in rows]
+    }
+
+
+def metric_series(db: DatabaseManager, hours: int, tipo_metrica: Optional[str] = None,
+                  nodo_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Serie temporal por nodo y tipo de métrica en las últimas horas, con la
+    resolución del nivel que corresponde a la ventana.
+
+    Returns:
+        Dict: {'nivel', 'resolucion_segundos', 'puntos'}
+    """
+    ensure_rollups(db)
+    name, table, column, resolution = choose_tier(hours, retention_settings(db))
+    if name == 'raw':
+        select = (f"nodo_id, tipo_metrica, {column} AS instante, valor AS promedio, "
+                  f"valor AS minimo, valor AS maximo, 1 AS cantidad")
+    else:
+        select = (f"nodo_id, tipo_metrica, {column} AS instante, suma / cantidad AS promedio, "
+                  f"minimo, maximo, cantidad")
+    conditions = [f"{column} >= datetime('now', ?)"]
+    params: List[Any] = [f"-{int(hours)} hours"]
+    if tipo_metrica:
+        conditions.append("tipo_metrica = ?")
+        params.append(tipo_metrica)
+    if nodo_id is not None:
+        conditions.append("nodo_id = ?")
+        params.append(nodo_id)
+    rows = db.execute_query(
+        f"SELECT {select} FROM {table} WHERE {' AND '.join(conditions)} "
+        f"ORDER BY nodo_id, tipo_metrica, {column}",
+        tuple(params)
+    )
+    return {'nivel': name, 'resolucion_segundos': resolution, 'puntos': [dict(row) for row in rows]}
+
+
+def prune(db: DatabaseManager, batch_size: Optional[int] = None,
+          max_batches: Optional[int] = None) -> Dict[str, int]:
+    """
+    Borra los datos vencidos de cada nivel en lotes pequeños (una
+    transacción por lote).
+
+    Args:
+        db: Gestor de base de datos
+        batch_size (optional): Filas por lote (por defecto METRICS_PRUNE_BATCH)
+        max_batches (optional): Máximo de lotes por nivel en esta corrida
+
+    Returns:
+        Dict[str, int]: Filas borradas por nivel
+    """
+    ensure_rollups(db)
+    batch_size = int(batch_size or config.get_metrics_retention_config()['prune_batch'])
+    retention = retention_settings(db)
+    deleted = {}
+    for name, table, column, _ in TIERS:
+        sql = (f"DELETE FROM {table} WHERE rowid IN "
+               f"(SELECT rowid FROM {table} WHERE {column} < datetime('now', ?) LIMIT ?)")
+        params = (f"-{int(retention[name] * 60)} minutes", batch_size)
+        deleted[name] = batches = 0
+        while max_batches is None or batches < max_batches:
+            with db.connection() as conn:
+                count = conn.execute(sql, params).rowcount
+                conn.commit()
+            deleted[name] += count
+            batches += 1
+            if count < batch_size:
+                break
+    return deleted
+
+
+# ===================================================================
+# PODA PERIÓDICA
+# ===================================================================
+
+_last_prune: Dict[str, float] = {}
+_prune_lock = threading.Lock()
+
+
+def prune_if_due(db: DatabaseManager) -> Optional[Dict[str, int]]:
+    """
+    Poda si pasaron METRICS_PRUNE_INTERVAL segundos desde la última poda
+    de esta base de datos.
+
+    Returns:
+        Optional[Dict[str, int]]: Filas borradas por nivel, o None si no tocaba
+    """
+    interval = float(config.get_metrics_retention_config()['prune_interval'])
+    with _prune_lock:
+        if time.time() - _last_prune.get(db.db_path, 0) < interval:
+            return None
+        _last_prune[db.db_path] = time.time()
+    return prune(db)
@@ -0,0 +1,236 @@
+"""
+===================================================================
+OVERCOMMIT DINÁMICO POR WORKER - SCHEDULER
+===================================================================
+
+Calcula un factor de sobreasignación por worker y por recurso a partir
+del uso observado en metricas_tiempo_real, en lugar de multiplicar la
+capacidad de todos los workers por el mismo RESOURCE_FACTOR.
+
+Fuentes de uso (cpu_usage / mem_usage en metricas_tiempo_real, en
+las últimas OVERCOMMIT_WINDOW_HOURS horas):
+- Nodo de cada VM (ingesta push de los agentes): % de lo asignado a
+  la VM.
+- Nodo del worker (drivers.metrics_collector): % de la capacidad
+  física del worker, derivado de la capacidad disponible que reportan
+  las fuentes de métricas.
+
+Para cada worker y recurso (CPU y RAM):
+1. Si hay muestras por VM, se toma el percentil OVERCOMMIT_PERCENTILE
+   del uso de cada VM y el uso del worker por unidad asignada es el
+   promedio de esos percentiles ponderado por las vCPUs / RAM de cada
+   VM (sumar los percentiles es conservador: los picos no siempre
+   coinciden).
+2. Si no, se toma el percentil del uso del worker y el uso por unidad
+   asignada es lo usado (percentil x capacidad física) sobre la suma
+   de lo asignado a sus VMs.
+3. factor = OVERCOMMIT_TARGET_UTILIZATION / uso, acotado entre
+   OVERCOMMIT_MIN_FACTOR y OVERCOMMIT_MAX_VCPU / OVERCOMMIT_MAX_RAM.
+
+Los workers (o recursos) con menos de OVERCOMMIT_MIN_SAMPLES muestras
+o sin VMs asignadas, y el disco, que no tiene métrica de uso de
+capacidad, usan RESOURCE_FACTOR. Los factores se recalculan cada OVERCOMMIT_REFRESH
+segundos; la capacidad ya reservada queda descontada con el factor
+vigente al reservar.
+
+Versión: 3.1
+===================================================================
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from conf.ConfigManager import config
+from database.DatabaseManager import DatabaseManager
+
+
+USAGE_QUERY = """
+SELECT v.servidor_id_servidor AS worker_id, v.id_vm, r.ram, r.vcpu, m.tipo_metrica, m.valor
+FROM metricas_tiempo_real m
+INNER JOIN nodo_cluster nc ON nc.id_nodo = m.nodo_id
+INNER JOIN vm v ON v.id_vm = nc.vm_id
+INNER JOIN recursos r ON r.id_recursos = v.recursos_id_estado
+WHERE m.tipo_metrica IN ('cpu_usage', 'mem_usage')
+  AND m.timestamp >= datetime('now', ?)
+  AND v.servidor_id_servidor IS NOT NULL
+"""
+
+WORKER_USAGE_QUERY = """
+SELECT nc.worker_id, m.tipo_metrica, m.valor
+FROM metricas_tiempo_real m
+INNER JOIN nodo_cluster nc ON nc.id_nodo = m.nodo_id
+WHERE m.tipo_metrica IN ('cpu_usage', 'mem_usage')
+  AND m.timestamp >= datetime('now', ?)
+  AND nc.vm_id IS NULL
+  AND nc.worker_id IS NOT NULL
+"""
+
+WORKER_ALLOCATION_QUERY = """
+SELECT s.id_servidor AS worker_id, r.ram AS ram_total, r.vcpu AS vcpu_total,
+       COALESCE(SUM(rv.ram), 0) AS ram, COALESCE(SUM(rv.vcpu), 0) AS vcpu
+FROM servidor s
+INNER JOIN recursos r ON r.id_recursos = s.id_recurso
+LEFT JOIN vm v ON v.servidor_id_servidor = s.id_servidor
+LEFT JOIN recursos rv ON rv.id_recursos = v.recursos_id_estado
+GROUP BY s.id_servidor
+"""
+
+# Métrica -> (posición del recurso en (ram, disco, vcpu), columna de lo asignado)
+METRICS = {'mem_usage': (0, 'ram'), 'cpu_usage': (2, 'vcpu')}
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Percentil por interpolación lineal (como numpy.percentile)."""
+    values = sorted(values)
+    position = (len(values) - 1) * percentile / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class OvercommitFactors:
+    """
+    Factores de sobreasignación (ram, disco, vcpu) por worker.
+
+    Se usa en lugar del RESOURCE_FACTOR numérico en el libro de
+    capacidad y en las reservas: los workers sin factor propio usan el
+    factor por defecto.
+    """
+
+    def __init__(self, default: float, factors: Optional[Dict[int, Tuple[float, float, float]]] = None,
+                 usage: Optional[Dict[int, Dict[str, Any]]] = None):
+        self.default = float(default)
+        self.factors = dict(factors or {})
+        self.usage = dict(usage or {})
+        self.computed_at = time.time()
+
+    def for_worker(self, worker_id: Any) -> Tuple[float, float, float]:
+        """Factores (ram, disco, vcpu) de un worker."""
+        return self.factors.get(worker_id, (self.default, self.default, self.default))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable (factores y uso observado por worker)."""
+        return {
+            'default': self.default,
+            'computed_at': self.computed_at,
+            'workers': {
+                worker_id: {
+                    'ram': round(factors[0], 3), 'disco': round(factors[1], 3), 'vcpu': round(factors[2], 3),
+                    **self.usage.get(worker_id, {})
+                }
+                for worker_id, factors in sorted(self.factors.items())
+            }
+        }
+
+
+def compute_overcommit(db: Optional[DatabaseManager] = None,
+                       settings: Optional[Dict[str, Any]] = None) -> OvercommitFactors:
+    """
+    Calcula los factores de sobreasignación a partir de las métricas.
+
+    Args:
+        db (optional): Gestor de base de datos
+        settings (optional): Parámetros (por defecto get_overcommit_config)
+
+    Returns:
+        OvercommitFactors: Factores por worker
+    """
+    db = db or DatabaseManager()
+    settings = settings or config.get_overcommit_config()
+    default = float(settings['default_factor'])
+    caps = {0: float(settings['max_ram']), 2: float(settings['max_vcpu'])}
+    minimum = float(settings['min_factor'])
+    target = float(settings['target_utilization'])
+
+    # (worker, vm, métrica) -> muestras y recursos asignados a la VM
+    samples: Dict[Tuple[int, int, str], List[float]] = {}
+    allocated: Dict[Tuple[int, int], Any] = {}
+    for row in db.execute_query(USAGE_QUERY, (f"-{int(settings['window_hours'])} hours",)):
+        samples.setdefault((row['worker_id'], row['id_vm'], row['tipo_metrica']), []).append(float(row['valor']))
+        allocated[(row['worker_id'], row['id_vm'])] = row
+
+    # worker -> recurso -> [uso ponderado, asignado, muestras]
+    totals: Dict[int, Dict[int, List[float]]] = {}
+    for (worker_id, vm_id, metric), values in samples.items():
+        resource, column = METRICS[metric]
+        amount = float(allocated[(worker_id, vm_id)][column] or 0)
+        usage = min(_percentile(values, float(settings['percentile'])), 100.0) / 100
+        entry = totals.setdefault(worker_id, {}).setdefault(resource, [0.0, 0.0, 0])
+        entry[0] += usage * amount
+        entry[1] += amount
+        entry[2] += len(values)
+
+    # Workers (o recursos) sin muestras suficientes por VM: uso medido del worker
+    worker_samples: Dict[Tuple[int, str], List[float]] = {}
+    for row in db.execute_query(WORKER_USAGE_QUERY, (f"-{int(settings['window_hours'])} hours",)):
+        worker_samples.setdefault((row['worker_id'], row['tipo_metrica']), []).append(float(row['valor']))
+    if worker_samples:
+        workers = {row['worker_id']: row for row in db.execute_query(WORKER_ALLOCATION_QUERY)}
+        for (worker_id, metric), values in worker_samples.items():
+            resource, column = METRICS[metric]
+            current = totals.get(worker_id, {}).get(resource)
+            if worker_id not in workers or (current and current[2] >= int(settings['min_samples'])):
+                continue
+            usage = min(max(_percentile(values, float(settings['percentile'])), 0.0), 100.0) / 100
+            capacity = float(workers[worker_id][f"{column}_total"] or 0)
+            totals.setdefault(worker_id, {})[resource] = [
+                usage * capacity, float(workers[worker_id][column] or 0), len(values)
+            ]
+
+    factors = {}
+    usage_report = {}
+    for worker_id, resources in totals.items():
+        worker_factors = [default, default, default]
+        report = {}
+        for resource, (used, amount, count) in resources.items():
+            if count < int(settings['min_samples']) or amount <= 0:
+                continue
+            ratio = used / amount
+            factor = target / ratio if ratio > 0 else caps[resource]
+            worker_factors[resource] = max(minimum, min(caps[resource], factor))
+            report[f"uso_{'ram' if resource == 0 else 'vcpu'}"] = round(ratio, 4)
+        if report:
+            factors[worker_id] = tuple(worker_factors)
+            usage_report[worker_id] = report
+
+    return OvercommitFactors(default, factors, usage_report)
+
+
+# ===================================================================
+# FACTORES COMPARTIDOS POR BASE DE DATOS
+# ===================================================================
+
+_cache: Dict[str, OvercommitFactors] = {}
+_cache_lock = threading.Lock()
+
+
+def get_resource_factor(db_path: Optional[str] = None) -> Union[float, OvercommitFactors]:
+    """
+    Factor de recursos a usar en el scheduling: RESOURCE_FACTOR si el
+    overcommit dinámico está desactivado, o los factores por worker
+    (recalculados cada OVERCOMMIT_REFRESH segundos).
+
+    Args:
+        db_path (optional): Ruta de la base de datos (por defecto la configurada)
+
+    Returns:
+        float u OvercommitFactors
+    """
+    settings = config.get_overcommit_config()
+    if not settings['enabled']:
+        return settings['default_factor']
+
+    db_path = db_path or config.get_db_config().get('db_path', './data/system.db')
+    with _cache_lock:
+        factors = _cache.get(db_path)
+        if factors is not None and time.time() - factors.computed_at < float(settings['refresh']):
+            return factors
+        try:
+            factors = compute_overcommit(DatabaseManager(db_path), settings)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error calculando overcommit dinámico: {e}")
+            return factors if factors is not None else settings['default_factor']
+        _cache[db_path] = factors
+        return factors
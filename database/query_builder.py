@@ -0,0 +1,293 @@
+"""
+===================================================================
+CONSTRUCTOR DE CONSULTAS PARAMETRIZADAS - SQLite3
+===================================================================
+
+Genera sentencias SQL con parámetros enlazados (?) y texto estable,
+de modo que la caché de sentencias preparadas de sqlite3 pueda
+reutilizarlas entre llamadas.
+
+Componentes:
+- parameterize(): extrae literales de fragmentos SQL heredados
+  (condiciones y valores construidos con f-strings)
+- build_select/insert/update/delete(): construyen sentencias a partir
+  de diccionarios de columnas y valores
+
+Versión: 3.1
+===================================================================
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$')
+_NUMBER = re.compile(r'\d+(\.\d+)?([eE][+-]?\d+)?')
+_WORD = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Palabras clave tras las que un número es una posición de columna
+# (ORDER BY 1, GROUP BY 2) y no un valor
+_POSITIONAL_KEYWORDS = {'BY'}
+# Palabras clave que cierran una cláusula ORDER BY / GROUP BY
+_CLAUSE_KEYWORDS = {
+    'LIMIT', 'OFFSET', 'HAVING', 'WHERE', 'AND', 'OR', 'UNION',
+    'DESC', 'ASC', 'FROM', 'SELECT'
+}
+
+# Funciones MySQL que aparecen en código heredado y su equivalente SQLite
+_LEGACY_FUNCTIONS = {
+    'now()': 'CURRENT_TIMESTAMP'
+}
+
+
+def parameterize(fragment: str) -> Tuple[str, List[Any]]:
+    """
+    Reemplaza los literales de un fragmento SQL por placeholders.
+
+    Los literales entre comillas simples y los números sueltos se
+    extraen como parámetros; identificadores, comillas dobles y
+    posiciones de columna en ORDER BY / GROUP BY se conservan.
+
+    Args:
+        fragment: Fragmento SQL (condición WHERE, lista de valores, SET)
+
+    Returns:
+        Tuple[str, List]: (texto con placeholders, parámetros)
+
+    Ejemplo:
+        >>> parameterize("nombre='slice1' AND vlan_id=10")
+        ('nombre=? AND vlan_id=?', ['slice1', 10])
+    """
+    out: List[str] = []
+    params: List[Any] = []
+    i = 0
+    length = len(fragment)
+    positional = False
+
+    while i < length:
+        char = fragment[i]
+
+        # Literal de texto con comillas simples ('' como escape)
+        if char == "'":
+            j = i + 1
+            chunks = []
+            while j < length:
+                if fragment[j] == "'":
+                    if j + 1 < length and fragment[j + 1] == "'":
+                        chunks.append("'")
+                        j += 2
+                        continue
+                    break
+                chunks.append(fragment[j])
+                j += 1
+            if j >= length:
+                # Comilla sin cerrar: no tocar el resto del fragmento
+                out.append(fragment[i:])
+                break
+            out.append('?')
+            params.append(''.join(chunks))
+            i = j + 1
+            continue
+
+        # Identificador entre comillas dobles o backticks: copiar intacto
+        if char in ('"', '`'):
+            j = fragment.find(char, i + 1)
+            j = length - 1 if j == -1 else j
+            out.append(fragment[i:j + 1])
+            i = j + 1
+            continue
+
+        # Palabra: identificador, palabra clave o función
+        if char.isalpha() or char == '_':
+            match = _WORD.match(fragment, i)
+            word = match.group(0)
+            upper = word.upper()
+            legacy = fragment[i:i + len(word) + 2].lower()
+            if legacy in _LEGACY_FUNCTIONS:
+                out.append(_LEGACY_FUNCTIONS[legacy])
+                i += len(word) + 2
+                continue
+            if upper in _POSITIONAL_KEYWORDS:
+                positional = True
+            elif upper in _CLAUSE_KEYWORDS:
+                positional = False
+            out.append(word)
+            i = match.end()
+            continue
+
+        # Número suelto (no forma parte de un identificador)
+        if char.isdigit() or (char == '.' and i + 1 < length and fragment[i + 1].isdigit()):
+            match = _NUMBER.match(fragment, i) if char.isdigit() else None
+            prev = fragment[i - 1] if i > 0 else ''
+            if match and not (prev.isalnum() or prev in ('_', '.')):
+                end = match.end()
+                nxt = fragment[end] if end < length else ''
+                if not (nxt.isalpha() or nxt == '_'):
+                    if positional:
+                        out.append(match.group(0))
+                    else:
+                        literal = match.group(0)
+                        is_float = match.group(1) or match.group(2)
+                        out.append('?')
+                        params.append(float(literal) if is_float else int(literal))
+                    i = end
+                    continue
+            out.append(char)
+            i += 1
+            continue
+
+        out.append(char)
+        i += 1
+
+    return ''.join(out), params
+
+
+def _check_identifier(name: str) -> str:
+    """
+    Valida que un nombre de tabla o columna sea un identificador simple.
+
+    Raises:
+        ValueError: Si el nombre contiene caracteres no permitidos
+    """
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Identificador SQL inválido: {name!r}")
+    return name
+
+
+def _where(where: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    """
+    Construye una cláusula WHERE de igualdades unidas por AND.
+    Un valor None se traduce a IS NULL y una lista/tupla a IN (...).
+    """
+    if not where:
+        return '', []
+
+    conditions = []
+    params: List[Any] = []
+    for column, value in where.items():
+        _check_identifier(column)
+        if value is None:
+            conditions.append(f"{column} IS NULL")
+        elif isinstance(value, (list, tuple, set)):
+            values = list(value)
+            if not values:
+                conditions.append("0")
+                continue
+            conditions.append(f"{column} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        else:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+
+    return ' WHERE ' + ' AND '.join(conditions), params
+
+
+def build_select(
+    table: str,
+    columns: Sequence[str] = ('*',),
+    where: Optional[Dict[str, Any]] = None,
+    order_by: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[str, List[Any]]:
+    """
+    Construye un SELECT parametrizado.
+
+    Args:
+        table: Tabla a consultar
+        columns: Columnas a devolver
+        where: Igualdades {columna: valor}
+        order_by: Columna de ordenamiento (admite sufijo DESC/ASC)
+        limit: Máximo de filas
+
+    Returns:
+        Tuple[str, List]: (sentencia, parámetros)
+    """
+    _check_identifier(table)
+    cols = ','.join(c if c == '*' else _check_identifier(c) for c in columns)
+    where_sql, params = _where(where)
+    sql = f"SELECT {cols} FROM {table}{where_sql}"
+
+    if order_by:
+        parts = order_by.split()
+        direction = parts[1].upper() if len(parts) > 1 else ''
+        if direction not in ('', 'ASC', 'DESC'):
+            raise ValueError(f"Dirección de orden inválida: {order_by!r}")
+        sql += f" ORDER BY {_check_identifier(parts[0])}{' ' + direction if direction else ''}"
+
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    return sql, params
+
+
+def build_insert(table: str, values: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Construye un INSERT parametrizado.
+
+    Args:
+        table: Tabla destino
+        values: {columna: valor}
+
+    Returns:
+        Tuple[str, List]: (sentencia, parámetros)
+    """
+    _check_identifier(table)
+    columns = [_check_identifier(c) for c in values]
+    sql = f"INSERT INTO {table} ({','.join(columns)}) VALUES ({','.join('?' * len(columns))})"
+    return sql, list(values.values())
+
+
+def build_update(table: str, values: Dict[str, Any], where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Construye un UPDATE parametrizado. Exige condición para no
+    actualizar la tabla completa por accidente.
+
+    Args:
+        table: Tabla destino
+        values: {columna: nuevo_valor}
+        where: Igualdades {columna: valor}
+
+    Returns:
+        Tuple[str, List]: (sentencia, parámetros)
+    """
+    _check_identifier(table)
+    if not where:
+        raise ValueError("build_update requiere una condición WHERE")
+    assignments = ','.join(f"{_check_identifier(c)} = ?" for c in values)
+    where_sql, where_params = _where(where)
+    return f"UPDATE {table} SET {assignments}{where_sql}", list(values.values()) + where_params
+
+
+def build_delete(table: str, where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Construye un DELETE parametrizado. Exige condición.
+
+    Args:
+        table: Tabla destino
+        where: Igualdades {columna: valor}
+
+    Returns:
+        Tuple[str, List]: (sentencia, parámetros)
+    """
+    _check_identifier(table)
+    if not where:
+        raise ValueError("build_delete requiere una condición WHERE")
+    where_sql, params = _where(where)
+    return f"DELETE FROM {table}{where_sql}", params
+
+
+def build_insert_many(table: str, columns: Iterable[str]) -> str:
+    """
+    Construye el texto de un INSERT para usar con executemany.
+
+    Args:
+        table: Tabla destino
+        columns: Columnas en el orden de las tuplas de valores
+
+    Returns:
+        str: Sentencia con placeholders
+    """
+    _check_identifier(table)
+    cols = [_check_identifier(c) for c in columns]
+    return f"INSERT INTO {table} ({','.join(cols)}) VALUES ({','.join('?' * len(cols))})"
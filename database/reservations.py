@@ -0,0 +1,410 @@
+"""
+===================================================================
+RESERVAS DE RECURSOS EN DOS FASES - SQLite3
+===================================================================
+
+Reservas temporales de capacidad entre la decisión del scheduler y
+la creación de las VMs por el driver:
+
+1. hold: descuenta la capacidad de recursos.*_available con un UPDATE
+   condicional (solo si alcanza) y registra la reserva con un TTL.
+   Todas las reservas de un slice se toman en una sola transacción:
+   o se reservan todos los nodos o ninguno.
+2. commit: el driver confirma las reservas de las VMs creadas; la
+   capacidad queda descontada mientras exista la VM. Si la VM la
+   registra SliceUnitOfWork, la unidad de trabajo la descuenta del
+   libro de capacidad; si no (drivers legados de Modules/), la reserva
+   se queda en el libro como consumo de la VM (consume_in_ledger).
+3. release: el driver libera las reservas de los nodos que fallaron
+   (finish confirma y libera en un solo paso).
+   Las reservas pendientes que superan su TTL se liberan solas
+   (expire_stale) en la siguiente reserva.
+
+La capacidad se descuenta en unidades de la base de datos, es decir,
+lo pedido dividido por el factor de recursos con el que el scheduler
+escala la capacidad (RESOURCE_FACTOR, o el factor de cada worker y
+recurso con el overcommit dinámico).
+
+Como cada cambio de capacidad es atómico en SQLite, varias corridas
+de scheduling concurrentes (en hilos o procesos distintos) no pueden
+sobre-reservar un worker y no necesitan un lock global.
+
+Versión: 3.1
+===================================================================
+"""
+
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from conf.ConfigManager import config
+from database.DatabaseManager import DatabaseManager
+from database.capacity_ledger import get_capacity_ledger, resource_factors
+from database.catalog_cache import WORKERS, invalidate_catalog
+
+
+RESERVATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS reserva_recursos (
+    id_reserva INTEGER PRIMARY KEY AUTOINCREMENT,
+    token VARCHAR(32) NOT NULL,
+    slice_nombre VARCHAR(100),
+    nodo VARCHAR(100) NOT NULL,
+    vm_nombre VARCHAR(100),
+    servidor_id INTEGER NOT NULL,
+    ram REAL NOT NULL,
+    storage REAL NOT NULL,
+    vcpu REAL NOT NULL,
+    factor REAL DEFAULT 1,
+    factor_ram REAL,
+    factor_storage REAL,
+    factor_vcpu REAL,
+    estado VARCHAR(20) DEFAULT 'pendiente',
+    expira_en REAL NOT NULL,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (servidor_id) REFERENCES servidor(id_servidor)
+);
+CREATE INDEX IF NOT EXISTS idx_reserva_token ON reserva_recursos(token);
+CREATE INDEX IF NOT EXISTS idx_reserva_estado_expira ON reserva_recursos(estado, expira_en);
+CREATE INDEX IF NOT EXISTS idx_reserva_vm ON reserva_recursos(vm_nombre);
+"""
+
+# Descuento condicional: solo se aplica si el worker tiene capacidad suficiente
+HOLD_SQL = """
+UPDATE recursos
+SET ram_available = ram_available - ?,
+    storage_available = storage_available - ?,
+    vcpu_available = vcpu_available - ?
+WHERE id_recursos = (SELECT id_recurso FROM servidor WHERE id_servidor = ?)
+  AND ram_available >= ? AND storage_available >= ? AND vcpu_available >= ?
+"""
+
+# Descuento incondicional: la VM de una reserva vencida ya existe
+TAKE_SQL = """
+UPDATE recursos
+SET ram_available = ram_available - ?,
+    storage_available = storage_available - ?,
+    vcpu_available = vcpu_available - ?
+WHERE id_recursos = (SELECT id_recurso FROM servidor WHERE id_servidor = ?)
+"""
+
+# Columnas agregadas después de la primera versión de la tabla
+ADDED_COLUMNS = {'factor_ram': 'REAL', 'factor_storage': 'REAL', 'factor_vcpu': 'REAL'}
+
+RESERVATION_COLUMNS = "id_reserva, nodo, servidor_id, ram, storage, vcpu, factor, " \
+                      "factor_ram, factor_storage, factor_vcpu, estado"
+
+RETURN_SQL = """
+UPDATE recursos
+SET ram_available = ram_available + ?,
+    storage_available = storage_available + ?,
+    vcpu_available = vcpu_available + ?
+WHERE id_recursos = (SELECT id_recurso FROM servidor WHERE id_servidor = ?)
+"""
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+class ReservationError(Exception):
+    """
+    No hay capacidad suficiente para reservar los recursos pedidos
+    (por ejemplo, porque otra corrida concurrente los tomó antes).
+    """
+
+    def __init__(self, message: str, nodo: Optional[str] = None, worker_id: Optional[int] = None):
+        super().__init__(message)
+        self.nodo = nodo
+        self.worker_id = worker_id
+
+
+class ReservationManager:
+    """
+    Gestor de reservas de capacidad sobre la tabla reserva_recursos.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, ttl: Optional[float] = None):
+        """
+        Inicializa el gestor.
+
+        Args:
+            db (optional): Gestor de base de datos a usar
+            ttl (optional): Segundos de validez de una reserva pendiente
+                            (por defecto RESERVATION_TTL)
+        """
+        self.db = db or DatabaseManager()
+        self.ttl = float(ttl if ttl is not None else config.get_scheduler_config()['reservation_ttl'])
+        self.ledger = get_capacity_ledger(self.db.db_path)
+        self.logger = logging.getLogger(__name__)
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """Crea la tabla de reservas en bases de datos anteriores a ella."""
+        with _schema_lock:
+            if self.db.db_path in _schema_ready:
+                return
+            with self.db.connection() as conn:
+                conn.executescript(RESERVATIONS_DDL)
+                existing = {row[1] for row in conn.execute("PRAGMA table_info(reserva_recursos)")}
+                for column, kind in ADDED_COLUMNS.items():
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE reserva_recursos ADD COLUMN {column} {kind}")
+                conn.commit()
+            _schema_ready.add(self.db.db_path)
+
+    # ===================================================================
+    # FASE 1: RESERVA
+    # ===================================================================
+
+    def hold(self, slice_nombre: str, items: Iterable[Dict[str, Any]],
+             factor: Any = 1, ttl: Optional[float] = None) -> str:
+        """
+        Reserva los recursos de varios nodos en una sola transacción.
+
+        Args:
+            slice_nombre: Nombre del slice
+            items: Nodos a reservar: {'nodo', 'worker_id', 'ram', 'disk', 'vcpu'}
+                   con los recursos tal como los pide la VM
+            factor: Factor de recursos del scheduler (RESOURCE_FACTOR) o
+                    factores por worker y recurso (OvercommitFactors)
+            ttl (optional): Segundos de validez (por defecto el del gestor)
+
+        Returns:
+            str: Token que identifica las reservas
+
+        Raises:
+            ReservationError: Si algún worker no tiene capacidad suficiente
+                              (no se reserva ningún nodo)
+        """
+        self.expire_stale()
+
+        items = list(items)
+        token = uuid.uuid4().hex
+        expira_en = time.time() + (self.ttl if ttl is None else float(ttl))
+
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for item in items:
+                    ram_factor, storage_factor, vcpu_factor = resource_factors(factor, item['worker_id'])
+                    ram = float(item['ram']) / ram_factor
+                    storage = float(item['disk']) / storage_factor
+                    vcpu = float(item['vcpu']) / vcpu_factor
+                    cursor.execute(HOLD_SQL, (ram, storage, vcpu, item['worker_id'], ram, storage, vcpu))
+                    if cursor.rowcount != 1:
+                        raise ReservationError(
+                            f"Worker {item['worker_id']} sin capacidad para el nodo {item['nodo']}",
+                            nodo=item['nodo'], worker_id=item['worker_id']
+                        )
+                    cursor.execute(
+                        "INSERT INTO reserva_recursos (token, slice_nombre, nodo, servidor_id, ram, storage, "
+                        "vcpu, factor_ram, factor_storage, factor_vcpu, expira_en) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (token, slice_nombre, item['nodo'], item['worker_id'], ram, storage, vcpu,
+                         ram_factor, storage_factor, vcpu_factor, expira_en)
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        for item in items:
+            self.ledger.consume(item['worker_id'], item['ram'], item['disk'], item['vcpu'])
+        invalidate_catalog(WORKERS)
+
+        self.logger.info(f"Reserva {token[:8]} tomada para {len(items)} nodos de {slice_nombre}")
+        return token
+
+    # ===================================================================
+    # FASE 2: CONFIRMACIÓN O LIBERACIÓN
+    # ===================================================================
+
+    def commit(self, token: str, vm_names: Dict[str, str], consume_in_ledger: bool = False) -> int:
+        """
+        Confirma las reservas de los nodos cuyas VMs se crearon.
+
+        La capacidad ya descontada en la base de datos queda asignada a
+        la VM; en el libro de capacidad la reserva se cambia por la VM
+        que registra la unidad de trabajo. Si la reserva venció mientras
+        se creaba la VM, su capacidad se vuelve a descontar.
+
+        Args:
+            token: Token de la reserva
+            vm_names: Clave del nodo -> nombre de la VM creada
+            consume_in_ledger: True si ninguna SliceUnitOfWork registrará
+                               las VMs: la reserva queda en el libro como
+                               consumo de la VM en lugar de quitarse
+
+        Returns:
+            int: Reservas confirmadas
+        """
+        confirmed, retaken = [], []
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for nodo, vm_nombre in vm_names.items():
+                    cursor.execute(
+                        f"SELECT {RESERVATION_COLUMNS} FROM reserva_recursos "
+                        "WHERE token = ? AND nodo = ? AND estado IN ('pendiente', 'expirada')",
+                        (token, nodo)
+                    )
+                    row = cursor.fetchone()
+                    if row is None:
+                        continue
+                    cursor.execute(
+                        "UPDATE reserva_recursos SET estado = 'confirmada', vm_nombre = ? "
+                        "WHERE id_reserva = ? AND estado = ?",
+                        (vm_nombre, row['id_reserva'], row['estado'])
+                    )
+                    if cursor.rowcount != 1:
+                        continue
+                    if row['estado'] == 'expirada':
+                        self.logger.warning(f"Reserva del nodo {nodo} confirmada después de vencer")
+                        cursor.execute(TAKE_SQL, (row['ram'], row['storage'], row['vcpu'], row['servidor_id']))
+                        retaken.append(row)
+                    else:
+                        confirmed.append(row)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        if retaken:
+            invalidate_catalog(WORKERS)
+        if consume_in_ledger:
+            # Las reservas vencidas ya se habían quitado del libro: la VM se vuelve a descontar
+            for row in retaken:
+                self.ledger.consume(row['servidor_id'], *self._ledger_amounts(row))
+        else:
+            # La unidad de trabajo descuenta la VM; las vencidas ya se habían quitado del libro
+            for row in confirmed:
+                self._ledger_release(row)
+        return len(confirmed)
+
+    def release(self, token: str, nodos: Optional[Iterable[str]] = None) -> int:
+        """
+        Libera las reservas pendientes de un token (o solo de los nodos
+        indicados) y devuelve su capacidad.
+
+        Returns:
+            int: Reservas liberadas
+        """
+        rows = self.db.execute_query(
+            f"SELECT {RESERVATION_COLUMNS} FROM reserva_recursos "
+            "WHERE token = ? AND estado = 'pendiente'", (token,)
+        )
+        if nodos is not None:
+            wanted = set(nodos)
+            rows = [row for row in rows if row['nodo'] in wanted]
+        return self._give_back(rows, 'pendiente', 'liberada')
+
+    def finish(self, token: str, vm_names: Dict[str, str], consume_in_ledger: bool = False) -> Dict[str, int]:
+        """
+        Cierra una reserva: confirma los nodos cuyas VMs se crearon y
+        libera el resto.
+
+        Args:
+            token: Token de la reserva
+            vm_names: Clave del nodo -> nombre de la VM creada
+            consume_in_ledger: Ver commit
+
+        Returns:
+            Dict: Reservas confirmadas y liberadas
+        """
+        confirmadas = self.commit(token, vm_names, consume_in_ledger) if vm_names else 0
+        liberadas = self.release(token)
+        return {'confirmadas': confirmadas, 'liberadas': liberadas}
+
+    def release_vm(self, vm_nombre: str) -> bool:
+        """
+        Devuelve la capacidad de la reserva confirmada de una VM eliminada.
+        El libro de capacidad lo ajusta quien elimina la VM.
+
+        Returns:
+            bool: True si la VM tenía una reserva confirmada
+        """
+        rows = self.db.execute_query(
+            f"SELECT {RESERVATION_COLUMNS} FROM reserva_recursos "
+            "WHERE vm_nombre = ? AND estado = 'confirmada'", (vm_nombre,)
+        )
+        return self._give_back(rows, 'confirmada', 'liberada', update_ledger=False) > 0
+
+    def expire_stale(self, now: Optional[float] = None) -> int:
+        """
+        Libera las reservas pendientes cuyo TTL ya venció.
+
+        Returns:
+            int: Reservas expiradas
+        """
+        rows = self.db.execute_query(
+            f"SELECT {RESERVATION_COLUMNS} FROM reserva_recursos "
+            "WHERE estado = 'pendiente' AND expira_en < ?",
+            (time.time() if now is None else now,)
+        )
+        expired = self._give_back(rows, 'pendiente', 'expirada')
+        if expired:
+            self.logger.warning(f"{expired} reservas pendientes expiraron sin confirmarse")
+        return expired
+
+    def _give_back(self, rows: List[Any], from_state: str, to_state: str,
+                   update_ledger: bool = True) -> int:
+        """
+        Cambia el estado de las reservas y devuelve su capacidad a recursos.
+        El cambio de estado es condicional, de modo que una reserva nunca
+        se devuelve dos veces aunque dos hilos la liberen a la vez.
+        """
+        if not rows:
+            return 0
+
+        returned = []
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for row in rows:
+                    cursor.execute(
+                        "UPDATE reserva_recursos SET estado = ? WHERE id_reserva = ? AND estado = ?",
+                        (to_state, row['id_reserva'], from_state)
+                    )
+                    if cursor.rowcount != 1:
+                        continue
+                    cursor.execute(RETURN_SQL, (row['ram'], row['storage'], row['vcpu'], row['servidor_id']))
+                    returned.append(row)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        if returned:
+            invalidate_catalog(WORKERS)
+        if update_ledger:
+            for row in returned:
+                self._ledger_release(row)
+        return len(returned)
+
+    @staticmethod
+    def _ledger_amounts(row: Any) -> Tuple[float, float, float]:
+        """Recursos (ram, disco, vcpu) de una reserva tal como los pidió la VM."""
+        # Las reservas anteriores al overcommit dinámico solo tienen 'factor'
+        factor = row['factor'] or 1
+        return (row['ram'] * (row['factor_ram'] or factor),
+                row['storage'] * (row['factor_storage'] or factor),
+                row['vcpu'] * (row['factor_vcpu'] or factor))
+
+    def _ledger_release(self, row: Any):
+        """Quita del libro de capacidad lo que la reserva había consumido."""
+        self.ledger.release(row['servidor_id'], *self._ledger_amounts(row))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene el número de reservas por estado.
+        """
+        rows = self.db.execute_query(
+            "SELECT estado, COUNT(*) AS total FROM reserva_recursos GROUP BY estado"
+        )
+        stats = {row['estado']: row['total'] for row in rows}
+        stats['ttl'] = self.ttl
+        return stats
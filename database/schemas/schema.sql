@@ -307,7 +307,10 @@ CREATE TABLE IF NOT EXISTS metricas_sistema (
 CREATE TABLE IF NOT EXISTS metricas_tiempo_real (
     id_metrica INTEGER PRIMARY KEY AUTOINCREMENT,
     nodo_id INTEGER NOT NULL,
-    tipo_metrica VARCHAR(30) NOT NULL,       -- cpu_usage, mem_usage, disk_io, net_io
+    tipo_metrica VARCHAR(30) NOT NULL,       -- cpu_usage, mem_usage (% en uso: de lo asignado en
+                                             -- el nodo de una VM, de la capacidad física en el de
+                                             -- un worker), ram_disponible, vcpu_disponible,
+                                             -- storage_disponible (valor_maximo = total), disk_io, net_io
     valor REAL NOT NULL,
     valor_maximo REAL,                       -- Valor máximo en el periodo
     valor_minimo REAL,                       -- Valor mínimo en el periodo
@@ -318,6 +321,32 @@ CREATE TABLE IF NOT EXISTS metricas_tiempo_real (
     FOREIGN KEY (nodo_id) REFERENCES nodo_cluster(id_nodo) ON DELETE CASCADE
 );
 
+-- TABLAS: metricas_rollup_5m / metricas_rollup_1h
+-- Agregados de metricas_tiempo_real por bloque de 5 minutos y de 1 hora
+-- (mantenidos por los triggers rollup_metricas_*)
+CREATE TABLE IF NOT EXISTS metricas_rollup_5m (
+    nodo_id INTEGER NOT NULL,
+    tipo_metrica VARCHAR(30) NOT NULL,
+    bucket DATETIME NOT NULL,
+    suma REAL NOT NULL,
+    minimo REAL NOT NULL,
+    maximo REAL NOT NULL,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (nodo_id, tipo_metrica, bucket),
+    FOREIGN KEY (nodo_id) REFERENCES nodo_cluster(id_nodo) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS metricas_rollup_1h (
+    nodo_id INTEGER NOT NULL,
+    tipo_metrica VARCHAR(30) NOT NULL,
+    bucket DATETIME NOT NULL,
+    suma REAL NOT NULL,
+    minimo REAL NOT NULL,
+    maximo REAL NOT NULL,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (nodo_id, tipo_metrica, bucket),
+    FOREIGN KEY (nodo_id) REFERENCES nodo_cluster(id_nodo) ON DELETE CASCADE
+);
+
 -- ===================================================================
 -- SECCIÓN 6: EVENTOS Y AUDITORÍA
 -- ===================================================================
@@ -376,6 +405,55 @@ CREATE TABLE IF NOT EXISTS configuracion_sistema (
     fecha_modificacion DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ===================================================================
+-- SECCIÓN 8: RESERVAS DE RECURSOS
+-- ===================================================================
+
+-- TABLA: reserva_recursos
+-- Reservas temporales de capacidad entre el scheduling y la creación de VMs
+CREATE TABLE IF NOT EXISTS reserva_recursos (
+    id_reserva INTEGER PRIMARY KEY AUTOINCREMENT,
+    token VARCHAR(32) NOT NULL,              -- Agrupa las reservas de un slice
+    slice_nombre VARCHAR(100),
+    nodo VARCHAR(100) NOT NULL,              -- Clave del nodo en el slice
+    vm_nombre VARCHAR(100),                  -- VM creada (al confirmar)
+    servidor_id INTEGER NOT NULL,
+    ram REAL NOT NULL,                       -- Descontado de recursos.ram_available
+    storage REAL NOT NULL,                   -- Descontado de recursos.storage_available
+    vcpu REAL NOT NULL,                      -- Descontado de recursos.vcpu_available
+    factor REAL DEFAULT 1,                   -- RESOURCE_FACTOR al reservar (reservas anteriores)
+    factor_ram REAL,                         -- Factor de RAM del worker al reservar
+    factor_storage REAL,                     -- Factor de disco del worker al reservar
+    factor_vcpu REAL,                        -- Factor de vCPU del worker al reservar
+    estado VARCHAR(20) DEFAULT 'pendiente',  -- pendiente, confirmada, liberada, expirada
+    expira_en REAL NOT NULL,                 -- Timestamp UNIX de expiración
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (servidor_id) REFERENCES servidor(id_servidor)
+);
+
+-- ===================================================================
+-- SECCIÓN 9: TRABAJOS ASÍNCRONOS
+-- ===================================================================
+
+-- TABLA: trabajo
+-- Creación y eliminación de slices encoladas por la API
+CREATE TABLE IF NOT EXISTS trabajo (
+    id_trabajo VARCHAR(32) PRIMARY KEY,
+    tipo VARCHAR(30) NOT NULL,               -- crear_slice, eliminar_slice
+    slice_nombre VARCHAR(100) NOT NULL,
+    driver VARCHAR(30),                      -- linux_cluster, openstack
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente', -- pendiente, ejecutando, completado, error, interrumpido
+    parametros TEXT,                         -- JSON con los datos del trabajo
+    progreso TEXT,                           -- JSON con el estado de cada nodo
+    resultado TEXT,                          -- JSON con el resultado del driver
+    error TEXT,
+    codigo_error INTEGER,                    -- Código HTTP equivalente al error
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    fecha_inicio DATETIME,
+    fecha_fin DATETIME
+);
+
 -- ===================================================================
 -- ÍNDICES PARA OPTIMIZACIÓN
 -- ===================================================================
@@ -418,7 +496,16 @@ CREATE INDEX IF NOT EXISTS idx_eventos_servidor ON eventos_cluster(servidor_id);
 -- Índices compuestos para consultas complejas
 CREATE INDEX IF NOT EXISTS idx_metricas_nodo_timestamp ON metricas_tiempo_real(nodo_id, timestamp);
 CREATE INDEX IF NOT EXISTS idx_metricas_tipo_timestamp ON metricas_tiempo_real(tipo_metrica, timestamp);
+CREATE INDEX IF NOT EXISTS idx_rollup_5m_tipo_bucket ON metricas_rollup_5m(tipo_metrica, bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_5m_bucket ON metricas_rollup_5m(bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_1h_tipo_bucket ON metricas_rollup_1h(tipo_metrica, bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_1h_bucket ON metricas_rollup_1h(bucket);
 CREATE INDEX IF NOT EXISTS idx_vm_servidor_slice ON vm(servidor_id_servidor, topologia_id_topologia);
+CREATE INDEX IF NOT EXISTS idx_reserva_token ON reserva_recursos(token);
+CREATE INDEX IF NOT EXISTS idx_reserva_estado_expira ON reserva_recursos(estado, expira_en);
+CREATE INDEX IF NOT EXISTS idx_reserva_vm ON reserva_recursos(vm_nombre);
+CREATE INDEX IF NOT EXISTS idx_trabajo_estado ON trabajo(estado);
+CREATE INDEX IF NOT EXISTS idx_trabajo_slice_estado ON trabajo(slice_nombre, estado);
 
 -- ===================================================================
 -- DATOS INICIALES
@@ -544,6 +631,34 @@ BEGIN
     WHERE id_storage = NEW.id_storage;
 END;
 
+-- Triggers para mantener los rollups de métricas al insertar muestras
+CREATE TRIGGER IF NOT EXISTS rollup_metricas_5m
+    AFTER INSERT ON metricas_tiempo_real
+BEGIN
+    INSERT INTO metricas_rollup_5m (nodo_id, tipo_metrica, bucket, suma, minimo, maximo, cantidad)
+    VALUES (NEW.nodo_id, NEW.tipo_metrica,
+            datetime((CAST(strftime('%s', NEW.timestamp) AS INTEGER) / 300) * 300, 'unixepoch'),
+            NEW.valor, NEW.valor, NEW.valor, 1)
+    ON CONFLICT (nodo_id, tipo_metrica, bucket) DO UPDATE SET
+        suma = suma + excluded.suma,
+        minimo = MIN(minimo, excluded.minimo),
+        maximo = MAX(maximo, excluded.maximo),
+        cantidad = cantidad + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_metricas_1h
+    AFTER INSERT ON metricas_tiempo_real
+BEGIN
+    INSERT INTO metricas_rollup_1h (nodo_id, tipo_metrica, bucket, suma, minimo, maximo, cantidad)
+    VALUES (NEW.nodo_id, NEW.tipo_metrica, strftime('%Y-%m-%d %H:00:00', NEW.timestamp),
+            NEW.valor, NEW.valor, NEW.valor, 1)
+    ON CONFLICT (nodo_id, tipo_metrica, bucket) DO UPDATE SET
+        suma = suma + excluded.suma,
+        minimo = MIN(minimo, excluded.minimo),
+        maximo = MAX(maximo, excluded.maximo),
+        cantidad = cantidad + 1;
+END;
+
 -- Trigger para configuración
 CREATE TRIGGER IF NOT EXISTS update_config_timestamp 
     AFTER UPDATE ON configuracion_sistema
@@ -0,0 +1,240 @@
+"""
+===================================================================
+UNIDAD DE TRABAJO PARA DESPLIEGUE DE SLICES - SQLite3
+===================================================================
+
+Acumula en memoria las filas que genera el despliegue de un slice
+(recursos, vm, nodo_cluster y métricas iniciales del nodo) y las
+escribe con executemany en una única transacción.
+
+Si el despliegue falla antes de confirmar, no se escribe nada; si
+falla durante la escritura, la transacción se deshace completa.
+
+Uso:
+    with SliceUnitOfWork() as uow:
+        uow.add_vm(...)
+    # Al salir del bloque sin excepción se confirma todo junto
+
+Versión: 3.1
+===================================================================
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from database.DatabaseManager import DatabaseManager
+from database.capacity_ledger import get_capacity_ledger
+from database.query_builder import build_insert_many
+
+
+class SliceUnitOfWork:
+    """
+    Unidad de trabajo que agrupa las escrituras de despliegue de un slice.
+
+    Los IDs de las filas nuevas se reservan dentro de la transacción
+    (BEGIN IMMEDIATE toma el lock de escritura), de modo que las filas
+    hijas pueden referenciar a sus padres sin insertar una por una.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        """
+        Inicializa la unidad de trabajo.
+
+        Args:
+            db (optional): Gestor de base de datos a usar
+        """
+        self.db = db or DatabaseManager()
+        self.logger = logging.getLogger(__name__)
+
+        self._vms: List[Dict[str, Any]] = []
+        self.committed = False
+
+    # ===================================================================
+    # REGISTRO DE OPERACIONES
+    # ===================================================================
+
+    def add_vm(
+        self,
+        nombre: str,
+        recursos: Dict[str, int],
+        vnc_port: int,
+        worker_id: int,
+        slice_id: int,
+        image_id: int,
+        enlaces: Optional[List[str]] = None,
+        estado: str = 'ACTIVO'
+    ):
+        """
+        Registra una VM desplegada y las filas que dependen de ella.
+
+        Args:
+            nombre: Nombre completo de la VM (vm-xxxxxx)
+            recursos: {'ram': MB, 'disk': GB, 'vcpu': n}
+            vnc_port: Puerto VNC asignado
+            worker_id: ID del servidor físico
+            slice_id: ID del slice
+            image_id: ID de la imagen
+            enlaces: Nombres de las VMs enlazadas
+            estado: Estado inicial de la VM
+        """
+        self._vms.append({
+            'nombre': nombre,
+            'ram': int(recursos['ram']),
+            'disk': int(recursos['disk']),
+            'vcpu': int(recursos['vcpu']),
+            'vnc_port': vnc_port,
+            'worker_id': worker_id,
+            'slice_id': slice_id,
+            'image_id': image_id,
+            'enlaces': list(enlaces or []),
+            'estado': estado
+        })
+
+    @property
+    def pending(self) -> int:
+        """Número de VMs pendientes de escribir."""
+        return len(self._vms)
+
+    # ===================================================================
+    # CONFIRMACIÓN Y DESCARTE
+    # ===================================================================
+
+    def _next_id(self, cursor, table: str, id_column: str) -> int:
+        """
+        Obtiene el siguiente ID libre de una tabla AUTOINCREMENT,
+        considerando tanto sqlite_sequence como el máximo actual.
+        """
+        cursor.execute(
+            f"SELECT MAX("
+            f"COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0), "
+            f"COALESCE((SELECT MAX({id_column}) FROM {table}), 0))",
+            (table,)
+        )
+        return cursor.fetchone()[0] + 1
+
+    def commit(self) -> Dict[str, int]:
+        """
+        Escribe todas las filas registradas en una sola transacción.
+
+        Returns:
+            Dict con el número de filas escritas por tabla
+
+        Raises:
+            Exception: Si falla la escritura (la transacción se deshace)
+        """
+        if self.committed:
+            raise RuntimeError("La unidad de trabajo ya fue confirmada")
+
+        written = {'recursos': 0, 'vm': 0, 'nodo_cluster': 0}
+        if not self._vms:
+            self.committed = True
+            return written
+
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+
+                recursos_id = self._next_id(cursor, 'recursos', 'id_recursos')
+                vm_id = self._next_id(cursor, 'vm', 'id_vm')
+                nodo_id = self._next_id(cursor, 'nodo_cluster', 'id_nodo')
+
+                recursos_rows, vm_rows, nodo_rows = [], [], []
+                ram_rows, storage_rows, vcpu_rows, enlace_rows = [], [], [], []
+
+                for vm in self._vms:
+                    recursos_rows.append((
+                        recursos_id, vm['ram'], vm['disk'], vm['vcpu']
+                    ))
+                    vm_rows.append((
+                        vm_id, vm['nombre'], vm['estado'], vm['vnc_port'],
+                        vm['worker_id'], vm['slice_id'], vm['image_id'], recursos_id
+                    ))
+                    nodo_rows.append((
+                        nodo_id, vm['nombre'], 1, vm['vnc_port'], vm['worker_id'], vm_id
+                    ))
+                    ram_rows.append((vm['ram'], vm['ram'], nodo_id))
+                    storage_rows.append((vm['disk'], vm['disk'], nodo_id))
+                    vcpu_rows.append((vm['vcpu'], vm['vcpu'], nodo_id))
+                    if vm['enlaces']:
+                        enlace_rows.append((','.join(vm['enlaces']), nodo_id))
+
+                    recursos_id += 1
+                    vm_id += 1
+                    nodo_id += 1
+
+                cursor.executemany(
+                    build_insert_many('recursos', ['id_recursos', 'ram', 'storage', 'vcpu']),
+                    recursos_rows
+                )
+                cursor.executemany(
+                    build_insert_many('vm', [
+                        'id_vm', 'nombre', 'estado', 'vnc', 'servidor_id_servidor',
+                        'topologia_id_topologia', 'imagen_id_imagen', 'recursos_id_estado'
+                    ]),
+                    vm_rows
+                )
+                cursor.executemany(
+                    build_insert_many('nodo_cluster', [
+                        'id_nodo', 'nombre', 'tipo', 'puerto_vnc', 'worker_id', 'vm_id'
+                    ]),
+                    nodo_rows
+                )
+                cursor.executemany(
+                    build_insert_many('nodo_ram', ['memoria_total', 'memoria_disponible', 'nodo_id']),
+                    ram_rows
+                )
+                cursor.executemany(
+                    build_insert_many('nodo_almacenamiento', [
+                        'capacidad_total', 'capacidad_disponible', 'nodo_id'
+                    ]),
+                    storage_rows
+                )
+                cursor.executemany(
+                    build_insert_many('nodo_vcpu', ['vcpu_total', 'vcpu_disponibles', 'nodo_id']),
+                    vcpu_rows
+                )
+                if enlace_rows:
+                    cursor.executemany(
+                        build_insert_many('nodo_enlace', ['nombre', 'nodo_id']),
+                        enlace_rows
+                    )
+
+                conn.commit()
+
+            except Exception as e:
+                conn.rollback()
+                self.logger.error(f"Error confirmando unidad de trabajo ({len(self._vms)} VMs): {e}")
+                raise
+
+        written.update({
+            'recursos': len(self._vms),
+            'vm': len(self._vms),
+            'nodo_cluster': len(self._vms)
+        })
+        self.committed = True
+        # Descontar los recursos de las VMs creadas del libro de capacidad
+        get_capacity_ledger(self.db.db_path).consume_many(self._vms)
+        self.logger.info(f"Unidad de trabajo confirmada: {len(self._vms)} VMs en una transacción")
+        return written
+
+    def rollback(self):
+        """
+        Descarta las operaciones registradas sin escribir nada.
+        """
+        if self._vms:
+            self.logger.warning(f"Descartando {len(self._vms)} VMs pendientes de escribir")
+        self._vms.clear()
+
+    def __enter__(self):
+        """Soporte para context manager"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Confirma al salir sin errores; descarta si hubo excepción"""
+        if exc_type is not None:
+            self.rollback()
+            return False
+        if not self.committed:
+            self.commit()
+        return False
@@ -10,15 +10,31 @@ Drivers disponibles:
 - LinuxClusterDriver: Gestión de cluster Linux
 - OpenStackDriver: Gestión de OpenStack
 
+Los drivers se importan recién al accederlos (importar el paquete no
+carga requests ni los drivers); para obtener la instancia compartida
+de un driver usar drivers.registry.get_driver.
+
 Autor: Generado por Claude Code
 Versión: 3.0
 ===================================================================
 """
 
-from .linux_cluster_driver import LinuxClusterDriver
-from .openstack_driver import OpenStackDriver
+import importlib
+
+_LAZY = {
+    'LinuxClusterDriver': '.linux_cluster_driver',
+    'OpenStackDriver': '.openstack_driver'
+}
 
 __all__ = [
     'LinuxClusterDriver',
     'OpenStackDriver'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
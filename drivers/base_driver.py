@@ -12,11 +12,14 @@ Versión: 3.0
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 import json
 from pathlib import Path
 from conf.ConfigManager import config
+from database.reservations import ReservationManager
+from database.overcommit import get_resource_factor
+from .http_client import get_http_client
 
 
 class BaseDriver(ABC):
@@ -31,6 +34,8 @@ class BaseDriver(ABC):
         """
         self.logger = logging.getLogger(self.__class__.__name__)
         self.config = config
+        # Cliente HTTP compartido (conexiones keep-alive y reintentos)
+        self.http = get_http_client()
         
     @abstractmethod
     def create_slice(self, slice_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -71,6 +76,62 @@ class BaseDriver(ABC):
         """
         pass
     
+    def _reserve_resources(self, slice_data: Dict[str, Any], items: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Reserva la capacidad de los nodos a crear. Si el scheduler ya
+        tomó una reserva para el slice, se reutiliza su token.
+        
+        Args:
+            slice_data: Datos del slice
+            items: Nodos a reservar: {'nodo', 'worker_id', 'ram', 'disk', 'vcpu'}
+            
+        Returns:
+            Optional[str]: Token de la reserva (None si no hay nada que reservar)
+            
+        Raises:
+            ReservationError: Si algún worker ya no tiene capacidad suficiente
+        """
+        reserva = slice_data.get('reserva') or {}
+        if reserva.get('token'):
+            return reserva['token']
+        
+        items = [item for item in items if item['worker_id'] is not None]
+        if not items:
+            return None
+        
+        token = ReservationManager().hold(slice_data['nombre'], items, get_resource_factor())
+        slice_data['reserva'] = {'token': token}
+        return token
+    
+    def _finish_reservation(self, slice_data: Dict[str, Any], token: Optional[str],
+                            created: Dict[str, str]):
+        """
+        Confirma la reserva de las VMs creadas y libera la del resto de nodos.
+        
+        Args:
+            slice_data: Datos del slice
+            token: Token de la reserva (None si no se reservó)
+            created: Clave del nodo -> nombre de la VM creada
+        """
+        if not token:
+            return
+        try:
+            resumen = ReservationManager().finish(token, created)
+            self.logger.info(f"Reserva cerrada: {resumen['confirmadas']} confirmadas, "
+                             f"{resumen['liberadas']} liberadas")
+        except Exception as e:
+            # Las reservas pendientes expiran solas al vencer su TTL
+            self.logger.error(f"Error cerrando reserva: {e}")
+        slice_data.pop('reserva', None)
+    
+    @staticmethod
+    def _reservation_item(node_key: str, worker_id: Any, vm_resources: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Arma el pedido de reserva de un nodo a partir de sus recursos.
+        """
+        return {'nodo': node_key, 'worker_id': worker_id, 'ram': vm_resources['ram'],
+                'disk': vm_resources['disk'], 'vcpu': vm_resources['vcpu']}
+    
     def save_slice_to_file(self, slice_data: Dict[str, Any]) -> bool:
         """
         Guarda el slice en un archivo JSON.
@@ -0,0 +1,196 @@
+"""
+===================================================================
+EVENTOS DE SLICES
+===================================================================
+
+Canal de eventos en proceso para seguir el avance de la creación y
+eliminación de slices nodo por nodo. Los drivers publican un evento
+por cada cambio de estado de un nodo o del slice; los interesados
+(por ejemplo, los trabajos de la API) se suscriben con una función.
+
+Cada evento es un diccionario:
+    {'id', 'slice', 'nodo' (None si es del slice), 'estado',
+     'detalle', 'timestamp'}
+
+Estados de nodo: planificado (worker y recursos asignados),
+solicitado (creación pedida al cluster), creado, eliminado, error.
+Estados de slice: iniciado, flujos_configurados, flujos_error,
+creado, eliminado, error (solo los tres últimos cierran la operación).
+
+Los suscriptores se llaman en el hilo que publica (puede ser un hilo
+del motor de aprovisionamiento) y no deben bloquear; un suscriptor
+que falla no afecta al driver ni a los demás.
+
+Se guardan los últimos EVENTS_HISTORY_SIZE eventos de cada slice
+para que un cliente que se conecta tarde (o se reconecta con
+Last-Event-ID) reciba lo que se perdió. EventStream lleva los eventos
+de un slice a una corrutina (para el stream SSE de la API).
+
+Versión: 3.1
+===================================================================
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from conf.ConfigManager import config
+
+Listener = Callable[[Dict[str, Any]], None]
+
+# Eventos de slice que cierran una creación o eliminación
+SLICE_DONE = ('creado', 'eliminado', 'error')
+
+# Slices con historial guardado (los menos recientes se descartan)
+MAX_SLICES = 256
+
+_listeners: List[Listener] = []
+_history: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+def subscribe(listener: Listener) -> Listener:
+    """
+    Registra una función que recibe todos los eventos publicados.
+
+    Returns:
+        La misma función, para usarla luego con unsubscribe
+    """
+    with _lock:
+        _listeners.append(listener)
+    return listener
+
+
+def unsubscribe(listener: Listener):
+    """Quita una función registrada con subscribe."""
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def publish(slice_nombre: str, estado: str, nodo: Optional[str] = None,
+            **detalle: Any) -> Dict[str, Any]:
+    """
+    Publica un evento de un slice o de uno de sus nodos.
+
+    Args:
+        slice_nombre: Nombre del slice
+        estado: Estado nuevo del nodo o del slice
+        nodo (optional): Clave del nodo (None para eventos del slice)
+        **detalle: Datos adicionales (worker_id, vm, error, ...)
+
+    Returns:
+        Dict: Evento publicado
+    """
+    with _lock:
+        event = {
+            'id': next(_ids),
+            'slice': slice_nombre,
+            'nodo': nodo,
+            'estado': estado,
+            'detalle': detalle,
+            'timestamp': time.time()
+        }
+        history = _history.get(slice_nombre)
+        if history is None:
+            history = deque(maxlen=int(config.get_events_config()['history_size']))
+            _history[slice_nombre] = history
+            while len(_history) > MAX_SLICES:
+                _history.popitem(last=False)
+        else:
+            _history.move_to_end(slice_nombre)
+        history.append(event)
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error en suscriptor de eventos: {e}")
+    return event
+
+
+def history(slice_nombre: str, after_id: int = 0) -> List[Dict[str, Any]]:
+    """
+    Últimos eventos guardados de un slice.
+
+    Args:
+        slice_nombre: Nombre del slice
+        after_id (optional): Devolver solo los eventos con ID mayor
+
+    Returns:
+        List[Dict]: Eventos en orden de publicación
+    """
+    with _lock:
+        return [event for event in _history.get(slice_nombre, ()) if event['id'] > after_id]
+
+
+class EventStream:
+    """
+    Suscripción a los eventos de un slice para consumir desde asyncio.
+
+    Los eventos llegan desde los hilos de los drivers y se pasan al event
+    loop con call_soon_threadsafe. Primero se entregan los del historial
+    posteriores a after_id (sin after_id, los de la última operación,
+    desde su evento iniciado) y luego los nuevos, sin repetir.
+
+    Uso:
+        with EventStream(nombre, after_id) as stream:
+            event = await stream.get(timeout)
+    """
+
+    def __init__(self, slice_nombre: str, after_id: int = 0, max_pending: int = 1000):
+        self.slice_nombre = slice_nombre
+        self.last_id = after_id
+        self.dropped = 0
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._backlog: Deque[Dict[str, Any]] = deque()
+
+    def _put(self, event: Dict[str, Any]):
+        """Encola un evento en el loop (descarta si el cliente no da abasto)."""
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _on_event(self, event: Dict[str, Any]):
+        if event['slice'] == self.slice_nombre:
+            self._loop.call_soon_threadsafe(self._put, event)
+
+    def __enter__(self) -> 'EventStream':
+        # Suscribirse antes de leer el historial para no perder eventos
+        subscribe(self._on_event)
+        backlog = history(self.slice_nombre, self.last_id)
+        if self.last_id == 0:
+            starts = [i for i, event in enumerate(backlog)
+                      if event['nodo'] is None and event['estado'] == 'iniciado']
+            backlog = backlog[starts[-1]:] if starts else backlog
+        self._backlog.extend(backlog)
+        return self
+
+    def __exit__(self, *exc):
+        unsubscribe(self._on_event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Siguiente evento del slice.
+
+        Returns:
+            Optional[Dict]: Evento, o None si no llegó ninguno en timeout segundos
+        """
+        while True:
+            if self._backlog:
+                event = self._backlog.popleft()
+            else:
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    return None
+            if event['id'] > self.last_id:
+                self.last_id = event['id']
+                return event
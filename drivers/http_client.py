@@ -0,0 +1,239 @@
+"""
+===================================================================
+CLIENTE HTTP COMPARTIDO
+===================================================================
+
+Cliente HTTP único por proceso para los drivers y las rutas de la API.
+Reutiliza conexiones keep-alive por host (Keystone, Nova, Neutron y
+API del cluster) en lugar de abrir una conexión TCP por llamada.
+
+Características:
+- Pool de conexiones por host (requests.Session + HTTPAdapter)
+- Reintentos con backoff exponencial solo para métodos idempotentes
+- Timeout por defecto desde configuración
+- Contadores de latencia por endpoint
+
+Versión: 3.1
+===================================================================
+"""
+
+import re
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from conf.ConfigManager import config
+
+
+# Métodos que pueden repetirse sin efectos secundarios adicionales
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# Segmentos de ruta variables (IDs numéricos, UUIDs, hashes) que se agrupan
+_VARIABLE_SEGMENT = re.compile(r'^([0-9]+|[0-9a-fA-F-]{32,36}|[0-9a-fA-F]{6,})$')
+
+
+class HttpClient:
+    """
+    Cliente HTTP con conexiones persistentes, reintentos y métricas.
+
+    Los errores de conexión se reintentan para cualquier método, ya que
+    la petición no llegó a enviarse; los errores de lectura y las
+    respuestas 429/5xx solo se reintentan en métodos idempotentes.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_maxsize: int = 20
+    ):
+        """
+        Inicializa el cliente.
+
+        Args:
+            timeout: Timeout por defecto de cada petición en segundos
+            max_retries: Reintentos máximos por petición
+            backoff_factor: Factor del backoff exponencial entre reintentos
+            pool_maxsize: Conexiones keep-alive máximas por host
+        """
+        self.timeout = float(timeout)
+        self.max_retries = int(max_retries)
+        self.backoff_factor = float(backoff_factor)
+        self.pool_maxsize = int(pool_maxsize)
+        self.logger = logging.getLogger(__name__)
+
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_maxsize,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_key(method: str, url: str) -> str:
+        """
+        Construye la clave de métricas de una petición: método, host y
+        ruta con los segmentos variables reemplazados por {id}.
+
+        Ejemplo:
+            GET http://10.20.12.54:8774/v2.1/servers/3f2a.../action
+            -> "GET 10.20.12.54:8774/v2.1/servers/{id}/action"
+        """
+        parts = urlsplit(url)
+        segments = [
+            '{id}' if _VARIABLE_SEGMENT.match(segment) else segment
+            for segment in parts.path.split('/')
+        ]
+        return f"{method.upper()} {parts.netloc}{'/'.join(segments)}"
+
+    def _record(self, key: str, elapsed_ms: float, status: Optional[int], error: bool):
+        """
+        Acumula una muestra de latencia para un endpoint.
+        """
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = {
+                    'requests': 0,
+                    'errors': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'last_status': None
+                }
+                self._stats[key] = stats
+            stats['requests'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['last_status'] = status
+            if error:
+                stats['errors'] += 1
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Ejecuta una petición HTTP con el pool compartido.
+
+        Args:
+            method: Método HTTP
+            url: URL completa
+            **kwargs: Argumentos de requests (json, headers, params, timeout...)
+
+        Returns:
+            requests.Response: Respuesta recibida
+
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla
+                                                  tras los reintentos
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        key = self.endpoint_key(method, url)
+        start = time.perf_counter()
+
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(key, (time.perf_counter() - start) * 1000, None, True)
+            raise
+
+        self._record(key, (time.perf_counter() - start) * 1000, response.status_code,
+                     response.status_code >= 400)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Petición GET"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Petición POST (sin reintentos salvo errores de conexión)"""
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        """Petición PUT"""
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        """Petición DELETE"""
+        return self.request('DELETE', url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración del cliente y la latencia por endpoint.
+
+        Returns:
+            Dict con configuración y métricas por endpoint
+        """
+        with self._lock:
+            endpoints = {key: dict(value) for key, value in self._stats.items()}
+
+        for stats in endpoints.values():
+            stats['avg_ms'] = round(stats['total_ms'] / stats['requests'], 2) if stats['requests'] else 0.0
+            stats['total_ms'] = round(stats['total_ms'], 2)
+            stats['max_ms'] = round(stats['max_ms'], 2)
+
+        return {
+            'timeout': self.timeout,
+            'max_retries': self.max_retries,
+            'backoff_factor': self.backoff_factor,
+            'pool_maxsize': self.pool_maxsize,
+            'endpoints': endpoints
+        }
+
+    def close(self):
+        """
+        Cierra las conexiones persistentes del cliente.
+        """
+        self.session.close()
+
+
+# ===================================================================
+# INSTANCIA COMPARTIDA
+# ===================================================================
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """
+    Obtiene el cliente HTTP compartido por el proceso, creándolo con la
+    configuración de HTTP la primera vez.
+
+    Returns:
+        HttpClient: Cliente compartido
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_config = config.get_http_config()
+                _client = HttpClient(
+                    timeout=http_config.get('timeout', 30),
+                    max_retries=http_config.get('max_retries', 3),
+                    backoff_factor=http_config.get('backoff_factor', 0.5),
+                    pool_maxsize=http_config.get('pool_maxsize', 20)
+                )
+    return _client
@@ -0,0 +1,399 @@
+"""
+===================================================================
+TRABAJOS ASÍNCRONOS DE SLICES
+===================================================================
+
+Ejecuta la creación y eliminación de slices fuera del event loop de
+la API. Las rutas encolan un trabajo y responden 202 con su ID; un
+pool acotado de hilos (JOBS_MAX_WORKERS) llama al driver y el avance
+de cada nodo se toma de los eventos que publican los drivers
+(drivers.events). El avance se guarda en el trabajo como mucho una vez
+cada PROGRESS_INTERVAL segundos y al terminar; el detalle de cada
+evento queda en el stream de eventos.
+
+Los trabajos se guardan en la tabla trabajo de SQLite:
+- pendiente: encolado, todavía no empezó.
+- ejecutando: el driver está trabajando.
+- completado / error: terminó (con su resultado o su error).
+- interrumpido: el servicio se reinició mientras se ejecutaba; no se
+  reintenta porque el slice pudo quedar a medio crear.
+
+Al iniciar, los trabajos pendientes de una ejecución anterior se
+vuelven a encolar. La API crea el gestor en su lifespan (api.main) para
+que esto ocurra al arrancar, y al apagarse espera los trabajos en
+ejecución antes de cerrar los drivers.
+
+Versión: 3.1
+===================================================================
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from conf.ConfigManager import config
+from database.DatabaseManager import DatabaseManager
+from database.reservations import ReservationError
+from . import events
+
+
+JOBS_DDL = """
+CREATE TABLE IF NOT EXISTS trabajo (
+    id_trabajo VARCHAR(32) PRIMARY KEY,
+    tipo VARCHAR(30) NOT NULL,
+    slice_nombre VARCHAR(100) NOT NULL,
+    driver VARCHAR(30),
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    parametros TEXT,
+    progreso TEXT,
+    resultado TEXT,
+    error TEXT,
+    codigo_error INTEGER,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    fecha_inicio DATETIME,
+    fecha_fin DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_trabajo_estado ON trabajo(estado);
+CREATE INDEX IF NOT EXISTS idx_trabajo_slice_estado ON trabajo(slice_nombre, estado);
+"""
+
+ACTIVE_STATES = ('pendiente', 'ejecutando')
+
+# Estados de nodo que ya no cambian
+NODE_DONE = ('creado', 'eliminado', 'error')
+
+# Segundos mínimos entre escrituras del avance de un trabajo en ejecución
+PROGRESS_INTERVAL = 1.0
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+class JobConflict(Exception):
+    """
+    El slice ya tiene un trabajo pendiente o en ejecución.
+    """
+
+
+# ===================================================================
+# EJECUCIÓN DE CADA TIPO DE TRABAJO
+# ===================================================================
+
+def _driver(driver_type: str):
+    """Driver compartido de un tipo de slice (UnknownDriver es un ValueError)."""
+    from .registry import get_driver
+    return get_driver(driver_type)
+
+
+def _create_slice(job: Dict[str, Any]) -> Any:
+    """Crea el slice con el driver del trabajo."""
+    return _driver(job['driver']).create_slice(job['parametros']['slice'])
+
+
+def _delete_slice(job: Dict[str, Any]) -> Any:
+    """Elimina el slice con el driver del trabajo."""
+    nombre = job['slice_nombre']
+    driver = _driver(job['driver'])
+    # Cargar slice desde archivo para tener datos completos
+    slice_data = driver.load_slice_from_file(nombre) or {"nombre": nombre, "nodos": {}}
+    if not driver.delete_slice(slice_data):
+        raise RuntimeError(f"Error eliminando slice {nombre}")
+    return {"slice_name": nombre}
+
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    'crear_slice': _create_slice,
+    'eliminar_slice': _delete_slice
+}
+
+
+def _error_code(error: Exception) -> int:
+    """Código HTTP equivalente al error de un trabajo."""
+    if isinstance(error, ReservationError):
+        return 409
+    if isinstance(error, ValueError):
+        return 400
+    return 500
+
+
+class JobManager:
+    """
+    Cola persistente de trabajos de slices con un pool acotado de hilos.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, max_workers: Optional[int] = None,
+                 recover: bool = True):
+        """
+        Inicializa el gestor (por defecto con JOBS_MAX_WORKERS hilos).
+
+        Args:
+            db (optional): Gestor de base de datos
+            max_workers (optional): Trabajos ejecutándose a la vez
+            recover (optional): Retomar los trabajos de una ejecución anterior
+        """
+        self.db = db or DatabaseManager()
+        self.max_workers = int(max_workers or config.get_jobs_config()['max_workers'])
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._ensure_schema()
+        if recover:
+            self.recover()
+
+    def _ensure_schema(self):
+        """Crea la tabla de trabajos en bases de datos anteriores a ella."""
+        with _schema_lock:
+            if self.db.db_path in _schema_ready:
+                return
+            with self.db.connection() as conn:
+                conn.executescript(JOBS_DDL)
+                conn.commit()
+            _schema_ready.add(self.db.db_path)
+
+    def recover(self) -> Dict[str, int]:
+        """
+        Marca como interrumpidos los trabajos que quedaron ejecutándose y
+        vuelve a encolar los pendientes.
+
+        Returns:
+            Dict[str, int]: Trabajos interrumpidos y reencolados
+        """
+        with self.db.connection() as conn:
+            interrupted = conn.execute(
+                "UPDATE trabajo SET estado = 'interrumpido', fecha_fin = CURRENT_TIMESTAMP, "
+                "error = 'El servicio se reinició durante la ejecución' WHERE estado = 'ejecutando'"
+            ).rowcount
+            conn.commit()
+        pending = [row['id_trabajo'] for row in self.db.execute_query(
+            "SELECT id_trabajo FROM trabajo WHERE estado = 'pendiente' ORDER BY fecha_creacion"
+        )]
+        for job_id in pending:
+            self._schedule(job_id)
+        if interrupted or pending:
+            self.logger.warning(f"Trabajos interrumpidos: {interrupted}, reencolados: {len(pending)}")
+        return {'interrumpidos': interrupted, 'reencolados': len(pending)}
+
+    # ===================================================================
+    # ENCOLADO Y CONSULTA
+    # ===================================================================
+
+    def submit(self, tipo: str, slice_nombre: str, driver: Optional[str] = None,
+               parametros: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Encola un trabajo.
+
+        Args:
+            tipo: Tipo de trabajo (crear_slice, eliminar_slice)
+            slice_nombre: Slice sobre el que actúa
+            driver (optional): Tipo de driver del slice
+            parametros (optional): Datos del trabajo (serializables a JSON)
+
+        Returns:
+            str: ID del trabajo
+
+        Raises:
+            JobConflict: Si el slice ya tiene un trabajo activo
+        """
+        if tipo not in HANDLERS:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        job_id = uuid.uuid4().hex
+        with self.db.connection() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                active = conn.execute(
+                    "SELECT id_trabajo FROM trabajo WHERE slice_nombre = ? AND estado IN (?, ?)",
+                    (slice_nombre, *ACTIVE_STATES)
+                ).fetchone()
+                if active:
+                    raise JobConflict(f"El slice {slice_nombre} ya tiene el trabajo {active[0]} en curso")
+                conn.execute(
+                    "INSERT INTO trabajo (id_trabajo, tipo, slice_nombre, driver, parametros, progreso) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, tipo, slice_nombre, driver, json.dumps(parametros or {}),
+                     json.dumps(self._empty_progress()))
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self._schedule(job_id)
+        self.logger.info(f"Trabajo {job_id} encolado: {tipo} {slice_nombre}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un trabajo con su avance por nodo.
+
+        Returns:
+            Optional[Dict]: Trabajo o None si no existe
+        """
+        rows = self.db.execute_query("SELECT * FROM trabajo WHERE id_trabajo = ?", (job_id,))
+        return self._to_dict(rows[0]) if rows else None
+
+    def list(self, estado: Optional[str] = None, slice_nombre: Optional[str] = None,
+             limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Lista los trabajos más recientes (sin parámetros ni resultado).
+        """
+        conditions, params = [], []
+        if estado:
+            conditions.append("estado = ?")
+            params.append(estado)
+        if slice_nombre:
+            conditions.append("slice_nombre = ?")
+            params.append(slice_nombre)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.db.execute_query(
+            "SELECT id_trabajo, tipo, slice_nombre, driver, estado, progreso, error, codigo_error, "
+            f"fecha_creacion, fecha_inicio, fecha_fin FROM trabajo {where} "
+            "ORDER BY fecha_creacion DESC, rowid DESC LIMIT ?",
+            (*params, int(limit))
+        )
+        return [self._to_dict(row) for row in rows]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Espera a que termine un trabajo encolado en este proceso."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+        return self.get(job_id)
+
+    @staticmethod
+    def _empty_progress() -> Dict[str, Any]:
+        return {'total_nodos': None, 'completados': 0, 'nodos': {}}
+
+    @staticmethod
+    def _to_dict(row) -> Dict[str, Any]:
+        job = dict(row)
+        for field in ('parametros', 'progreso', 'resultado'):
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    # ===================================================================
+    # EJECUCIÓN
+    # ===================================================================
+
+    def _schedule(self, job_id: str):
+        future = self._executor.submit(self._run, job_id)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _save_progress(self, job_id: str, progress: Dict[str, Any]):
+        with self.db.connection() as conn:
+            conn.execute("UPDATE trabajo SET progreso = ? WHERE id_trabajo = ?", (json.dumps(progress), job_id))
+            conn.commit()
+
+    def _run(self, job_id: str):
+        """Ejecuta un trabajo en un hilo del pool."""
+        job = self.get(job_id)
+        if job is None or job['estado'] != 'pendiente':
+            return
+        with self.db.connection() as conn:
+            conn.execute(
+                "UPDATE trabajo SET estado = 'ejecutando', fecha_inicio = CURRENT_TIMESTAMP WHERE id_trabajo = ?",
+                (job_id,)
+            )
+            conn.commit()
+
+        progress = self._empty_progress()
+        progress_lock = threading.Lock()
+        last_saved = [float('-inf')]
+
+        def on_event(event: Dict[str, Any]):
+            if event['slice'] != job['slice_nombre']:
+                return
+            with progress_lock:
+                if event['nodo'] is None:
+                    if event['estado'] == 'iniciado':
+                        progress['total_nodos'] = event['detalle'].get('nodos')
+                    return
+                progress['nodos'][event['nodo']] = {'estado': event['estado'], **event['detalle']}
+                progress['completados'] = sum(1 for node in progress['nodos'].values()
+                                              if node['estado'] in NODE_DONE)
+                now = time.monotonic()
+                if now - last_saved[0] < PROGRESS_INTERVAL:
+                    return
+                last_saved[0] = now
+                snapshot = json.loads(json.dumps(progress, default=str))
+            self._save_progress(job_id, snapshot)
+
+        events.subscribe(on_event)
+        try:
+            result = HANDLERS[job['tipo']](job)
+            estado, error, codigo = 'completado', None, None
+        except Exception as e:
+            self.logger.error(f"Error en el trabajo {job_id} ({job['tipo']} {job['slice_nombre']}): {e}")
+            result, estado, error, codigo = None, 'error', str(e), _error_code(e)
+        finally:
+            events.unsubscribe(on_event)
+
+        with progress_lock:
+            final_progress = json.dumps(progress, default=str)
+        with self.db.connection() as conn:
+            conn.execute(
+                "UPDATE trabajo SET estado = ?, resultado = ?, error = ?, codigo_error = ?, progreso = ?, "
+                "fecha_fin = CURRENT_TIMESTAMP WHERE id_trabajo = ?",
+                (estado, json.dumps(result, default=str) if result is not None else None,
+                 error, codigo, final_progress, job_id)
+            )
+            conn.commit()
+        self.logger.info(f"Trabajo {job_id} {estado}")
+
+    def shutdown(self, wait: bool = True):
+        """
+        Detiene el pool de hilos. Los trabajos en ejecución terminan; los
+        que no empezaron quedan pendientes y se retoman al reiniciar.
+
+        Args:
+            wait (optional): Esperar a que terminen los trabajos en ejecución
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# ===================================================================
+# GESTOR COMPARTIDO POR BASE DE DATOS
+# ===================================================================
+
+_managers: Dict[str, JobManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_job_manager(db_path: Optional[str] = None) -> JobManager:
+    """
+    Obtiene el gestor de trabajos compartido de una base de datos (lo crea
+    y retoma los trabajos pendientes la primera vez).
+
+    Args:
+        db_path (optional): Ruta de la base de datos (por defecto la configurada)
+
+    Returns:
+        JobManager: Gestor de trabajos
+    """
+    db_path = db_path or config.get_db_config().get('db_path', './data/system.db')
+    with _managers_lock:
+        manager = _managers.get(db_path)
+        if manager is None:
+            manager = JobManager(DatabaseManager(db_path))
+            _managers[db_path] = manager
+        return manager
+
+
+def close_job_managers():
+    """Detiene los gestores de trabajos (al apagar la API)."""
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.shutdown()
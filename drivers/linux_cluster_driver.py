@@ -14,11 +14,15 @@ Versión: 3.0
 
 import requests
 import secrets
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 from .base_driver import BaseDriver
-from conf.Conexion import Conexion, Conexion2
+from conf.Conexion import Conexion
+from database.unit_of_work import SliceUnitOfWork
+from database.catalog_cache import IMAGES, invalidate_catalog
+from .provisioning import get_provisioning_engine
+from . import events
 
 
 class LinuxClusterDriver(BaseDriver):
@@ -26,7 +30,7 @@ class LinuxClusterDriver(BaseDriver):
     Driver para gestión de clusters Linux con VMs y switches OpenFlow.
     
     Características:
-    - Creación de VMs en workers específicos
+    - Creación concurrente de VMs en workers específicos
     - Gestión automática de VLANs
     - Configuración de flows OpenFlow
     - Asignación de puertos VNC
@@ -50,11 +54,13 @@ class LinuxClusterDriver(BaseDriver):
         Returns:
             Dict con el slice actualizado
         """
+        token = None
         try:
             if not self.validate_slice_data(slice_data):
                 raise ValueError("Datos de slice inválidos")
             
             self.logger.info(f"Iniciando creación de slice: {slice_data['nombre']}")
+            events.publish(slice_data['nombre'], 'iniciado', nodos=len(slice_data['nodos']))
             
             # 1. Obtener o crear ID del slice
             slice_id = self._get_or_create_slice_id(slice_data)
@@ -62,34 +68,83 @@ class LinuxClusterDriver(BaseDriver):
             # 2. Generar nombres únicos para VMs
             vm_names = self._generate_vm_names(slice_data['nodos'])
             
-            # 3. Crear VMs por nodo
+            # 3. Crear VMs por nodo (las filas se escriben en una sola transacción)
             worker_list = []
-            for node_key, node_data in slice_data['nodos'].items():
-                if node_data.get('instanciado', 'false') == 'false':
-                    success, worker_id = self._create_vm_for_node(
-                        node_key, node_data, vm_names, slice_id, slice_data
-                    )
+            resultados = {}
+            with SliceUnitOfWork() as uow:
+                # 3.1 Preparar nodos y reservar sus puertos VNC
+                tasks = []
+                for node_key, node_data in slice_data['nodos'].items():
+                    if node_data.get('instanciado', 'false') == 'false':
+                        task = self._prepare_node(node_key, node_data, vm_names, slice_data)
+                        if task is None:
+                            resultados[node_key] = {
+                                'node_key': node_key, 'worker_id': node_data.get('id_worker'),
+                                'success': False, 'error': 'Error preparando el nodo', 'elapsed': 0.0
+                            }
+                            events.publish(slice_data['nombre'], 'error', node_key,
+                                           worker_id=node_data.get('id_worker'), error='Error preparando el nodo')
+                        else:
+                            tasks.append(task)
+                            events.publish(slice_data['nombre'], 'planificado', node_key,
+                                           worker_id=task['worker_id'], vm=f"vm-{task['vm_name']}")
+                
+                # 3.2 Reservar la capacidad de los workers elegidos
+                token = self._reserve_resources(slice_data, [
+                    self._reservation_item(task['node_key'], task['worker_id'], task['vm_resources'])
+                    for task in tasks
+                ])
+                
+                # 3.3 Crear las VMs en paralelo (límites compartidos con otros slices)
+                results = get_provisioning_engine().run(tasks, self._provision_task, lambda result: events.publish(
+                    slice_data['nombre'], 'creado' if result['success'] else 'error', result['node_key'],
+                    worker_id=result['worker_id'], error=result['error'], elapsed=result['elapsed']
+                ))
+                
+                # 3.4 Registrar resultados en este hilo
+                for task, result in zip(tasks, results):
+                    resultados[task['node_key']] = result
+                    if not result['success']:
+                        continue
                     
-                    if success:
-                        node_data['instanciado'] = 'true'
-                        if str(worker_id) not in worker_list:
-                            worker_list.append(str(worker_id))
-            
-            # 4. Configurar flows OpenFlow
+                    self._save_vm_to_database(
+                        task['vm_name'], task['vm_resources'], task['vnc_port'], task['worker_id'],
+                        slice_id, task['image_id'], task['enlaces'], uow
+                    )
+                    slice_data['nodos'][task['node_key']]['instanciado'] = 'true'
+                    if str(task['worker_id']) not in worker_list:
+                        worker_list.append(str(task['worker_id']))
+            
+            # 3.5 Confirmar la reserva de las VMs creadas y liberar el resto
+            self._finish_reservation(slice_data, token, {
+                node_key: f"vm-{vm_names[node_key]}"
+                for node_key, result in resultados.items() if result['success']
+            })
+            token = None
+            
+            # 4. Configurar flows OpenFlow una vez creadas las VMs
             if worker_list:
-                self._configure_openflow_flows(slice_data.get('vlan_id'), worker_list)
+                if self._configure_openflow_flows(slice_data.get('vlan_id'), worker_list):
+                    events.publish(slice_data['nombre'], 'flujos_configurados', workers=worker_list)
+                else:
+                    events.publish(slice_data['nombre'], 'flujos_error', workers=worker_list,
+                                   error='Error configurando flows OpenFlow')
             
             # 5. Actualizar estado y guardar
             slice_data['estado'] = 'ejecutado'
             slice_data['mapeo_nombres'] = vm_names
+            slice_data['resultado_nodos'] = resultados
             
             self.save_slice_to_file(slice_data)
             
             self.logger.info(f"Slice {slice_data['nombre']} creado exitosamente")
+            events.publish(slice_data['nombre'], 'creado')
             return slice_data
             
         except Exception as e:
             self.logger.error(f"Error creando slice: {e}")
+            events.publish(slice_data.get('nombre'), 'error', error=str(e))
+            self._finish_reservation(slice_data, token, {})
             raise
     
     def delete_slice(self, slice_data: Dict[str, Any]) -> bool:
@@ -106,7 +161,6 @@ class LinuxClusterDriver(BaseDriver):
             self.logger.info(f"Iniciando eliminación de slice: {slice_data['nombre']}")
             
             conn = Conexion()
-            conn2 = Conexion2()
             
             # Obtener ID del slice
             slice_id_result = conn.Select("id_slice", "slice", f"nombre='{slice_data['nombre']}'")
@@ -120,8 +174,11 @@ class LinuxClusterDriver(BaseDriver):
             vms = conn.Select("nombre,servidor_id_servidor", "vm", f"topologia_id_topologia={slice_id}")
             
             # Eliminar cada VM
+            events.publish(slice_data['nombre'], 'iniciado', nodos=len(vms))
             for i, (vm_name, worker_id) in enumerate(vms):
-                success = self._delete_vm(vm_name, worker_id, conn, conn2)
+                success = self._delete_vm(vm_name, worker_id, conn)
+                events.publish(slice_data['nombre'], 'eliminado' if success else 'error', vm_name,
+                               worker_id=worker_id)
                 if not success:
                     self.logger.warning(f"Fallo eliminando VM {vm_name}")
             
@@ -129,10 +186,12 @@ class LinuxClusterDriver(BaseDriver):
             conn.Delete("slice", f"nombre='{slice_data['nombre']}'")
             
             self.logger.info(f"Slice {slice_data['nombre']} eliminado exitosamente")
+            events.publish(slice_data['nombre'], 'eliminado')
             return True
             
         except Exception as e:
             self.logger.error(f"Error eliminando slice: {e}")
+            events.publish(slice_data.get('nombre'), 'error', error=str(e))
             return False
     
     def get_slice_status(self, slice_name: str) -> Dict[str, Any]:
@@ -210,36 +269,13 @@ class LinuxClusterDriver(BaseDriver):
         if existing_slice:
             return existing_slice[0][0]
         
-        # Obtener próximo VLAN ID
-        vlan_id = self._get_next_vlan_id()
+        # Crear nuevo slice con el próximo VLAN ID
+        slice_id, vlan_id = conn.create_slice_record(slice_name, 'linux_cluster')
         slice_data['vlan_id'] = vlan_id
         
-        # Crear nuevo slice
-        slice_id = conn.Insert(
-            "slice",
-            "nombre,tipo,vlan_id,fecha_creacion,fecha_modificacion",
-            f"'{slice_name}','linux_cluster',{vlan_id},now(),now()"
-        )
-        
         self.logger.info(f"Slice creado con ID {slice_id} y VLAN {vlan_id}")
         return slice_id
     
-    def _get_next_vlan_id(self) -> int:
-        """
-        Obtiene el próximo VLAN ID disponible.
-        
-        Returns:
-            int: Próximo VLAN ID
-        """
-        conn = Conexion()
-        max_vlan_result = conn.GetMaxVlan()
-        max_vlan = max_vlan_result[0][0]
-        
-        if max_vlan is None:
-            max_vlan = 0
-        
-        return max_vlan + 1
-    
     def _generate_vm_names(self, nodos: Dict[str, Any]) -> Dict[str, str]:
         """
         Genera nombres únicos para las VMs.
@@ -255,30 +291,28 @@ class LinuxClusterDriver(BaseDriver):
             vm_names[nodo_key] = secrets.token_hex(3)
         return vm_names
     
-    def _create_vm_for_node(
-        self, 
+    def _prepare_node(
+        self,
         node_key: str,
         node_data: Dict[str, Any],
         vm_names: Dict[str, str],
-        slice_id: int,
         slice_data: Dict[str, Any]
-    ) -> Tuple[bool, Optional[int]]:
+    ) -> Optional[Dict[str, Any]]:
         """
-        Crea una VM para un nodo específico.
+        Prepara la creación de la VM de un nodo: resuelve recursos e imagen
+        y reserva su puerto VNC.
         
         Args:
             node_key: Clave del nodo
             node_data: Datos del nodo
             vm_names: Mapeo de nombres de VM
-            slice_id: ID del slice
             slice_data: Datos completos del slice
             
         Returns:
-            Tuple[bool, Optional[int]]: (éxito, worker_id)
+            Optional[Dict]: Tarea de aprovisionamiento o None si falla
         """
         try:
             conn = Conexion()
-            conn2 = Conexion2()
             
             vm_name = vm_names[node_key]
             
@@ -288,7 +322,7 @@ class LinuxClusterDriver(BaseDriver):
             # Obtener imagen
             image_id = self._get_or_create_image(node_data['config']['imagen'], conn)
             
-            # Obtener worker ID y puerto VNC
+            # Obtener worker ID y reservar puerto VNC
             worker_id = node_data['id_worker']
             vnc_port = self._get_next_vnc_port(worker_id, conn)
             
@@ -297,29 +331,40 @@ class LinuxClusterDriver(BaseDriver):
             if 'enlaces' in node_data:
                 enlaces = [vm_names[link] for link in node_data['enlaces'] if link in vm_names]
             
-            # Crear VM en el cluster
-            success = self._create_vm_in_cluster(
-                vm_name, vm_resources, enlaces, node_data['config']['imagen'],
-                slice_data.get('vlan_id'), vnc_port, worker_id
-            )
-            
-            if success:
-                # Guardar en base de datos
-                self._save_vm_to_database(
-                    vm_name, vm_resources, vnc_port, worker_id,
-                    slice_id, image_id, enlaces, conn, conn2
-                )
-                
-                # Actualizar puerto VNC máximo
-                conn.Update("servidor", f"max_vnc={vnc_port}", f"id_servidor={worker_id}")
-                
-                return True, worker_id
-            
-            return False, None
+            return {
+                'node_key': node_key,
+                'vm_name': vm_name,
+                'vm_resources': vm_resources,
+                'image_id': image_id,
+                'imagen': node_data['config']['imagen'],
+                'worker_id': worker_id,
+                'vnc_port': vnc_port,
+                'enlaces': enlaces,
+                'vlan_id': slice_data.get('vlan_id'),
+                'slice_nombre': slice_data['nombre']
+            }
             
         except Exception as e:
-            self.logger.error(f"Error creando VM para nodo {node_key}: {e}")
-            return False, None
+            self.logger.error(f"Error preparando VM para nodo {node_key}: {e}")
+            return None
+    
+    def _provision_task(self, task: Dict[str, Any]) -> bool:
+        """
+        Crea en el cluster la VM de una tarea preparada.
+        Se ejecuta en los hilos del motor de aprovisionamiento.
+        
+        Args:
+            task: Tarea generada por _prepare_node
+            
+        Returns:
+            bool: True si la creación fue exitosa
+        """
+        events.publish(task['slice_nombre'], 'solicitado', task['node_key'],
+                       worker_id=task['worker_id'], vm=f"vm-{task['vm_name']}")
+        return self._create_vm_in_cluster(
+            task['vm_name'], task['vm_resources'], task['enlaces'], task['imagen'],
+            task['vlan_id'], task['vnc_port'], task['worker_id']
+        )
     
     def _get_vm_resources(self, node_data: Dict[str, Any], conn: Conexion) -> Dict[str, int]:
         """
@@ -377,28 +422,26 @@ class LinuxClusterDriver(BaseDriver):
         # Crear nueva imagen si tiene URL
         if image_config.get('url', '-') != '-':
             image_id = conn.Insert("imagen", "nombre,fecha_creacion", f"'{image_name}',now()")
+            invalidate_catalog(IMAGES)
             return image_id
         
         raise ValueError(f"Imagen {image_name} no encontrada y no tiene URL")
     
     def _get_next_vnc_port(self, worker_id: int, conn: Conexion) -> int:
         """
-        Obtiene el próximo puerto VNC disponible para un worker.
+        Reserva el próximo puerto VNC de un worker. La reserva se confirma
+        en la base de datos en el momento, para que los slices que se crean
+        a la vez en el mismo worker no repitan puertos.
         
         Args:
             worker_id: ID del worker
             conn: Conexión a la base de datos
             
         Returns:
-            int: Próximo puerto VNC
+            int: Puerto VNC reservado
         """
-        max_vnc_result = conn.Select("max_vnc", "servidor", f"id_servidor={worker_id}")
-        
-        if not max_vnc_result or max_vnc_result[0][0] is None:
-            # Puerto VNC base desde configuración
-            return self.config.get('VNC_BASE_PORT', 5900) + 1
-        
-        return max_vnc_result[0][0] + 1
+        # Puerto VNC base desde configuración (max_vnc es 0 en servidores nuevos)
+        return conn.allocate_vnc_port(worker_id, self.config.get('VNC_BASE_PORT', 5900))
     
     def _create_vm_in_cluster(
         self,
@@ -438,7 +481,7 @@ class LinuxClusterDriver(BaseDriver):
             
             vm_create_url = f"{self.cluster_config['api_url']}{self.cluster_config['vm_create_endpoint']}"
             
-            response = requests.post(vm_create_url, json=data, timeout=30)
+            response = self.http.post(vm_create_url, json=data, timeout=30)
             response.raise_for_status()
             
             result = response.json()
@@ -462,11 +505,12 @@ class LinuxClusterDriver(BaseDriver):
         slice_id: int,
         image_id: int,
         enlaces: List[str],
-        conn: Conexion,
-        conn2: Conexion2
+        uow: SliceUnitOfWork
     ):
         """
-        Guarda la información de la VM en las bases de datos.
+        Registra la información de la VM en la unidad de trabajo del slice.
+        Las filas de recursos, vm, nodo_cluster y métricas iniciales se
+        escriben todas juntas al confirmar la unidad de trabajo.
         
         Args:
             vm_name: Nombre de la VM
@@ -476,45 +520,25 @@ class LinuxClusterDriver(BaseDriver):
             slice_id: ID del slice
             image_id: ID de la imagen
             enlaces: Lista de enlaces
-            conn: Conexión a BD principal
-            conn2: Conexión a BD de cluster
+            uow: Unidad de trabajo del despliegue
         """
-        # Base de datos principal
         nombre_completo = f"vm-{vm_name}"
         
-        # Crear recursos
-        recursos_id = conn.Insert(
-            "recursos",
-            "ram,storage,vcpu",
-            f"{vm_resources['ram']},{vm_resources['disk']},{vm_resources['vcpu']}"
-        )
-        
-        # Crear VM
-        vm_id = conn.Insert(
-            "vm",
-            "nombre,estado,fecha_creacion,creado_por,fecha_modificacion,modificado_por,vnc,servidor_id_servidor,topologia_id_topologia,imagen_id_imagen,recursos_id_estado",
-            f"'{nombre_completo}','ACTIVO',now(),1,now(),1,{vnc_port},{worker_id},{slice_id},{image_id},{recursos_id}"
+        uow.add_vm(
+            nombre_completo, vm_resources, vnc_port, worker_id,
+            slice_id, image_id, enlaces
         )
-        
-        # Base de datos de cluster
-        nodo_id = conn2.Insert("nodo", "nombre,tipo,puerto_vnc", f"'{nombre_completo}',1,{vnc_port}")
-        
-        # Métricas iniciales
-        conn2.Insert("ram", "memoria_total,creacion,Nodo_id_nodo", f"{vm_resources['ram']},now(),{nodo_id}")
-        conn2.Insert("cpu", "memoria_total,creacion,Nodo_id_nodo", f"{vm_resources['disk']},now(),{nodo_id}")
-        conn2.Insert("vcpu", "vcpu_total,creacion,Nodo_id_nodo", f"{vm_resources['vcpu']},now(),{nodo_id}")
-        
-        # Enlaces
-        if enlaces:
-            conn2.Insert("enlace", "nombre,nodo_id_nodo", f"'{','.join(enlaces)}',{nodo_id}")
     
-    def _configure_openflow_flows(self, vlan_id: int, worker_list: List[str]):
+    def _configure_openflow_flows(self, vlan_id: int, worker_list: List[str]) -> bool:
         """
         Configura los flows OpenFlow para el slice.
         
         Args:
             vlan_id: ID de VLAN
             worker_list: Lista de workers
+            
+        Returns:
+            bool: True si los flows se configuraron
         """
         try:
             flow_data = {
@@ -524,30 +548,31 @@ class LinuxClusterDriver(BaseDriver):
             
             flows_url = f"{self.cluster_config['api_url']}{self.cluster_config['flows_endpoint']}"
             
-            response = requests.post(flows_url, json=flow_data, timeout=30)
+            response = self.http.post(flows_url, json=flow_data, timeout=30)
             response.raise_for_status()
             
             self.logger.info(f"Flows OpenFlow configurados para VLAN {vlan_id}")
+            return True
             
         except Exception as e:
             self.logger.error(f"Error configurando flows OpenFlow: {e}")
+            return False
     
-    def _delete_vm(self, vm_name: str, worker_id: int, conn: Conexion, conn2: Conexion2) -> bool:
+    def _delete_vm(self, vm_name: str, worker_id: int, conn: Conexion) -> bool:
         """
         Elimina una VM específica.
         
         Args:
             vm_name: Nombre de la VM
             worker_id: ID del worker
-            conn: Conexión a BD principal
-            conn2: Conexión a BD de cluster
+            conn: Conexión a la base de datos
             
         Returns:
             bool: True si la eliminación fue exitosa
         """
         try:
             # Obtener información de enlaces
-            nodo_cluster_result = conn2.Select("id_nodo", "nodo", f"nombre='{vm_name}'")
+            nodo_cluster_result = conn.Select("id_nodo", "nodo_cluster", f"nombre='{vm_name}'")
             if not nodo_cluster_result:
                 self.logger.warning(f"Nodo {vm_name} no encontrado en BD cluster")
                 return False
@@ -555,7 +580,7 @@ class LinuxClusterDriver(BaseDriver):
             nodo_id = nodo_cluster_result[0][0]
             
             # Obtener enlaces para construir TAPs
-            enlaces_result = conn2.Select("nombre", "enlace", f"nodo_id_nodo={nodo_id}")
+            enlaces_result = conn.Select("nombre", "nodo_enlace", f"nodo_id={nodo_id}")
             taps_list = []
             
             if enlaces_result and enlaces_result[0][0]:
@@ -570,22 +595,10 @@ class LinuxClusterDriver(BaseDriver):
                 f"?worker_id={worker_id}&vm_name={vm_name}&taps={','.join(taps_list)}"
             )
             
-            response = requests.get(vm_delete_url, timeout=30)
+            response = self.http.get(vm_delete_url, timeout=30)
             
             if response.ok:
-                # Eliminar de base de datos principal
-                vm_result = conn.Select("id_vm,recursos_id_estado", "vm", f"nombre='{vm_name}'")
-                if vm_result:
-                    vm_id, recursos_id = vm_result[0]
-                    conn.Delete("vm", f"id_vm={vm_id}")
-                    conn.Delete("recursos", f"id_recursos={recursos_id}")
-                
-                # Eliminar de base de datos de cluster
-                conn2.Delete("enlace", f"nodo_id_nodo={nodo_id}")
-                conn2.Delete("vcpu", f"Nodo_id_nodo={nodo_id}")
-                conn2.Delete("cpu", f"Nodo_id_nodo={nodo_id}")
-                conn2.Delete("ram", f"Nodo_id_nodo={nodo_id}")
-                conn2.Delete("nodo", f"id_nodo={nodo_id}")
+                conn.delete_vm_records(vm_name)
                 
                 self.logger.info(f"VM {vm_name} eliminada exitosamente")
                 return True
@@ -0,0 +1,289 @@
+"""
+===================================================================
+RECOLECTOR DE MÉTRICAS ASÍNCRONO
+===================================================================
+
+Reemplaza el bucle schedule de Validador: en cada intervalo consulta
+cada fuente de métricas una sola vez (no una vez por worker), todas
+en paralelo, con timeout por consulta y un retardo aleatorio (jitter)
+para no sincronizar las consultas de varios recolectores.
+
+Cada fuente devuelve la capacidad disponible por servidor:
+    [{"Worker1": {"ram": ..., "vcpu": ..., "storage": ...}, ...}]
+
+Las muestras de todas las fuentes se escriben en una sola
+transacción en metricas_tiempo_real, asociadas al nodo_cluster del
+worker (se crea si el worker no tiene uno). Por cada worker se
+registran la capacidad disponible (ram_disponible, vcpu_disponible,
+storage_disponible, con valor_maximo = capacidad total) y el uso en %
+de su capacidad física (cpu_usage, mem_usage), que es lo que leen el
+overcommit dinámico y el planificador de rebalanceo. Una fuente que falla o
+tarda más que el timeout se omite en ese intervalo. Entre
+recolecciones se podan las métricas vencidas (metrics_retention).
+
+Uso:
+    python -m drivers.metrics_collector [--once]
+
+Versión: 3.1
+===================================================================
+"""
+
+import asyncio
+import datetime
+import logging
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from conf.ConfigManager import config
+from database.DatabaseManager import DatabaseManager
+from database.metrics_retention import ensure_rollups, prune_if_due
+from database.query_builder import build_insert_many
+
+
+WORKERS_QUERY = """
+SELECT s.id_servidor, s.nombre, r.ram, r.vcpu, r.storage,
+       (SELECT nc.id_nodo FROM nodo_cluster nc
+        WHERE nc.worker_id = s.id_servidor AND nc.vm_id IS NULL
+        ORDER BY nc.id_nodo LIMIT 1) AS nodo_id
+FROM servidor s
+LEFT JOIN recursos r ON r.id_recursos = s.id_recurso
+"""
+
+# Campo del payload -> (tipo_metrica, unidad, columna de capacidad total)
+METRICS = {
+    'ram': ('ram_disponible', 'MB', 'ram'),
+    'vcpu': ('vcpu_disponible', 'vcpu', 'vcpu'),
+    'storage': ('storage_disponible', 'GB', 'storage')
+}
+
+# Campo del payload -> tipo_metrica del uso en % de la capacidad del worker
+USAGE_METRICS = {'ram': 'mem_usage', 'vcpu': 'cpu_usage'}
+
+METRIC_COLUMNS = ['nodo_id', 'tipo_metrica', 'valor', 'valor_maximo', 'valor_minimo',
+                  'unidad', 'intervalo_segundos', 'timestamp']
+
+
+def parse_payload(payload: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Normaliza la respuesta de una fuente a {servidor: {'ram', 'vcpu', 'storage'}}.
+
+    Acepta la lista del endpoint /cpu-metrics (un diccionario por elemento)
+    o directamente el diccionario por servidor.
+    """
+    documents = payload if isinstance(payload, list) else [payload]
+    servers: Dict[str, Dict[str, Any]] = {}
+    for document in documents:
+        if not isinstance(document, dict):
+            continue
+        for name, values in document.items():
+            if isinstance(values, dict):
+                servers.setdefault(name, {}).update(values)
+    return servers
+
+
+def create_worker_node(cursor, worker: Any) -> int:
+    """
+    Crea el nodo_cluster de un worker (fila de WORKERS_QUERY) que todavía
+    no tiene uno, para asociarle métricas.
+
+    Returns:
+        int: ID del nodo creado
+    """
+    cursor.execute(
+        "INSERT INTO nodo_cluster (nombre, worker_id) VALUES (?, ?)",
+        (f"{worker['nombre'].lower()}-node", worker['id_servidor'])
+    )
+    return cursor.lastrowid
+
+
+class MetricsCollector:
+    """
+    Consulta las fuentes de métricas en paralelo y registra las muestras
+    de cada intervalo en lote.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, sources: Optional[List[str]] = None,
+                 interval: Optional[float] = None, timeout: Optional[float] = None,
+                 jitter: Optional[float] = None, server_names: Optional[Iterable[str]] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Inicializa el recolector (por defecto con get_monitoring_config).
+
+        Args:
+            db (optional): Gestor de base de datos
+            sources (optional): URLs de las fuentes de métricas
+            interval (optional): Segundos entre recolecciones
+            timeout (optional): Timeout de cada consulta en segundos
+            jitter (optional): Retardo aleatorio máximo antes de cada consulta
+            server_names (optional): Registrar solo estos servidores (por defecto todos)
+            transport (optional): Transporte httpx (para pruebas)
+        """
+        settings = config.get_monitoring_config()
+        self.db = db or DatabaseManager()
+        self.sources = list(sources if sources is not None else settings['sources'])
+        self.interval = float(interval if interval is not None else settings['interval'])
+        self.timeout = float(timeout if timeout is not None else settings['timeout'])
+        self.jitter = float(jitter if jitter is not None else settings['jitter'])
+        self.server_names = set(server_names) if server_names is not None else None
+        self.transport = transport
+        self.logger = logging.getLogger(__name__)
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Consulta una fuente; None si falla o excede el timeout."""
+        if self.jitter > 0:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+        try:
+            response = await client.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return parse_payload(response.json())
+        except (httpx.HTTPError, ValueError) as e:
+            self.logger.error(f"Error consultando métricas en {url}: {e}")
+            return None
+
+    async def fetch_all(self) -> Dict[str, Any]:
+        """
+        Consulta todas las fuentes en paralelo, una vez cada una.
+
+        Returns:
+            Dict: {'servidores': {servidor: valores}, 'fuentes_ok', 'fuentes_error'}
+        """
+        async with httpx.AsyncClient(transport=self.transport) as client:
+            results = await asyncio.gather(*(self._fetch(client, url) for url in self.sources))
+
+        servers: Dict[str, Dict[str, Any]] = {}
+        for result in results:
+            for name, values in (result or {}).items():
+                if self.server_names is None or name in self.server_names:
+                    servers.setdefault(name, {}).update(values)
+        failed = sum(1 for result in results if result is None)
+        return {'servidores': servers, 'fuentes_ok': len(results) - failed, 'fuentes_error': failed}
+
+    def write_samples(self, servers: Dict[str, Dict[str, Any]],
+                      timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Registra las muestras de un intervalo en una sola transacción.
+
+        Args:
+            servers: {servidor: {'ram', 'vcpu', 'storage'}} con la capacidad disponible
+            timestamp (optional): Marca de tiempo común (UTC, formato SQLite)
+
+        Returns:
+            Dict: Muestras escritas y servidores desconocidos
+        """
+        timestamp = timestamp or datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        written = {'muestras': 0, 'nodos_creados': 0, 'desconocidos': []}
+        if not servers:
+            return written
+
+        ensure_rollups(self.db)
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                workers = {row['nombre']: row for row in cursor.execute(WORKERS_QUERY).fetchall()}
+                rows = []
+                for name, values in servers.items():
+                    worker = workers.get(name)
+                    if worker is None:
+                        written['desconocidos'].append(name)
+                        continue
+                    nodo_id = worker['nodo_id']
+                    if nodo_id is None:
+                        nodo_id = create_worker_node(cursor, worker)
+                        written['nodos_creados'] += 1
+                    for field, (metric, unit, column) in METRICS.items():
+                        if values.get(field) is None:
+                            continue
+                        rows.append((nodo_id, metric, float(values[field]), worker[column], 0,
+                                     unit, int(self.interval), timestamp))
+                        capacity = float(worker[column] or 0)
+                        if field in USAGE_METRICS and capacity > 0:
+                            usage = min(max(100.0 * (1 - float(values[field]) / capacity), 0.0), 100.0)
+                            rows.append((nodo_id, USAGE_METRICS[field], round(usage, 4), 100.0, 0,
+                                         '%', int(self.interval), timestamp))
+
+                cursor.executemany(build_insert_many('metricas_tiempo_real', METRIC_COLUMNS), rows)
+                conn.commit()
+                written['muestras'] = len(rows)
+
+            except Exception as e:
+                conn.rollback()
+                self.logger.error(f"Error registrando métricas: {e}")
+                raise
+
+        if written['desconocidos']:
+            self.logger.warning(f"Servidores sin registro en la base de datos: {written['desconocidos']}")
+        return written
+
+    async def collect_once(self) -> Dict[str, Any]:
+        """
+        Una recolección completa: consulta las fuentes y registra las muestras.
+
+        Returns:
+            Dict: Resumen del intervalo
+        """
+        started = time.perf_counter()
+        fetched = await self.fetch_all()
+        written = await asyncio.to_thread(self.write_samples, fetched['servidores'])
+        return {
+            'fuentes_ok': fetched['fuentes_ok'],
+            'fuentes_error': fetched['fuentes_error'],
+            'servidores': len(fetched['servidores']),
+            **written,
+            'duracion_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    async def run(self, cycles: Optional[int] = None):
+        """
+        Recolecta cada `interval` segundos (alineado al inicio, sin acumular
+        la duración de cada recolección).
+
+        Args:
+            cycles (optional): Cantidad de recolecciones (por defecto sin límite)
+        """
+        done = 0
+        next_run = time.monotonic()
+        while cycles is None or done < cycles:
+            try:
+                summary = await self.collect_once()
+                self.logger.info(f"Métricas registradas: {summary}")
+                pruned = await asyncio.to_thread(prune_if_due, self.db)
+                if pruned:
+                    self.logger.info(f"Métricas vencidas borradas: {pruned}")
+            except Exception as e:
+                self.logger.error(f"Error en la recolección de métricas: {e}")
+            done += 1
+            next_run += self.interval
+            if cycles is None or done < cycles:
+                await asyncio.sleep(max(0.0, next_run - time.monotonic()))
+
+
+def run_collector(cycles: Optional[int] = None, **kwargs):
+    """
+    Ejecuta el recolector de forma bloqueante (para usar fuera de un event loop).
+
+    Args:
+        cycles (optional): Cantidad de recolecciones (por defecto sin límite)
+        **kwargs: Argumentos de MetricsCollector
+    """
+    asyncio.run(MetricsCollector(**kwargs).run(cycles))
+
+
+def main():
+    """Punto de entrada de línea de comandos."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recolector de métricas del cluster")
+    parser.add_argument('--once', action='store_true', help="Recolectar una sola vez y salir")
+    parser.add_argument('--interval', type=float, default=None, help="Segundos entre recolecciones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_collector(cycles=1 if args.once else None, interval=args.interval)
+
+
+if __name__ == '__main__':
+    main()
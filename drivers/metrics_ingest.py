@@ -0,0 +1,431 @@
+"""
+===================================================================
+INGESTA MASIVA DE MÉTRICAS (PUSH)
+===================================================================
+
+Recibe lotes de muestras enviados por los agentes de los workers
+(POST /linux-cluster/metrics y POST /openstack/metrics) para que el
+volumen de métricas crezca con la cantidad de agentes y no dependa
+del recolector que consulta la API del cluster.
+
+Formatos aceptados (un lote por request):
+- NDJSON (application/x-ndjson): un objeto por línea.
+- JSON: una lista de objetos, o una lista compacta de listas
+  [nodo, tipo_metrica, valor, timestamp?, unidad?].
+
+Cada muestra tiene 'nodo' (ID o nombre del nodo_cluster, o nombre del
+worker), 'tipo_metrica', 'valor' y, opcionalmente, 'timestamp' (epoch
+o texto ISO 8601, que se convierte a UTC) y 'unidad'. La validación es
+barata (tipos, rangos y fechas); el nodo se resuelve al escribir.
+
+Las muestras válidas se encolan en un buffer acotado en memoria. Un
+hilo las escribe en metricas_tiempo_real con executemany en
+transacciones grandes, cuando se juntan METRICS_INGEST_FLUSH_SIZE
+muestras o cada METRICS_INGEST_FLUSH_INTERVAL segundos. Si un lote no
+entra en el buffer se rechaza completo (HTTP 429) para que el agente
+lo reintente más tarde.
+
+Una muestra que la base de datos rechaza se descarta sin perder el
+resto de su transacción; si la transacción entera falla (base
+bloqueada, disco lleno), el lote vuelve al buffer y se reintenta.
+
+Versión: 3.1
+===================================================================
+"""
+
+import datetime
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from conf.ConfigManager import config
+from database.DatabaseManager import DatabaseManager
+from database.metrics_retention import ensure_rollups
+from database.query_builder import build_insert_many
+from .metrics_collector import WORKERS_QUERY, create_worker_node
+
+
+INGEST_COLUMNS = ['nodo_id', 'tipo_metrica', 'valor', 'unidad', 'timestamp']
+
+COMPACT_FIELDS = ('nodo', 'tipo_metrica', 'valor', 'timestamp', 'unidad')
+
+
+class IngestError(Exception):
+    """
+    El cuerpo del lote no se puede interpretar o excede el tamaño máximo.
+    """
+
+
+class IngestBusy(Exception):
+    """
+    El buffer no tiene lugar para el lote; el agente debe reintentar.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _timestamp(value: Any) -> Optional[str]:
+    """
+    Normaliza el timestamp de una muestra al formato de SQLite (UTC).
+
+    Acepta epoch o texto ISO 8601; el texto con zona horaria se convierte
+    a UTC y el que no la tiene se toma como UTC.
+
+    Returns:
+        Optional[str]: Timestamp normalizado o None si es inválido
+    """
+    if value is None:
+        return datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            parsed = datetime.datetime.utcfromtimestamp(value)
+        elif isinstance(value, str) and len(value) <= 40:
+            text = value.strip()
+            parsed = datetime.datetime.fromisoformat(text[:-1] + '+00:00' if text.endswith('Z') else text)
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        else:
+            return None
+    except (ValueError, OverflowError, OSError):
+        return None
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_samples(body: bytes, content_type: str = '') -> List[Any]:
+    """
+    Interpreta el cuerpo de un lote (NDJSON o JSON) sin validar las muestras.
+
+    Raises:
+        IngestError: Si el cuerpo no es NDJSON ni una lista JSON
+    """
+    try:
+        text = body.decode('utf-8')
+        if 'ndjson' in content_type or 'jsonlines' in content_type:
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        payload = json.loads(text)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise IngestError(f"Cuerpo inválido: {e}")
+    if isinstance(payload, dict) and isinstance(payload.get('samples'), list):
+        payload = payload['samples']
+    if not isinstance(payload, list):
+        raise IngestError("Se esperaba una lista de muestras")
+    return payload
+
+
+def validate_sample(sample: Any) -> Optional[Tuple[Any, str, float, Optional[str], str]]:
+    """
+    Valida una muestra (objeto o lista compacta).
+
+    Returns:
+        Optional[Tuple]: (nodo, tipo_metrica, valor, unidad, timestamp) o None si es inválida
+    """
+    if isinstance(sample, list):
+        if not 3 <= len(sample) <= len(COMPACT_FIELDS):
+            return None
+        sample = dict(zip(COMPACT_FIELDS, sample))
+    elif not isinstance(sample, dict):
+        return None
+
+    nodo = sample.get('nodo', sample.get('nodo_id'))
+    tipo = sample.get('tipo_metrica', sample.get('metrica'))
+    valor = sample.get('valor')
+    unidad = sample.get('unidad')
+    if isinstance(nodo, bool) or not isinstance(nodo, (int, str)) or nodo == '':
+        return None
+    if not isinstance(tipo, str) or not 0 < len(tipo) <= 30:
+        return None
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor):
+        return None
+    if unidad is not None and (not isinstance(unidad, str) or len(unidad) > 10):
+        return None
+    timestamp = _timestamp(sample.get('timestamp'))
+    if timestamp is None:
+        return None
+    return nodo, tipo, float(valor), unidad, timestamp
+
+
+class MetricsIngestor:
+    """
+    Buffer acotado de muestras con escritura en lote en segundo plano.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, queue_size: Optional[int] = None,
+                 flush_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 max_batch: Optional[int] = None, start: bool = True):
+        """
+        Inicializa el buffer (por defecto con get_metrics_ingest_config).
+
+        Args:
+            db (optional): Gestor de base de datos
+            queue_size (optional): Muestras que puede haber en el buffer
+            flush_size (optional): Muestras por transacción
+            flush_interval (optional): Segundos máximos entre escrituras
+            max_batch (optional): Muestras máximas por request
+            start (optional): Iniciar el hilo de escritura
+        """
+        settings = config.get_metrics_ingest_config()
+        self.db = db or DatabaseManager()
+        self.queue_size = int(queue_size or settings['queue_size'])
+        self.flush_size = int(flush_size or settings['flush_size'])
+        self.flush_interval = float(flush_interval or settings['flush_interval'])
+        self.max_batch = int(max_batch or settings['max_batch'])
+        self.logger = logging.getLogger(__name__)
+
+        self._buffer: deque = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._nodes: Dict[Any, int] = {}
+        self._stats = {'aceptadas': 0, 'invalidas': 0, 'rechazadas_429': 0, 'escritas': 0,
+                       'descartadas': 0, 'nodo_desconocido': 0, 'transacciones': 0, 'errores': 0}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        if start:
+            self.start()
+
+    # ===================================================================
+    # RECEPCIÓN
+    # ===================================================================
+
+    def submit(self, body: bytes, content_type: str = '', origen: str = 'linux_cluster') -> Dict[str, Any]:
+        """
+        Valida un lote y lo encola completo.
+
+        Args:
+            body: Cuerpo del request (NDJSON o JSON)
+            content_type: Content-Type del request
+            origen: Driver del agente que envía el lote
+
+        Returns:
+            Dict: Muestras aceptadas e inválidas y ocupación del buffer
+
+        Raises:
+            IngestError: Cuerpo inválido o lote demasiado grande
+            IngestBusy: El buffer no tiene lugar para el lote
+        """
+        samples = parse_samples(body, content_type)
+        if len(samples) > self.max_batch:
+            raise IngestError(f"El lote tiene {len(samples)} muestras (máximo {self.max_batch})")
+
+        valid = []
+        for sample in samples:
+            parsed = validate_sample(sample)
+            if parsed is not None:
+                valid.append(parsed)
+        invalid = len(samples) - len(valid)
+
+        with self._condition:
+            self._stats['invalidas'] += invalid
+            if len(self._buffer) + len(valid) > self.queue_size:
+                self._stats['rechazadas_429'] += len(valid)
+                # Tiempo estimado hasta que se vacíe el buffer
+                retry_after = max(1, math.ceil(self.flush_interval * len(self._buffer) / self.flush_size))
+                raise IngestBusy(f"Buffer de métricas lleno ({len(self._buffer)}/{self.queue_size})",
+                                 retry_after)
+            self._buffer.extend(valid)
+            self._stats['aceptadas'] += len(valid)
+            if len(self._buffer) >= self.flush_size:
+                self._condition.notify()
+            pending = len(self._buffer)
+
+        return {'origen': origen, 'aceptadas': len(valid), 'invalidas': invalid,
+                'en_buffer': pending, 'capacidad': self.queue_size}
+
+    # ===================================================================
+    # ESCRITURA
+    # ===================================================================
+
+    def _resolve(self, cursor, keys: Iterable[Any]) -> Dict[Any, int]:
+        """
+        Resuelve nodos (ID o nombre) a id_nodo. Los workers sin nodo_cluster
+        reciben uno; los nodos desconocidos no aparecen en el resultado.
+        """
+        missing = [key for key in set(keys) if key not in self._nodes]
+        if missing:
+            for row in cursor.execute("SELECT id_nodo, nombre FROM nodo_cluster").fetchall():
+                self._nodes[row['id_nodo']] = row['id_nodo']
+                self._nodes[row['nombre']] = row['id_nodo']
+            for worker in cursor.execute(WORKERS_QUERY).fetchall():
+                if worker['nombre'] in missing and worker['nombre'] not in self._nodes:
+                    self._nodes[worker['nombre']] = worker['nodo_id'] or create_worker_node(cursor, worker)
+                elif worker['nodo_id'] is not None:
+                    self._nodes.setdefault(worker['nombre'], worker['nodo_id'])
+        return self._nodes
+
+    def _insert_rows(self, cursor, rows: List[Tuple]) -> int:
+        """
+        Inserta las filas de un lote con executemany. Si alguna viola una
+        restricción, las inserta de a una y descarta solo las rechazadas.
+
+        Returns:
+            int: Filas descartadas
+        """
+        sql = build_insert_many('metricas_tiempo_real', INGEST_COLUMNS)
+        cursor.execute("SAVEPOINT lote")
+        try:
+            cursor.executemany(sql, rows)
+            cursor.execute("RELEASE lote")
+            return 0
+        except sqlite3.IntegrityError as e:
+            cursor.execute("ROLLBACK TO lote")
+            cursor.execute("RELEASE lote")
+            self.logger.warning(f"Lote de métricas rechazado ({e}); se escribe fila por fila")
+
+        discarded = 0
+        for row in rows:
+            cursor.execute("SAVEPOINT muestra")
+            try:
+                cursor.execute(sql, row)
+            except sqlite3.IntegrityError as e:
+                cursor.execute("ROLLBACK TO muestra")
+                discarded += 1
+                self.logger.warning(f"Métrica descartada {row}: {e}")
+            cursor.execute("RELEASE muestra")
+        return discarded
+
+    def flush(self) -> int:
+        """
+        Escribe hasta flush_size muestras del buffer en una transacción.
+        Si la transacción falla, el lote vuelve al frente del buffer.
+
+        Returns:
+            int: Muestras escritas
+
+        Raises:
+            sqlite3.Error: Si no se pudo escribir el lote (queda en el buffer)
+        """
+        with self._flush_lock:
+            with self._condition:
+                count = min(len(self._buffer), self.flush_size)
+                batch = [self._buffer.popleft() for _ in range(count)]
+            if not batch:
+                return 0
+
+            try:
+                ensure_rollups(self.db)
+                with self.db.connection() as conn:
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute("BEGIN IMMEDIATE")
+                        nodes = self._resolve(cursor, (sample[0] for sample in batch))
+                        rows = [(nodes[nodo], tipo, valor, unidad, timestamp)
+                                for nodo, tipo, valor, unidad, timestamp in batch if nodo in nodes]
+                        discarded = self._insert_rows(cursor, rows)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+            except Exception as e:
+                self._nodes.clear()
+                with self._condition:
+                    self._buffer.extendleft(reversed(batch))
+                    self._stats['errores'] += 1
+                self.logger.error(f"Error escribiendo {len(batch)} métricas, quedan en el buffer: {e}")
+                raise
+
+            with self._condition:
+                self._stats['escritas'] += len(rows) - discarded
+                self._stats['descartadas'] += discarded
+                self._stats['nodo_desconocido'] += len(batch) - len(rows)
+                self._stats['transacciones'] += 1
+            return len(rows) - discarded
+
+    def flush_all(self) -> int:
+        """
+        Escribe todo lo que hay en el buffer.
+
+        Raises:
+            sqlite3.Error: Si un lote no se pudo escribir (queda en el buffer)
+        """
+        written = 0
+        while self._buffer:
+            written += self.flush()
+        return written
+
+    def _run(self):
+        """Hilo de escritura: por tamaño de lote o por intervalo."""
+        while True:
+            with self._condition:
+                if len(self._buffer) < self.flush_size and not self._stopped:
+                    self._condition.wait(self.flush_interval)
+                if self._stopped and not self._buffer:
+                    return
+            try:
+                while self.flush() == self.flush_size:
+                    pass
+            except Exception as e:
+                self.logger.error(f"Error en el hilo de ingesta de métricas: {e}")
+                time.sleep(self.flush_interval)
+
+    def start(self):
+        """Inicia el hilo de escritura si no está corriendo."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='metrics-ingest', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el hilo de escritura después de vaciar el buffer."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de la ingesta y ocupación del buffer."""
+        with self._condition:
+            return {**self._stats, 'en_buffer': len(self._buffer), 'capacidad': self.queue_size,
+                    'flush_size': self.flush_size}
+
+
+# ===================================================================
+# INSTANCIAS COMPARTIDAS POR BASE DE DATOS
+# ===================================================================
+
+_ingestors: Dict[str, MetricsIngestor] = {}
+_ingestors_lock = threading.Lock()
+
+
+def get_metrics_ingestor(db_path: Optional[str] = None) -> MetricsIngestor:
+    """
+    Obtiene el buffer de ingesta compartido de una base de datos.
+
+    Args:
+        db_path (optional): Ruta de la base de datos (por defecto la configurada)
+
+    Returns:
+        MetricsIngestor: Buffer de ingesta
+    """
+    db_path = db_path or config.get_db_config().get('db_path', './data/system.db')
+    with _ingestors_lock:
+        ingestor = _ingestors.get(db_path)
+        if ingestor is None:
+            ingestor = MetricsIngestor(DatabaseManager(db_path))
+            _ingestors[db_path] = ingestor
+        return ingestor
+
+
+def close_metrics_ingestors(timeout: float = 10):
+    """
+    Detiene los buffers de ingesta y escribe las muestras que todavía
+    tienen (al apagar la API), para no perder lotes ya aceptados.
+
+    Args:
+        timeout (optional): Segundos de espera por cada hilo de escritura
+    """
+    with _ingestors_lock:
+        ingestors = list(_ingestors.values())
+        _ingestors.clear()
+    for ingestor in ingestors:
+        ingestor.stop(timeout)
+        try:
+            ingestor.flush_all()
+        except Exception as e:
+            ingestor.logger.error(f"Se perdieron {ingestor.get_stats()['en_buffer']} métricas al apagar: {e}")
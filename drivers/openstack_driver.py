@@ -12,14 +12,24 @@ Versión: 3.0
 ===================================================================
 """
 
-import requests
 import secrets
 import random
-from typing import Dict, Any, List, Optional, Tuple
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+import requests
+
 from .base_driver import BaseDriver
-from conf.Conexion import Conexion, Conexion2
+from conf.Conexion import Conexion
+from database.unit_of_work import SliceUnitOfWork
+from database.catalog_cache import IMAGES, OPENSTACK_FLAVORS, WORKERS, ZONES, invalidate_catalog
+from .token_cache import get_token_cache, credential_key, parse_expires_at
+from .openstack_inventory import get_server_inventory
+from . import events
+
+# Vigencia asumida si Keystone no informa expires_at (valor por defecto de Keystone)
+DEFAULT_TOKEN_TTL = 3600
 
 
 class OpenStackDriver(BaseDriver):
@@ -27,7 +37,7 @@ class OpenStackDriver(BaseDriver):
     Driver para gestión de OpenStack.
     
     Características:
-    - Autenticación con Keystone
+    - Autenticación con Keystone (renueva el token si OpenStack lo rechaza)
     - Gestión de redes y subredes VLAN
     - Creación de flavors dinámicos
     - Despliegue de instancias en hipervisores específicos
@@ -41,8 +51,10 @@ class OpenStackDriver(BaseDriver):
         super().__init__()
         self.openstack_config = self.config.get_openstack_config()
         self.network_config = self.config.get_network_config()
-        self._token = None
-        self._token_expiry = None
+        # Caché de tokens compartida entre instancias del driver
+        self.token_cache = get_token_cache()
+        # Inventario de servidores Nova compartido (índice por nombre e ID)
+        self.inventory = get_server_inventory(self.openstack_config['nova_url'])
         
     def create_slice(self, slice_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -54,22 +66,24 @@ class OpenStackDriver(BaseDriver):
         Returns:
             Dict con el slice actualizado
         """
+        reservation = None
         try:
             if not self.validate_slice_data(slice_data):
                 raise ValueError("Datos de slice inválidos")
             
             self.logger.info(f"Iniciando creación de slice OpenStack: {slice_data['nombre']}")
+            events.publish(slice_data['nombre'], 'iniciado', nodos=len(slice_data['nodos']))
             
-            # 1. Autenticación
-            token = self._get_token()
+            # 1. Autenticación (el token queda en la caché compartida)
+            self._get_token()
             
             # 2. Crear red virtual
-            network_info = self._create_network(token, slice_data['nombre'])
+            network_info = self._create_network(slice_data['nombre'])
             network_id = network_info['id']
             
             # 3. Crear subred
             cidr = self._generate_cidr()
-            self._create_subnet(token, network_id, f"{slice_data['nombre']}_subred", cidr)
+            self._create_subnet(network_id, f"{slice_data['nombre']}_subred", cidr)
             
             # 4. Obtener o crear ID del slice
             slice_id = self._get_or_create_slice_id(slice_data)
@@ -77,20 +91,34 @@ class OpenStackDriver(BaseDriver):
             # 5. Generar nombres únicos para VMs
             vm_names = self._generate_vm_names(slice_data['nodos'])
             
-            # 6. Crear VMs por nodo
-            flavor_counter = 1
-            for node_key, node_data in slice_data['nodos'].items():
-                if node_data.get('instanciado', 'false') == 'false':
-                    success = self._create_vm_for_node(
-                        node_key, node_data, vm_names, slice_id,
-                        token, network_id, flavor_counter
-                    )
-                    
-                    if success:
-                        node_data['instanciado'] = 'true'
-                        flavor_counter += 1
+            # 6. Reservar la capacidad de los hipervisores elegidos
+            reservation = self._reserve_resources(slice_data, self._reservation_items(slice_data['nodos']))
             
-            # 7. Actualizar estado y guardar
+            # 7. Crear VMs por nodo (las filas se escriben en una sola transacción)
+            flavor_counter = 1
+            created = {}
+            with SliceUnitOfWork() as uow:
+                for node_key, node_data in slice_data['nodos'].items():
+                    if node_data.get('instanciado', 'false') == 'false':
+                        events.publish(slice_data['nombre'], 'solicitado', node_key,
+                                       worker_id=node_data.get('id_worker'), vm=f"vm-{vm_names[node_key]}")
+                        success = self._create_vm_for_node(
+                            node_key, node_data, vm_names, slice_id,
+                            network_id, flavor_counter, uow
+                        )
+                        
+                        events.publish(slice_data['nombre'], 'creado' if success else 'error', node_key,
+                                       worker_id=node_data.get('id_worker'))
+                        if success:
+                            node_data['instanciado'] = 'true'
+                            created[node_key] = f"vm-{vm_names[node_key]}"
+                            flavor_counter += 1
+            
+            # 8. Confirmar la reserva de las VMs creadas y liberar el resto
+            self._finish_reservation(slice_data, reservation, created)
+            reservation = None
+            
+            # 9. Actualizar estado y guardar
             slice_data['estado'] = 'ejecutado'
             slice_data['mapeo_nombres'] = vm_names
             slice_data['network_id'] = network_id
@@ -99,10 +127,13 @@ class OpenStackDriver(BaseDriver):
             self.save_slice_to_file(slice_data)
             
             self.logger.info(f"Slice OpenStack {slice_data['nombre']} creado exitosamente")
+            events.publish(slice_data['nombre'], 'creado')
             return slice_data
             
         except Exception as e:
             self.logger.error(f"Error creando slice OpenStack: {e}")
+            events.publish(slice_data.get('nombre'), 'error', error=str(e))
+            self._finish_reservation(slice_data, reservation, {})
             raise
     
     def delete_slice(self, slice_data: Dict[str, Any]) -> bool:
@@ -119,8 +150,6 @@ class OpenStackDriver(BaseDriver):
             self.logger.info(f"Iniciando eliminación de slice OpenStack: {slice_data['nombre']}")
             
             conn = Conexion()
-            conn2 = Conexion2()
-            token = self._get_token()
             
             # Obtener ID del slice
             slice_id_result = conn.Select("id_slice", "slice", f"nombre='{slice_data['nombre']}'")
@@ -133,9 +162,15 @@ class OpenStackDriver(BaseDriver):
             # Obtener VMs del slice
             vms = conn.Select("nombre,servidor_id_servidor", "vm", f"topologia_id_topologia={slice_id}")
             
+            # Resolver los IDs de Nova de todas las VMs con una sola consulta
+            statuses = self.get_vm_statuses([vm[0] for vm in vms])
+            
             # Eliminar cada VM
+            events.publish(slice_data['nombre'], 'iniciado', nodos=len(vms))
             for vm_name, worker_id in vms:
-                success = self._delete_vm(vm_name, token, conn, conn2)
+                success = self._delete_vm(vm_name, conn, statuses[vm_name].get("id"))
+                events.publish(slice_data['nombre'], 'eliminado' if success else 'error', vm_name,
+                               worker_id=worker_id)
                 if not success:
                     self.logger.warning(f"Fallo eliminando VM {vm_name}")
             
@@ -145,10 +180,12 @@ class OpenStackDriver(BaseDriver):
             # TODO: Eliminar red y subred de OpenStack si es necesario
             
             self.logger.info(f"Slice OpenStack {slice_data['nombre']} eliminado exitosamente")
+            events.publish(slice_data['nombre'], 'eliminado')
             return True
             
         except Exception as e:
             self.logger.error(f"Error eliminando slice OpenStack: {e}")
+            events.publish(slice_data.get('nombre'), 'error', error=str(e))
             return False
     
     def get_slice_status(self, slice_name: str) -> Dict[str, Any]:
@@ -183,17 +220,17 @@ class OpenStackDriver(BaseDriver):
                 f"topologia_id_topologia={slice_id}"
             )
             
+            # Obtener estados en OpenStack con una sola consulta del inventario
+            statuses = self.get_vm_statuses([vm[0] for vm in vms])
+            
             vm_list = []
             for vm_name, vm_estado, vnc_port, worker_id in vms:
-                # Obtener estado en OpenStack
-                openstack_status = self._get_vm_status_from_openstack(vm_name)
-                
                 vm_list.append({
                     "nombre": vm_name,
                     "estado": vm_estado,
                     "vnc_port": vnc_port,
                     "worker_id": worker_id,
-                    "openstack_status": openstack_status
+                    "openstack_status": statuses[vm_name]
                 })
             
             return {
@@ -219,13 +256,10 @@ class OpenStackDriver(BaseDriver):
             List con información de hipervisores
         """
         try:
-            token = self._get_token()
-            headers = {
-                "X-Auth-Token": token,
-                "X-OpenStack-Nova-API-Version": "2.47"
-            }
+            headers = {"X-OpenStack-Nova-API-Version": "2.47"}
             
-            response = requests.get(
+            response = self.authenticated_request(
+                "GET",
                 f"{self.openstack_config['nova_url']}/os-hypervisors/detail",
                 headers=headers,
                 timeout=30
@@ -268,66 +302,137 @@ class OpenStackDriver(BaseDriver):
     def _get_token(self) -> str:
         """
         Obtiene un token de autenticación de Keystone.
+        El token se reutiliza entre instancias del driver hasta poco
+        antes de su expiración.
         
         Returns:
             str: Token de autenticación
         """
         try:
-            # TODO: Implementar cache de token con expiración
-            auth_data = {
-                "auth": {
-                    "identity": {
-                        "methods": ["password"],
-                        "password": {
-                            "user": {
-                                "domain": {
-                                    "id": self.openstack_config['domain_id'],
-                                    "name": self.openstack_config['domain_name']
-                                },
-                                "name": self.openstack_config['admin_user'],
-                                "password": self.openstack_config['admin_password']
-                            }
-                        }
-                    },
-                    "scope": {
-                        "project": {
+            return self.token_cache.get(self._token_key(), self._request_token)
+            
+        except Exception as e:
+            self.logger.error(f"Error obteniendo token de OpenStack: {e}")
+            raise
+    
+    def _token_key(self) -> str:
+        """Clave del token de estas credenciales en la caché."""
+        return credential_key(
+            self.openstack_config['keystone_url'],
+            self.openstack_config['domain_id'],
+            self.openstack_config['admin_user'],
+            self.openstack_config['project_name']
+        )
+    
+    def _authenticated(self, call: Callable[[str], Any]) -> Any:
+        """
+        Ejecuta una llamada a OpenStack con el token de la caché. Si
+        OpenStack responde 401 (token revocado antes de expirar), descarta
+        el token y reintenta una sola vez con uno nuevo.
+        
+        Args:
+            call: Función que recibe el token y devuelve la respuesta HTTP
+                  (o lanza requests.HTTPError)
+            
+        Returns:
+            Resultado de la llamada
+        """
+        token = self._get_token()
+        try:
+            result = call(token)
+            if getattr(result, 'status_code', None) != 401:
+                return result
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                raise
+        
+        self.logger.warning("OpenStack rechazó el token (401); se renueva y se reintenta")
+        self.token_cache.invalidate(self._token_key(), token)
+        return call(self._get_token())
+    
+    def authenticated_request(self, method: str, url: str,
+                              headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """
+        Petición HTTP a OpenStack con X-Auth-Token, renovando el token y
+        reintentando una vez si es rechazado.
+        
+        Args:
+            method: Método HTTP
+            url: URL completa
+            headers (optional): Cabeceras adicionales
+            **kwargs: Argumentos de requests (json, params, timeout...)
+            
+        Returns:
+            requests.Response: Respuesta recibida
+        """
+        return self._authenticated(lambda token: self.http.request(
+            method, url, headers={**(headers or {}), "X-Auth-Token": token}, **kwargs
+        ))
+    
+    def _request_token(self) -> Tuple[str, float]:
+        """
+        Autentica contra Keystone con usuario y contraseña.
+        
+        Returns:
+            Tuple[str, float]: (token, timestamp de expiración)
+        """
+        auth_data = {
+            "auth": {
+                "identity": {
+                    "methods": ["password"],
+                    "password": {
+                        "user": {
                             "domain": {
-                                "id": self.openstack_config['domain_id']
+                                "id": self.openstack_config['domain_id'],
+                                "name": self.openstack_config['domain_name']
                             },
-                            "name": self.openstack_config['project_name']
+                            "name": self.openstack_config['admin_user'],
+                            "password": self.openstack_config['admin_password']
                         }
                     }
+                },
+                "scope": {
+                    "project": {
+                        "domain": {
+                            "id": self.openstack_config['domain_id']
+                        },
+                        "name": self.openstack_config['project_name']
+                    }
                 }
             }
-            
-            response = requests.post(
-                self.openstack_config['keystone_url'],
-                json=auth_data,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            token = response.headers["X-Subject-Token"]
-            self.logger.info("Token de OpenStack obtenido exitosamente")
-            return token
-            
-        except Exception as e:
-            self.logger.error(f"Error obteniendo token de OpenStack: {e}")
-            raise
+        }
+        
+        response = self.http.post(
+            self.openstack_config['keystone_url'],
+            json=auth_data,
+            timeout=30
+        )
+        response.raise_for_status()
+        
+        token = response.headers["X-Subject-Token"]
+        
+        # Keystone informa la expiración en token.expires_at
+        try:
+            expires_at = parse_expires_at(response.json().get('token', {}).get('expires_at'))
+        except ValueError:
+            expires_at = None
+        if expires_at is None:
+            expires_at = time.time() + DEFAULT_TOKEN_TTL
+        
+        self.logger.info("Token de OpenStack obtenido exitosamente")
+        return token, expires_at
     
-    def _create_network(self, token: str, network_name: str) -> Dict[str, Any]:
+    def _create_network(self, network_name: str) -> Dict[str, Any]:
         """
         Crea una red virtual en OpenStack.
         
         Args:
-            token: Token de autenticación
             network_name: Nombre de la red
             
         Returns:
             Dict con información de la red creada
         """
         try:
-            headers = {"X-Auth-Token": token}
             network_data = {
                 "network": {
                     "admin_state_up": True,
@@ -339,10 +444,10 @@ class OpenStackDriver(BaseDriver):
                 }
             }
             
-            response = requests.post(
+            response = self.authenticated_request(
+                "POST",
                 f"{self.openstack_config['neutron_url']}/networks",
                 json=network_data,
-                headers=headers,
                 timeout=30
             )
             response.raise_for_status()
@@ -355,18 +460,16 @@ class OpenStackDriver(BaseDriver):
             self.logger.error(f"Error creando red {network_name}: {e}")
             raise
     
-    def _create_subnet(self, token: str, network_id: str, subnet_name: str, cidr: str):
+    def _create_subnet(self, network_id: str, subnet_name: str, cidr: str):
         """
         Crea una subred en OpenStack.
         
         Args:
-            token: Token de autenticación
             network_id: ID de la red
             subnet_name: Nombre de la subred
             cidr: CIDR de la subred
         """
         try:
-            headers = {"X-Auth-Token": token}
             ip_numbers = cidr.split(".")
             
             gateway_ip = f"{ip_numbers[0]}.{ip_numbers[1]}.{ip_numbers[2]}{self.network_config.get('gateway_suffix', '.1')}"
@@ -388,10 +491,10 @@ class OpenStackDriver(BaseDriver):
                 }
             }
             
-            response = requests.post(
+            response = self.authenticated_request(
+                "POST",
                 f"{self.openstack_config['neutron_url']}/subnets",
                 json=subnet_data,
-                headers=headers,
                 timeout=30
             )
             response.raise_for_status()
@@ -420,12 +523,11 @@ class OpenStackDriver(BaseDriver):
         n2 = random.randint(0, 255)
         return f"10.{n1}.{n2}.0/24"
     
-    def _create_flavor(self, token: str, name: str, ram: int, vcpus: int, disk: int) -> str:
+    def _create_flavor(self, name: str, ram: int, vcpus: int, disk: int) -> str:
         """
         Crea un flavor en OpenStack.
         
         Args:
-            token: Token de autenticación
             name: Nombre del flavor
             ram: RAM en MB
             vcpus: Número de vCPUs
@@ -435,7 +537,6 @@ class OpenStackDriver(BaseDriver):
             str: ID del flavor creado
         """
         try:
-            headers = {"X-Auth-Token": token}
             flavor_data = {
                 "flavor": {
                     "name": name,
@@ -446,15 +547,16 @@ class OpenStackDriver(BaseDriver):
                 }
             }
             
-            response = requests.post(
+            response = self.authenticated_request(
+                "POST",
                 f"{self.openstack_config['nova_url']}/flavors",
                 json=flavor_data,
-                headers=headers,
                 timeout=30
             )
             response.raise_for_status()
             
             flavor_id = response.json()["flavor"]["id"]
+            invalidate_catalog(OPENSTACK_FLAVORS)
             self.logger.info(f"Flavor {name} creado con ID {flavor_id}")
             return flavor_id
             
@@ -462,22 +564,20 @@ class OpenStackDriver(BaseDriver):
             self.logger.error(f"Error creando flavor {name}: {e}")
             raise
     
-    def _get_flavor_id(self, token: str, flavor_name: str) -> Optional[str]:
+    def _get_flavor_id(self, flavor_name: str) -> Optional[str]:
         """
         Obtiene el ID de un flavor existente.
         
         Args:
-            token: Token de autenticación
             flavor_name: Nombre del flavor
             
         Returns:
             Optional[str]: ID del flavor o None si no existe
         """
         try:
-            headers = {"X-Auth-Token": token}
-            response = requests.get(
+            response = self.authenticated_request(
+                "GET",
                 f"{self.openstack_config['nova_url']}/flavors/detail",
-                headers=headers,
                 timeout=30
             )
             response.raise_for_status()
@@ -494,7 +594,6 @@ class OpenStackDriver(BaseDriver):
     
     def _create_server(
         self,
-        token: str,
         vm_name: str,
         flavor_id: str,
         network_id: str,
@@ -504,7 +603,6 @@ class OpenStackDriver(BaseDriver):
         Crea una instancia en OpenStack.
         
         Args:
-            token: Token de autenticación
             vm_name: Nombre de la VM
             flavor_id: ID del flavor
             network_id: ID de la red
@@ -514,10 +612,7 @@ class OpenStackDriver(BaseDriver):
             Optional[str]: ID de la instancia creada o None si falló
         """
         try:
-            headers = {
-                "X-Auth-Token": token,
-                "X-OpenStack-Nova-API-Version": "2.74"
-            }
+            headers = {"X-OpenStack-Nova-API-Version": "2.74"}
             
             server_data = {
                 "server": {
@@ -531,7 +626,8 @@ class OpenStackDriver(BaseDriver):
                 }
             }
             
-            response = requests.post(
+            response = self.authenticated_request(
+                "POST",
                 f"{self.openstack_config['nova_url']}/servers",
                 json=server_data,
                 headers=headers,
@@ -540,6 +636,7 @@ class OpenStackDriver(BaseDriver):
             response.raise_for_status()
             
             server_id = response.json()["server"]["id"]
+            self.inventory.invalidate()
             self.logger.info(f"Instancia {vm_name} creada con ID {server_id}")
             return server_id
             
@@ -566,36 +663,13 @@ class OpenStackDriver(BaseDriver):
         if existing_slice:
             return existing_slice[0][0]
         
-        # Obtener próximo VLAN ID
-        vlan_id = self._get_next_vlan_id()
+        # Crear nuevo slice con el próximo VLAN ID
+        slice_id, vlan_id = conn.create_slice_record(slice_name, 'openstack')
         slice_data['vlan_id'] = vlan_id
         
-        # Crear nuevo slice
-        slice_id = conn.Insert(
-            "slice",
-            "nombre,tipo,vlan_id,fecha_creacion,fecha_modificacion",
-            f"'{slice_name}','openstack',{vlan_id},now(),now()"
-        )
-        
         self.logger.info(f"Slice OpenStack creado con ID {slice_id} y VLAN {vlan_id}")
         return slice_id
     
-    def _get_next_vlan_id(self) -> int:
-        """
-        Obtiene el próximo VLAN ID disponible.
-        
-        Returns:
-            int: Próximo VLAN ID
-        """
-        conn = Conexion()
-        max_vlan_result = conn.GetMaxVlan()
-        max_vlan = max_vlan_result[0][0]
-        
-        if max_vlan is None:
-            max_vlan = 0
-        
-        return max_vlan + 1
-    
     def _generate_vm_names(self, nodos: Dict[str, Any]) -> Dict[str, str]:
         """
         Genera nombres únicos para las VMs.
@@ -617,9 +691,9 @@ class OpenStackDriver(BaseDriver):
         node_data: Dict[str, Any],
         vm_names: Dict[str, str],
         slice_id: int,
-        token: str,
         network_id: str,
-        flavor_counter: int
+        flavor_counter: int,
+        uow: SliceUnitOfWork
     ) -> bool:
         """
         Crea una VM para un nodo específico.
@@ -629,16 +703,15 @@ class OpenStackDriver(BaseDriver):
             node_data: Datos del nodo
             vm_names: Mapeo de nombres de VM
             slice_id: ID del slice
-            token: Token de autenticación
             network_id: ID de la red
             flavor_counter: Contador para nombres de flavor
+            uow: Unidad de trabajo donde se registran las filas de la VM
             
         Returns:
             bool: True si la creación fue exitosa
         """
         try:
             conn = Conexion()
-            conn2 = Conexion2()
             
             vm_name = vm_names[node_key]
             
@@ -649,14 +722,14 @@ class OpenStackDriver(BaseDriver):
             if node_data['config']['type'] == 'manual':
                 flavor_name = str(flavor_counter)
                 flavor_id = self._create_flavor(
-                    token, flavor_name,
+                    flavor_name,
                     vm_resources['ram'],
                     vm_resources['vcpu'],
                     vm_resources['disk']
                 )
             else:
                 flavor_name = node_data['config']['info_config']
-                flavor_id = self._get_flavor_id(token, flavor_name)
+                flavor_id = self._get_flavor_id(flavor_name)
                 if not flavor_id:
                     raise ValueError(f"Flavor {flavor_name} no encontrado")
             
@@ -678,13 +751,13 @@ class OpenStackDriver(BaseDriver):
             
             # Crear instancia en OpenStack
             full_vm_name = f"vm-{vm_name}"
-            server_id = self._create_server(token, full_vm_name, flavor_id, network_id, hypervisor_hostname)
+            server_id = self._create_server(full_vm_name, flavor_id, network_id, hypervisor_hostname)
             
             if server_id:
-                # Guardar en base de datos
+                # Registrar en la unidad de trabajo
                 self._save_vm_to_database(
                     full_vm_name, vm_resources, worker_id,
-                    slice_id, image_id, enlaces, conn, conn2
+                    slice_id, image_id, enlaces, uow
                 )
                 
                 return True
@@ -695,6 +768,31 @@ class OpenStackDriver(BaseDriver):
             self.logger.error(f"Error creando VM OpenStack para nodo {node_key}: {e}")
             return False
     
+    def _reservation_items(self, nodos: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Pedidos de reserva de los nodos pendientes de instanciar.
+        Los nodos cuyos recursos no se pueden resolver se omiten: su
+        creación fallará igual más adelante.
+        
+        Args:
+            nodos: Nodos del slice
+            
+        Returns:
+            List[Dict]: Pedidos para _reserve_resources
+        """
+        conn = Conexion()
+        items = []
+        for node_key, node_data in nodos.items():
+            if node_data.get('instanciado', 'false') != 'false':
+                continue
+            try:
+                vm_resources = self._get_vm_resources(node_data, conn)
+            except Exception as e:
+                self.logger.warning(f"Recursos del nodo {node_key} no resueltos: {e}")
+                continue
+            items.append(self._reservation_item(node_key, node_data.get('id_worker'), vm_resources))
+        return items
+    
     def _get_vm_resources(self, node_data: Dict[str, Any], conn: Conexion) -> Dict[str, int]:
         """
         Obtiene los recursos de la VM según la configuración.
@@ -751,10 +849,12 @@ class OpenStackDriver(BaseDriver):
         # Crear nueva imagen si tiene URL
         if image_config.get('url', '-') != '-':
             image_id = conn.Insert("imagen", "nombre,fecha_creacion", f"'{image_name}',now()")
+            invalidate_catalog(IMAGES)
             return image_id
         
         # Para OpenStack, usar imagen por defecto
         image_id = conn.Insert("imagen", "nombre,fecha_creacion", f"'{image_name}',now()")
+        invalidate_catalog(IMAGES)
         return image_id
     
     def _save_vm_to_database(
@@ -765,11 +865,12 @@ class OpenStackDriver(BaseDriver):
         slice_id: int,
         image_id: int,
         enlaces: List[str],
-        conn: Conexion,
-        conn2: Conexion2
+        uow: SliceUnitOfWork
     ):
         """
-        Guarda la información de la VM en las bases de datos.
+        Registra la información de la VM en la unidad de trabajo del slice.
+        Las filas de recursos, vm, nodo_cluster y métricas iniciales se
+        escriben todas juntas al confirmar la unidad de trabajo.
         
         Args:
             vm_name: Nombre de la VM
@@ -778,37 +879,30 @@ class OpenStackDriver(BaseDriver):
             slice_id: ID del slice
             image_id: ID de la imagen
             enlaces: Lista de enlaces
-            conn: Conexión a BD principal
-            conn2: Conexión a BD de cluster
+            uow: Unidad de trabajo del despliegue
         """
-        # Base de datos principal
         vnc_port = -100  # OpenStack maneja VNC automáticamente
         
-        # Crear recursos
-        recursos_id = conn.Insert(
-            "recursos",
-            "ram,storage,vcpu",
-            f"{vm_resources['ram']},{vm_resources['disk']},{vm_resources['vcpu']}"
-        )
-        
-        # Crear VM
-        vm_id = conn.Insert(
-            "vm",
-            "nombre,estado,fecha_creacion,creado_por,fecha_modificacion,modificado_por,vnc,servidor_id_servidor,topologia_id_topologia,imagen_id_imagen,recursos_id_estado",
-            f"'{vm_name}','ACTIVO',now(),1,now(),1,{vnc_port},{worker_id},{slice_id},{image_id},{recursos_id}"
-        )
-        
-        # Base de datos de cluster
-        nodo_id = conn2.Insert("nodo", "nombre,tipo,puerto_vnc", f"'{vm_name}',1,{vnc_port}")
-        
-        # Métricas iniciales
-        conn2.Insert("ram", "memoria_total,creacion,Nodo_id_nodo", f"{vm_resources['ram']},now(),{nodo_id}")
-        conn2.Insert("cpu", "memoria_total,creacion,Nodo_id_nodo", f"{vm_resources['disk']},now(),{nodo_id}")
-        conn2.Insert("vcpu", "vcpu_total,creacion,Nodo_id_nodo", f"{vm_resources['vcpu']},now(),{nodo_id}")
+        uow.add_vm(vm_name, vm_resources, vnc_port, worker_id, slice_id, image_id, enlaces)
+    
+    def get_vm_statuses(self, vm_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene el estado de varias VMs desde OpenStack con una sola
+        consulta del inventario de servidores.
         
-        # Enlaces
-        if enlaces:
-            conn2.Insert("enlace", "nombre,nodo_id_nodo", f"'{','.join(enlaces)}',{nodo_id}")
+        Args:
+            vm_names: Nombres de las VMs
+            
+        Returns:
+            Dict: nombre -> estado de la VM (o error)
+        """
+        if not vm_names:
+            return {}
+        try:
+            return self._authenticated(lambda token: self.inventory.get_status_many(vm_names, token))
+        except Exception as e:
+            self.logger.error(f"Error obteniendo estado de {len(vm_names)} VMs: {e}")
+            return {vm_name: {"error": str(e)} for vm_name in vm_names}
     
     def _get_vm_status_from_openstack(self, vm_name: str) -> Dict[str, Any]:
         """
@@ -820,36 +914,7 @@ class OpenStackDriver(BaseDriver):
         Returns:
             Dict con el estado de la VM
         """
-        try:
-            token = self._get_token()
-            headers = {
-                "X-Auth-Token": token,
-                "X-OpenStack-Nova-API-Version": "2.47"
-            }
-            
-            response = requests.get(
-                f"{self.openstack_config['nova_url']}/servers/detail",
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            for server in response.json()["servers"]:
-                if server["name"] == vm_name:
-                    return {
-                        "id": server["id"],
-                        "status": server["status"],
-                        "power_state": server.get("OS-EXT-STS:power_state"),
-                        "task_state": server.get("OS-EXT-STS:task_state"),
-                        "created": server["created"],
-                        "updated": server["updated"]
-                    }
-            
-            return {"error": "VM no encontrada en OpenStack"}
-            
-        except Exception as e:
-            self.logger.error(f"Error obteniendo estado de VM {vm_name}: {e}")
-            return {"error": str(e)}
+        return self.get_vm_statuses([vm_name])[vm_name]
     
     def _get_vm_id_from_openstack(self, vm_name: str) -> Optional[str]:
         """
@@ -862,24 +927,8 @@ class OpenStackDriver(BaseDriver):
             Optional[str]: ID de la VM o None si no existe
         """
         try:
-            token = self._get_token()
-            headers = {
-                "X-Auth-Token": token,
-                "X-OpenStack-Nova-API-Version": "2.47"
-            }
-            
-            response = requests.get(
-                f"{self.openstack_config['nova_url']}/servers/detail",
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            for server in response.json()["servers"]:
-                if server["name"] == vm_name:
-                    return server["id"]
-            
-            return None
+            server = self._authenticated(lambda token: self.inventory.get_by_name(vm_name, token))
+            return server["id"] if server else None
             
         except Exception as e:
             self.logger.error(f"Error obteniendo ID de VM {vm_name}: {e}")
@@ -896,63 +945,48 @@ class OpenStackDriver(BaseDriver):
             bool: True si la eliminación fue exitosa
         """
         try:
-            token = self._get_token()
-            headers = {
-                "X-Auth-Token": token,
-                "X-OpenStack-Nova-API-Version": "2.47"
-            }
+            headers = {"X-OpenStack-Nova-API-Version": "2.47"}
             
-            response = requests.delete(
+            response = self.authenticated_request(
+                "DELETE",
                 f"{self.openstack_config['nova_url']}/servers/{vm_id}",
                 headers=headers,
                 timeout=30
             )
             
             # OpenStack devuelve 204 para eliminación exitosa
-            return response.status_code == 204
+            if response.status_code == 204:
+                self.inventory.invalidate()
+                return True
+            return False
             
         except Exception as e:
             self.logger.error(f"Error eliminando VM {vm_id} de OpenStack: {e}")
             return False
     
-    def _delete_vm(self, vm_name: str, token: str, conn: Conexion, conn2: Conexion2) -> bool:
+    def _delete_vm(self, vm_name: str, conn: Conexion, vm_id: Optional[str] = None) -> bool:
         """
         Elimina una VM específica.
         
         Args:
             vm_name: Nombre de la VM
-            token: Token de autenticación
-            conn: Conexión a BD principal
-            conn2: Conexión a BD de cluster
+            conn: Conexión a la base de datos
+            vm_id (optional): ID de Nova ya resuelto; si falta se busca por nombre
             
         Returns:
             bool: True si la eliminación fue exitosa
         """
         try:
             # Obtener ID de la VM en OpenStack
-            vm_id = self._get_vm_id_from_openstack(vm_name)
+            if not vm_id:
+                vm_id = self._get_vm_id_from_openstack(vm_name)
             
             if vm_id:
                 # Eliminar de OpenStack
                 openstack_success = self._delete_vm_from_openstack(vm_id)
                 
                 if openstack_success:
-                    # Eliminar de base de datos principal
-                    vm_result = conn.Select("id_vm,recursos_id_estado", "vm", f"nombre='{vm_name}'")
-                    if vm_result:
-                        vm_db_id, recursos_id = vm_result[0]
-                        conn.Delete("vm", f"id_vm={vm_db_id}")
-                        conn.Delete("recursos", f"id_recursos={recursos_id}")
-                    
-                    # Eliminar de base de datos de cluster
-                    nodo_result = conn2.Select("id_nodo", "nodo", f"nombre='{vm_name}'")
-                    if nodo_result:
-                        nodo_id = nodo_result[0][0]
-                        conn2.Delete("enlace", f"nodo_id_nodo={nodo_id}")
-                        conn2.Delete("vcpu", f"Nodo_id_nodo={nodo_id}")
-                        conn2.Delete("cpu", f"Nodo_id_nodo={nodo_id}")
-                        conn2.Delete("ram", f"Nodo_id_nodo={nodo_id}")
-                        conn2.Delete("nodo", f"id_nodo={nodo_id}")
+                    conn.delete_vm_records(vm_name)
                     
                     self.logger.info(f"VM OpenStack {vm_name} eliminada exitosamente")
                     return True
@@ -1015,6 +1049,8 @@ class OpenStackDriver(BaseDriver):
                     'nombre,descripcion,fecha_creacion,ip,id_zona,id_recurso,fecha_modificacion',
                     f'"{nombre}","openstack","{fecha_actual}","openstack",1,{id_recurso},"{fecha_actual}"'
                 )
+                invalidate_catalog(ZONES)
+            invalidate_catalog(WORKERS)
             
         except Exception as e:
             self.logger.error(f"Error actualizando recursos del hipervisor {hypervisor_info['nombre']}: {e}")
\ No newline at end of file
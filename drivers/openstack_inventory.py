@@ -0,0 +1,259 @@
+"""
+===================================================================
+INVENTARIO DE SERVIDORES NOVA
+===================================================================
+
+Caché del listado /servers/detail de Nova, indexado por nombre e ID,
+compartida por todas las instancias de OpenStackDriver.
+
+En lugar de descargar y recorrer el listado completo por cada VM
+consultada, el inventario se descarga una vez por ventana de
+refresco (paginado con limit/marker) y las búsquedas son O(1).
+
+Características:
+- TTL configurable y refresco bajo demanda
+- Paginación con limit/marker
+- Un solo refresco en curso; los demás hilos esperan su resultado
+- Consulta masiva de estados (get_status_many)
+- Invalidación al crear o eliminar servidores
+
+Versión: 3.1
+===================================================================
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from conf.ConfigManager import config
+from .http_client import get_http_client, HttpClient
+
+
+NOVA_API_VERSION = "2.47"
+NOT_FOUND_STATUS = {"error": "VM no encontrada en OpenStack"}
+
+
+def server_status(server: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extrae el estado de un servidor de Nova en el formato de la API.
+
+    Args:
+        server: Servidor tal como lo devuelve /servers/detail
+
+    Returns:
+        Dict con id, estado y fechas del servidor
+    """
+    return {
+        "id": server["id"],
+        "status": server["status"],
+        "power_state": server.get("OS-EXT-STS:power_state"),
+        "task_state": server.get("OS-EXT-STS:task_state"),
+        "created": server["created"],
+        "updated": server["updated"]
+    }
+
+
+class ServerInventory:
+    """
+    Inventario de servidores de un endpoint Nova.
+    """
+
+    def __init__(self, nova_url: str, http: Optional[HttpClient] = None,
+                 ttl: float = 30, page_size: int = 200):
+        """
+        Inicializa el inventario.
+
+        Args:
+            nova_url: URL base de Nova
+            http (optional): Cliente HTTP (por defecto el compartido)
+            ttl: Segundos de validez del inventario descargado
+            page_size: Servidores por página al descargar
+        """
+        self.nova_url = nova_url
+        self.http = http or get_http_client()
+        self.ttl = float(ttl)
+        self.page_size = max(1, int(page_size))
+        self.logger = logging.getLogger(__name__)
+
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stats = {'refreshes': 0, 'pages': 0, 'lookups': 0, 'invalidations': 0}
+
+    def _expired(self) -> bool:
+        """Indica si el inventario debe descargarse de nuevo."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def _fetch_all(self, token: str) -> List[Dict[str, Any]]:
+        """
+        Descarga todos los servidores página por página.
+
+        Args:
+            token: Token de Keystone
+
+        Returns:
+            List[Dict]: Servidores de todas las páginas
+        """
+        headers = {
+            "X-Auth-Token": token,
+            "X-OpenStack-Nova-API-Version": NOVA_API_VERSION
+        }
+        servers: List[Dict[str, Any]] = []
+        marker = None
+
+        while True:
+            params = {'limit': self.page_size}
+            if marker:
+                params['marker'] = marker
+
+            response = self.http.get(
+                f"{self.nova_url}/servers/detail",
+                headers=headers,
+                params=params,
+                timeout=30
+            )
+            response.raise_for_status()
+            page = response.json().get("servers", [])
+            servers.extend(page)
+            self._stats['pages'] += 1
+
+            # Última página: menos elementos que el límite
+            if len(page) < self.page_size:
+                break
+            marker = page[-1]["id"]
+
+        return servers
+
+    def refresh(self, token: str, force: bool = False):
+        """
+        Descarga el inventario si expiró (o siempre con force=True).
+        Las llamadas concurrentes comparten una misma descarga.
+
+        Args:
+            token: Token de Keystone
+            force: Descargar aunque el inventario siga vigente
+        """
+        if not force and not self._expired():
+            return
+
+        with self._refresh_lock:
+            # Otro hilo pudo haber refrescado mientras se esperaba el lock
+            if not force and not self._expired():
+                return
+
+            servers = self._fetch_all(token)
+            by_name: Dict[str, Dict[str, Any]] = {}
+            by_id: Dict[str, Dict[str, Any]] = {}
+            for server in servers:
+                # Con nombres repetidos se conserva el primero del listado
+                by_name.setdefault(server["name"], server)
+                by_id[server["id"]] = server
+
+            with self._lock:
+                self._by_name = by_name
+                self._by_id = by_id
+                self._loaded_at = time.monotonic()
+                self._stats['refreshes'] += 1
+
+            self.logger.debug(f"Inventario Nova actualizado: {len(servers)} servidores")
+
+    def get_by_name(self, name: str, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un servidor por nombre.
+
+        Returns:
+            Optional[Dict]: Servidor o None si no existe
+        """
+        self.refresh(token)
+        with self._lock:
+            self._stats['lookups'] += 1
+            return self._by_name.get(name)
+
+    def get_by_id(self, server_id: str, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un servidor por ID.
+
+        Returns:
+            Optional[Dict]: Servidor o None si no existe
+        """
+        self.refresh(token)
+        with self._lock:
+            self._stats['lookups'] += 1
+            return self._by_id.get(server_id)
+
+    def get_status_many(self, names: Iterable[str], token: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene el estado de varios servidores con una sola descarga.
+
+        Args:
+            names: Nombres de los servidores
+            token: Token de Keystone
+
+        Returns:
+            Dict: nombre -> estado (o error si no existe en Nova)
+        """
+        self.refresh(token)
+        result = {}
+        with self._lock:
+            for name in names:
+                self._stats['lookups'] += 1
+                server = self._by_name.get(name)
+                result[name] = server_status(server) if server else dict(NOT_FOUND_STATUS)
+        return result
+
+    def invalidate(self):
+        """
+        Marca el inventario como expirado (tras crear o eliminar servidores).
+        """
+        with self._lock:
+            self._loaded_at = None
+            self._stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene contadores y antigüedad del inventario.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['servers'] = len(self._by_id)
+            stats['age_seconds'] = (
+                round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None
+            )
+        stats['ttl'] = self.ttl
+        stats['page_size'] = self.page_size
+        return stats
+
+
+# ===================================================================
+# INVENTARIOS COMPARTIDOS POR ENDPOINT
+# ===================================================================
+
+_inventories: Dict[str, ServerInventory] = {}
+_inventories_lock = threading.Lock()
+
+
+def get_server_inventory(nova_url: str) -> ServerInventory:
+    """
+    Obtiene el inventario compartido de un endpoint Nova, creándolo con
+    la configuración de OpenStack la primera vez.
+
+    Args:
+        nova_url: URL base de Nova
+
+    Returns:
+        ServerInventory: Inventario compartido
+    """
+    with _inventories_lock:
+        inventory = _inventories.get(nova_url)
+        if inventory is None:
+            openstack_config = config.get_openstack_config()
+            inventory = ServerInventory(
+                nova_url,
+                ttl=openstack_config.get('inventory_ttl', 30),
+                page_size=openstack_config.get('inventory_page_size', 200)
+            )
+            _inventories[nova_url] = inventory
+        return inventory
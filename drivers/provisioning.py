@@ -0,0 +1,178 @@
+"""
+===================================================================
+MOTOR DE APROVISIONAMIENTO CONCURRENTE
+===================================================================
+
+Ejecuta en paralelo las llamadas de creación de VMs de un slice,
+respetando un límite global de concurrencia y un límite por worker
+para no saturar un mismo servidor físico. El driver usa un único motor
+por proceso (get_provisioning_engine), así los límites valen también
+entre slices que se crean a la vez.
+
+El motor solo ejecuta las llamadas remotas: la preparación de cada
+nodo (recursos, imagen, puerto VNC) y la escritura en base de datos
+las hace el driver en el hilo que lo invoca.
+
+Versión: 3.1
+===================================================================
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from conf.ConfigManager import config
+
+
+class ProvisioningEngine:
+    """
+    Pool acotado de hilos para aprovisionar VMs.
+
+    Cada tarea es un diccionario con al menos 'node_key' y 'worker_id'.
+    La función de aprovisionamiento recibe la tarea y devuelve True si
+    la VM se creó. El resultado de cada nodo se devuelve por separado,
+    en el mismo orden en que se recibieron las tareas.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_per_worker: int = 2):
+        """
+        Inicializa el motor.
+
+        Args:
+            max_concurrency: Máximo de creaciones simultáneas en total
+            max_per_worker: Máximo de creaciones simultáneas por worker
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_per_worker = max(1, int(max_per_worker))
+        self.logger = logging.getLogger(__name__)
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._worker_limits: Dict[Any, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _worker_limit(self, worker_id: Any) -> threading.BoundedSemaphore:
+        """
+        Obtiene el semáforo de un worker, creándolo si no existe.
+        """
+        key = str(worker_id)
+        with self._lock:
+            semaphore = self._worker_limits.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_worker)
+                self._worker_limits[key] = semaphore
+            return semaphore
+
+    @staticmethod
+    def _interleave(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Reordena las tareas alternando workers, para que los hilos del pool
+        no queden todos esperando el semáforo de un mismo worker.
+        """
+        queues: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        for task in tasks:
+            queues.setdefault(str(task.get('worker_id')), []).append(task)
+
+        ordered = []
+        while queues:
+            for key in list(queues):
+                ordered.append(queues[key].pop(0))
+                if not queues[key]:
+                    del queues[key]
+        return ordered
+
+    def _run_task(self, task: Dict[str, Any], provision: Callable[[Dict[str, Any]], bool],
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta una tarea respetando el límite de su worker y el global.
+
+        Returns:
+            Dict con el resultado del nodo
+        """
+        result = {
+            'node_key': task['node_key'],
+            'worker_id': task.get('worker_id'),
+            'success': False,
+            'error': None,
+            'elapsed': 0.0
+        }
+
+        with self._worker_limit(task.get('worker_id')), self._slots:
+            start = time.monotonic()
+            try:
+                result['success'] = bool(provision(task))
+                if not result['success']:
+                    result['error'] = 'La creación de la VM no fue exitosa'
+            except Exception as e:
+                self.logger.error(f"Error aprovisionando nodo {task['node_key']}: {e}")
+                result['error'] = str(e)
+            result['elapsed'] = round(time.monotonic() - start, 3)
+
+        if on_result is not None:
+            try:
+                on_result(result)
+            except Exception as e:
+                self.logger.error(f"Error notificando el resultado del nodo {task['node_key']}: {e}")
+        return result
+
+    def run(self, tasks: List[Dict[str, Any]], provision: Callable[[Dict[str, Any]], bool],
+            on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Aprovisiona todas las tareas y espera a que terminen.
+
+        Args:
+            tasks: Tareas a ejecutar (una por nodo)
+            provision: Función que crea la VM de una tarea
+            on_result (optional): Función que recibe el resultado de cada nodo
+                                  apenas termina (en el hilo del pool)
+
+        Returns:
+            List[Dict]: Resultado por nodo, en el orden de las tareas
+        """
+        if not tasks:
+            return []
+
+        workers = min(self.max_concurrency, len(tasks))
+        start = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='provision') as executor:
+            futures = {
+                task['node_key']: executor.submit(self._run_task, task, provision, on_result)
+                for task in self._interleave(tasks)
+            }
+            by_node = {node_key: future.result() for node_key, future in futures.items()}
+
+        results = [by_node[task['node_key']] for task in tasks]
+        succeeded = sum(1 for r in results if r['success'])
+        self.logger.info(
+            f"Aprovisionamiento: {succeeded}/{len(results)} VMs en "
+            f"{time.monotonic() - start:.2f}s (concurrencia {workers}, por worker {self.max_per_worker})"
+        )
+        return results
+
+
+_engine: Optional[ProvisioningEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_provisioning_engine() -> ProvisioningEngine:
+    """
+    Obtiene el motor de aprovisionamiento del proceso, creándolo con
+    PROVISIONING_MAX_CONCURRENCY y PROVISIONING_MAX_PER_WORKER la
+    primera vez.
+
+    Returns:
+        ProvisioningEngine: Motor compartido por todos los slices
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                cluster_config = config.get_cluster_config()
+                _engine = ProvisioningEngine(
+                    cluster_config.get('provisioning_max_concurrency', 8),
+                    cluster_config.get('provisioning_max_per_worker', 2)
+                )
+    return _engine
@@ -0,0 +1,217 @@
+"""
+===================================================================
+REGISTRO DE DRIVERS
+===================================================================
+
+Registro único por proceso de los drivers de slices. Cada driver se
+importa e instancia la primera vez que se pide y luego se reutiliza
+(junto con el cliente HTTP, la caché de tokens y el inventario que
+comparte), en lugar de crear un driver nuevo en cada request.
+
+Los drivers incluidos se registran como "modulo:Clase" y se importan
+recién al usarlos. Otros paquetes pueden agregar backends con el
+grupo de entry points ENTRY_POINT_GROUP:
+
+    [project.entry-points."proyecto_master.drivers"]
+    mi_backend = "mi_paquete.driver:MiDriver"
+
+La API crea el registro en su lifespan (api.main) y lo cierra al
+apagarse; fuera de la API basta con get_driver_registry().
+
+Versión: 3.1
+===================================================================
+"""
+
+import importlib
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# Drivers incluidos: tipo de slice -> "modulo:Clase"
+BUILTIN_DRIVERS = {
+    'linux_cluster': 'drivers.linux_cluster_driver:LinuxClusterDriver',
+    'openstack': 'drivers.openstack_driver:OpenStackDriver'
+}
+
+ENTRY_POINT_GROUP = 'proyecto_master.drivers'
+
+Factory = Union[str, Callable[[], Any]]
+
+
+class UnknownDriver(ValueError):
+    """
+    No hay un driver registrado para el tipo de slice pedido.
+    """
+
+
+def _import_target(target: str) -> Callable[[], Any]:
+    """Importa la clase de un destino "modulo:Clase"."""
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class DriverRegistry:
+    """
+    Crea cada driver una sola vez, al primer uso, y lo comparte entre
+    requests y trabajos.
+    """
+
+    def __init__(self, builtin: bool = True):
+        """
+        Inicializa el registro.
+
+        Args:
+            builtin (optional): Registrar los drivers incluidos
+        """
+        self.logger = logging.getLogger(__name__)
+        self._factories: Dict[str, Factory] = dict(BUILTIN_DRIVERS) if builtin else {}
+        self._instances: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Factory, replace: bool = False):
+        """
+        Registra un driver.
+
+        Args:
+            name: Tipo de slice que atiende
+            factory: "modulo:Clase" o función sin argumentos que crea el driver
+            replace (optional): Reemplazar un driver ya registrado
+        """
+        with self._lock:
+            if name in self._factories and not replace:
+                return
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+            self._errors.pop(name, None)
+
+    def discover(self) -> List[str]:
+        """
+        Registra los drivers declarados por entry points (sin importarlos).
+
+        Returns:
+            List[str]: Nombres agregados
+        """
+        added = []
+        try:
+            declared = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception as e:
+            self.logger.error(f"Error leyendo entry points de drivers: {e}")
+            return added
+        for entry_point in declared:
+            if entry_point.name not in self._factories:
+                self.register(entry_point.name, lambda entry_point=entry_point: entry_point.load()())
+                added.append(entry_point.name)
+        if added:
+            self.logger.info(f"Drivers registrados por entry points: {added}")
+        return added
+
+    def names(self) -> List[str]:
+        """Tipos de slice con driver registrado."""
+        with self._lock:
+            return sorted(self._factories)
+
+    def get(self, name: Any) -> Any:
+        """
+        Obtiene el driver de un tipo de slice, creándolo la primera vez.
+
+        Args:
+            name: Tipo de slice (str o DriverType)
+
+        Returns:
+            Instancia compartida del driver
+
+        Raises:
+            UnknownDriver: Si el tipo no tiene driver registrado
+        """
+        name = getattr(name, 'value', name)
+        driver = self._instances.get(name)
+        if driver is not None:
+            return driver
+
+        with self._lock:
+            driver = self._instances.get(name)
+            if driver is not None:
+                return driver
+            factory = self._factories.get(name)
+            if factory is None:
+                raise UnknownDriver(f"Tipo de driver no soportado: {name}")
+            try:
+                if isinstance(factory, str):
+                    factory = _import_target(factory)
+                driver = factory()
+            except Exception as e:
+                self._errors[name] = str(e)
+                self.logger.error(f"Error cargando el driver {name}: {e}")
+                raise
+            self._instances[name] = driver
+            self._errors.pop(name, None)
+            self.logger.info(f"Driver {name} cargado")
+            return driver
+
+    def get_status(self) -> Dict[str, str]:
+        """
+        Estado de cada driver sin cargar los que no se usaron.
+
+        Returns:
+            Dict: {nombre: 'cargado' | 'registrado' | 'error: ...'}
+        """
+        with self._lock:
+            return {
+                name: (f"error: {self._errors[name]}" if name in self._errors
+                       else 'cargado' if name in self._instances else 'registrado')
+                for name in sorted(self._factories)
+            }
+
+    def close(self):
+        """Libera los drivers creados y cierra sus clientes HTTP."""
+        with self._lock:
+            drivers = list(self._instances.values())
+            self._instances.clear()
+        closed = set()
+        for driver in drivers:
+            http = getattr(driver, 'http', None)
+            if http is not None and id(http) not in closed:
+                closed.add(id(http))
+                try:
+                    http.close()
+                except Exception as e:
+                    self.logger.error(f"Error cerrando el cliente HTTP: {e}")
+
+
+_registry: Optional[DriverRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_driver_registry() -> DriverRegistry:
+    """
+    Obtiene el registro de drivers del proceso, creándolo (con los
+    drivers de entry points) la primera vez.
+
+    Returns:
+        DriverRegistry: Registro compartido
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DriverRegistry()
+                _registry.discover()
+    return _registry
+
+
+def get_driver(name: Any) -> Any:
+    """
+    Atajo para get_driver_registry().get(name).
+    """
+    return get_driver_registry().get(name)
+
+
+def close_driver_registry():
+    """Cierra el registro del proceso (al apagar la API)."""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.close()
@@ -0,0 +1,258 @@
+"""
+===================================================================
+CACHÉ DE TOKENS DE KEYSTONE
+===================================================================
+
+Caché de tokens compartida por todo el proceso, de modo que las
+instancias de OpenStackDriver (una por request en la API) reutilicen
+el mismo token hasta poco antes de su expiración.
+
+Características:
+- Expiración tomada de token.expires_at de la respuesta de Keystone
+- Renovación anticipada con un margen configurable
+- Una sola renovación en curso por credencial (los demás hilos esperan
+  su resultado en lugar de autenticarse en paralelo)
+- Invalidación de un token que OpenStack rechazó antes de expirar
+- Persistencia opcional en un archivo JSON con permisos 0600
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from conf.ConfigManager import config
+
+
+def parse_expires_at(value: Optional[str]) -> Optional[float]:
+    """
+    Convierte el campo expires_at de Keystone a timestamp UNIX.
+
+    Args:
+        value: Fecha ISO 8601 (ej. "2024-05-01T12:00:00.000000Z")
+
+    Returns:
+        Optional[float]: Timestamp o None si no se puede interpretar
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        return None
+
+
+def credential_key(*parts: Any) -> str:
+    """
+    Genera la clave de caché de una credencial sin incluir la contraseña
+    en texto plano.
+
+    Args:
+        *parts: Elementos que identifican la credencial (URL, usuario, proyecto)
+
+    Returns:
+        str: Hash SHA-256 de los elementos
+    """
+    return hashlib.sha256('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+class TokenCache:
+    """
+    Caché de tokens con expiración y renovación coalescida.
+    """
+
+    def __init__(self, refresh_margin: float = 300, cache_file: Optional[str] = None):
+        """
+        Inicializa la caché.
+
+        Args:
+            refresh_margin: Segundos antes de la expiración en los que el
+                            token se renueva
+            cache_file (optional): Archivo JSON donde persistir los tokens
+        """
+        self.refresh_margin = float(refresh_margin)
+        self.cache_file = cache_file or None
+        self.logger = logging.getLogger(__name__)
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refresh_locks: Dict[str, threading.Lock] = {}
+        self._stats = {'hits': 0, 'refreshes': 0, 'refresh_errors': 0, 'stale_served': 0,
+                       'invalidations': 0}
+
+        self._load()
+
+    def _load(self):
+        """
+        Carga los tokens aún vigentes desde el archivo de persistencia.
+        """
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            now = time.time()
+            self._entries = {
+                key: self._entry(entry['token'], float(entry['expires_at']), now)
+                for key, entry in stored.items()
+                if entry.get('token') and entry.get('expires_at', 0) > now
+            }
+        except Exception as e:
+            self.logger.warning(f"No se pudo leer la caché de tokens {self.cache_file}: {e}")
+
+    def _persist(self):
+        """
+        Guarda los tokens en el archivo de persistencia (permisos 0600).
+        Debe llamarse con el lock de la caché tomado.
+        """
+        if not self.cache_file:
+            return
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_file}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            self.logger.warning(f"No se pudo guardar la caché de tokens {self.cache_file}: {e}")
+
+    def _entry(self, token: str, expires_at: float, now: float) -> Dict[str, Any]:
+        """
+        Construye una entrada de caché. El margen de renovación nunca supera
+        la mitad de la vida del token, para no renovar en cada llamada
+        tokens de vida corta.
+        """
+        margin = min(self.refresh_margin, max(0.0, (expires_at - now) / 2))
+        return {'token': token, 'expires_at': expires_at, 'refresh_at': expires_at - margin}
+
+    def _fresh(self, entry: Optional[Dict[str, Any]], now: float) -> bool:
+        """Indica si un token sigue vigente fuera del margen de renovación."""
+        return entry is not None and entry['refresh_at'] > now
+
+    def get(self, key: str, fetch: Callable[[], Tuple[str, float]]) -> str:
+        """
+        Obtiene un token vigente, renovándolo si está por expirar.
+
+        Args:
+            key: Clave de la credencial (ver credential_key)
+            fetch: Función que autentica y devuelve (token, expires_at)
+
+        Returns:
+            str: Token vigente
+
+        Raises:
+            Exception: Si la renovación falla y no queda un token utilizable
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._fresh(entry, now):
+                self._stats['hits'] += 1
+                return entry['token']
+            refresh_lock = self._refresh_locks.setdefault(key, threading.Lock())
+
+        # Solo un hilo renueva; los demás esperan y reutilizan su resultado
+        with refresh_lock:
+            now = time.time()
+            with self._lock:
+                entry = self._entries.get(key)
+                if self._fresh(entry, now):
+                    self._stats['hits'] += 1
+                    return entry['token']
+
+            try:
+                token, expires_at = fetch()
+            except Exception:
+                with self._lock:
+                    self._stats['refresh_errors'] += 1
+                    # Si el token anterior aún no expiró, seguir usándolo
+                    if entry is not None and entry['expires_at'] > now:
+                        self._stats['stale_served'] += 1
+                        self.logger.warning("Renovación de token fallida; se usa el token vigente")
+                        return entry['token']
+                raise
+
+            with self._lock:
+                self._entries[key] = self._entry(token, float(expires_at), time.time())
+                self._stats['refreshes'] += 1
+                self._persist()
+            return token
+
+    def invalidate(self, key: Optional[str] = None, token: Optional[str] = None):
+        """
+        Descarta un token (por ejemplo, tras un 401) o todos si no se
+        indica clave.
+
+        Args:
+            key (optional): Clave de la credencial
+            token (optional): Token rechazado; solo se descarta si la caché
+                              todavía lo tiene, para no tirar el que ya
+                              renovó otro hilo que recibió el mismo 401
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                entry = self._entries.get(key)
+                if entry is None or (token is not None and entry['token'] != token):
+                    return
+                del self._entries[key]
+            self._stats['invalidations'] += 1
+            self._persist()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene contadores de la caché y la vigencia de cada token
+        (sin exponer los tokens).
+        """
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tokens'] = [
+                {'key': key[:12], 'expires_in': round(entry['expires_at'] - now, 1)}
+                for key, entry in self._entries.items()
+            ]
+        stats['refresh_margin'] = self.refresh_margin
+        stats['persistent'] = bool(self.cache_file)
+        return stats
+
+
+# ===================================================================
+# INSTANCIA COMPARTIDA
+# ===================================================================
+
+_cache: Optional[TokenCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> TokenCache:
+    """
+    Obtiene la caché de tokens del proceso, creándola con la
+    configuración de OpenStack la primera vez.
+
+    Returns:
+        TokenCache: Caché compartida
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                openstack_config = config.get_openstack_config()
+                _cache = TokenCache(
+                    refresh_margin=openstack_config.get('token_refresh_margin', 300),
+                    cache_file=openstack_config.get('token_cache_file') or None
+                )
+    return _cache
@@ -0,0 +1,45 @@
+"""
+===================================================================
+MÓDULO DE SCHEDULING - PLACEMENT DE VMs
+===================================================================
+
+Este paquete contiene los motores de placement usados por
+App_Scheduler para asignar VMs a workers.
+
+Componentes:
+- numpy_engine: Placement por coeficientes vectorizado con NumPy
+- strategies: Estrategias de bin-packing seleccionables por configuración
+- topology: Placement que agrupa en un worker los nodos enlazados
+- consolidation: Placement que concentra las VMs para apagar workers
+- batch: Placement de una cola de slices con prioridades en una pasada
+- simulator: Simulador y benchmark de placement (python -m scheduler.simulator)
+- rebalancer: Plan de migraciones para liberar workers y enfriar puntos
+  calientes según métricas en vivo (python -m scheduler.rebalancer)
+
+Versión: 3.1
+===================================================================
+"""
+
+from .numpy_engine import CapacityArrays, NumpyPlacementEngine
+from .strategies import (
+    PlacementStrategy, register_strategy, get_strategy,
+    available_strategies, placement_report, count_cross_edges
+)
+from .topology import TopologyStrategy, build_edges
+from .consolidation import ConsolidationStrategy
+from .batch import BatchScheduler
+
+__all__ = [
+    'CapacityArrays',
+    'NumpyPlacementEngine',
+    'PlacementStrategy',
+    'register_strategy',
+    'get_strategy',
+    'available_strategies',
+    'placement_report',
+    'count_cross_edges',
+    'TopologyStrategy',
+    'build_edges',
+    'ConsolidationStrategy',
+    'BatchScheduler'
+]
@@ -0,0 +1,282 @@
+"""
+===================================================================
+SCHEDULING POR LOTES - VARIOS SLICES EN UNA PASADA
+===================================================================
+
+Planifica juntos los slices que esperan en cola en lugar de ubicarlos
+uno por uno a medida que llegan. Cada slice se acepta completo o se
+rechaza completo.
+
+Algoritmo (greedy con reparación):
+1. Los slices se ordenan por prioridad y, dentro de la misma
+   prioridad, de mayor a menor tamaño (participación dominante de la
+   suma de sus VMs sobre la capacidad de la zona). La pasada se repite
+   con el orden de llegada y se queda la que acepta más (ponderado por
+   prioridad): con la cola sobrecargada, ubicar primero los grandes
+   puede dejar afuera a muchos chicos.
+2. Lookahead: antes de aceptar un slice se compara ubicarlo ahora o
+   después de los siguientes de la cola; si diferirlo permite aceptar
+   más (ponderado por prioridad), se difiere una sola vez.
+3. Reparación: para cada slice rechazado se prueba liberar un slice
+   aceptado de prioridad menor o igual, ubicar el rechazado y volver a
+   ubicar el liberado. Si el liberado ya no entra solo se lo desplaza
+   cuando el rechazado tiene mayor prioridad.
+
+Las VMs de cada slice se asignan con la estrategia de placement
+configurada (su orden y su elección de worker).
+
+Versión: 3.1
+===================================================================
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from conf.ConfigManager import config
+from .numpy_engine import CapacityArrays
+from .strategies import PlacementStrategy, get_strategy, _available, _requirements, _shares, _totals
+
+
+def _copy(caps: CapacityArrays) -> CapacityArrays:
+    """Copia independiente de las capacidades."""
+    return CapacityArrays(caps.ids, caps.ram_disponible, caps.disco_disponible, caps.vcpu_disponible,
+                          caps.ram, caps.disco, caps.vcpu)
+
+
+def _apply(caps: CapacityArrays, requests: np.ndarray, assignment: Sequence[int], sign: float = 1.0):
+    """Descuenta (sign=1) o devuelve (sign=-1) los recursos de una asignación."""
+    for request, index in zip(requests, assignment):
+        caps.ram_disponible[index] -= sign * request[0]
+        caps.disco_disponible[index] -= sign * request[1]
+        caps.vcpu_disponible[index] -= sign * request[2]
+
+
+class BatchScheduler:
+    """
+    Ubica juntos los slices de una cola con prioridades.
+    """
+
+    def __init__(self, strategy: Optional[str] = None, lookahead: Optional[int] = None,
+                 repair: Optional[bool] = None):
+        """
+        Inicializa el scheduler por lotes (por defecto con SCHEDULER_STRATEGY,
+        SCHEDULER_BATCH_LOOKAHEAD y SCHEDULER_BATCH_REPAIR).
+
+        Args:
+            strategy (optional): Estrategia con la que se asignan las VMs de cada slice
+            lookahead (optional): Slices siguientes a considerar antes de aceptar uno (0 = sin lookahead)
+            repair (optional): Intentar ubicar los rechazados liberando otros
+        """
+        scheduler_config = config.get_scheduler_config()
+        self.strategy: PlacementStrategy = get_strategy(strategy or scheduler_config['strategy'])
+        self.lookahead = int(lookahead if lookahead is not None else scheduler_config['batch_lookahead'])
+        self.repair = bool(repair if repair is not None else scheduler_config['batch_repair'])
+        self.logger = logging.getLogger(__name__)
+
+    def _fit(self, caps: CapacityArrays, vms: Sequence[Any], requests: np.ndarray) -> Optional[List[int]]:
+        """
+        Asigna todas las VMs de un slice sobre una copia de las capacidades.
+
+        Returns:
+            Optional[List[int]]: Índice del worker por VM o None si alguna no entra
+        """
+        trial = _copy(caps)
+        assignment: List[Optional[int]] = [None] * len(vms)
+        for i in self.strategy.order(trial, vms):
+            index = self.strategy.choose(trial, requests[i])
+            if index is None:
+                return None
+            _apply(trial, requests[i:i + 1], [index])
+            assignment[i] = index
+        return assignment
+
+    def _value(self, caps: CapacityArrays, queue: Sequence[Dict[str, Any]]) -> Tuple[float, float]:
+        """Valor greedy de ubicar la cola en orden: (prioridad aceptada, tamaño aceptado)."""
+        trial = _copy(caps)
+        weight = size = 0.0
+        for item in queue:
+            assignment = self._fit(trial, item['vms'], item['requests'])
+            if assignment is not None:
+                _apply(trial, item['requests'], assignment)
+                weight += 1 + item['prioridad']
+                size += item['tamano']
+        return weight, size
+
+    def schedule(self, workers: Sequence[Any], pending: Sequence[Dict[str, Any]]
+                 ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Ubica una cola de slices y actualiza los objetos Worker con los aceptados.
+
+        Args:
+            workers: Workers candidatos (objetos Worker)
+            pending: Slices en cola: {'nombre', 'vms' (objetos Vm), 'prioridad' (opcional, mayor primero)}
+
+        Returns:
+            Tuple: Resultado por slice en el orden de pending ({'nombre',
+                   'prioridad', 'aceptado', 'workers' (worker por VM),
+                   'motivo'}) y resumen del lote
+        """
+        started = time.perf_counter()
+        caps = CapacityArrays.from_workers(workers)
+        cluster = _totals(caps).sum(axis=0)
+        items = []
+        for position, slice_data in enumerate(pending):
+            vms = list(slice_data['vms'])
+            requests = np.array([_requirements(vm) for vm in vms]).reshape(-1, 3)
+            items.append({
+                'posicion': position,
+                'nombre': slice_data.get('nombre'),
+                'prioridad': slice_data.get('prioridad') or 0,
+                'vms': vms,
+                'requests': requests,
+                'tamano': float(_shares(requests.sum(axis=0), cluster).max()) if len(vms) else 0.0
+            })
+
+        # De mayor a menor tamaño; también en orden de llegada, por si
+        # priorizar los grandes deja afuera más slices de los que ubica.
+        # La pasada sin lookahead en orden de llegada es la de ubicarlos
+        # de a uno: el lote nunca acepta menos que ella.
+        by_size = sorted(items, key=lambda item: (-item['prioridad'], -item['tamano']))
+        by_arrival = sorted(items, key=lambda item: -item['prioridad'])
+        orders = {
+            'tamano': (by_size, self.lookahead),
+            'llegada': (by_arrival, self.lookahead),
+            'llegada_sin_lookahead': (by_arrival, 0)
+        }
+        if not self.lookahead:
+            del orders['llegada_sin_lookahead']
+        passes = {name: self._pass(_copy(caps), queue, lookahead) for name, (queue, lookahead) in orders.items()}
+        order = max(passes, key=lambda name: passes[name]['valor'])
+        best = passes[order]
+
+        # Actualizar los workers con lo aceptado
+        best['caps'].write_back(workers)
+        results = []
+        for item in items:
+            assignment = best['asignacion'].get(item['posicion'])
+            results.append({
+                'nombre': item['nombre'],
+                'prioridad': item['prioridad'],
+                'aceptado': assignment is not None,
+                'workers': [workers[i] for i in assignment] if assignment is not None else None,
+                'motivo': best['motivo'].get(item['posicion']) if assignment is None else None
+            })
+
+        summary = {
+            'estrategia': self.strategy.name,
+            'orden': order,
+            'slices': len(items),
+            'aceptados': sum(1 for r in results if r['aceptado']),
+            'rechazados': sum(1 for r in results if not r['aceptado']),
+            'diferidos': best['diferidos'],
+            'reparados': best['reparados'],
+            'desplazados': best['desplazados'],
+            'vms_asignadas': sum(len(item['vms']) for item in items if item['posicion'] in best['asignacion']),
+            'duracion_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+        return results, summary
+
+    def _pass(self, caps: CapacityArrays, queue: List[Dict[str, Any]], lookahead: int) -> Dict[str, Any]:
+        """
+        Una pasada greedy (con lookahead y reparación) sobre la cola en el orden dado.
+
+        Returns:
+            Dict con las capacidades resultantes, la asignación y el motivo
+            de rechazo por posición, y el valor de lo aceptado
+        """
+        queue = list(queue)
+        accepted: List[Dict[str, Any]] = []
+        rejected: List[Dict[str, Any]] = []
+        assignments: Dict[int, List[int]] = {}
+        reasons: Dict[int, str] = {}
+        deferred = set()
+        while queue:
+            item = queue.pop(0)
+            assignment = self._fit(caps, item['vms'], item['requests'])
+            if assignment is None:
+                reasons[item['posicion']] = 'sin_capacidad'
+                rejected.append(item)
+                continue
+
+            window = queue[:lookahead]
+            if window and item['posicion'] not in deferred:
+                now = self._value(caps, [item] + window)
+                later = self._value(caps, window + [item])
+                if later > now:
+                    deferred.add(item['posicion'])
+                    queue.insert(len(window), item)
+                    continue
+
+            _apply(caps, item['requests'], assignment)
+            assignments[item['posicion']] = assignment
+            accepted.append(item)
+
+        repaired = displaced = 0
+        if self.repair:
+            repaired, displaced = self._repair(caps, accepted, rejected, assignments, reasons)
+
+        value = (sum(1 + item['prioridad'] for item in accepted), sum(item['tamano'] for item in accepted))
+        return {'caps': caps, 'asignacion': assignments, 'motivo': reasons, 'valor': value,
+                'diferidos': len(deferred), 'reparados': repaired, 'desplazados': displaced}
+
+    def _may_fit(self, caps: CapacityArrays, requests: np.ndarray, freed: np.ndarray,
+                 assignment: Sequence[int]) -> bool:
+        """
+        Descarte rápido antes de reparar: liberando la asignación dada, ¿alcanza
+        la capacidad total para requests y tiene cada VM algún worker donde
+        entrar sola?
+        """
+        available = np.clip(_available(caps), 0, None)
+        np.add.at(available, list(assignment), freed)
+        if (available.sum(axis=0) < requests.sum(axis=0)).any():
+            return False
+        return bool((available[None, :, :] >= requests[:, None, :]).all(axis=2).any(axis=1).all())
+
+    def _repair(self, caps: CapacityArrays, accepted: List[Dict[str, Any]], rejected: List[Dict[str, Any]],
+                assignments: Dict[int, List[int]], reasons: Dict[int, str]) -> Tuple[int, int]:
+        """
+        Intenta ubicar cada slice rechazado liberando uno aceptado.
+
+        Returns:
+            Tuple[int, int]: Slices rechazados que se lograron ubicar y
+                             slices aceptados que quedaron desplazados
+        """
+        repaired = displaced = 0
+        for item in list(rejected):
+            candidates = sorted((a for a in accepted if a['prioridad'] <= item['prioridad']),
+                                key=lambda a: (a['prioridad'], a['tamano']))
+            for victim in candidates:
+                original = assignments[victim['posicion']]
+                # Con igual prioridad el liberado también tiene que volver a entrar
+                needed = item['requests']
+                if victim['prioridad'] == item['prioridad']:
+                    needed = np.vstack([needed, victim['requests']])
+                if not self._may_fit(caps, needed, victim['requests'], original):
+                    continue
+                _apply(caps, victim['requests'], original, sign=-1)
+                assignment = self._fit(caps, item['vms'], item['requests'])
+                if assignment is not None:
+                    _apply(caps, item['requests'], assignment)
+                    replaced = self._fit(caps, victim['vms'], victim['requests'])
+                    if replaced is not None or victim['prioridad'] < item['prioridad']:
+                        assignments[item['posicion']] = assignment
+                        reasons.pop(item['posicion'], None)
+                        accepted.append(item)
+                        rejected.remove(item)
+                        repaired += 1
+                        if replaced is not None:
+                            _apply(caps, victim['requests'], replaced)
+                            assignments[victim['posicion']] = replaced
+                        else:
+                            del assignments[victim['posicion']]
+                            reasons[victim['posicion']] = 'desplazado'
+                            accepted.remove(victim)
+                            rejected.append(victim)
+                            displaced += 1
+                        break
+                    _apply(caps, item['requests'], assignment, sign=-1)
+                _apply(caps, victim['requests'], original)
+        return repaired, displaced
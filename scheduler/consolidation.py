@@ -0,0 +1,77 @@
+"""
+===================================================================
+PLACEMENT DE CONSOLIDACIÓN (AHORRO DE ENERGÍA)
+===================================================================
+
+Estrategia 'consolidacion': concentra las VMs en la menor cantidad de
+workers para que el resto pueda apagarse o pasar a reposo.
+
+Algoritmo:
+1. Las VMs se asignan de mayor a menor participación dominante.
+2. Un worker está activo si ya tiene recursos ocupados o si recibió
+   una VM en esta corrida. Cada VM va al worker activo que queda más
+   lleno (best-fit por recurso dominante).
+3. Solo si ningún worker activo tiene lugar se enciende uno nuevo: el
+   de mayor capacidad, para que entren más VMs antes de encender otro.
+4. Ningún worker se llena por encima de su reserva (headroom): una
+   fracción configurable de la RAM, el disco y las vCPUs que siempre
+   queda libre para picos de carga.
+
+Los workers que quedan sin VMs se listan en el reporte de placement
+(workers_apagables).
+
+Versión: 3.1
+===================================================================
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from conf.ConfigManager import config
+from .numpy_engine import CapacityArrays
+from .strategies import PlacementStrategy, RESOURCES, register_strategy, _available, _shares, _totals
+
+
+class ConsolidationStrategy(PlacementStrategy):
+    """
+    Bin-packing sobre los workers activos con reserva por recurso.
+    """
+
+    name = 'consolidacion'
+
+    def __init__(self, headroom: Optional[Dict[str, float]] = None):
+        """
+        Inicializa la estrategia.
+
+        Args:
+            headroom (optional): Fracción libre mínima por recurso
+                                 ({'ram', 'disco', 'vcpu'}); por defecto
+                                 SCHEDULER_HEADROOM_RAM/DISK/VCPU
+        """
+        super().__init__()
+        headroom = headroom or config.get_scheduler_config()['headroom']
+        self.headroom = np.array([float(headroom.get(r, 0) or 0) for r in RESOURCES])
+
+    def _active(self, caps: CapacityArrays) -> np.ndarray:
+        """Workers con algún recurso ocupado."""
+        return (_available(caps) < _totals(caps)).any(axis=1)
+
+    def choose(self, caps: CapacityArrays, request: np.ndarray) -> Optional[int]:
+        totals = _totals(caps)
+        remaining = _available(caps) - request
+        fits = (remaining >= self.headroom * totals).all(axis=1)
+        if not fits.any():
+            return None
+
+        active = fits & self._active(caps)
+        if active.any():
+            fullness = _shares(remaining, totals).max(axis=1)
+            return int(np.argmin(np.where(active, fullness, np.inf)))
+
+        # Encender el worker con más capacidad (en fracción del cluster)
+        size = _shares(totals, totals.sum(axis=0)).sum(axis=1)
+        return int(np.argmax(np.where(fits, size, -np.inf)))
+
+
+register_strategy(ConsolidationStrategy)
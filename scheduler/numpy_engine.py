@@ -0,0 +1,243 @@
+"""
+===================================================================
+MOTOR DE PLACEMENT VECTORIZADO - NumPy
+===================================================================
+
+Implementación vectorizada del algoritmo de coeficientes de
+App_Scheduler. Las capacidades de los workers se mantienen en arreglos
+NumPy y el coeficiente de todos los candidatos se calcula con una sola
+operación por VM.
+
+Produce los mismos placements que ordenamiento_coeficiente:
+- coeficiente = w_ram*ram_disp/ram + w_disk*disco_disp/disco
+                + w_vcpu*vcpu_req/vcpu_disp (0 si algún divisor es 0)
+- se elige el worker de mayor coeficiente que cumple los recursos;
+  en empate gana el que aparece primero en la lista
+- el descuento de RAM y disco usa BYTES_TO_MB y BYTES_TO_GB igual
+  que el algoritmo original
+
+Las VMs consecutivas con los mismos requerimientos se procesan como
+un lote: entre una VM y la siguiente solo cambia el coeficiente del
+worker elegido, por lo que no se recalcula el resto.
+
+Versión: 3.1
+===================================================================
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from conf.ConfigManager import config
+
+
+class CapacityArrays:
+    """
+    Capacidades de un conjunto de workers en arreglos NumPy (float64),
+    en el mismo orden que la lista de workers de origen.
+    """
+
+    def __init__(self, ids: Sequence[Any], ram_disponible, disco_disponible,
+                 vcpu_disponible, ram, disco, vcpu):
+        self.ids = list(ids)
+        self.ram_disponible = np.asarray(ram_disponible, dtype=np.float64).copy()
+        self.disco_disponible = np.asarray(disco_disponible, dtype=np.float64).copy()
+        self.vcpu_disponible = np.asarray(vcpu_disponible, dtype=np.float64).copy()
+        self.ram = np.asarray(ram, dtype=np.float64).copy()
+        self.disco = np.asarray(disco, dtype=np.float64).copy()
+        self.vcpu = np.asarray(vcpu, dtype=np.float64).copy()
+
+    @classmethod
+    def from_workers(cls, workers: Sequence[Any]) -> 'CapacityArrays':
+        """
+        Construye los arreglos a partir de objetos Worker de App_Scheduler.
+        """
+        return cls(
+            [w.id_servidor for w in workers],
+            [w.ram_disponible for w in workers],
+            [w.disco_disponible for w in workers],
+            [w.vcpu_disponible for w in workers],
+            [w.ram for w in workers],
+            [w.disco for w in workers],
+            [w.vcpu for w in workers]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def write_back(self, workers: Sequence[Any]):
+        """
+        Copia las capacidades disponibles a los objetos Worker, dejándolos
+        en el mismo estado que el algoritmo original.
+        """
+        for i, worker in enumerate(workers):
+            worker.ram_disponible = float(self.ram_disponible[i])
+            worker.disco_disponible = float(self.disco_disponible[i])
+            worker.vcpu_disponible = float(self.vcpu_disponible[i])
+
+
+class NumpyPlacementEngine:
+    """
+    Placement por coeficientes sobre arreglos NumPy.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 bytes_to_mb: Optional[float] = None, bytes_to_gb: Optional[float] = None):
+        """
+        Inicializa el motor. La configuración se lee una sola vez aquí y
+        no en cada cálculo de coeficiente.
+
+        Args:
+            weights (optional): ram_weight, disk_weight y vcpu_weight
+                                (por defecto los de get_scheduler_config)
+            bytes_to_mb (optional): Factor de descuento de RAM
+            bytes_to_gb (optional): Factor de descuento de disco
+        """
+        scheduler_config = weights or config.get_scheduler_config()
+        self.ram_weight = scheduler_config['ram_weight']
+        self.disk_weight = scheduler_config['disk_weight']
+        self.vcpu_weight = scheduler_config['vcpu_weight']
+        self.bytes_to_mb = bytes_to_mb if bytes_to_mb is not None else config.get('BYTES_TO_MB')
+        self.bytes_to_gb = bytes_to_gb if bytes_to_gb is not None else config.get('BYTES_TO_GB')
+        self.logger = logging.getLogger(__name__)
+
+    def scores(self, caps: CapacityArrays, vcpu_requeridas: float) -> np.ndarray:
+        """
+        Calcula el coeficiente de todos los workers para una VM.
+
+        Args:
+            caps: Capacidades de los workers
+            vcpu_requeridas: vCPUs requeridas por la VM
+
+        Returns:
+            np.ndarray: Coeficiente por worker
+        """
+        valid = (caps.ram != 0) & (caps.disco != 0) & (caps.vcpu_disponible != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coef = (self.ram_weight * (caps.ram_disponible / caps.ram) +
+                    self.disk_weight * (caps.disco_disponible / caps.disco) +
+                    self.vcpu_weight * (vcpu_requeridas / caps.vcpu_disponible))
+        return np.where(valid, coef, 0.0)
+
+    def _fits(self, caps: CapacityArrays, vm: Any) -> np.ndarray:
+        """Máscara de workers con recursos suficientes para la VM."""
+        return ((caps.ram_disponible >= vm.ram_requerida) &
+                (caps.disco_disponible >= vm.disco_requerido) &
+                (caps.vcpu_disponible >= vm.vcpu_requeridas))
+
+    def _choose(self, coef: np.ndarray, fits: np.ndarray) -> Optional[int]:
+        """
+        Índice del worker de mayor coeficiente entre los que cumplen.
+        argmax devuelve la primera ocurrencia del máximo, que coincide con
+        el orden estable del sort descendente original.
+        """
+        if not fits.any():
+            return None
+        return int(np.argmax(np.where(fits, coef, -np.inf)))
+
+    def _consume(self, caps: CapacityArrays, index: int, vm: Any):
+        """Descuenta los recursos de la VM del worker elegido."""
+        caps.ram_disponible[index] -= vm.ram_requerida * self.bytes_to_mb
+        caps.disco_disponible[index] -= vm.disco_requerido * self.bytes_to_gb
+        caps.vcpu_disponible[index] -= vm.vcpu_requeridas
+
+    def place(self, caps: CapacityArrays, vm: Any) -> Optional[int]:
+        """
+        Asigna una VM y descuenta sus recursos.
+
+        Args:
+            caps: Capacidades de los workers (se modifican)
+            vm: VM con ram_requerida, disco_requerido y vcpu_requeridas
+
+        Returns:
+            Optional[int]: Índice del worker elegido o None si ninguno cumple
+        """
+        index = self._choose(self.scores(caps, vm.vcpu_requeridas), self._fits(caps, vm))
+        if index is not None:
+            self._consume(caps, index, vm)
+        return index
+
+    def place_batch(self, caps: CapacityArrays, vms: Sequence[Any]) -> List[Optional[int]]:
+        """
+        Asigna VMs con los mismos requerimientos. El coeficiente y la
+        máscara se calculan una vez y después de cada asignación solo se
+        actualiza la fila del worker elegido. Se detiene en la primera VM
+        que no puede ubicarse.
+
+        Returns:
+            List[Optional[int]]: Índice elegido por VM (None en la que falló)
+        """
+        if not vms:
+            return []
+
+        template = vms[0]
+        coef = self.scores(caps, template.vcpu_requeridas)
+        fits = self._fits(caps, template)
+        result: List[Optional[int]] = []
+
+        for vm in vms:
+            index = self._choose(coef, fits)
+            result.append(index)
+            if index is None:
+                break
+            self._consume(caps, index, vm)
+            row = slice(index, index + 1)
+            coef[row] = self.scores(_RowView(caps, row), template.vcpu_requeridas)
+            fits[row] = self._fits(_RowView(caps, row), template)
+
+        return result
+
+    def place_all(self, workers: Sequence[Any], vms: Sequence[Any]) -> List[Optional[Any]]:
+        """
+        Asigna una lista de VMs en orden sobre una lista de workers,
+        agrupando las VMs consecutivas idénticas. Se detiene en la primera
+        VM sin worker y al final actualiza los objetos Worker.
+
+        Args:
+            workers: Workers candidatos (objetos Worker)
+            vms: VMs a asignar (objetos Vm)
+
+        Returns:
+            List: Worker elegido por VM; la lista termina en None si una
+                  VM no pudo ubicarse
+        """
+        caps = CapacityArrays.from_workers(workers)
+        chosen: List[Optional[Any]] = []
+
+        for group in _group_identical(vms):
+            indices = self.place_batch(caps, group)
+            chosen.extend(workers[i] if i is not None else None for i in indices)
+            if indices and indices[-1] is None:
+                break
+
+        caps.write_back(workers)
+        return chosen
+
+
+class _RowView:
+    """Vista de una fila de CapacityArrays para recalcular un solo worker."""
+
+    def __init__(self, caps: CapacityArrays, row: slice):
+        self.ram_disponible = caps.ram_disponible[row]
+        self.disco_disponible = caps.disco_disponible[row]
+        self.vcpu_disponible = caps.vcpu_disponible[row]
+        self.ram = caps.ram[row]
+        self.disco = caps.disco[row]
+
+
+def _group_identical(vms: Sequence[Any]) -> List[List[Any]]:
+    """
+    Agrupa VMs consecutivas con los mismos requerimientos, conservando
+    el orden original.
+    """
+    groups: List[List[Any]] = []
+    last_key = None
+    for vm in vms:
+        key = (vm.ram_requerida, vm.disco_requerido, vm.vcpu_requeridas)
+        if groups and key == last_key:
+            groups[-1].append(vm)
+        else:
+            groups.append([vm])
+            last_key = key
+    return groups
@@ -0,0 +1,527 @@
+"""
+===================================================================
+PLANIFICADOR DE DESFRAGMENTACIÓN Y REBALANCEO
+===================================================================
+
+Planificador offline que lee las VMs ubicadas (vm, recursos,
+servidor) y las métricas en vivo (metricas_tiempo_real) y propone un
+plan ordenado de migraciones:
+
+1. Liberar workers completos: se vacían primero los workers que
+   requieren menos movimientos, moviendo sus VMs a otros workers
+   activos de la misma zona (best-fit respetando la reserva por
+   recurso). Un worker solo se vacía si todas sus VMs tienen destino.
+2. Puntos calientes: en los workers cuya carga medida (CPU o RAM)
+   supera el umbral, se mueve la VM más chica que baja la carga por
+   debajo del umbral (o la de más carga si ninguna alcanza) al worker
+   más frío con lugar.
+
+Cada movimiento es válido ejecutado en orden (el destino tiene lugar
+considerando los movimientos anteriores) y se le asigna un inicio
+respetando el límite de migraciones por minuto. El plan incluye la
+ganancia esperada: workers activos, carga máxima, puntos calientes y
+capacidad varada antes y después.
+
+La capacidad de asignación de un worker es su total por su factor de
+recursos (el del overcommit dinámico o RESOURCE_FACTOR) y la usada es
+la suma de sus VMs. La carga
+en vivo usa los porcentajes de cpu_usage/mem_usage de cada VM sobre
+sus vCPUs/RAM; las VMs sin métricas propias se reparten, en proporción
+a lo asignado, el uso medido de su worker (cpu_usage/mem_usage del
+nodo del worker, que registra drivers.metrics_collector) que no
+explican las VMs medidas. Las VMs de workers sin muestras no suman
+carga: esos workers nunca cuentan como puntos calientes.
+
+Uso:
+    python -m scheduler.rebalancer --zona zona-1 --max-moves 10 --output plan.json
+
+Versión: 3.1
+===================================================================
+"""
+
+import sys
+import json
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Agregar el directorio raíz al path para imports
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from conf.ConfigManager import config
+from database.DatabaseManager import DatabaseManager
+from database.capacity_ledger import resource_factors
+from database.overcommit import get_resource_factor
+from .strategies import RESOURCES
+
+
+WORKERS_QUERY = """
+SELECT s.id_servidor, s.nombre, zd.nombre AS zona, r.ram, r.storage, r.vcpu
+FROM servidor s
+INNER JOIN recursos r ON r.id_recursos = s.id_recurso
+LEFT JOIN zona_disponibilidad zd ON zd.idzona_disponibilidad = s.id_zona
+ORDER BY s.id_servidor
+"""
+
+VMS_QUERY = """
+SELECT v.id_vm, v.nombre, v.servidor_id_servidor, r.ram, r.storage, r.vcpu
+FROM vm v
+INNER JOIN recursos r ON r.id_recursos = v.recursos_id_estado
+WHERE v.servidor_id_servidor IS NOT NULL
+ORDER BY v.id_vm
+"""
+
+LIVE_METRICS_QUERY = """
+SELECT nc.vm_id, m.tipo_metrica, AVG(m.valor) AS promedio
+FROM metricas_tiempo_real m
+INNER JOIN nodo_cluster nc ON nc.id_nodo = m.nodo_id
+WHERE m.tipo_metrica IN ('cpu_usage', 'mem_usage')
+  AND m.timestamp >= datetime('now', ?)
+  AND nc.vm_id IS NOT NULL
+GROUP BY nc.vm_id, m.tipo_metrica
+"""
+
+WORKER_METRICS_QUERY = """
+SELECT nc.worker_id, m.tipo_metrica, AVG(m.valor) AS promedio
+FROM metricas_tiempo_real m
+INNER JOIN nodo_cluster nc ON nc.id_nodo = m.nodo_id
+WHERE m.tipo_metrica IN ('cpu_usage', 'mem_usage')
+  AND m.timestamp >= datetime('now', ?)
+  AND nc.vm_id IS NULL
+  AND nc.worker_id IS NOT NULL
+GROUP BY nc.worker_id, m.tipo_metrica
+"""
+
+# Métrica -> (posición en la carga (vcpu, ram), posición del recurso en (ram, disco, vcpu))
+LOAD_METRICS = {'cpu_usage': (0, 2), 'mem_usage': (1, 0)}
+
+# Un recurso con menos de esta fracción libre deja varados los demás
+STRANDED_SHARE = 0.05
+
+
+class ClusterState:
+    """
+    Estado de placement de una zona (o de todo el cluster).
+
+    Attributes:
+        ids, nombres, zonas: Datos de cada worker
+        capacidad: Capacidad de asignación (workers x ram, disco, vcpu)
+        fisico: Capacidad física para la carga en vivo (workers x vcpu, ram)
+        vms: VMs con 'id_vm', 'nombre', 'worker' (índice), 'recursos'
+             (ram, disco, vcpu) y 'carga' (núcleos, MB en uso)
+        medidas: Número de VMs con métricas en vivo
+    """
+
+    def __init__(self, workers: List[Dict[str, Any]], vms: List[Dict[str, Any]], factor: Any):
+        self.ids = [w['id'] for w in workers]
+        self.nombres = [w['nombre'] for w in workers]
+        self.zonas = [w['zona'] for w in workers]
+        total = np.array([w['total'] for w in workers], dtype=float).reshape(-1, 3)
+        factors = np.array([resource_factors(factor, w['id']) for w in workers], dtype=float).reshape(-1, 3)
+        self.capacidad = total * factors
+        self.fisico = total[:, [2, 0]]
+        self.vms = vms
+        self.medidas = sum(1 for vm in vms if vm.get('medida'))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def usage(self, placement: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recursos asignados y carga en vivo por worker para una ubicación
+        de las VMs (índice de worker por VM).
+        """
+        used = np.zeros((len(self), 3))
+        load = np.zeros((len(self), 2))
+        for vm, worker in zip(self.vms, placement):
+            used[worker] += vm['recursos']
+            load[worker] += vm['carga']
+        return used, load
+
+
+def load_cluster_state(db: Optional[DatabaseManager] = None, zona: Optional[str] = None,
+                       factor: Any = None, window_minutes: int = 15) -> ClusterState:
+    """
+    Lee las VMs ubicadas y las métricas en vivo de la base de datos.
+
+    Args:
+        db (optional): Gestor de base de datos
+        zona (optional): Limitar a una zona de disponibilidad
+        factor (optional): Factor de recursos, número u OvercommitFactors
+                           (por defecto get_resource_factor)
+        window_minutes: Minutos de métricas a promediar
+
+    Returns:
+        ClusterState: Estado actual
+    """
+    db = db or DatabaseManager()
+    factor = factor if factor is not None else get_resource_factor(db.db_path)
+
+    workers = [
+        {'id': row['id_servidor'], 'nombre': row['nombre'], 'zona': row['zona'],
+         'total': [float(row['ram'] or 0), float(row['storage'] or 0), float(row['vcpu'] or 0)]}
+        for row in db.execute_query(WORKERS_QUERY)
+        if zona is None or row['zona'] == zona
+    ]
+    index = {worker['id']: i for i, worker in enumerate(workers)}
+
+    window = (f"-{int(window_minutes)} minutes",)
+    metrics: Dict[int, Dict[str, float]] = {}
+    for row in db.execute_query(LIVE_METRICS_QUERY, window):
+        metrics.setdefault(row['vm_id'], {})[row['tipo_metrica']] = float(row['promedio'])
+    worker_metrics: Dict[int, Dict[str, float]] = {}
+    for row in db.execute_query(WORKER_METRICS_QUERY, window):
+        worker_metrics.setdefault(row['worker_id'], {})[row['tipo_metrica']] = float(row['promedio'])
+
+    vms = []
+    for row in db.execute_query(VMS_QUERY):
+        if row['servidor_id_servidor'] not in index:
+            continue
+        recursos = np.array([float(row['ram'] or 0), float(row['storage'] or 0), float(row['vcpu'] or 0)])
+        medidas = metrics.get(row['id_vm'], {})
+        carga = np.full(2, np.nan)
+        for metric, (k, resource) in LOAD_METRICS.items():
+            if metric in medidas:
+                carga[k] = recursos[resource] * medidas[metric] / 100
+        vms.append({
+            'id_vm': row['id_vm'],
+            'nombre': row['nombre'],
+            'worker': index[row['servidor_id_servidor']],
+            'recursos': recursos,
+            'carga': carga,
+            'medida': bool(medidas)
+        })
+
+    # Las VMs sin métricas propias se reparten lo que las medidas no explican del uso del worker
+    by_worker: Dict[int, List[Dict[str, Any]]] = {}
+    for vm in vms:
+        by_worker.setdefault(vm['worker'], []).append(vm)
+    for i, own in by_worker.items():
+        measured = worker_metrics.get(workers[i]['id'], {})
+        for metric, (k, resource) in LOAD_METRICS.items():
+            pending = [vm for vm in own if np.isnan(vm['carga'][k])]
+            allocated = sum(vm['recursos'][resource] for vm in pending)
+            if not pending or metric not in measured or allocated <= 0:
+                for vm in pending:
+                    vm['carga'][k] = 0.0
+                continue
+            used = measured[metric] / 100 * workers[i]['total'][resource]
+            rest = max(used - sum(vm['carga'][k] for vm in own if not np.isnan(vm['carga'][k])), 0.0)
+            for vm in pending:
+                vm['carga'][k] = rest * vm['recursos'][resource] / allocated
+                vm['medida'] = True
+
+    return ClusterState(workers, vms, factor)
+
+
+class RebalancePlanner:
+    """
+    Calcula planes de migración para liberar workers y enfriar puntos calientes.
+    """
+
+    def __init__(self, max_moves: Optional[int] = None, moves_per_minute: Optional[int] = None,
+                 hot_threshold: Optional[float] = None, headroom: Optional[Dict[str, float]] = None):
+        """
+        Inicializa el planificador (por defecto con los valores REBALANCE_*
+        y SCHEDULER_HEADROOM_* de la configuración).
+
+        Args:
+            max_moves (optional): Máximo de migraciones del plan
+            moves_per_minute (optional): Migraciones que pueden empezar por minuto
+            hot_threshold (optional): Carga (0-1) a partir de la cual un worker está caliente
+            headroom (optional): Fracción libre mínima por recurso en los destinos
+        """
+        scheduler_config = config.get_scheduler_config()
+        defaults = scheduler_config['rebalance']
+        headroom = headroom or scheduler_config['headroom']
+        self.max_moves = int(max_moves if max_moves is not None else defaults['max_moves'])
+        self.moves_per_minute = max(1, int(moves_per_minute or defaults['moves_per_minute']))
+        self.hot_threshold = float(hot_threshold if hot_threshold is not None else defaults['hot_threshold'])
+        self.headroom = np.array([float(headroom.get(r, 0) or 0) for r in RESOURCES])
+        self.logger = logging.getLogger(__name__)
+
+    def _load(self, state: ClusterState, load: np.ndarray) -> np.ndarray:
+        """Carga en vivo (0-1) de cada worker: la mayor entre CPU y RAM."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = np.where(state.fisico > 0, load / state.fisico, 0.0)
+        return shares.max(axis=1)
+
+    def _targets(self, state: ClusterState, used: np.ndarray, load: np.ndarray, vm: Dict[str, Any],
+                 allowed: np.ndarray) -> np.ndarray:
+        """Máscara de workers que pueden recibir la VM sin pasar la reserva ni el umbral."""
+        remaining = state.capacidad - used - vm['recursos']
+        fits = (remaining >= self.headroom * state.capacidad).all(axis=1)
+        cool = self._load(state, load + vm['carga']) <= self.hot_threshold
+        same_zone = np.array([zona == state.zonas[vm['worker']] for zona in state.zonas])
+        return allowed & fits & cool & same_zone
+
+    def plan(self, state: ClusterState) -> Dict[str, Any]:
+        """
+        Calcula el plan de migraciones.
+
+        Args:
+            state: Estado actual del cluster
+
+        Returns:
+            Dict con los movimientos ordenados y la ganancia esperada
+        """
+        placement = [vm['worker'] for vm in state.vms]
+        used, load = state.usage(placement)
+        before = self._summary(state, used, load)
+        moves: List[Dict[str, Any]] = []
+        freed: List[int] = []
+
+        self._drain(state, placement, used, load, moves, freed)
+        self._cool(state, placement, used, load, moves, freed)
+
+        for order, move in enumerate(moves):
+            move['orden'] = order + 1
+            move['inicio_s'] = (order // self.moves_per_minute) * 60
+
+        after = self._summary(state, used, load)
+        return {
+            'generado': datetime.now().isoformat(),
+            'workers': len(state),
+            'vms': len(state.vms),
+            'vms_con_metricas': state.medidas,
+            'limites': {'max_movimientos': self.max_moves, 'por_minuto': self.moves_per_minute,
+                        'umbral_carga': self.hot_threshold},
+            'movimientos': moves,
+            'workers_liberados': [state.ids[i] for i in freed],
+            'ganancia': {key: {'antes': before[key], 'despues': after[key]} for key in before},
+            'duracion_estimada_s': ((len(moves) - 1) // self.moves_per_minute + 1) * 60 if moves else 0
+        }
+
+    def _move(self, state: ClusterState, placement: List[int], used: np.ndarray, load: np.ndarray,
+              moves: List[Dict[str, Any]], vm_index: int, target: int, reason: str):
+        """Registra una migración y actualiza el estado planificado."""
+        vm = state.vms[vm_index]
+        source = placement[vm_index]
+        used[source] -= vm['recursos']
+        load[source] -= vm['carga']
+        used[target] += vm['recursos']
+        load[target] += vm['carga']
+        placement[vm_index] = target
+        moves.append({
+            'vm': vm['nombre'],
+            'id_vm': vm['id_vm'],
+            'origen': state.ids[source],
+            'destino': state.ids[target],
+            'motivo': reason,
+            'recursos': {r: float(v) for r, v in zip(RESOURCES, vm['recursos'])}
+        })
+
+    def _drain(self, state: ClusterState, placement: List[int], used: np.ndarray, load: np.ndarray,
+               moves: List[Dict[str, Any]], freed: List[int]):
+        """Vacía los workers que requieren menos movimientos."""
+        counts = np.bincount(placement, minlength=len(state)) if placement else np.zeros(len(state), dtype=int)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = np.where(state.capacidad > 0, used / state.capacidad, 0.0).max(axis=1)
+        candidates = sorted((i for i in range(len(state)) if counts[i] > 0),
+                            key=lambda i: (counts[i], share[i]))
+        receivers = np.zeros(len(state), dtype=bool)
+
+        for worker in candidates:
+            if len(moves) + counts[worker] > self.max_moves:
+                continue
+            active = (used.any(axis=1)) & ~receivers
+            if receivers[worker] or active.sum() < 2:
+                continue
+
+            # Probar la evacuación completa sobre una copia del estado
+            trial_used, trial_load = used.copy(), load.copy()
+            vms = sorted((i for i, w in enumerate(placement) if w == worker),
+                         key=lambda i: -state.vms[i]['recursos'].max())
+            allowed = used.any(axis=1)
+            allowed[worker] = False
+            allowed[freed] = False
+            targets = []
+            for vm_index in vms:
+                vm = state.vms[vm_index]
+                mask = self._targets(state, trial_used, trial_load, vm, allowed)
+                if not mask.any():
+                    break
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    remaining = np.where(state.capacidad > 0,
+                                         (state.capacidad - trial_used - vm['recursos']) / state.capacidad, 0.0)
+                target = int(np.argmin(np.where(mask, remaining.max(axis=1), np.inf)))
+                trial_used[target] += vm['recursos']
+                trial_load[target] += vm['carga']
+                targets.append((vm_index, target))
+            else:
+                for vm_index, target in targets:
+                    self._move(state, placement, used, load, moves, vm_index, target, 'liberar_worker')
+                    receivers[target] = True
+                freed.append(worker)
+
+    def _cool(self, state: ClusterState, placement: List[int], used: np.ndarray, load: np.ndarray,
+              moves: List[Dict[str, Any]], freed: List[int]):
+        """Mueve VMs fuera de los workers con carga sobre el umbral."""
+        allowed = np.ones(len(state), dtype=bool)
+        allowed[freed] = False
+        while len(moves) < self.max_moves:
+            current = self._load(state, load)
+            hot = [i for i in np.argsort(-current) if current[i] > self.hot_threshold]
+            moved = False
+            for worker in hot:
+                vms = [i for i, w in enumerate(placement) if w == worker]
+                # La VM más chica que basta para enfriar el worker; si ninguna basta, la de más carga
+                fixes = [i for i in vms
+                         if self._load_of(state, load[worker] - state.vms[i]['carga'], worker) <= self.hot_threshold]
+                ranked = (sorted(fixes, key=lambda i: state.vms[i]['recursos'].max()) +
+                          sorted(set(vms) - set(fixes), key=lambda i: -state.vms[i]['carga'].max()))
+                for vm_index in ranked:
+                    mask = self._targets(state, used, load, state.vms[vm_index], allowed)
+                    mask[worker] = False
+                    if not mask.any():
+                        continue
+                    target = int(np.argmin(np.where(mask, current, np.inf)))
+                    self._move(state, placement, used, load, moves, vm_index, target, 'punto_caliente')
+                    moved = True
+                    break
+                if moved:
+                    break
+            if not moved:
+                break
+
+    def _load_of(self, state: ClusterState, load: np.ndarray, worker: int) -> float:
+        """Carga (0-1) de un worker con un vector de carga dado."""
+        physical = state.fisico[worker]
+        return float(max((load[k] / physical[k]) if physical[k] > 0 else 0.0 for k in range(2)))
+
+    def _summary(self, state: ClusterState, used: np.ndarray, load: np.ndarray) -> Dict[str, Any]:
+        """Indicadores para comparar el estado antes y después del plan."""
+        current = self._load(state, load)
+        free = np.clip(state.capacidad - used, 0, None)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            free_share = np.where(state.capacidad > 0, free / state.capacidad, 0.0)
+        # Capacidad libre inutilizable porque otro recurso del worker está agotado
+        stranded = np.zeros(3)
+        for k in range(3):
+            others = np.delete(free_share, k, axis=1).min(axis=1)
+            stranded[k] = free[others < STRANDED_SHARE, k].sum()
+        return {
+            'workers_activos': int(used.any(axis=1).sum()),
+            'carga_maxima': round(float(current.max()), 4) if len(current) else 0.0,
+            'puntos_calientes': int((current > self.hot_threshold).sum()),
+            'capacidad_varada': {r: round(float(v), 2) for r, v in zip(RESOURCES, stranded)}
+        }
+
+
+def plan_rebalance(zona: Optional[str] = None, db_path: Optional[str] = None,
+                   window_minutes: Optional[int] = None, **options) -> Dict[str, Any]:
+    """
+    Lee el estado actual y calcula un plan de rebalanceo.
+
+    Args:
+        zona (optional): Zona de disponibilidad a rebalancear (por defecto todas)
+        db_path (optional): Base de datos a leer
+        window_minutes (optional): Minutos de métricas en vivo a promediar
+        **options: max_moves, moves_per_minute, hot_threshold, headroom
+
+    Returns:
+        Dict con el plan
+    """
+    window = window_minutes or config.get_scheduler_config()['rebalance']['metrics_window']
+    state = load_cluster_state(DatabaseManager(db_path), zona=zona, window_minutes=window)
+    plan = RebalancePlanner(**options).plan(state)
+    plan['zona'] = zona
+    plan['ventana_minutos'] = window
+    return plan
+
+
+# ===================================================================
+# EJECUCIÓN EN SEGUNDO PLANO
+# ===================================================================
+
+MAX_STORED_PLANS = 20
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rebalance")
+_plans: Dict[str, Dict[str, Any]] = {}
+_plans_lock = threading.Lock()
+
+
+def submit_plan(**kwargs) -> str:
+    """
+    Encola el cálculo de un plan en un hilo propio, sin bloquear a quien
+    lo pide. Los planes se calculan de a uno.
+
+    Args:
+        **kwargs: Argumentos de plan_rebalance
+
+    Returns:
+        str: ID del plan
+    """
+    plan_id = uuid.uuid4().hex[:12]
+    with _plans_lock:
+        _plans[plan_id] = {'id': plan_id, 'estado': 'pendiente', 'creado': datetime.now().isoformat(),
+                           'parametros': kwargs, 'plan': None, 'error': None}
+        # Conservar solo los planes más recientes
+        for old in list(_plans)[:-MAX_STORED_PLANS]:
+            if _plans[old]['estado'] in ('completado', 'error'):
+                del _plans[old]
+    _executor.submit(_run_plan, plan_id, kwargs)
+    return plan_id
+
+
+def _run_plan(plan_id: str, kwargs: Dict[str, Any]):
+    """Calcula un plan encolado y guarda su resultado."""
+    with _plans_lock:
+        _plans[plan_id]['estado'] = 'ejecutando'
+    try:
+        plan = plan_rebalance(**kwargs)
+        with _plans_lock:
+            _plans[plan_id].update(estado='completado', plan=plan)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Error calculando plan de rebalanceo: {e}")
+        with _plans_lock:
+            _plans[plan_id].update(estado='error', error=str(e))
+
+
+def get_plan(plan_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene el estado (y el resultado, si terminó) de un plan encolado.
+    """
+    with _plans_lock:
+        job = _plans.get(plan_id)
+        return dict(job) if job else None
+
+
+def main():
+    """
+    Función principal para ejecutar el planificador desde línea de comandos.
+    """
+    import argparse
+
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description='Plan de desfragmentación y rebalanceo de workers')
+    parser.add_argument('--zona', help='Zona de disponibilidad (por defecto todas)')
+    parser.add_argument('--db', help='Ruta de la base de datos (por defecto la configurada)')
+    parser.add_argument('--max-moves', type=int, help='Máximo de migraciones')
+    parser.add_argument('--per-minute', type=int, help='Migraciones que pueden empezar por minuto')
+    parser.add_argument('--hot-threshold', type=float, help='Carga (0-1) de un worker caliente')
+    parser.add_argument('--window', type=int, help='Minutos de métricas en vivo a promediar')
+    parser.add_argument('--output', help='Archivo donde guardar el plan JSON')
+
+    args = parser.parse_args()
+
+    plan = plan_rebalance(zona=args.zona, db_path=args.db, window_minutes=args.window,
+                          max_moves=args.max_moves, moves_per_minute=args.per_minute,
+                          hot_threshold=args.hot_threshold)
+
+    output = json.dumps(plan, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
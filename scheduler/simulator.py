@@ -0,0 +1,695 @@
+"""
+===================================================================
+SIMULADOR DE PLACEMENT - BENCHMARK DEL SCHEDULER
+===================================================================
+
+Genera clusters sintéticos (workers repartidos en zonas) y cargas de
+slices (tamaño, mezcla de flavors, tasa de llegada y duración) y las
+ejecuta contra las estrategias de placement sin tocar la
+infraestructura.
+
+Modos:
+- offline: replica scheduler_main en memoria (snapshot de la zona,
+  planificar y reserva en unidades pedidas) para cualquier estrategia
+  registrada.
+- scheduler_main: ejecuta scheduler_main de punta a punta sobre una
+  base de datos SQLite temporal (libro de capacidad, reservas y
+  escritura de las VMs con SliceUnitOfWork).
+
+Con --batch-window los slices que llegan en la misma ventana se
+encolan y se planifican juntos al cerrarla (BatchScheduler en modo
+offline, scheduler_batch en modo scheduler_main); la latencia de cada
+slice es la del lote repartida entre sus slices.
+
+Para cada estrategia reporta placements por segundo, latencia p50/p99
+por slice, utilización, fragmentación, workers activos y tasa de
+rechazo en JSON, para comparar versiones.
+
+Uso:
+    python -m scheduler.simulator --workers 1000 --zones 4 --slices 500 \\
+        --strategy coeficiente --strategy best_fit --output resultado.json
+    python -m scheduler.simulator --slices 500 --arrival-rate 20 --batch-window 1
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+import json
+import heapq
+import random
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Agregar el directorio raíz al path para imports
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from conf.ConfigManager import config
+from Modules.App_Scheduler import Worker, Vm, planificar, scheduler_main, scheduler_batch, cerrar_reserva
+from database.DatabaseManager import DatabaseManager
+from database.db_initializer import DatabaseInitializer
+from database.connection_pool import close_all_pools
+from database.unit_of_work import SliceUnitOfWork
+from .batch import BatchScheduler
+from .strategies import RESOURCES, available_strategies
+
+
+MODES = ('offline', 'scheduler_main')
+
+# Tipos de worker: (ram MB, disco GB, vcpu)
+WORKER_PROFILES = {
+    'small': (16384, 500, 8),
+    'medium': (65536, 1000, 32),
+    'large': (262144, 4000, 64)
+}
+
+# Flavors de VM: (ram MB, disco GB, vcpu)
+FLAVORS = {
+    'tiny': (512, 1, 1),
+    'small': (2048, 20, 1),
+    'medium': (4096, 40, 2),
+    'large': (8192, 80, 4),
+    'xlarge': (16384, 160, 8)
+}
+
+DEFAULT_WORKER_MIX = {'small': 2, 'medium': 2, 'large': 1}
+DEFAULT_FLAVOR_MIX = {'tiny': 3, 'small': 4, 'medium': 2, 'large': 1}
+
+
+# ===================================================================
+# GENERACIÓN DE CLUSTERS Y CARGAS
+# ===================================================================
+
+def parse_mix(text: Optional[str], known: Dict[str, Any], default: Dict[str, int]) -> Dict[str, float]:
+    """
+    Interpreta una mezcla 'nombre=peso,nombre=peso'.
+
+    Raises:
+        ValueError: Si un nombre no existe o un peso no es positivo
+    """
+    if not text:
+        return dict(default)
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in known:
+            raise ValueError(f"'{name}' no existe; opciones: {', '.join(known)}")
+        mix[name] = float(weight or 1)
+        if mix[name] <= 0:
+            raise ValueError(f"El peso de '{name}' debe ser positivo")
+    return mix
+
+
+def _pick(rng: random.Random, mix: Dict[str, float]) -> str:
+    """Elige un nombre según los pesos de la mezcla."""
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def generate_cluster(rng: random.Random, workers: int, zones: int,
+                     worker_mix: Dict[str, float], initial_load: float = 0.0) -> Dict[str, Any]:
+    """
+    Genera un cluster sintético.
+
+    Args:
+        rng: Generador aleatorio
+        workers: Número total de workers
+        zones: Número de zonas de disponibilidad (reparto round-robin)
+        worker_mix: Pesos de los tipos de WORKER_PROFILES
+        initial_load: Fracción máxima ya ocupada de cada worker al empezar
+
+    Returns:
+        Dict con 'zonas' (nombres), 'ids', 'zona' (índice por worker),
+        'total' y 'disponible' (arrays n x 3 de ram, disco, vcpu)
+    """
+    nombres = [f"zona-{z + 1}" for z in range(max(1, zones))]
+    total = np.zeros((workers, 3))
+    disponible = np.zeros((workers, 3))
+    for i in range(workers):
+        total[i] = WORKER_PROFILES[_pick(rng, worker_mix)]
+        disponible[i] = np.floor(total[i] * (1 - rng.uniform(0, initial_load)))
+    return {
+        'zonas': nombres,
+        'ids': list(range(1, workers + 1)),
+        'zona': [i % len(nombres) for i in range(workers)],
+        'total': total,
+        'disponible': disponible
+    }
+
+
+def generate_workload(rng: random.Random, slices: int, zonas: Sequence[str],
+                      min_size: int, max_size: int, flavor_mix: Dict[str, float],
+                      arrival_rate: float, lifetime: float,
+                      link_density: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    Genera los slices a desplegar con llegadas de Poisson.
+
+    Cada slice es un árbol aleatorio de nodos más una fracción
+    link_density de enlaces extra.
+
+    Args:
+        rng: Generador aleatorio
+        slices: Número de slices
+        zonas: Zonas donde se piden los slices
+        min_size, max_size: Rango de nodos por slice
+        flavor_mix: Pesos de los flavors de FLAVORS
+        arrival_rate: Slices por segundo simulado
+        lifetime: Duración media de un slice en segundos (0 = permanente)
+        link_density: Enlaces extra por nodo
+
+    Returns:
+        List[Dict]: Slices con 'nombre', 'zona', 'llegada', 'duracion' y 'nodos'
+    """
+    workload = []
+    clock = 0.0
+    for s in range(slices):
+        clock += rng.expovariate(arrival_rate) if arrival_rate > 0 else 0.0
+        size = rng.randint(min_size, max_size)
+        names = [f"n{i}" for i in range(size)]
+        enlaces = {name: [] for name in names}
+        pairs = [(names[i], names[rng.randrange(i)]) for i in range(1, size)]
+        for _ in range(int(size * link_density)):
+            a, b = rng.sample(names, 2) if size > 1 else (names[0], names[0])
+            if a != b:
+                pairs.append((a, b))
+        for a, b in pairs:
+            if b not in enlaces[a]:
+                enlaces[a].append(b)
+                enlaces[b].append(a)
+
+        nodos = {}
+        for name in names:
+            ram, disco, vcpu = FLAVORS[_pick(rng, flavor_mix)]
+            nodos[name] = {
+                'config': {'type': 'manual', 'info_config': [vcpu, ram, disco],
+                           'imagen': {'nombre': 'cirros', 'url': '-'}},
+                'enlaces': enlaces[name],
+                'instanciado': 'false'
+            }
+        workload.append({
+            'nombre': f"sim{s}",
+            'zona': rng.choice(list(zonas)),
+            'llegada': clock,
+            'duracion': rng.expovariate(1 / lifetime) if lifetime > 0 else None,
+            'nodos': nodos
+        })
+    return workload
+
+
+def _vms(nodos: Dict[str, Any]) -> List[Vm]:
+    """VMs de un slice en el orden de sus nodos, como las arma scheduler_main."""
+    vms = []
+    for name, nodo in nodos.items():
+        vcpu, ram, disco = nodo['config']['info_config']
+        vms.append(Vm(name, int(ram), int(disco), int(vcpu)))
+    return vms
+
+
+# ===================================================================
+# MÉTRICAS
+# ===================================================================
+
+class _Metrics:
+    """Acumula las mediciones de una corrida."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.vms_placed = 0
+        self.vms_requested = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.rejected_capacity = 0
+        self.utilization_samples: List[np.ndarray] = []
+        self.active_samples: List[int] = []
+
+    def sample(self, total: np.ndarray, disponible: np.ndarray):
+        """Registra la utilización y los workers activos tras un slice."""
+        capacity = total.sum(axis=0)
+        self.utilization_samples.append(
+            np.divide((total - disponible).sum(axis=0), capacity, out=np.zeros(3), where=capacity > 0)
+        )
+        self.active_samples.append(_active_workers(total, disponible))
+
+    def summary(self, total: np.ndarray, disponible: np.ndarray,
+                zone_of: Sequence[int], zones: int, elapsed: float) -> Dict[str, Any]:
+        """Reporte final de la corrida."""
+        latencies = np.array(self.latencies) * 1000
+        placement_time = float(np.sum(self.latencies))
+        used = total - disponible
+        capacity = total.sum(axis=0)
+        final = np.divide(used.sum(axis=0), capacity, out=np.zeros(3), where=capacity > 0)
+        mean = np.mean(self.utilization_samples, axis=0) if self.utilization_samples else np.zeros(3)
+        slices = self.accepted + self.rejected
+        return {
+            'slices': slices,
+            'slices_accepted': self.accepted,
+            'slices_rejected': self.rejected,
+            'rejected_by_reservation': self.rejected_capacity,
+            'rejection_rate': round(self.rejected / slices, 4) if slices else 0.0,
+            'vms_requested': self.vms_requested,
+            'vms_placed': self.vms_placed,
+            'placements_per_second': round(self.vms_placed / placement_time, 2) if placement_time else 0.0,
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else 0.0,
+                'p99': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else 0.0,
+                'mean': round(float(latencies.mean()), 3) if len(latencies) else 0.0
+            },
+            'utilization': {
+                'final': {r: round(float(u), 4) for r, u in zip(RESOURCES, final)},
+                'mean': {r: round(float(u), 4) for r, u in zip(RESOURCES, mean)}
+            },
+            'fragmentation': _fragmentation(disponible, zone_of, zones),
+            'active_workers': {
+                'final': _active_workers(total, disponible),
+                'mean': round(float(np.mean(self.active_samples)), 2) if self.active_samples else 0.0
+            },
+            'elapsed_s': round(elapsed, 3)
+        }
+
+
+def _active_workers(total: np.ndarray, disponible: np.ndarray) -> int:
+    """Workers con algún recurso ocupado (no se pueden apagar)."""
+    return int(((total - disponible) > 1e-9).any(axis=1).sum())
+
+
+def _fragmentation(disponible: np.ndarray, zone_of: Sequence[int], zones: int) -> Dict[str, float]:
+    """
+    Fragmentación media por zona: 1 - (mayor bloque libre / total libre),
+    igual que en placement_report.
+    """
+    zone_of = np.asarray(zone_of)
+    values = []
+    for z in range(zones):
+        free = np.clip(disponible[zone_of == z], 0, None)
+        if not len(free):
+            continue
+        free_total = free.sum(axis=0)
+        values.append(np.divide(free.max(axis=0), free_total, out=np.ones(3), where=free_total > 0))
+    fragmentation = 1 - np.mean(values, axis=0) if values else np.zeros(3)
+    return {r: round(float(f), 4) for r, f in zip(RESOURCES, fragmentation)}
+
+
+def _due(departures: List[Tuple[float, int, Any]], now: float) -> List[Any]:
+    """Saca de la cola los slices cuya duración terminó antes de now."""
+    finished = []
+    while departures and departures[0][0] <= now:
+        finished.append(heapq.heappop(departures)[2])
+    return finished
+
+
+def _batches(workload: List[Dict[str, Any]], window: float) -> List[Tuple[float, List[Tuple[int, Dict[str, Any]]]]]:
+    """
+    Agrupa los slices que llegan en la misma ventana de window segundos.
+
+    Returns:
+        List: (cierre de la ventana, [(número, slice)]) en orden de llegada
+    """
+    groups: List[Tuple[int, List[Tuple[int, Dict[str, Any]]]]] = []
+    for number, item in enumerate(workload):
+        key = int(item['llegada'] // window)
+        if groups and groups[-1][0] == key:
+            groups[-1][1].append((number, item))
+        else:
+            groups.append((key, [(number, item)]))
+    return [((key + 1) * window, items) for key, items in groups]
+
+
+# ===================================================================
+# MODOS DE SIMULACIÓN
+# ===================================================================
+
+def simulate_offline(cluster: Dict[str, Any], workload: List[Dict[str, Any]],
+                     strategy: str, factor: float = 1) -> Dict[str, Any]:
+    """
+    Ejecuta la carga con una estrategia en memoria.
+
+    Cada slice toma un snapshot de su zona (capacidad por el factor de
+    recursos), se planifica con planificar y, si todas sus VMs caben,
+    se descuentan en unidades pedidas como lo hace la reserva; si la
+    estrategia sobrepasa algún worker el slice se rechaza, igual que
+    cuando la reserva falla.
+
+    Returns:
+        Dict con el reporte de la corrida
+    """
+    total = cluster['total'] * factor
+    disponible = cluster['disponible'] * factor
+    ids = np.array(cluster['ids'])
+    zone_of = np.array(cluster['zona'])
+    members = {z: np.flatnonzero(zone_of == z) for z in range(len(cluster['zonas']))}
+    zone_index = {name: z for z, name in enumerate(cluster['zonas'])}
+    position = {worker_id: i for i, worker_id in enumerate(ids)}
+    metrics = _Metrics()
+
+    departures: List[Tuple[float, int, Any]] = []
+    started = time.perf_counter()
+    for number, item in enumerate(workload):
+        for consumption in _due(departures, item['llegada']):
+            for index, amount in consumption:
+                disponible[index] += amount
+
+        vms = _vms(item['nodos'])
+        metrics.vms_requested += len(vms)
+        rows = members[zone_index[item['zona']]]
+
+        start = time.perf_counter()
+        workers = [Worker(int(ids[i]), *disponible[i], *total[i]) for i in rows]
+        elegidos, _ = planificar(workers, vms, estrategia=strategy, nodos=item['nodos'])
+        metrics.latencies.append(time.perf_counter() - start)
+
+        if all(worker is not None for worker in elegidos):
+            consumption = [(position[worker.id_servidor],
+                            np.array([vm.ram_requerida, vm.disco_requerido, vm.vcpu_requeridas], dtype=float))
+                           for vm, worker in zip(vms, elegidos)]
+            trial = disponible.copy()
+            for index, amount in consumption:
+                trial[index] -= amount
+            if (trial >= 0).all():
+                disponible = trial
+                metrics.accepted += 1
+                metrics.vms_placed += len(vms)
+                if item['duracion'] is not None:
+                    heapq.heappush(departures, (item['llegada'] + item['duracion'], number, consumption))
+            else:
+                metrics.rejected += 1
+                metrics.rejected_capacity += 1
+        else:
+            metrics.rejected += 1
+        metrics.sample(total, disponible)
+
+    return metrics.summary(total, disponible, zone_of, len(cluster['zonas']),
+                           time.perf_counter() - started)
+
+
+def simulate_batch(cluster: Dict[str, Any], workload: List[Dict[str, Any]],
+                   strategy: str, factor: float = 1, window: float = 1.0) -> Dict[str, Any]:
+    """
+    Ejecuta la carga en memoria planificando por lotes: al cerrar cada
+    ventana, los slices de cada zona que llegaron en ella se ubican con
+    BatchScheduler sobre un snapshot de la zona.
+
+    Returns:
+        Dict con el reporte de la corrida
+    """
+    total = cluster['total'] * factor
+    disponible = cluster['disponible'] * factor
+    ids = np.array(cluster['ids'])
+    zone_of = np.array(cluster['zona'])
+    members = {z: np.flatnonzero(zone_of == z) for z in range(len(cluster['zonas']))}
+    zone_index = {name: z for z, name in enumerate(cluster['zonas'])}
+    scheduler = BatchScheduler(strategy)
+    metrics = _Metrics()
+
+    departures: List[Tuple[float, int, Any]] = []
+    started = time.perf_counter()
+    for closes, group in _batches(workload, window):
+        for consumption in _due(departures, closes):
+            for index, amount in consumption:
+                disponible[index] += amount
+
+        by_zone: Dict[int, List[Tuple[int, Dict[str, Any]]]] = {}
+        for number, item in group:
+            by_zone.setdefault(zone_index[item['zona']], []).append((number, item))
+
+        for z, items in by_zone.items():
+            rows = members[z]
+            vms = [_vms(item['nodos']) for _, item in items]
+            pending = [{'nombre': item['nombre'], 'prioridad': item.get('prioridad'), 'vms': slice_vms}
+                       for (_, item), slice_vms in zip(items, vms)]
+
+            start = time.perf_counter()
+            workers = [Worker(int(ids[i]), *disponible[i], *total[i]) for i in rows]
+            results, _ = scheduler.schedule(workers, pending)
+            elapsed = time.perf_counter() - start
+
+            position = {id(worker): int(i) for worker, i in zip(workers, rows)}
+            for (number, item), slice_vms, result in zip(items, vms, results):
+                metrics.latencies.append(elapsed / len(items))
+                metrics.vms_requested += len(slice_vms)
+                if result['aceptado']:
+                    consumption = [(position[id(worker)],
+                                    np.array([vm.ram_requerida, vm.disco_requerido, vm.vcpu_requeridas], dtype=float))
+                                   for vm, worker in zip(slice_vms, result['workers'])]
+                    for index, amount in consumption:
+                        disponible[index] -= amount
+                    metrics.accepted += 1
+                    metrics.vms_placed += len(slice_vms)
+                    if item['duracion'] is not None:
+                        heapq.heappush(departures, (closes + item['duracion'], number, consumption))
+                else:
+                    metrics.rejected += 1
+
+        # Las reservas del lote se toman juntas, antes de crear las VMs
+        for _ in group:
+            metrics.sample(total, disponible)
+
+    return metrics.summary(total, disponible, zone_of, len(cluster['zonas']),
+                           time.perf_counter() - started)
+
+
+def seed_cluster_database(db: DatabaseManager, cluster: Dict[str, Any]):
+    """
+    Puebla una base de datos vacía con las zonas y workers del cluster.
+    """
+    # El esquema ya trae filas de recursos de ejemplo
+    offset = db.execute_query("SELECT COALESCE(MAX(id_recursos), 0) FROM recursos")[0][0]
+    operations = []
+    for name in cluster['zonas']:
+        operations.append({'type': 'insert', 'params': (name,),
+                           'sql': "INSERT INTO zona_disponibilidad (nombre) VALUES (?)"})
+    for worker_id, zona, total, disponible in zip(cluster['ids'], cluster['zona'],
+                                                   cluster['total'], cluster['disponible']):
+        operations.append({
+            'type': 'insert',
+            'sql': "INSERT INTO recursos (id_recursos, ram, storage, vcpu, ram_available, "
+                   "storage_available, vcpu_available) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            'params': (offset + worker_id, *map(float, total), *map(float, disponible))
+        })
+        operations.append({
+            'type': 'insert',
+            'sql': "INSERT INTO servidor (id_servidor, nombre, id_zona, id_recurso) VALUES (?, ?, ?, ?)",
+            'params': (worker_id, f"worker{worker_id}", zona + 1, offset + worker_id)
+        })
+    db.execute_transaction(operations)
+
+
+def simulate_scheduler_main(cluster: Dict[str, Any], workload: List[Dict[str, Any]],
+                            strategy: str, factor: float, workdir: str,
+                            batch_window: float = 0.0) -> Dict[str, Any]:
+    """
+    Ejecuta la carga con scheduler_main sobre una base de datos temporal
+    (con scheduler_batch por ventana si batch_window > 0).
+
+    Los slices aceptados se registran con SliceUnitOfWork y su reserva se
+    confirma como lo hace el driver; al terminar su duración sus VMs se
+    eliminan con delete_vm_records.
+
+    Returns:
+        Dict con el reporte de la corrida
+    """
+    db_path = os.path.join(workdir, f"simulator_{strategy}.db")
+    initializer = DatabaseInitializer()
+    schema_sql = initializer.load_schema_file(initializer.schema_path)
+    if not schema_sql or not initializer.execute_schema(Path(db_path), schema_sql):
+        raise RuntimeError("No se pudo crear el esquema de la base de datos temporal")
+
+    db = DatabaseManager(db_path)
+    seed_cluster_database(db, cluster)
+
+    original = (config.get('DB_PATH'), config.get('SCHEDULER_STRATEGY'))
+    config.update_config('DB_PATH', db_path)
+    config.update_config('SCHEDULER_STRATEGY', strategy)
+    metrics = _Metrics()
+    started = time.perf_counter()
+    departures: List[Tuple[float, int, Any]] = []
+    try:
+        if batch_window > 0:
+            groups = _batches(workload, batch_window)
+        else:
+            groups = [(item['llegada'], [(number, item)]) for number, item in enumerate(workload)]
+
+        for closes, group in groups:
+            for vm_names in _due(departures, closes):
+                for vm_name in vm_names:
+                    db.delete_vm_records(vm_name)
+
+            lista_data = [{'nombre': item['nombre'], 'zona': {'nombre': item['zona']},
+                           'prioridad': item.get('prioridad'), 'nodos': json.loads(json.dumps(item['nodos']))}
+                          for _, item in group]
+
+            start = time.perf_counter()
+            if batch_window > 0:
+                resultados, _ = scheduler_batch(lista_data, factor)
+            else:
+                resultados = [scheduler_main(lista_data[0], factor)]
+            elapsed = time.perf_counter() - start
+
+            for (number, item), (data, result) in zip(group, resultados):
+                metrics.latencies.append(elapsed / len(group))
+                metrics.vms_requested += len(data['nodos'])
+                if result:
+                    vm_names = _register_slice(db, data)
+                    metrics.accepted += 1
+                    metrics.vms_placed += len(vm_names)
+                    if item['duracion'] is not None:
+                        heapq.heappush(departures, (closes + item['duracion'], number, vm_names))
+                else:
+                    metrics.rejected += 1
+                    if data.get('reserva_rechazada'):
+                        metrics.rejected_capacity += 1
+                metrics.sample(*_database_capacity(db, factor))
+
+        total, disponible = _database_capacity(db, factor)
+    finally:
+        config.update_config('DB_PATH', original[0])
+        config.update_config('SCHEDULER_STRATEGY', original[1])
+
+    return metrics.summary(total, disponible, cluster['zona'], len(cluster['zonas']),
+                           time.perf_counter() - started)
+
+
+def _register_slice(db: DatabaseManager, data: Dict[str, Any]) -> List[str]:
+    """Registra las VMs de un slice aceptado y confirma su reserva."""
+    slice_id = db.insert('slice', {'nombre': data['nombre'], 'tipo': 'linux_cluster'})
+    creadas = {}
+    with SliceUnitOfWork(db) as uow:
+        for port, (name, nodo) in enumerate(data['nodos'].items()):
+            vcpu, ram, disco = nodo['config']['info_config']
+            vm_name = f"vm-{data['nombre']}-{name}"
+            uow.add_vm(vm_name, {'ram': ram, 'disk': disco, 'vcpu': vcpu},
+                       5901 + port, nodo['id_worker'], slice_id, 1)
+            creadas[name] = vm_name
+    cerrar_reserva(data, creadas, registradas_en_uow=True)
+    return list(creadas.values())
+
+
+def _database_capacity(db: DatabaseManager, factor: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Capacidad total y disponible (en unidades pedidas) leídas de la base
+    de datos, en el orden de los workers.
+    """
+    rows = db.execute_query(
+        "SELECT r.ram, r.storage, r.vcpu, r.ram_available, r.storage_available, r.vcpu_available "
+        "FROM servidor s JOIN recursos r ON r.id_recursos = s.id_recurso ORDER BY s.id_servidor"
+    )
+    values = np.array([tuple(row) for row in rows], dtype=float) * factor
+    return values[:, :3], values[:, 3:]
+
+
+def run_simulation(strategies: Sequence[str], mode: str = 'offline', workers: int = 100,
+                   zones: int = 2, slices: int = 200, min_size: int = 1, max_size: int = 8,
+                   worker_mix: Optional[Dict[str, float]] = None,
+                   flavor_mix: Optional[Dict[str, float]] = None,
+                   arrival_rate: float = 1.0, lifetime: float = 0.0,
+                   initial_load: float = 0.0, factor: Optional[float] = None,
+                   seed: int = 42, batch_window: float = 0.0) -> Dict[str, Any]:
+    """
+    Genera un cluster y una carga y los ejecuta con cada estrategia.
+    Todas las estrategias reciben exactamente el mismo cluster y carga.
+    Con batch_window > 0 los slices se planifican por lotes de esa
+    ventana en segundos simulados.
+
+    Returns:
+        Dict con los parámetros y un reporte por estrategia
+    """
+    unknown = [name for name in strategies if name not in available_strategies()]
+    if unknown:
+        raise ValueError(f"Estrategias no registradas: {', '.join(unknown)}")
+    if mode not in MODES:
+        raise ValueError(f"Modo no soportado: {mode}")
+
+    factor = float(factor if factor is not None else config.get_scheduler_config()['resource_factor'])
+    worker_mix = worker_mix or dict(DEFAULT_WORKER_MIX)
+    flavor_mix = flavor_mix or dict(DEFAULT_FLAVOR_MIX)
+    rng = random.Random(seed)
+    cluster = generate_cluster(rng, workers, zones, worker_mix, initial_load)
+    workload = generate_workload(rng, slices, cluster['zonas'], min_size, max_size,
+                                 flavor_mix, arrival_rate, lifetime)
+
+    report = {
+        'parameters': {
+            'mode': mode, 'workers': workers, 'zones': zones, 'slices': slices,
+            'slice_size': [min_size, max_size], 'worker_mix': worker_mix, 'flavor_mix': flavor_mix,
+            'arrival_rate': arrival_rate, 'lifetime': lifetime, 'initial_load': initial_load,
+            'resource_factor': factor, 'seed': seed, 'batch_window': batch_window
+        },
+        'results': {}
+    }
+    if mode == 'offline':
+        for name in strategies:
+            if batch_window > 0:
+                report['results'][name] = simulate_batch(cluster, workload, name, factor, batch_window)
+            else:
+                report['results'][name] = simulate_offline(cluster, workload, name, factor)
+        return report
+
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            for name in strategies:
+                report['results'][name] = simulate_scheduler_main(cluster, workload, name, factor, workdir,
+                                                                  batch_window)
+        finally:
+            close_all_pools()
+    return report
+
+
+def main():
+    """
+    Función principal para ejecutar el simulador desde línea de comandos.
+    """
+    import argparse
+
+    logging.basicConfig(level=logging.ERROR)
+
+    parser = argparse.ArgumentParser(description='Simulador de placement del scheduler')
+    parser.add_argument('--mode', choices=MODES, default='offline', help='Modo de simulación')
+    parser.add_argument('--strategy', action='append', choices=available_strategies(),
+                        help='Estrategia a medir (por defecto todas)')
+    parser.add_argument('--workers', type=int, default=100, help='Workers del cluster')
+    parser.add_argument('--zones', type=int, default=2, help='Zonas de disponibilidad')
+    parser.add_argument('--worker-mix', help=f"Pesos por tipo de worker ({', '.join(WORKER_PROFILES)})")
+    parser.add_argument('--initial-load', type=float, default=0.0,
+                        help='Fracción máxima ya ocupada de cada worker')
+    parser.add_argument('--slices', type=int, default=200, help='Slices a desplegar')
+    parser.add_argument('--min-size', type=int, default=1, help='Nodos mínimos por slice')
+    parser.add_argument('--max-size', type=int, default=8, help='Nodos máximos por slice')
+    parser.add_argument('--flavor-mix', help=f"Pesos por flavor ({', '.join(FLAVORS)})")
+    parser.add_argument('--arrival-rate', type=float, default=1.0, help='Slices por segundo simulado')
+    parser.add_argument('--lifetime', type=float, default=0.0,
+                        help='Duración media de un slice en segundos (0 = permanente)')
+    parser.add_argument('--factor', type=float, help='Factor de recursos (por defecto RESOURCE_FACTOR)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla aleatoria')
+    parser.add_argument('--batch-window', type=float, default=0.0,
+                        help='Planificar por lotes los slices que llegan en esta ventana (segundos, 0 = de a uno)')
+    parser.add_argument('--output', help='Archivo donde guardar el reporte JSON')
+
+    args = parser.parse_args()
+
+    try:
+        report = run_simulation(
+            args.strategy or available_strategies(), mode=args.mode, workers=args.workers,
+            zones=args.zones, slices=args.slices, min_size=args.min_size, max_size=args.max_size,
+            worker_mix=parse_mix(args.worker_mix, WORKER_PROFILES, DEFAULT_WORKER_MIX),
+            flavor_mix=parse_mix(args.flavor_mix, FLAVORS, DEFAULT_FLAVOR_MIX),
+            arrival_rate=args.arrival_rate, lifetime=args.lifetime,
+            initial_load=args.initial_load, factor=args.factor, seed=args.seed,
+            batch_window=args.batch_window
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+===================================================================
+ESTRATEGIAS DE PLACEMENT (BIN-PACKING)
+===================================================================
+
+Interfaz común para los algoritmos que asignan las VMs de un slice
+a los workers, seleccionables con SCHEDULER_STRATEGY.
+
+Estrategias disponibles:
+- coeficiente: Heurística de coeficientes original (orden del slice)
+- ffd: First-fit decreasing, primer worker que cumple
+- best_fit: Worker que queda más lleno según el recurso dominante
+- worst_fit: Worker que queda más libre (reparte la carga)
+- topologia: Agrupa nodos enlazados en el mismo worker (ver topology)
+- consolidacion: Concentra las VMs en pocos workers (ver consolidation)
+
+Salvo 'coeficiente', las estrategias ordenan las VMs de mayor a menor
+participación dominante (la mayor fracción que piden de la RAM, disco
+o vCPUs del cluster) antes de asignarlas, intentan ubicar todas las
+VMs y descuentan los recursos en las mismas unidades en que se piden.
+
+Todas generan un reporte de eficiencia de empaquetado (workers
+usados, utilización, fragmentación y workers que quedan sin VMs).
+
+Versión: 3.1
+===================================================================
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from .numpy_engine import CapacityArrays, NumpyPlacementEngine
+
+
+RESOURCES = ('ram', 'disco', 'vcpu')
+
+
+def _requirements(vm: Any) -> np.ndarray:
+    """Requerimientos de una VM como vector (ram, disco, vcpu)."""
+    return np.array([vm.ram_requerida, vm.disco_requerido, vm.vcpu_requeridas], dtype=np.float64)
+
+
+def _available(caps: CapacityArrays) -> np.ndarray:
+    """Recursos disponibles como matriz workers x (ram, disco, vcpu)."""
+    return np.column_stack([caps.ram_disponible, caps.disco_disponible, caps.vcpu_disponible])
+
+
+def _totals(caps: CapacityArrays) -> np.ndarray:
+    """Recursos totales como matriz workers x (ram, disco, vcpu)."""
+    return np.column_stack([caps.ram, caps.disco, caps.vcpu])
+
+
+def _shares(amounts: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """Fracción amounts/totals, 0 donde el total es 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(totals > 0, amounts / totals, 0.0)
+
+
+class PlacementStrategy(ABC):
+    """
+    Clase base de las estrategias de placement.
+    """
+
+    name = ''
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def order(self, caps: CapacityArrays, vms: Sequence[Any]) -> List[int]:
+        """
+        Orden en que se asignan las VMs: de mayor a menor participación
+        dominante sobre la capacidad total del cluster. El orden es estable
+        para VMs del mismo tamaño.
+
+        Returns:
+            List[int]: Índices de vms en orden de asignación
+        """
+        if not vms:
+            return []
+        cluster = _totals(caps).sum(axis=0)
+        requests = np.array([_requirements(vm) for vm in vms])
+        dominant = _shares(requests, cluster).max(axis=1)
+        return [int(i) for i in np.argsort(-dominant, kind='stable')]
+
+    @abstractmethod
+    def choose(self, caps: CapacityArrays, request: np.ndarray) -> Optional[int]:
+        """
+        Elige el worker para un requerimiento.
+
+        Args:
+            caps: Capacidades actuales de los workers
+            request: Vector (ram, disco, vcpu) requerido
+
+        Returns:
+            Optional[int]: Índice del worker o None si ninguno cumple
+        """
+        pass
+
+    def _fits(self, caps: CapacityArrays, request: np.ndarray) -> np.ndarray:
+        """Máscara de workers con recursos suficientes."""
+        return (_available(caps) >= request).all(axis=1)
+
+    def place(self, workers: Sequence[Any], vms: Sequence[Any],
+              enlaces: Optional[Sequence[Tuple[int, int]]] = None) -> List[Optional[Any]]:
+        """
+        Asigna todas las VMs posibles y actualiza los objetos Worker.
+
+        Args:
+            workers: Workers candidatos (objetos Worker)
+            vms: VMs a asignar (objetos Vm)
+            enlaces (optional): Enlaces (i, j) entre índices de vms; solo
+                                los usan las estrategias de topología
+
+        Returns:
+            List: Worker elegido por VM en el orden de vms (None si no cupo)
+        """
+        caps = CapacityArrays.from_workers(workers)
+        chosen: List[Optional[Any]] = [None] * len(vms)
+
+        for i in self.order(caps, vms):
+            request = _requirements(vms[i])
+            index = self.choose(caps, request)
+            if index is None:
+                self.logger.debug(f"VM {vms[i].nodo_nombre} sin worker disponible")
+                continue
+            caps.ram_disponible[index] -= request[0]
+            caps.disco_disponible[index] -= request[1]
+            caps.vcpu_disponible[index] -= request[2]
+            chosen[i] = workers[index]
+
+        caps.write_back(workers)
+        return chosen
+
+
+class CoefficientStrategy(PlacementStrategy):
+    """
+    Heurística de coeficientes original: VMs en el orden del slice,
+    se detiene en la primera VM que no cabe.
+    """
+
+    name = 'coeficiente'
+
+    def __init__(self):
+        super().__init__()
+        self.engine = NumpyPlacementEngine()
+
+    def order(self, caps: CapacityArrays, vms: Sequence[Any]) -> List[int]:
+        return list(range(len(vms)))
+
+    def choose(self, caps: CapacityArrays, request: np.ndarray) -> Optional[int]:
+        fits = self._fits(caps, request)
+        if not fits.any():
+            return None
+        return int(np.argmax(np.where(fits, self.engine.scores(caps, request[2]), -np.inf)))
+
+    def place(self, workers: Sequence[Any], vms: Sequence[Any],
+              enlaces: Optional[Sequence[Tuple[int, int]]] = None) -> List[Optional[Any]]:
+        chosen = self.engine.place_all(workers, vms)
+        return chosen + [None] * (len(vms) - len(chosen))
+
+
+class FirstFitDecreasingStrategy(PlacementStrategy):
+    """
+    First-fit decreasing: primer worker de la lista con recursos suficientes.
+    """
+
+    name = 'ffd'
+
+    def choose(self, caps: CapacityArrays, request: np.ndarray) -> Optional[int]:
+        fits = self._fits(caps, request)
+        if not fits.any():
+            return None
+        return int(np.argmax(fits))
+
+
+class BestFitStrategy(PlacementStrategy):
+    """
+    Best-fit por recurso dominante: elige el worker cuyo recurso más
+    libre (en fracción de su capacidad) queda más bajo tras la asignación.
+    """
+
+    name = 'best_fit'
+
+    def choose(self, caps: CapacityArrays, request: np.ndarray) -> Optional[int]:
+        fits = self._fits(caps, request)
+        if not fits.any():
+            return None
+        remaining = _shares(_available(caps) - request, _totals(caps)).max(axis=1)
+        return int(np.argmin(np.where(fits, remaining, np.inf)))
+
+
+class WorstFitStrategy(PlacementStrategy):
+    """
+    Worst-fit: elige el worker cuyo recurso más escaso (en fracción de su
+    capacidad) queda más alto tras la asignación, repartiendo la carga.
+    """
+
+    name = 'worst_fit'
+
+    def choose(self, caps: CapacityArrays, request: np.ndarray) -> Optional[int]:
+        fits = self._fits(caps, request)
+        if not fits.any():
+            return None
+        remaining = _shares(_available(caps) - request, _totals(caps)).min(axis=1)
+        return int(np.argmax(np.where(fits, remaining, -np.inf)))
+
+
+# ===================================================================
+# REGISTRO DE ESTRATEGIAS
+# ===================================================================
+
+_strategies: Dict[str, Type[PlacementStrategy]] = {}
+
+
+def register_strategy(cls: Type[PlacementStrategy]) -> Type[PlacementStrategy]:
+    """
+    Registra una estrategia bajo su atributo name.
+    """
+    _strategies[cls.name] = cls
+    return cls
+
+
+def available_strategies() -> List[str]:
+    """
+    Nombres de las estrategias registradas.
+    """
+    return sorted(_strategies)
+
+
+def get_strategy(name: str) -> PlacementStrategy:
+    """
+    Crea la estrategia registrada con el nombre indicado.
+
+    Raises:
+        ValueError: Si la estrategia no existe
+    """
+    cls = _strategies.get(name)
+    if cls is None:
+        raise ValueError(f"Estrategia de placement desconocida: {name} "
+                         f"(disponibles: {', '.join(available_strategies())})")
+    return cls()
+
+
+for _cls in (CoefficientStrategy, FirstFitDecreasingStrategy, BestFitStrategy, WorstFitStrategy):
+    register_strategy(_cls)
+
+
+# ===================================================================
+# REPORTE DE EFICIENCIA
+# ===================================================================
+
+def count_cross_edges(enlaces: Sequence[Tuple[int, int]], assigned: Sequence[Optional[int]]) -> int:
+    """
+    Cuenta los enlaces cuyos extremos quedaron en workers distintos.
+    Los enlaces con un extremo sin asignar no se cuentan.
+    """
+    return sum(
+        1 for a, b in enlaces
+        if assigned[a] is not None and assigned[b] is not None and assigned[a] != assigned[b]
+    )
+
+
+def placement_report(caps: CapacityArrays, vms: Sequence[Any],
+                     assigned: Sequence[Optional[int]], strategy: str,
+                     enlaces: Optional[Sequence[Tuple[int, int]]] = None) -> Dict[str, Any]:
+    """
+    Calcula la eficiencia de empaquetado de una asignación.
+
+    La utilización es la fracción de los recursos disponibles de los
+    workers usados que ocupan las VMs. La fragmentación de cada recurso
+    es 1 - (mayor bloque libre / total libre): 0 si todo lo libre está en
+    un solo worker y cercana a 1 si está repartido en trozos pequeños.
+    Los workers apagables son los que siguen sin ninguna VM después de
+    la asignación (candidatos a apagarse o pasar a reposo).
+
+    Args:
+        caps: Capacidades de los workers antes de la asignación
+        vms: VMs del slice
+        assigned: Índice del worker elegido por VM (None si no cupo)
+        strategy: Nombre de la estrategia usada
+        enlaces (optional): Enlaces (i, j) del slice; si se indican se
+                            reporta cuántos quedan entre workers distintos
+
+    Returns:
+        Dict con el reporte
+    """
+    before = _available(caps)
+    consumed = np.zeros_like(before)
+    unplaced = []
+    for vm, index in zip(vms, assigned):
+        if index is None:
+            unplaced.append(vm.nodo_nombre)
+        else:
+            consumed[index] += _requirements(vm)
+
+    used = consumed.any(axis=1)
+    # Workers sin VMs antes ni después de la asignación
+    idle = ~used & (before >= _totals(caps)).all(axis=1)
+    free = np.clip(before - consumed, 0, None)
+    free_total = free.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fragmentation = np.where(free_total > 0, 1 - free.max(axis=0, initial=0) / free_total, 0.0)
+        utilization = np.where(before[used].sum(axis=0) > 0,
+                               consumed[used].sum(axis=0) / before[used].sum(axis=0), 0.0)
+
+    report = {
+        'estrategia': strategy,
+        'vms_total': len(vms),
+        'vms_asignadas': len(vms) - len(unplaced),
+        'vms_sin_asignar': unplaced,
+        'workers_total': len(caps),
+        'workers_usados': int(used.sum()),
+        'workers_activos': int(len(caps) - idle.sum()),
+        'workers_apagables': [caps.ids[i] for i in np.flatnonzero(idle)],
+        'utilizacion': {r: round(float(u), 4) for r, u in zip(RESOURCES, utilization)},
+        'fragmentacion': {r: round(float(f), 4) for r, f in zip(RESOURCES, fragmentation)}
+    }
+    if enlaces is not None:
+        report['enlaces_total'] = len(enlaces)
+        report['enlaces_entre_workers'] = count_cross_edges(enlaces, assigned)
+    return report
@@ -0,0 +1,199 @@
+"""
+===================================================================
+PLACEMENT CONSCIENTE DE LA TOPOLOGÍA
+===================================================================
+
+Estrategia 'topologia': particiona el grafo del slice (nodos y sus
+enlaces) en grupos que caben en cada worker, buscando que los nodos
+conectados queden en el mismo worker. Cada enlace entre workers
+distintos debe atravesar la red VLAN/OpenFlow, por lo que se
+minimiza su cantidad.
+
+Algoritmo:
+1. Crecimiento greedy de regiones: se empieza por el nodo de mayor
+   grado y se continúa por el nodo de la frontera con mayor ganancia
+   (vecinos ya asignados menos vecinos pendientes), de modo que los
+   grupos densamente conectados se asignan juntos. Cada VM va al
+   worker donde ya están más vecinos suyos; en empate, a un worker ya
+   usado y luego al de más capacidad libre.
+2. Refinamiento por propagación de etiquetas: se mueve cada VM al
+   worker donde tiene más vecinos si moverla reduce los enlaces
+   entre workers y el destino tiene recursos, hasta que no haya
+   mejoras o se alcance el máximo de pasadas.
+
+Versión: 3.1
+===================================================================
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .numpy_engine import CapacityArrays
+from .strategies import (
+    PlacementStrategy, register_strategy,
+    _available, _requirements, _shares, _totals
+)
+
+
+Edge = Tuple[int, int]
+
+
+def build_edges(nodos: Dict[str, Dict[str, Any]], names: Sequence[str]) -> List[Edge]:
+    """
+    Extrae los enlaces no dirigidos del slice como pares de índices.
+
+    Args:
+        nodos: data['nodos'] del slice
+        names: Nombres de los nodos en el orden de las VMs
+
+    Returns:
+        List[Edge]: Enlaces (i, j) con i < j, sin duplicados ni enlaces
+                    a nodos inexistentes
+    """
+    index = {name: i for i, name in enumerate(names)}
+    edges = set()
+    for name in names:
+        for link in nodos.get(name, {}).get('enlaces', []) or []:
+            if link in index and link != name:
+                a, b = index[name], index[link]
+                edges.add((min(a, b), max(a, b)))
+    return sorted(edges)
+
+
+def _adjacency(count: int, edges: Sequence[Edge]) -> List[List[int]]:
+    """Listas de adyacencia a partir de los enlaces."""
+    adjacency: List[List[int]] = [[] for _ in range(count)]
+    for a, b in edges:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    return adjacency
+
+
+class TopologyStrategy(PlacementStrategy):
+    """
+    Particionado greedy del grafo del slice con refinamiento por
+    propagación de etiquetas.
+    """
+
+    name = 'topologia'
+    max_passes = 10
+
+    def choose(self, caps: CapacityArrays, request: np.ndarray) -> Optional[int]:
+        """Sin información de enlaces: worker con más capacidad libre."""
+        return self._choose_with_affinity(caps, request, np.zeros(len(caps)), np.zeros(len(caps), dtype=bool))
+
+    def _choose_with_affinity(self, caps: CapacityArrays, request: np.ndarray,
+                              affinity: np.ndarray, used: np.ndarray) -> Optional[int]:
+        """
+        Elige el worker que cumple con más vecinos ya asignados; en empate
+        prefiere un worker ya usado y luego el de más capacidad libre.
+        """
+        fits = self._fits(caps, request)
+        if not fits.any():
+            return None
+        free = _shares(_available(caps) - request, _totals(caps)).min(axis=1)
+        # Orden lexicográfico: afinidad, worker usado, capacidad libre (en [0, 1])
+        score = affinity * 4 + used * 2 + np.clip(free, 0, 1)
+        return int(np.argmax(np.where(fits, score, -np.inf)))
+
+    def place(self, workers: Sequence[Any], vms: Sequence[Any],
+              enlaces: Optional[Sequence[Edge]] = None) -> List[Optional[Any]]:
+        """
+        Asigna las VMs agrupando los nodos conectados.
+
+        Args:
+            workers: Workers candidatos (objetos Worker)
+            vms: VMs a asignar (objetos Vm)
+            enlaces (optional): Enlaces (i, j) entre índices de vms
+
+        Returns:
+            List: Worker elegido por VM en el orden de vms (None si no cupo)
+        """
+        caps = CapacityArrays.from_workers(workers)
+        adjacency = _adjacency(len(vms), enlaces or [])
+        requests = [_requirements(vm) for vm in vms]
+        assigned: List[Optional[int]] = [None] * len(vms)
+        used = np.zeros(len(caps), dtype=bool)
+
+        degree = np.array([len(neighbours) for neighbours in adjacency], dtype=np.float64)
+        placed_neighbours = np.zeros(len(vms))
+        pending = np.ones(len(vms), dtype=bool)
+
+        for _ in range(len(vms)):
+            i = self._next_node(degree, placed_neighbours, pending)
+            pending[i] = False
+            affinity = np.zeros(len(caps))
+            for neighbour in adjacency[i]:
+                if assigned[neighbour] is not None:
+                    affinity[assigned[neighbour]] += 1
+            index = self._choose_with_affinity(caps, requests[i], affinity, used)
+            if index is None:
+                self.logger.debug(f"VM {vms[i].nodo_nombre} sin worker disponible")
+                continue
+            self._move(caps, requests[i], None, index)
+            assigned[i] = index
+            used[index] = True
+            for neighbour in adjacency[i]:
+                placed_neighbours[neighbour] += 1
+
+        self._refine(caps, adjacency, requests, assigned)
+
+        caps.write_back(workers)
+        return [workers[index] if index is not None else None for index in assigned]
+
+    def _next_node(self, degree: np.ndarray, placed_neighbours: np.ndarray,
+                   pending: np.ndarray) -> int:
+        """
+        Siguiente VM a asignar. Se prefieren las VMs de la frontera (con
+        vecinos ya asignados) con mayor ganancia: vecinos asignados menos
+        vecinos pendientes. Sin frontera, se empieza una nueva región por
+        la VM pendiente de mayor grado. En empate, la primera del slice.
+        """
+        frontier = placed_neighbours > 0
+        gain = 2 * placed_neighbours - degree
+        # La frontera siempre precede al resto (el grado es menor que len(degree))
+        key = np.where(frontier, len(degree) * 2 + gain, degree)
+        return int(np.argmax(np.where(pending, key, -np.inf)))
+
+    def _move(self, caps: CapacityArrays, request: np.ndarray,
+              source: Optional[int], target: int):
+        """Traslada los recursos de una VM del worker source al target."""
+        if source is not None:
+            caps.ram_disponible[source] += request[0]
+            caps.disco_disponible[source] += request[1]
+            caps.vcpu_disponible[source] += request[2]
+        caps.ram_disponible[target] -= request[0]
+        caps.disco_disponible[target] -= request[1]
+        caps.vcpu_disponible[target] -= request[2]
+
+    def _refine(self, caps: CapacityArrays, adjacency: List[List[int]],
+                requests: List[np.ndarray], assigned: List[Optional[int]]):
+        """
+        Propagación de etiquetas: mueve VMs al worker donde tienen más
+        vecinos mientras eso reduzca los enlaces entre workers.
+        """
+        for _ in range(self.max_passes):
+            moved = False
+            for i, current in enumerate(assigned):
+                if current is None or not adjacency[i]:
+                    continue
+                counts: Dict[int, int] = {}
+                for neighbour in adjacency[i]:
+                    if assigned[neighbour] is not None:
+                        counts[assigned[neighbour]] = counts.get(assigned[neighbour], 0) + 1
+                for target, count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])):
+                    if count <= counts.get(current, 0):
+                        break
+                    if (caps.ram_disponible[target] >= requests[i][0] and
+                            caps.disco_disponible[target] >= requests[i][1] and
+                            caps.vcpu_disponible[target] >= requests[i][2]):
+                        self._move(caps, requests[i], current, target)
+                        assigned[i] = target
+                        moved = True
+                        break
+            if not moved:
+                break
+
+
+register_strategy(TopologyStrategy)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+===================================================================
+PRUEBAS DE LA CACHÉ DE LA API
+===================================================================
+
+Verifica la caché de catálogos (TTL, invalidación y ETag) y las
+estadísticas del dashboard que se leen en una sola consulta.
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.getcwd())
+
+from testing_support import run_tests, temp_database
+
+
+def test_catalog_cache_ttl_invalidation_and_etag():
+    """La caché de catálogos reutiliza el valor, lo recarga al invalidar o vencer y cambia el ETag."""
+    import time
+    from database.catalog_cache import CatalogCache, etag_matches
+
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {'flavors': ['f'] * len(loads), 'total': len(loads)}
+
+    cache = CatalogCache(ttl=60, ttls={'workers': 0.05})
+    first = cache.get('flavors', loader)
+    assert cache.get('flavors', loader) is first and len(loads) == 1
+    assert etag_matches(first.etag, first.etag) and etag_matches(f'"x", W/{first.etag}', first.etag)
+    assert not etag_matches(None, first.etag) and not etag_matches('"x"', first.etag)
+
+    cache.invalidate('flavors')
+    second = cache.get('flavors', loader)
+    assert len(loads) == 2 and second.etag != first.etag
+
+    # Una carga que empezó antes de invalidar no queda guardada
+    def stale_loader():
+        cache.invalidate('images')
+        return {'images': [], 'total': 0}
+
+    cache.get('images', stale_loader)
+    assert 'images' not in cache._entries
+
+    cache.get('workers', loader)
+    time.sleep(0.06)
+    cache.get('workers', loader)
+    stats = cache.get_stats()['catalogs']
+    assert stats['flavors'] == {**stats['flavors'], 'hits': 1, 'misses': 2, 'invalidations': 1}
+    assert stats['workers']['misses'] == 2 and stats['workers']['ttl_seconds'] == 0.05
+
+
+def test_system_stats_single_query():
+    """Las estadísticas del dashboard salen de una consulta y coinciden con los conteos por separado."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        otro = db.insert('slice', {'nombre': 'os', 'tipo': 'openstack', 'fecha_creacion': '2000-01-01 00:00:00'})
+        for i, topologia in enumerate((slice_id, slice_id, otro)):
+            db.insert('vm', {'nombre': f'vm-{i}', 'topologia_id_topologia': topologia, 'servidor_id_servidor': 1})
+        db.execute_update('recursos', 'ram_available = 0', 'id_recursos = (SELECT id_recurso FROM servidor WHERE id_servidor = 2)')
+        db.execute_update('recursos', 'ram_available = 1024, vcpu_available = 1',
+                          'id_recursos = (SELECT id_recurso FROM servidor WHERE id_servidor = 3)')
+
+        stats = db.get_system_stats(['linux_cluster', 'openstack', 'otro'])
+        assert stats['drivers'] == {'linux_cluster': {'slices': 1, 'vms': 2}, 'openstack': {'slices': 1, 'vms': 1},
+                                    'otro': {'slices': 0, 'vms': 0}}
+        zonas = {zona['zona']: zona for zona in stats['zone_utilization']}
+        # zona-a: w1 libre y w2 sin RAM disponible; zona-b: w3 con 1024 de 2048 y 1 de 4 vCPU
+        assert (zonas['zona-a']['servidores'], zonas['zona-a']['ram_uso_pct'], zonas['zona-a']['vcpu_uso_pct']) == \
+            (2, round(4096 * 100 / 12288, 2), 0)
+        assert (zonas['zona-b']['ram_uso_pct'], zonas['zona-b']['vcpu_uso_pct']) == (50.0, 75.0)
+        assert [s['nombre'] for s in stats['recent_slices']] == ['ledger', 'os']
+        assert len(db.get_system_stats(recent=1)['recent_slices']) == 1
+
+
+def test_catalog_cache_does_not_keep_failed_loads():
+    """Si la lectura falla el error llega al cliente y la siguiente petición vuelve a leer."""
+    from database.catalog_cache import CatalogCache
+
+    calls = []
+
+    def flaky_loader():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return {'zones': [], 'total': 0}
+
+    cache = CatalogCache(ttl=60)
+    try:
+        cache.get('zones', flaky_loader)
+        assert False, "Se esperaba RuntimeError"
+    except RuntimeError:
+        pass
+    assert 'zones' not in cache._entries
+    assert cache.get('zones', flaky_loader).value == {'zones': [], 'total': 0}
+    assert cache.get('zones', flaky_loader).value['total'] == 0 and len(calls) == 2
+    assert cache.get_stats()['catalogs']['zones']['misses'] == 2
+
+
+def test_system_stats_propagates_database_errors():
+    """Una base de datos sin esquema hace fallar las estadísticas en lugar de devolver ceros."""
+    import sqlite3
+    from pathlib import Path
+    from database import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db = DatabaseManager(str(Path(workdir) / "vacia.db"))
+        try:
+            db.get_system_stats(['linux_cluster'])
+            assert False, "Se esperaba sqlite3.Error"
+        except sqlite3.Error:
+            pass
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+===================================================================
+PRUEBAS DE LA BASE DE DATOS
+===================================================================
+
+Verifica el pool de conexiones SQLite3 (reutilización entre hilos,
+reentrada en el mismo hilo, timeout y health check) y la unidad de
+trabajo de despliegue (todo o nada).
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+
+from database import ConnectionPool, DatabaseManager, SliceUnitOfWork, get_capacity_ledger
+from database.connection_pool import PoolTimeoutError
+from testing_support import available, run_tests, temp_database
+
+
+def test_pool_reuses_connections_across_threads():
+    """Muchos hilos comparten pocas conexiones y las devuelven al pool al terminar."""
+    with tempfile.TemporaryDirectory() as workdir:
+        pool = ConnectionPool(str(Path(workdir) / "pool.db"), max_size=2, timeout=5)
+        barrier = threading.Barrier(6)
+        seen = set()
+        lock = threading.Lock()
+
+        def worker():
+            barrier.wait()
+            for _ in range(5):
+                with pool.connection() as conn:
+                    conn.execute("SELECT 1").fetchone()
+                    with lock:
+                        seen.add(id(conn))
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        stats = pool.get_stats()
+        assert len(seen) <= 2 and stats['misses'] == len(seen)
+        assert stats['hits'] + stats['misses'] == 30
+        assert (stats['open_connections'], stats['in_use_connections']) == (len(seen), 0)
+        assert stats['timeouts'] == 0
+        pool.close()
+
+
+def test_pool_is_reentrant_within_a_thread():
+    """Las operaciones anidadas usan la conexión del bloque exterior y no confirman su transacción."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+
+        with db.connection() as outer:
+            assert not db.pool.is_nested()
+            with db.connection() as inner:
+                assert inner is outer and db.pool.is_nested()
+            outer.execute("BEGIN IMMEDIATE")
+            db.insert('zona_disponibilidad', {'nombre': 'zona-c'})
+            assert outer.in_transaction
+            outer.rollback()
+
+        assert not db.select('zona_disponibilidad', where={'nombre': 'zona-c'})
+        assert db.pool.get_stats()['reentrant'] >= 2
+
+        # Una transacción que el llamador deja abierta se descarta al devolver la conexión
+        with db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO zona_disponibilidad (nombre) VALUES ('zona-d')")
+        assert not db.select('zona_disponibilidad', where={'nombre': 'zona-d'})
+
+
+def test_pool_times_out_and_replaces_broken_connections():
+    """Sin conexiones libres se espera hasta el timeout, y una conexión rota se reemplaza."""
+    with tempfile.TemporaryDirectory() as workdir:
+        pool = ConnectionPool(str(Path(workdir) / "pool.db"), max_size=1, timeout=0.05,
+                              health_check_interval=0)
+        held = threading.Event()
+        release = threading.Event()
+
+        def holder():
+            with pool.connection():
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        assert held.wait(5)
+        try:
+            with pool.connection():
+                pass
+            assert False, "Se esperaba PoolTimeoutError"
+        except PoolTimeoutError:
+            pass
+        release.set()
+        thread.join(5)
+
+        # La conexión inactiva se cierra por fuera: el health check la descarta
+        broken = pool._idle[0]
+        broken.close()
+        with pool.connection() as conn:
+            assert conn is not broken
+            assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+        stats = pool.get_stats()
+        assert (stats['waits'], stats['timeouts']) == (1, 1)
+        assert (stats['health_check_failures'], stats['discarded'], stats['open_connections']) == (1, 1, 1)
+
+        pool.close()
+        try:
+            with pool.connection():
+                pass
+            assert False, "Se esperaba un error con el pool cerrado"
+        except Exception as e:
+            assert 'cerrado' in str(e)
+
+
+def test_database_managers_share_the_pool():
+    """Las instancias de DatabaseManager de una misma base usan un único pool."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        other = DatabaseManager(db.db_path)
+        assert other.pool is db.pool
+        assert other.execute_query("SELECT COUNT(*) AS n FROM servidor")[0]['n'] == 3
+
+
+UOW_TABLES = ('recursos', 'vm', 'nodo_cluster', 'nodo_ram', 'nodo_almacenamiento', 'nodo_vcpu', 'nodo_enlace')
+
+
+def row_counts(db):
+    """Número de filas de las tablas que escribe la unidad de trabajo."""
+    return {table: db.execute_query(f"SELECT COUNT(*) AS n FROM {table}")[0]['n'] for table in UOW_TABLES}
+
+
+def test_unit_of_work_writes_linked_rows():
+    """Al confirmar se escriben las VMs con sus recursos, nodos y enlaces."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        before = row_counts(db)
+
+        with SliceUnitOfWork(db) as uow:
+            uow.add_vm('vm-a', {'ram': 1024, 'disk': 10, 'vcpu': 1}, 5901, 1, slice_id, 1, enlaces=['vm-b'])
+            uow.add_vm('vm-b', {'ram': 512, 'disk': 5, 'vcpu': 1}, 5902, 2, slice_id, 1, enlaces=['vm-a'])
+            assert uow.pending == 2
+
+        after = row_counts(db)
+        assert {table: after[table] - before[table] for table in UOW_TABLES} == {
+            'recursos': 2, 'vm': 2, 'nodo_cluster': 2, 'nodo_ram': 2,
+            'nodo_almacenamiento': 2, 'nodo_vcpu': 2, 'nodo_enlace': 2
+        }
+        rows = db.execute_query(
+            "SELECT v.nombre, v.vnc, v.servidor_id_servidor, r.ram, n.nombre AS nodo, e.nombre AS enlace "
+            "FROM vm v JOIN recursos r ON r.id_recursos = v.recursos_id_estado "
+            "JOIN nodo_cluster n ON n.vm_id = v.id_vm JOIN nodo_enlace e ON e.nodo_id = n.id_nodo "
+            "ORDER BY v.nombre"
+        )
+        assert [tuple(row) for row in rows] == [('vm-a', 5901, 1, 1024, 'vm-a', 'vm-b'),
+                                                ('vm-b', 5902, 2, 512, 'vm-b', 'vm-a')]
+
+        # Una unidad de trabajo solo se confirma una vez
+        try:
+            uow.commit()
+            assert False, "Se esperaba RuntimeError"
+        except RuntimeError:
+            pass
+
+
+def test_unit_of_work_rolls_back_every_row_when_one_insert_fails():
+    """Si una fila del lote viola una restricción no queda escrita ninguna, ni se descuenta capacidad."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        ledger = get_capacity_ledger(db.db_path)
+        snapshot = ledger.snapshot('zona-a', 2)
+        before = row_counts(db)
+
+        uow = SliceUnitOfWork(db)
+        uow.add_vm('vm-a', {'ram': 1024, 'disk': 10, 'vcpu': 1}, 5901, 1, slice_id, 1, enlaces=['vm-b'])
+        uow.add_vm('vm-a', {'ram': 512, 'disk': 5, 'vcpu': 1}, 5902, 2, slice_id, 1)
+        try:
+            uow.commit()
+            assert False, "Se esperaba IntegrityError"
+        except sqlite3.IntegrityError:
+            pass
+
+        assert row_counts(db) == before
+        assert not uow.committed
+        assert ledger.is_current(snapshot)
+        assert ledger.snapshot('zona-a', 2).rows == snapshot.rows
+        assert available(db, 1) == (8192.0, 100.0, 4.0)
+
+        # La conexión vuelve al pool sin transacción abierta y se puede seguir escribiendo
+        with SliceUnitOfWork(db) as retry:
+            retry.add_vm('vm-a', {'ram': 1024, 'disk': 10, 'vcpu': 1}, 5901, 1, slice_id, 1)
+        assert row_counts(db)['vm'] == before['vm'] + 1
+
+
+def test_unit_of_work_discards_rows_when_the_block_fails():
+    """Una excepción dentro del bloque descarta las VMs registradas sin escribir nada."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        before = row_counts(db)
+
+        try:
+            with SliceUnitOfWork(db) as uow:
+                uow.add_vm('vm-a', {'ram': 1024, 'disk': 10, 'vcpu': 1}, 5901, 1, slice_id, 1)
+                raise ValueError("fallo del despliegue")
+        except ValueError:
+            pass
+
+        assert uow.pending == 0 and not uow.committed
+        assert row_counts(db) == before
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
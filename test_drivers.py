@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+===================================================================
+PRUEBAS DE DRIVERS
+===================================================================
+
+Verifica las piezas que comparten los drivers de slices: el registro
+que crea cada driver una sola vez, el motor de aprovisionamiento con
+sus límites de concurrencia, la reserva atómica de puertos VNC, la
+caché de tokens de Keystone con la renovación tras un 401, el cliente
+HTTP compartido (reintentos solo en métodos idempotentes) y el
+inventario paginado de Nova.
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from testing_support import run_tests
+
+
+def test_driver_registry_builds_each_driver_once():
+    """El registro crea cada driver al primer uso, lo reutiliza y registra backends nuevos."""
+    from drivers.registry import DriverRegistry, UnknownDriver
+
+    created = []
+
+    class FakeDriver:
+        def __init__(self):
+            created.append(self)
+
+    registry = DriverRegistry(builtin=False)
+    registry.register('fake', FakeDriver)
+    registry.register('roto', lambda: 1 / 0)
+    assert registry.get_status() == {'fake': 'registrado', 'roto': 'registrado'}
+    assert registry.get('fake') is registry.get('fake') and len(created) == 1
+    try:
+        registry.get('roto')
+        assert False, "Se esperaba ZeroDivisionError"
+    except ZeroDivisionError:
+        pass
+    try:
+        registry.get('otro')
+        assert False, "Se esperaba UnknownDriver"
+    except UnknownDriver:
+        pass
+    status = registry.get_status()
+    assert status['fake'] == 'cargado' and status['roto'].startswith('error')
+
+    builtin = DriverRegistry()
+    assert builtin.names() == ['linux_cluster', 'openstack']
+    assert builtin.get_status()['linux_cluster'] == 'registrado'
+
+
+def test_driver_registry_retries_failed_factory_and_closes_clients():
+    """Un driver que falló al crearse se reintenta, y al cerrar se cierra cada cliente HTTP una vez."""
+    from drivers.registry import DriverRegistry
+
+    attempts = []
+    closed = []
+
+    class Http:
+        def close(self):
+            closed.append(self)
+            raise RuntimeError("ya cerrado")
+
+    shared = Http()
+
+    class FlakyDriver:
+        def __init__(self):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError("Keystone no responde")
+            self.http = shared
+
+    class OtherDriver:
+        http = shared
+
+    registry = DriverRegistry(builtin=False)
+    registry.register('flaky', FlakyDriver)
+    registry.register('otro', OtherDriver)
+    registry.register('otro', lambda: None)
+    try:
+        registry.get('flaky')
+        assert False, "Se esperaba ConnectionError"
+    except ConnectionError:
+        pass
+    assert registry.get_status()['flaky'] == 'error: Keystone no responde'
+    assert isinstance(registry.get('flaky'), FlakyDriver) and len(attempts) == 2
+    assert registry.get_status()['flaky'] == 'cargado'
+    assert isinstance(registry.get('otro'), OtherDriver)
+
+    registry.close()
+    assert closed == [shared]
+    assert registry.get_status() == {'flaky': 'registrado', 'otro': 'registrado'}
+
+
+def test_provisioning_engine_limits_apply_across_slices():
+    """Dos slices creados a la vez comparten el límite global y el de cada worker."""
+    import threading
+    import time
+    from drivers.provisioning import ProvisioningEngine
+
+    engine = ProvisioningEngine(max_concurrency=3, max_per_worker=1)
+    lock = threading.Lock()
+    running = {'total': 0, 'peak': 0}
+    per_worker = {}
+    peak_per_worker = {}
+
+    def provision(task):
+        worker = task['worker_id']
+        with lock:
+            running['total'] += 1
+            per_worker[worker] = per_worker.get(worker, 0) + 1
+            running['peak'] = max(running['peak'], running['total'])
+            peak_per_worker[worker] = max(peak_per_worker.get(worker, 0), per_worker[worker])
+        time.sleep(0.02)
+        with lock:
+            running['total'] -= 1
+            per_worker[worker] -= 1
+        if task['node_key'].endswith('falla'):
+            raise RuntimeError("worker sin espacio")
+        return True
+
+    def slice_tasks(nombre):
+        return [{'node_key': f'{nombre}-{i}', 'worker_id': i % 4} for i in range(8)] + \
+            [{'node_key': f'{nombre}-falla', 'worker_id': 0}]
+
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.update({n: engine.run(slice_tasks(n), provision)}))
+               for n in ('s1', 's2')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert running['peak'] <= 3 and max(peak_per_worker.values()) == 1
+    for nombre, result in results.items():
+        assert [r['node_key'] for r in result] == [t['node_key'] for t in slice_tasks(nombre)]
+        assert [r['success'] for r in result] == [True] * 8 + [False]
+        assert result[-1]['error'] == 'worker sin espacio'
+
+
+def test_vnc_ports_are_allocated_atomically():
+    """Los puertos VNC se reservan en la base de datos sin repetirse entre hilos."""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from testing_support import temp_database
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        db.execute_update('servidor', 'max_vnc = 5910', 'id_servidor = 2')
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ports = list(executor.map(lambda worker: (worker, db.allocate_vnc_port(worker, 5900)),
+                                      [1, 2] * 20))
+
+        for worker, first in ((1, 5901), (2, 5911)):
+            assigned = sorted(port for w, port in ports if w == worker)
+            assert assigned == list(range(first, first + 20)), assigned
+        assert db.select_one('servidor', 'max_vnc', {'id_servidor': 1})['max_vnc'] == 5920
+        try:
+            db.allocate_vnc_port(99)
+            assert False, "Se esperaba ValueError"
+        except ValueError:
+            pass
+
+
+def _response(status, json_body=None, headers=None):
+    """Respuesta de requests armada a mano para los dobles de HTTP."""
+    import json
+    import requests
+
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = json.dumps(json_body or {}).encode()
+    return response
+
+
+def test_token_cache_refreshes_before_expiry_and_serves_stale_on_errors():
+    """El token se renueva dentro del margen (acotado a media vida) y sigue en uso si Keystone falla."""
+    import time
+    from drivers.token_cache import TokenCache, parse_expires_at
+
+    assert parse_expires_at("2024-05-01T12:00:00.000000Z") == 1714564800.0
+    assert parse_expires_at("2024-05-01T14:00:00+02:00") == 1714564800.0
+    assert parse_expires_at("mañana") is None
+
+    now = time.time()
+    issued = iter([('t1', now + 3600), ('t2', now + 20), ('t3', now + 3600)])
+    cache = TokenCache(refresh_margin=300)
+    assert cache.get('k', lambda: next(issued)) == 't1'
+    assert cache.get('k', lambda: next(issued)) == 't1'
+
+    # Dentro del margen de renovación se pide un token nuevo
+    cache._entries['k']['refresh_at'] = now - 1
+    assert cache.get('k', lambda: next(issued)) == 't2'
+    # Un token de 20 s se renueva a los 10 s, no en cada llamada
+    assert round(cache._entries['k']['expires_at'] - cache._entries['k']['refresh_at']) == 10
+
+    def keystone_down():
+        raise ConnectionError("Keystone no responde")
+
+    cache._entries['k']['refresh_at'] = now - 1
+    assert cache.get('k', keystone_down) == 't2'
+    cache._entries['k']['expires_at'] = now - 1
+    try:
+        cache.get('k', keystone_down)
+        assert False, "Se esperaba ConnectionError"
+    except ConnectionError:
+        pass
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['refreshes'], stats['refresh_errors'], stats['stale_served']) == (1, 2, 2, 1)
+
+
+def test_token_cache_coalesces_concurrent_refreshes():
+    """Varios hilos sin token disparan una sola autenticación contra Keystone."""
+    import threading
+    import time
+    from drivers.token_cache import TokenCache
+
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def keystone():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'compartido', time.time() + 3600
+
+    cache = TokenCache(refresh_margin=300)
+    tokens = []
+
+    def worker():
+        barrier.wait()
+        tokens.append(cache.get('k', keystone))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1 and tokens == ['compartido'] * 8
+
+
+def test_openstack_driver_renews_revoked_token_once():
+    """Un 401 descarta el token revocado y la llamada se reintenta una sola vez con uno nuevo."""
+    import time
+    import requests
+    from drivers.openstack_driver import OpenStackDriver
+    from drivers.openstack_inventory import NOT_FOUND_STATUS, ServerInventory
+    from drivers.token_cache import TokenCache
+
+    issued = []
+    sent = []
+    revoked = {'t1'}
+
+    class FakeHttp:
+        def post(self, url, **kwargs):
+            issued.append(f"t{len(issued) + 1}")
+            expires = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + 3600))
+            return _response(201, {'token': {'expires_at': expires}}, {'X-Subject-Token': issued[-1]})
+
+        def request(self, method, url, headers=None, **kwargs):
+            sent.append(headers['X-Auth-Token'])
+            if headers['X-Auth-Token'] in revoked:
+                return _response(401)
+            return _response(200, {'servers': []})
+
+        def get(self, url, headers=None, **kwargs):
+            return self.request('GET', url, headers=headers, **kwargs)
+
+    driver = OpenStackDriver()
+    driver.http = FakeHttp()
+    driver.token_cache = TokenCache(refresh_margin=300)
+
+    response = driver.authenticated_request("GET", "http://nova/servers", headers={"X-Extra": "1"})
+    assert response.status_code == 200 and sent == ['t1', 't2'] and issued == ['t1', 't2']
+    assert driver.token_cache.get_stats()['invalidations'] == 1
+
+    # Otro hilo que recibió 401 con t1 no descarta el token ya renovado
+    driver.token_cache.invalidate(driver._token_key(), 't1')
+    assert driver._get_token() == 't2'
+
+    # Si el token nuevo también es rechazado, se devuelve el 401 sin más reintentos
+    revoked.add('t2')
+    revoked.add('t3')
+    assert driver.authenticated_request("DELETE", "http://nova/servers/x").status_code == 401
+    assert sent[2:] == ['t2', 't3']
+
+    # Las consultas del inventario (que lanzan HTTPError) también se reintentan
+    revoked.clear()
+    revoked.add('t3')
+    driver.inventory = ServerInventory("http://nova", http=driver.http)
+    assert driver.get_vm_statuses(['vm-a']) == {'vm-a': NOT_FOUND_STATUS}
+    assert sent[-2:] == ['t3', 't4']
+    try:
+        driver._authenticated(lambda token: _response(500).raise_for_status())
+        assert False, "Se esperaba HTTPError"
+    except requests.HTTPError:
+        pass
+
+
+def test_http_client_retries_only_idempotent_methods():
+    """Un 503 se reintenta en GET/PUT/DELETE pero no en POST, y las métricas agrupan IDs."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from drivers.http_client import HttpClient
+
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            hits.append((self.command, self.path))
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            status = 503 if self.path.startswith('/flaky') else 200
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        do_GET = do_POST = do_PUT = do_DELETE = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    client = HttpClient(timeout=5, max_retries=2, backoff_factor=0)
+
+    try:
+        for method in ('GET', 'PUT', 'DELETE', 'POST'):
+            hits.clear()
+            assert client.request(method, f"{base}/flaky/123", json={}).status_code == 503
+            assert len(hits) == (1 if method == 'POST' else 3), (method, hits)
+
+        assert client.get(f"{base}/servers/42").status_code == 200
+        assert client.get(f"{base}/servers/43").status_code == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+        client.close()
+
+    endpoints = client.get_stats()['endpoints']
+    port = server.server_address[1]
+    assert endpoints[f"GET 127.0.0.1:{port}/servers/{{id}}"]['requests'] == 2
+    flaky = endpoints[f"POST 127.0.0.1:{port}/flaky/{{id}}"]
+    assert (flaky['requests'], flaky['errors'], flaky['last_status']) == (1, 1, 503)
+
+    # Sin servidor escuchando el error de conexión llega al llamador tras los reintentos
+    try:
+        client.post(f"{base}/servers")
+        assert False, "Se esperaba ConnectionError"
+    except Exception as e:
+        assert 'Connection' in type(e).__name__
+
+
+def test_server_inventory_pages_and_refreshes():
+    """El inventario pagina con limit/marker, busca por nombre e ID y se refresca por TTL o invalidación."""
+    import requests
+    from drivers.openstack_inventory import NOT_FOUND_STATUS, ServerInventory
+
+    servers = [{'id': f"id-{i}", 'name': f"vm-{i}", 'status': 'ACTIVE',
+                'created': 'c', 'updated': 'u'} for i in range(5)]
+    requests_seen = []
+
+    class FakeNova:
+        status = 200
+
+        def get(self, url, headers=None, params=None, **kwargs):
+            requests_seen.append(dict(params))
+            if self.status != 200:
+                return _response(self.status)
+            start = 0
+            if 'marker' in params:
+                start = [s['id'] for s in servers].index(params['marker']) + 1
+            return _response(200, {'servers': servers[start:start + params['limit']]})
+
+    nova = FakeNova()
+    inventory = ServerInventory("http://nova", http=nova, ttl=60, page_size=2)
+
+    assert inventory.get_by_name('vm-4', 'tok')['id'] == 'id-4'
+    assert requests_seen == [{'limit': 2}, {'limit': 2, 'marker': 'id-1'}, {'limit': 2, 'marker': 'id-3'}]
+    assert inventory.get_by_id('id-0', 'tok')['name'] == 'vm-0'
+    assert inventory.get_by_name('vm-9', 'tok') is None
+    statuses = inventory.get_status_many(['vm-1', 'vm-9'], 'tok')
+    assert statuses['vm-1']['status'] == 'ACTIVE' and statuses['vm-9'] == NOT_FOUND_STATUS
+    assert len(requests_seen) == 3
+
+    # Una página llena al final obliga a pedir otra, que llega vacía
+    servers.append({'id': 'id-5', 'name': 'vm-5', 'status': 'BUILD', 'created': 'c', 'updated': 'u'})
+    inventory.invalidate()
+    assert inventory.get_by_name('vm-5', 'tok')['status'] == 'BUILD'
+    assert requests_seen[-1] == {'limit': 2, 'marker': 'id-5'}
+
+    # Vencido el TTL se descarga de nuevo; un error de Nova conserva el inventario anterior
+    inventory._loaded_at -= 61
+    nova.status = 503
+    try:
+        inventory.get_by_name('vm-0', 'tok')
+        assert False, "Se esperaba HTTPError"
+    except requests.HTTPError:
+        pass
+    nova.status = 200
+    inventory.refresh('tok', force=True)
+
+    stats = inventory.get_stats()
+    assert (stats['refreshes'], stats['pages'], stats['invalidations'], stats['servers']) == (3, 11, 1, 6)
+    assert stats['lookups'] == 6
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+===================================================================
+PRUEBAS DE TRABAJOS Y EVENTOS
+===================================================================
+
+Verifica los trabajos asíncronos de slices (avance por nodo, conflictos,
+códigos de error, apagado y recuperación al reiniciar, VLANs de slices
+creados a la vez) y el stream de eventos de despliegue que consume el
+endpoint SSE.
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.getcwd())
+
+from database import ReservationError
+from testing_support import run_tests, temp_database
+
+
+def test_jobs_track_node_progress_and_survive_restart():
+    """Los trabajos corren en el pool, registran el avance por nodo y se retoman al reiniciar."""
+    import threading
+    from drivers import events, jobs
+    from drivers.jobs import JobManager, JobConflict
+
+    release = threading.Event()
+
+    def fake_create(job):
+        nombre = job['slice_nombre']
+        events.publish(nombre, 'iniciado', nodos=2)
+        events.publish('otro-slice', 'creado', 'n9')
+        events.publish(nombre, 'creado', 'n1', worker_id=1)
+        release.wait(5)
+        events.publish(nombre, 'error', 'n2', worker_id=2, error='sin respuesta')
+        if job['parametros'].get('falla'):
+            raise ReservationError("Capacidad insuficiente")
+        return {'nombre': nombre}
+
+    original = dict(jobs.HANDLERS)
+    jobs.HANDLERS['crear_slice'] = fake_create
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db, _ = temp_database(workdir)
+            manager = JobManager(db, max_workers=1)
+            job_id = manager.submit('crear_slice', 's1', 'linux_cluster', {'slice': {}})
+            try:
+                manager.submit('crear_slice', 's1', 'linux_cluster')
+                assert False, "Se esperaba JobConflict"
+            except JobConflict:
+                pass
+            release.set()
+            job = manager.wait(job_id, 5)
+            assert job['estado'] == 'completado' and job['resultado'] == {'nombre': 's1'}
+            assert job['progreso']['total_nodos'] == 2 and job['progreso']['completados'] == 2
+            assert set(job['progreso']['nodos']) == {'n1', 'n2'}
+            assert job['progreso']['nodos']['n2']['error'] == 'sin respuesta'
+
+            failed = manager.wait(manager.submit('crear_slice', 's1', 'linux_cluster', {'falla': True}), 5)
+            assert (failed['estado'], failed['codigo_error']) == ('error', 409)
+            manager.shutdown()
+
+            # Reinicio: el que se ejecutaba queda interrumpido y el pendiente se retoma
+            with db.connection() as conn:
+                conn.execute("INSERT INTO trabajo (id_trabajo, tipo, slice_nombre, estado, parametros) "
+                             "VALUES ('a', 'crear_slice', 's2', 'ejecutando', '{}')")
+                conn.execute("INSERT INTO trabajo (id_trabajo, tipo, slice_nombre, estado, parametros) "
+                             "VALUES ('b', 'crear_slice', 's3', 'pendiente', '{}')")
+                conn.commit()
+            restarted = JobManager(db, max_workers=1)
+            assert restarted.get('a')['estado'] == 'interrumpido'
+            assert restarted.wait('b', 5)['estado'] == 'completado'
+            assert [job['id_trabajo'] for job in restarted.list(estado='interrumpido')] == ['a']
+            restarted.shutdown()
+    finally:
+        jobs.HANDLERS.update(original)
+
+
+def test_job_progress_writes_are_throttled():
+    """Una ráfaga de eventos de nodo no escribe el trabajo en cada evento; el avance final queda completo."""
+    from drivers import events, jobs
+    from drivers.jobs import JobManager
+
+    def fake_create(job):
+        events.publish(job['slice_nombre'], 'iniciado', nodos=50)
+        for i in range(50):
+            events.publish(job['slice_nombre'], 'creado', f'n{i}', worker_id=1)
+        return {'nombre': job['slice_nombre']}
+
+    original = dict(jobs.HANDLERS)
+    jobs.HANDLERS['crear_slice'] = fake_create
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db, _ = temp_database(workdir)
+            manager = JobManager(db, max_workers=1)
+            saved = []
+            save_progress = manager._save_progress
+            manager._save_progress = lambda job_id, progress: (saved.append(progress['completados']),
+                                                               save_progress(job_id, progress))
+            job = manager.wait(manager.submit('crear_slice', 's1', 'linux_cluster'), 5)
+            manager.shutdown()
+
+            assert job['estado'] == 'completado'
+            assert saved == [1]
+            assert job['progreso']['completados'] == 50 and len(job['progreso']['nodos']) == 50
+    finally:
+        jobs.HANDLERS.update(original)
+
+
+def test_job_shutdown_finishes_running_jobs_and_keeps_queued_ones():
+    """Al apagar, el trabajo en ejecución termina y los encolados se retoman en el próximo arranque."""
+    import threading
+    from drivers import jobs
+    from drivers.jobs import JobManager, close_job_managers
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_create(job):
+        started.set()
+        release.wait(5)
+        return {'nombre': job['slice_nombre']}
+
+    original = dict(jobs.HANDLERS)
+    jobs.HANDLERS['crear_slice'] = slow_create
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db, _ = temp_database(workdir)
+            manager = jobs._managers[db.db_path] = JobManager(db, max_workers=1)
+            running = manager.submit('crear_slice', 's1', 'linux_cluster')
+            queued = manager.submit('crear_slice', 's2', 'linux_cluster')
+            assert started.wait(5)
+
+            closing = threading.Thread(target=close_job_managers)
+            closing.start()
+            release.set()
+            closing.join(5)
+            assert not closing.is_alive() and db.db_path not in jobs._managers
+            assert manager.get(running)['estado'] == 'completado'
+            assert manager.get(queued)['estado'] == 'pendiente'
+
+            restarted = JobManager(db, max_workers=1)
+            assert restarted.wait(queued, 5)['estado'] == 'completado'
+            restarted.shutdown()
+    finally:
+        jobs.HANDLERS.update(original)
+
+
+def test_concurrent_slices_get_distinct_vlans():
+    """Los slices que se crean a la vez reciben VLANs distintas."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        db.execute_update('slice', 'vlan_id = 7', "nombre = 'ledger'")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            created = list(executor.map(lambda i: db.create_slice_record(f'slice-{i}', 'linux_cluster'),
+                                        range(20)))
+
+        assert sorted(vlan for _, vlan in created) == list(range(8, 28))
+        assert len({slice_id for slice_id, _ in created}) == 20
+        row = db.select_one('slice', ['vlan_id', 'tipo'], {'id_slice': created[0][0]})
+        assert (row['vlan_id'], row['tipo']) == (created[0][1], 'linux_cluster')
+
+
+def test_slice_event_stream_replays_and_follows():
+    """El stream de eventos repite la última operación, sigue con las nuevas y respeta Last-Event-ID."""
+    import asyncio
+    import threading
+    from drivers import events
+
+    events.publish('sse', 'iniciado', nodos=1)
+    events.publish('sse', 'creado')
+    first = events.publish('sse', 'iniciado', nodos=2)
+    events.publish('sse', 'planificado', 'n1', worker_id=1)
+    events.publish('otro', 'planificado', 'n1')
+    assert [e['estado'] for e in events.history('sse', first['id'])] == ['planificado']
+
+    async def consume(after_id=0):
+        received = []
+        with events.EventStream('sse', after_id) as stream:
+            threading.Timer(0.05, lambda: [
+                events.publish('sse', 'solicitado', 'n1'),
+                events.publish('sse', 'creado', 'n1'),
+                events.publish('sse', 'creado')
+            ]).start()
+            while True:
+                event = await stream.get(timeout=2)
+                assert event is not None, "Se esperaba un evento"
+                received.append((event['nodo'], event['estado']))
+                if event['nodo'] is None and event['estado'] in events.SLICE_DONE:
+                    return received
+
+    assert asyncio.run(consume()) == [(None, 'iniciado'), ('n1', 'planificado'), ('n1', 'solicitado'),
+                                      ('n1', 'creado'), (None, 'creado')]
+    last = events.history('sse')[-1]['id']
+    resumed = asyncio.run(consume(last))
+    assert resumed == [('n1', 'solicitado'), ('n1', 'creado'), (None, 'creado')]
+
+
+def test_jobs_report_errors_by_cause():
+    """Los trabajos fallidos guardan el error con su código HTTP y liberan el slice."""
+    from drivers import jobs
+    from drivers.jobs import JobManager
+
+    def broken_delete(job):
+        raise RuntimeError("worker sin respuesta")
+
+    original = dict(jobs.HANDLERS)
+    jobs.HANDLERS['eliminar_slice'] = broken_delete
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db, _ = temp_database(workdir)
+            manager = JobManager(db, max_workers=1)
+            try:
+                manager.submit('reiniciar_slice', 's1')
+                assert False, "Se esperaba ValueError"
+            except ValueError:
+                pass
+            assert manager.list() == []
+
+            # Driver sin registrar: error de los datos del pedido
+            unknown = manager.wait(manager.submit('crear_slice', 's1', 'nada', {'slice': {}}), 5)
+            assert (unknown['estado'], unknown['codigo_error']) == ('error', 400)
+            assert 'nada' in unknown['error']
+
+            # Falla inesperada del driver; el slice admite un trabajo nuevo al terminar
+            failed = manager.wait(manager.submit('eliminar_slice', 's1', 'linux_cluster'), 5)
+            assert (failed['estado'], failed['codigo_error'], failed['error']) == \
+                ('error', 500, 'worker sin respuesta')
+            assert failed['resultado'] is None and failed['fecha_fin'] is not None
+            assert len(manager.list(slice_nombre='s1', estado='error')) == 2
+            manager.shutdown()
+    finally:
+        jobs.HANDLERS.update(original)
+
+
+def test_slice_event_stream_times_out_without_events():
+    """Sin eventos nuevos el stream devuelve None al vencer el timeout y no repite los ya leídos."""
+    import asyncio
+    from drivers import events
+
+    done = events.publish('quieto', 'creado')
+
+    async def consume():
+        with events.EventStream('quieto', done['id']) as stream:
+            return await stream.get(timeout=0.05)
+
+    assert asyncio.run(consume()) is None
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+===================================================================
+PRUEBAS DE MÉTRICAS
+===================================================================
+
+Verifica el recolector de métricas (una consulta por fuente y escritura
+en lote), los rollups y la retención de métricas, y la ingesta push con
+su buffer y contrapresión, incluidos los errores: fuentes caídas o que
+no responden JSON, fallas de la base de datos y entradas inválidas.
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.getcwd())
+
+from testing_support import run_tests, temp_database
+
+
+def test_metrics_collector_fetches_each_source_once():
+    """Cada fuente se consulta una vez por intervalo y las muestras se escriben en lote."""
+    import asyncio
+    import httpx
+    from drivers.metrics_collector import MetricsCollector
+
+    calls = []
+
+    def handler(request):
+        calls.append(str(request.url))
+        if request.url.host == 'caido':
+            return httpx.Response(503)
+        return httpx.Response(200, json=[{
+            'w1': {'ram': 6000, 'vcpu': 3, 'storage': 80},
+            'w2': {'ram': 1000, 'vcpu': 1, 'storage': 20},
+            'wX': {'ram': 1, 'vcpu': 1, 'storage': 1}
+        }])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        recursos = db.execute_query("SELECT COUNT(*) AS n FROM recursos")[0]['n']
+        collector = MetricsCollector(db, sources=['http://metricas/cpu-metrics', 'http://caido/cpu-metrics'],
+                                     interval=60, timeout=1, jitter=0,
+                                     transport=httpx.MockTransport(handler))
+        summary = asyncio.run(collector.collect_once())
+
+        assert sorted(calls) == ['http://caido/cpu-metrics', 'http://metricas/cpu-metrics']
+        assert (summary['fuentes_ok'], summary['fuentes_error']) == (1, 1)
+        assert (summary['muestras'], summary['nodos_creados'], summary['desconocidos']) == (10, 2, ['wX'])
+
+        rows = db.execute_query(
+            "SELECT nc.worker_id, m.tipo_metrica, m.valor, m.valor_maximo, m.timestamp "
+            "FROM metricas_tiempo_real m JOIN nodo_cluster nc ON nc.id_nodo = m.nodo_id"
+        )
+        assert len({row['timestamp'] for row in rows}) == 1
+        ram = {row['worker_id']: (row['valor'], row['valor_maximo']) for row in rows
+               if row['tipo_metrica'] == 'ram_disponible'}
+        assert ram == {1: (6000.0, 8192.0), 2: (1000.0, 4096.0)}
+        # El uso en % de la capacidad del worker, como lo documenta el esquema
+        usage = {(row['worker_id'], row['tipo_metrica']): row['valor'] for row in rows
+                 if row['tipo_metrica'] in ('cpu_usage', 'mem_usage')}
+        assert usage == {(1, 'cpu_usage'): 25.0, (1, 'mem_usage'): round(100 * 2192 / 8192, 4),
+                         (2, 'cpu_usage'): 75.0, (2, 'mem_usage'): 75.5859}
+
+        # El siguiente intervalo reutiliza los nodos creados
+        assert asyncio.run(collector.collect_once())['nodos_creados'] == 0
+        assert db.execute_query("SELECT COUNT(*) AS n FROM recursos")[0]['n'] == recursos
+
+
+def test_metric_rollups_and_retention():
+    """Los rollups se mantienen al insertar, las consultas eligen nivel y la poda borra en lotes."""
+    from database.metrics_retention import summarize, metric_series, prune
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        nodo = db.insert('nodo_cluster', {'nombre': 'w1-node', 'worker_id': 1})
+        samples = [(f"-{minutes} minutes", value) for minutes, value in ((1, 10), (2, 30), (3, 20))]
+        samples += [(f"-{days} days", 50) for days in (3, 3, 20, 40)]
+        with db.connection() as conn:
+            conn.executemany(
+                "INSERT INTO metricas_tiempo_real (nodo_id, tipo_metrica, valor, timestamp) "
+                "VALUES (?, 'cpu_usage', ?, datetime('now', ?))",
+                [(nodo, value, offset) for offset, value in samples]
+            )
+            conn.commit()
+
+        # Rollups incrementales: mismas muestras que los datos crudos
+        for table in ('metricas_rollup_5m', 'metricas_rollup_1h'):
+            row = db.execute_query(f"SELECT SUM(cantidad) AS n, SUM(suma) AS s, MAX(maximo) AS m FROM {table}")[0]
+            assert (row['n'], row['s'], row['m']) == (7, 260.0, 50.0)
+
+        recent = summarize(db, 1)
+        assert recent['nivel'] == 'raw'
+        assert recent['metricas_por_tipo'][0]['promedio'] == 20.0
+        assert summarize(db, 24 * 5)['nivel'] == '5m'
+        week = summarize(db, 24 * 30)
+        assert week['nivel'] == '1h' and week['metricas_por_tipo'][0]['total_registros'] == 6
+        assert metric_series(db, 24 * 5, 'cpu_usage', nodo)['resolucion_segundos'] == 300
+
+        # Crudos > 48 h, 5m > 7 días, 1h > 30 días, de a 2 filas por lote
+        deleted = prune(db, batch_size=2)
+        assert deleted == {'raw': 4, '5m': 2, '1h': 1}
+        assert prune(db, batch_size=2) == {'raw': 0, '5m': 0, '1h': 0}
+        assert summarize(db, 1)['metricas_por_tipo'][0]['total_registros'] == 3
+
+
+def test_metrics_ingest_buffers_and_applies_back_pressure():
+    """Los lotes se validan, se encolan completos o se rechazan, y se escriben en transacciones."""
+    import json
+    from drivers.metrics_ingest import MetricsIngestor, IngestBusy, IngestError
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        ingestor = MetricsIngestor(db, queue_size=5, flush_size=2, flush_interval=1, max_batch=10, start=False)
+
+        ndjson = "\n".join(json.dumps(sample) for sample in (
+            {'nodo': 'w1', 'tipo_metrica': 'cpu_usage', 'valor': 40, 'timestamp': 1700000000},
+            {'nodo': 'w1', 'tipo_metrica': 'mem_usage', 'valor': 'alto'},
+            {'nodo': 'nadie', 'tipo_metrica': 'cpu_usage', 'valor': 10}
+        )).encode()
+        result = ingestor.submit(ndjson, 'application/x-ndjson')
+        assert (result['aceptadas'], result['invalidas'], result['en_buffer']) == (2, 1, 2)
+
+        compact = json.dumps([['w2', 'cpu_usage', 75.5], ['w2', 'mem_usage', 60, '2024-01-01T10:00:00Z', '%']]).encode()
+        assert ingestor.submit(compact, 'application/json')['en_buffer'] == 4
+
+        # No hay lugar para el lote completo: se rechaza sin encolar nada
+        try:
+            ingestor.submit(compact)
+            assert False, "Se esperaba IngestBusy"
+        except IngestBusy as e:
+            assert e.retry_after >= 1
+        try:
+            ingestor.submit(b'{"no": "lista"}')
+            assert False, "Se esperaba IngestError"
+        except IngestError:
+            pass
+
+        assert ingestor.flush_all() == 3
+        stats = ingestor.get_stats()
+        assert (stats['en_buffer'], stats['transacciones'], stats['nodo_desconocido']) == (0, 2, 1)
+        assert stats['rechazadas_429'] == 2
+        rows = db.execute_query(
+            "SELECT nc.worker_id, m.tipo_metrica, m.valor, m.timestamp FROM metricas_tiempo_real m "
+            "JOIN nodo_cluster nc ON nc.id_nodo = m.nodo_id ORDER BY m.id_metrica"
+        )
+        assert [(r['worker_id'], r['valor']) for r in rows] == [(1, 40.0), (2, 75.5), (2, 60.0)]
+        assert rows[0]['timestamp'] == '2023-11-14 22:13:20'
+        assert rows[2]['timestamp'] == '2024-01-01 10:00:00'
+
+
+def test_metrics_ingest_rejects_bad_timestamps_and_keeps_batches_on_db_errors():
+    """Un timestamp mal formado invalida solo su muestra y un lote que no se pudo escribir no se pierde."""
+    import json
+    from drivers.metrics_ingest import MetricsIngestor, validate_sample
+
+    assert validate_sample(['w1', 'cpu_usage', 1, '2024-01-01T12:00:00+02:00'])[4] == '2024-01-01 10:00:00'
+    assert validate_sample(['w1', 'cpu_usage', 1, '2024-01-01 10:00:00.250'])[4] == '2024-01-01 10:00:00'
+    for bad in ('not a timestamp at all', '2024-13-01T00:00:00', '', 1e20, [2024]):
+        assert validate_sample(['w1', 'cpu_usage', 1, bad]) is None, bad
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        ingestor = MetricsIngestor(db, queue_size=10, flush_size=10, flush_interval=1, max_batch=10, start=False)
+        batch = json.dumps([['w1', 'cpu_usage', 40, '2024-01-01T10:00:00Z'],
+                            ['w1', 'cpu_usage', 41, 'not a timestamp at all'],
+                            ['w1', 'cpu_usage', 42]]).encode()
+        result = ingestor.submit(batch)
+        assert (result['aceptadas'], result['invalidas']) == (2, 1)
+        assert ingestor.flush_all() == 2
+
+        # Una fila que la base rechaza se descarta sin perder las demás del lote
+        with db.connection() as conn:
+            conn.execute("CREATE TRIGGER sin_negativos BEFORE INSERT ON metricas_tiempo_real "
+                         "WHEN NEW.valor < 0 BEGIN SELECT RAISE(ABORT, 'valor negativo'); END")
+            conn.commit()
+        ingestor.submit(json.dumps([['w1', 'cpu_usage', -1], ['w1', 'cpu_usage', 43]]).encode())
+        assert ingestor.flush_all() == 1
+
+        # Si la transacción entera falla, el lote vuelve al buffer y se escribe después
+        ingestor.submit(json.dumps([['w2', 'cpu_usage', 44], ['w2', 'cpu_usage', 45]]).encode())
+        with db.connection() as conn:
+            conn.execute("ALTER TABLE metricas_tiempo_real RENAME TO metricas_pausa")
+            conn.commit()
+        try:
+            ingestor.flush()
+            assert False, "Se esperaba un error de la base de datos"
+        except Exception as e:
+            assert 'metricas_tiempo_real' in str(e)
+        assert ingestor.get_stats()['en_buffer'] == 2
+        with db.connection() as conn:
+            conn.execute("ALTER TABLE metricas_pausa RENAME TO metricas_tiempo_real")
+            conn.commit()
+        assert ingestor.flush_all() == 2
+
+        stats = ingestor.get_stats()
+        assert (stats['invalidas'], stats['descartadas'], stats['errores'], stats['escritas']) == (1, 1, 1, 5)
+        rows = db.execute_query("SELECT valor, timestamp FROM metricas_tiempo_real ORDER BY id_metrica")
+        assert [row['valor'] for row in rows] == [40.0, 42.0, 43.0, 44.0, 45.0]
+        assert rows[0]['timestamp'] == '2024-01-01 10:00:00'
+
+
+def test_metrics_ingestors_drain_on_shutdown():
+    """Al apagar, las muestras ya aceptadas se escriben antes de soltar el buffer."""
+    import json
+    from drivers import metrics_ingest
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        ingestor = metrics_ingest.get_metrics_ingestor(db.db_path)
+        assert metrics_ingest.get_metrics_ingestor(db.db_path) is ingestor
+        ingestor.submit(json.dumps([['w1', 'cpu_usage', 10], ['w3', 'cpu_usage', 20]]).encode())
+
+        metrics_ingest.close_metrics_ingestors()
+        assert db.db_path not in metrics_ingest._ingestors
+        assert not ingestor._thread.is_alive() and ingestor.get_stats()['en_buffer'] == 0
+        assert db.execute_query("SELECT COUNT(*) AS n FROM metricas_tiempo_real")[0]['n'] == 2
+
+
+def test_metrics_collector_survives_bad_sources_and_db_errors():
+    """Las fuentes que fallan no frenan al resto y un error al escribir no deja el intervalo a medias."""
+    import asyncio
+    import httpx
+    from drivers.metrics_collector import MetricsCollector
+
+    def handler(request):
+        if request.url.host == 'lento':
+            raise httpx.ReadTimeout("sin respuesta", request=request)
+        if request.url.host == 'roto':
+            return httpx.Response(200, text="no es json")
+        return httpx.Response(200, json={'w1': {'ram': 6000, 'vcpu': 3, 'storage': 80}})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        collector = MetricsCollector(db, sources=['http://lento/m', 'http://roto/m', 'http://metricas/m'],
+                                     interval=60, timeout=1, jitter=0,
+                                     transport=httpx.MockTransport(handler))
+        fetched = asyncio.run(collector.fetch_all())
+        assert (fetched['fuentes_ok'], fetched['fuentes_error']) == (1, 2)
+        assert list(fetched['servidores']) == ['w1']
+
+        # Una falla al insertar revierte también el nodo creado en el mismo intervalo
+        with db.connection() as conn:
+            conn.execute("CREATE TRIGGER falla_metricas BEFORE INSERT ON metricas_tiempo_real "
+                         "BEGIN SELECT RAISE(ABORT, 'disco lleno'); END")
+            conn.commit()
+        try:
+            collector.write_samples(fetched['servidores'])
+            assert False, "Se esperaba un error de la base de datos"
+        except Exception as e:
+            assert 'disco lleno' in str(e)
+        assert db.execute_query("SELECT COUNT(*) AS n FROM nodo_cluster")[0]['n'] == 0
+
+        # El ciclo registra el error y sigue en lugar de terminar
+        asyncio.run(collector.run(cycles=1))
+        assert db.execute_query("SELECT COUNT(*) AS n FROM metricas_tiempo_real")[0]['n'] == 0
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+===================================================================
+PRUEBAS DEL SCHEDULER
+===================================================================
+
+Verifica que el backend NumPy de App_Scheduler produzca exactamente
+los mismos placements (y el mismo estado final de los workers) que
+el algoritmo original de ordenamiento_coeficiente, el comportamiento
+de las estrategias de bin-packing y la capacidad que consumen (libro
+de capacidad, reservas, sobreasignación, simulador y rebalanceo).
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+import copy
+import time
+import random
+import tempfile
+
+sys.path.append(os.getcwd())
+
+from conf.ConfigManager import config
+from Modules.App_Scheduler import Worker, Vm, asignar_vms, planificar
+from scheduler.strategies import available_strategies, get_strategy
+from scheduler.consolidation import ConsolidationStrategy
+from database import SliceUnitOfWork, get_capacity_ledger, ReservationManager, ReservationError
+from testing_support import available, run_tests, temp_database
+
+
+def _random_workers(rng, count):
+    workers = []
+    for i in range(count):
+        ram = rng.choice([0, 4096, 8192, 16384, 32768])
+        disco = rng.choice([0, 100, 200, 500])
+        vcpu = rng.choice([0, 4, 8, 16])
+        workers.append(Worker(
+            i + 1,
+            float(rng.randint(0, ram)) if ram else 0.0,
+            float(rng.randint(0, disco)) if disco else 0.0,
+            float(rng.randint(0, vcpu)) if vcpu else 0.0,
+            float(ram), float(disco), float(vcpu)
+        ))
+    return workers
+
+
+def _random_vms(rng, count):
+    flavors = [(512, 1, 1), (1024, 10, 1), (2048, 20, 2), (4096, 40, 4)]
+    vms = []
+    for i in range(count):
+        ram, disco, vcpu = rng.choice(flavors)
+        # Rachas de VMs idénticas para ejercitar el procesamiento por lotes
+        repeat = rng.randint(1, 4)
+        vms.extend(Vm(f"vm{i}_{r}", ram, disco, vcpu) for r in range(repeat))
+    return vms
+
+
+def _run(backend, workers, vms):
+    workers = copy.deepcopy(workers)
+    elegidos = asignar_vms(workers, vms, backend=backend)
+    ids = [w.id_servidor if w is not None else None for w in elegidos]
+    estado = [(w.ram_disponible, w.disco_disponible, w.vcpu_disponible) for w in workers]
+    return ids, estado
+
+
+def _assert_parity(workers, vms):
+    legacy = _run('python', workers, vms)
+    vectorized = _run('numpy', workers, vms)
+    assert vectorized[0] == legacy[0], f"Placements distintos: {vectorized[0]} != {legacy[0]}"
+    assert vectorized[1] == legacy[1], "Estado final de workers distinto"
+
+
+def test_parity_random_clusters():
+    """Paridad en clusters aleatorios con los factores de conversión configurados."""
+    rng = random.Random(8)
+    for _ in range(50):
+        _assert_parity(_random_workers(rng, rng.randint(1, 40)), _random_vms(rng, rng.randint(1, 30)))
+
+
+def test_parity_without_unit_conversion():
+    """Paridad con varios placements por worker (factores de conversión = 1)."""
+    original = (config.get('BYTES_TO_MB'), config.get('BYTES_TO_GB'))
+    config.update_config('BYTES_TO_MB', 1)
+    config.update_config('BYTES_TO_GB', 1)
+    try:
+        rng = random.Random(80)
+        for _ in range(50):
+            _assert_parity(_random_workers(rng, rng.randint(1, 40)), _random_vms(rng, rng.randint(1, 60)))
+    finally:
+        config.update_config('BYTES_TO_MB', original[0])
+        config.update_config('BYTES_TO_GB', original[1])
+
+
+def test_ties_prefer_first_worker():
+    """Con coeficientes empatados se elige el primer worker de la lista."""
+    workers = [Worker(i, 8192.0, 100.0, 8.0, 8192.0, 100.0, 8.0) for i in (7, 3, 5)]
+    vms = [Vm("a", 1024, 10, 1)]
+    ids, _ = _run('numpy', workers, vms)
+    assert ids == [7]
+    _assert_parity(workers, vms)
+
+
+def test_stops_at_first_unplaceable_vm():
+    """La asignación se detiene en la primera VM que no cabe."""
+    workers = [Worker(1, 1024.0, 10.0, 1.0, 2048.0, 20.0, 2.0)]
+    vms = [Vm("grande", 4096, 10, 1), Vm("chica", 512, 1, 1)]
+    ids, _ = _run('numpy', workers, vms)
+    assert ids == [None]
+    _assert_parity(workers, vms)
+
+
+def test_empty_worker_list():
+    """Sin workers ninguna VM se asigna."""
+    ids, _ = _run('numpy', [], [Vm("a", 512, 1, 1)])
+    assert ids == [None]
+    _assert_parity([], [Vm("a", 512, 1, 1)])
+
+
+def test_decreasing_strategies_place_what_coefficient_misses():
+    """Ordenar por tamaño permite ubicar slices que la heurística original rechaza."""
+    def cluster():
+        return [Worker(1, 4096.0, 40.0, 4.0, 4096.0, 40.0, 4.0),
+                Worker(2, 2048.0, 40.0, 4.0, 2048.0, 40.0, 4.0)]
+    vms = [Vm("chica", 2048, 10, 1), Vm("grande", 4096, 10, 1)]
+
+    elegidos, reporte = planificar(cluster(), vms, estrategia='coeficiente')
+    assert elegidos[1] is None
+    assert reporte['vms_sin_asignar'] == ["grande"]
+
+    for estrategia in ('ffd', 'best_fit'):
+        elegidos, reporte = planificar(cluster(), vms, estrategia=estrategia)
+        assert [w.id_servidor for w in elegidos] == [2, 1], estrategia
+        assert reporte['vms_asignadas'] == 2
+        assert reporte['workers_usados'] == 2
+
+
+def test_strategies_respect_capacity():
+    """Ninguna estrategia deja recursos disponibles negativos."""
+    rng = random.Random(9)
+    for nombre in available_strategies():
+        if nombre == 'coeficiente':
+            continue
+        for _ in range(20):
+            workers = _random_workers(rng, rng.randint(1, 20))
+            vms = _random_vms(rng, rng.randint(1, 20))
+            elegidos, reporte = planificar(workers, vms, estrategia=nombre)
+            assert all(w.ram_disponible >= 0 and w.disco_disponible >= 0 and w.vcpu_disponible >= 0
+                       for w in workers), nombre
+            assert reporte['vms_asignadas'] == sum(w is not None for w in elegidos)
+
+
+def test_best_fit_packs_worst_fit_spreads():
+    """best_fit concentra las VMs en pocos workers; worst_fit las reparte."""
+    def cluster():
+        return [Worker(i, 8192.0, 80.0, 8.0, 8192.0, 80.0, 8.0) for i in range(1, 5)]
+    vms = [Vm(f"vm{i}", 1024, 10, 1) for i in range(4)]
+
+    _, packed = planificar(cluster(), vms, estrategia='best_fit')
+    _, spread = planificar(cluster(), vms, estrategia='worst_fit')
+    assert packed['workers_usados'] == 1
+    assert spread['workers_usados'] == 4
+
+
+def test_unknown_strategy():
+    """Una estrategia no registrada produce ValueError."""
+    try:
+        get_strategy('no-existe')
+    except ValueError:
+        return
+    assert False, "Se esperaba ValueError"
+
+
+def _two_cliques():
+    """Dos grupos de 4 nodos totalmente enlazados, unidos por un solo enlace."""
+    nodos = {}
+    for grupo in ('a', 'b'):
+        nombres = [f"{grupo}{i}" for i in range(4)]
+        for n in nombres:
+            nodos[n] = {'enlaces': [m for m in nombres if m != n]}
+    nodos['a0']['enlaces'].append('b0')
+    nodos['b0']['enlaces'].append('a0')
+    # Intercalar los grupos para que el orden del slice no los agrupe
+    orden = [n for par in zip(sorted(k for k in nodos if k[0] == 'a'),
+                             sorted(k for k in nodos if k[0] == 'b')) for n in par]
+    return nodos, [Vm(n, 1024, 10, 1) for n in orden]
+
+
+def test_topology_colocates_linked_nodes():
+    """La estrategia topologia deja en workers distintos solo el enlace entre grupos."""
+    nodos, vms = _two_cliques()
+
+    def cluster():
+        return [Worker(i, 4096.0, 40.0, 4.0, 4096.0, 40.0, 4.0) for i in range(1, 4)]
+
+    elegidos, reporte = planificar(cluster(), vms, estrategia='topologia', nodos=nodos)
+    assert all(w is not None for w in elegidos)
+    assert reporte['enlaces_total'] == 13
+    assert reporte['enlaces_entre_workers'] == 1
+
+    _, spread = planificar(cluster(), vms, estrategia='worst_fit', nodos=nodos)
+    assert spread['enlaces_entre_workers'] > reporte['enlaces_entre_workers']
+
+
+def test_topology_respects_capacity():
+    """La estrategia topologia no sobrepasa la capacidad de los workers."""
+    rng = random.Random(10)
+    for _ in range(20):
+        workers = _random_workers(rng, rng.randint(1, 20))
+        vms = _random_vms(rng, rng.randint(1, 20))
+        nombres = [vm.nodo_nombre for vm in vms]
+        nodos = {n: {'enlaces': rng.sample(nombres, min(3, len(nombres)))} for n in nombres}
+        planificar(workers, vms, estrategia='topologia', nodos=nodos)
+        assert all(w.ram_disponible >= 0 and w.disco_disponible >= 0 and w.vcpu_disponible >= 0
+                   for w in workers)
+
+
+def test_consolidation_packs_active_workers():
+    """consolidacion llena primero los workers activos, respeta la reserva y lista los apagables."""
+    def cluster():
+        return [Worker(1, 8192.0, 80.0, 8.0, 8192.0, 80.0, 8.0),
+                Worker(2, 6144.0, 60.0, 6.0, 8192.0, 80.0, 8.0),
+                Worker(3, 16384.0, 160.0, 16.0, 16384.0, 160.0, 16.0),
+                Worker(4, 8192.0, 80.0, 8.0, 8192.0, 80.0, 8.0)]
+    vms = [Vm(f"vm{i}", 1024, 10, 1) for i in range(6)]
+
+    elegidos, reporte = planificar(cluster(), vms, estrategia='consolidacion')
+    # El worker 2 ya está activo: recibe VMs hasta su reserva del 10%
+    # y después se enciende el worker más grande
+    assert [w.id_servidor for w in elegidos] == [2, 2, 2, 2, 2, 3]
+    assert reporte['workers_apagables'] == [1, 4]
+    assert reporte['workers_activos'] == 2
+
+    _, spread = planificar(cluster(), vms, estrategia='coeficiente')
+    assert spread['workers_activos'] > reporte['workers_activos']
+
+    workers = cluster()
+    ConsolidationStrategy(headroom={'ram': 0.5, 'disco': 0, 'vcpu': 0}).place(workers, vms)
+    assert all(w.ram_disponible >= 0.5 * w.ram for w in workers)
+
+
+def test_batch_places_large_slice_that_arrival_order_rejects():
+    """El scheduler por lotes ubica primero los slices grandes y los de mayor prioridad."""
+    from scheduler.batch import BatchScheduler
+
+    def cluster():
+        return [Worker(1, 16384.0, 100.0, 8.0, 16384.0, 100.0, 8.0),
+                Worker(2, 16384.0, 100.0, 8.0, 16384.0, 100.0, 8.0)]
+    pending = [{'nombre': f"chico{i}", 'vms': [Vm('n0', 1024, 10, 2)]} for i in range(4)]
+    pending.append({'nombre': 'grande', 'vms': [Vm('n0', 8192, 50, 8)]})
+
+    # De a uno, worst_fit reparte los chicos y el grande ya no entra
+    workers = cluster()
+    online = [all(w is not None for w in planificar(workers, item['vms'], estrategia='worst_fit')[0])
+              for item in pending]
+    assert online == [True, True, True, True, False]
+
+    workers = cluster()
+    results, summary = BatchScheduler('worst_fit', lookahead=2).schedule(workers, pending)
+    assert [r['aceptado'] for r in results] == [True] * 5
+    assert summary['aceptados'] == 5 and summary['vms_asignadas'] == 5
+    grande = results[-1]['workers'][0]
+    assert {r['workers'][0].id_servidor for r in results[:4]} == {3 - grande.id_servidor}
+    assert all(w.vcpu_disponible >= 0 for w in workers)
+
+    # La prioridad manda sobre el orden de llegada
+    pending = [{'nombre': 'baja', 'vms': [Vm('n0', 1024, 10, 8)], 'prioridad': 0},
+               {'nombre': 'alta', 'vms': [Vm('n0', 1024, 10, 8)], 'prioridad': 5}]
+    results, summary = BatchScheduler('best_fit').schedule(cluster()[:1], pending)
+    assert [(r['nombre'], r['aceptado'], r['motivo']) for r in results] == \
+        [('baja', False, 'sin_capacidad'), ('alta', True, None)]
+
+
+def test_capacity_ledger_snapshots_and_updates():
+    """El libro de capacidad separa zonas y se ajusta al crear y eliminar VMs."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        ledger = get_capacity_ledger(db.db_path)
+
+        snapshot = ledger.snapshot('zona-a', 2)
+        assert [row[0] for row in snapshot.rows] == [1, 2]
+        assert snapshot.rows[0][1:] == (16384.0, 200.0, 8.0, 16384.0, 200.0, 8.0)
+        assert [row[0] for row in ledger.snapshot('zona-b').rows] == [3]
+
+        with SliceUnitOfWork(db) as uow:
+            uow.add_vm('vm-ledger1', {'ram': 1024, 'disk': 10, 'vcpu': 1}, 5901, 1, slice_id, 1)
+        assert not ledger.is_current(snapshot)
+        assert ledger.snapshot('zona-a', 2).rows[0][1:4] == (15360.0, 190.0, 7.0)
+
+        assert db.delete_vm_records('vm-ledger1') == 1
+        assert ledger.snapshot('zona-a', 2).rows[0][1:4] == (16384.0, 200.0, 8.0)
+        assert ledger.get_stats()['loads'] == 1
+
+
+def test_reservations_hold_commit_release():
+    """Las reservas descuentan la capacidad de forma atómica y la devuelven al liberarse."""
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        ledger = get_capacity_ledger(db.db_path)
+        reservas = ReservationManager(db, ttl=60)
+        pedido = [{'nodo': 'n1', 'worker_id': 2, 'ram': 4096, 'disk': 100, 'vcpu': 4},
+                  {'nodo': 'n2', 'worker_id': 2, 'ram': 2048, 'disk': 20, 'vcpu': 2}]
+
+        token = reservas.hold('ledger', pedido, factor=2)
+        assert available(db, 2) == (1024.0, 40.0, 1.0)
+        assert ledger.snapshot('zona-a', 2).rows[1][1:4] == (2048.0, 80.0, 2.0)
+
+        # Una segunda corrida que no cabe no reserva nada
+        try:
+            reservas.hold('otro', [{'nodo': 'x', 'worker_id': 1, 'ram': 1024, 'disk': 10, 'vcpu': 1},
+                                   {'nodo': 'y', 'worker_id': 2, 'ram': 4096, 'disk': 10, 'vcpu': 1}], factor=2)
+            assert False, "Se esperaba ReservationError"
+        except ReservationError as e:
+            assert e.nodo == 'y'
+        assert available(db, 1) == (8192.0, 100.0, 4.0)
+
+        # n1 se crea y n2 falla: solo vuelve la capacidad de n2
+        with SliceUnitOfWork(db) as uow:
+            uow.add_vm('vm-n1', {'ram': 4096, 'disk': 100, 'vcpu': 4}, 5901, 2, slice_id, 1)
+        assert reservas.finish(token, {'n1': 'vm-n1'}) == {'confirmadas': 1, 'liberadas': 1}
+        assert available(db, 2) == (2048.0, 50.0, 2.0)
+        assert ledger.snapshot('zona-a', 2).rows[1][1:4] == (4096.0, 100.0, 4.0)
+
+        # Al eliminar la VM su capacidad vuelve al worker
+        assert db.delete_vm_records('vm-n1') == 1
+        assert available(db, 2) == (4096.0, 100.0, 4.0)
+        assert ledger.snapshot('zona-a', 2).rows[1][1:4] == (8192.0, 200.0, 8.0)
+
+        # Las reservas vencidas se liberan solas
+        reservas.hold('ledger', pedido[:1], factor=2, ttl=-1)
+        assert available(db, 2) == (2048.0, 50.0, 2.0)
+        assert reservas.expire_stale(time.time()) == 1
+        assert available(db, 2) == (4096.0, 100.0, 4.0)
+        assert reservas.get_stats()['expirada'] == 1
+
+
+def test_reservations_stay_in_ledger_without_unit_of_work():
+    """Con los drivers legados (sin SliceUnitOfWork) cerrar_reserva deja las VMs descontadas del libro."""
+    from Modules.App_Scheduler import cerrar_reserva
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        ledger = get_capacity_ledger(db.db_path)
+        before = ledger.snapshot('zona-a').rows
+        reservas = ReservationManager(db)
+        pedido = [{'nodo': 'n1', 'worker_id': 1, 'ram': 1024, 'disk': 10, 'vcpu': 1},
+                  {'nodo': 'n2', 'worker_id': 2, 'ram': 512, 'disk': 5, 'vcpu': 1}]
+
+        original = config.get('DB_PATH')
+        config.update_config('DB_PATH', db.db_path)
+        try:
+            data = {'nodos': {'n1': {}, 'n2': {}}, 'reserva': {'token': reservas.hold('legado', pedido)}}
+            # El driver legado creó n1 con Conexion.Insert y falló en n2
+            assert cerrar_reserva(data, {'n1': 'vm-legado1'}) == {'confirmadas': 1, 'liberadas': 1}
+        finally:
+            config.update_config('DB_PATH', original)
+
+        rows = ledger.snapshot('zona-a').rows
+        assert rows[0][1:4] == (7168.0, 90.0, 3.0) and rows[1] == before[1]
+        assert available(db, 1) == (7168.0, 90.0, 3.0)
+        ledger.reload()
+        assert ledger.snapshot('zona-a').rows == rows
+
+        # Una reserva que venció mientras se creaba la VM se vuelve a descontar
+        token = reservas.hold('legado', pedido[1:], ttl=-1)
+        assert reservas.expire_stale() == 1
+        reservas.finish(token, {'n2': 'vm-legado2'}, consume_in_ledger=True)
+        rows = ledger.snapshot('zona-a').rows
+        assert rows[1][1:4] == (3584.0, 95.0, 3.0)
+        ledger.reload()
+        assert ledger.snapshot('zona-a').rows == rows
+
+
+def test_legacy_delete_returns_capacity_to_ledger():
+    """Las VMs que borran los drivers legados devuelven su capacidad al worker y al libro."""
+    from Modules.App_Scheduler import cerrar_reserva, liberar_vms
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        ledger = get_capacity_ledger(db.db_path)
+        before = ledger.snapshot('zona-a').rows
+        reservas = ReservationManager(db)
+        pedido = [{'nodo': 'n1', 'worker_id': 1, 'ram': 1024, 'disk': 10, 'vcpu': 1},
+                  {'nodo': 'n2', 'worker_id': 2, 'ram': 512, 'disk': 5, 'vcpu': 1}]
+
+        original = config.get('DB_PATH')
+        config.update_config('DB_PATH', db.db_path)
+        try:
+            data = {'nodos': {'n1': {}, 'n2': {}}, 'reserva': {'token': reservas.hold('legado', pedido)}}
+            cerrar_reserva(data, {'n1': 'vm-legado1', 'n2': 'vm-legado2'})
+            assert ledger.snapshot('zona-a').rows[1][1:4] == (3584.0, 95.0, 3.0)
+
+            # borrar_slice eliminó solo vm-legado2; una VM sin reserva no devuelve nada
+            assert liberar_vms(['vm-legado2', 'vm-sin-reserva']) == 1
+        finally:
+            config.update_config('DB_PATH', original)
+
+        rows = ledger.snapshot('zona-a').rows
+        assert rows[1] == before[1] and rows[0][1:4] == (7168.0, 90.0, 3.0)
+        assert available(db, 2) == (4096.0, 100.0, 4.0)
+        assert reservas.get_stats()['liberada'] == 1
+
+
+def test_scheduler_main_keeps_rejected_plans_out_of_the_slice():
+    """Si todas las reservas se rechazan, scheduler_main no asigna workers a los nodos."""
+    import Modules.App_Scheduler as app_scheduler
+
+    class RejectingReservations(ReservationManager):
+        calls = 0
+
+        def hold(self, *args, **kwargs):
+            RejectingReservations.calls += 1
+            raise ReservationError("capacidad tomada por otra corrida", nodo='n1', worker_id=1)
+
+    def slice_data():
+        return {'nombre': 'rechazado', 'zona': {'nombre': 'zona-a'},
+                'nodos': {'n1': {'config': {'type': 'manual', 'info_config': [1, 1024, 10]}},
+                          'n2': {'config': {'type': 'manual', 'info_config': [1, 512, 5]}}}}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, _ = temp_database(workdir)
+        original = (config.get('DB_PATH'), app_scheduler.ReservationManager)
+        config.update_config('DB_PATH', db.db_path)
+        try:
+            app_scheduler.ReservationManager = RejectingReservations
+            data, result = app_scheduler.scheduler_main(slice_data(), 1)
+            assert not result and RejectingReservations.calls == app_scheduler.RESERVATION_ATTEMPTS
+            assert all('id_worker' not in nodo for nodo in data['nodos'].values())
+            assert 'reserva' not in data and 'otra corrida' in data['reserva_rechazada']
+
+            app_scheduler.ReservationManager = original[1]
+            data, result = app_scheduler.scheduler_main(slice_data(), 1)
+            assert result and 'reserva_rechazada' not in data
+            assert {nodo['id_worker'] for nodo in data['nodos'].values()} <= {1, 2}
+            assert app_scheduler.cerrar_reserva(data) == {'confirmadas': 0, 'liberadas': 2}
+        finally:
+            config.update_config('DB_PATH', original[0])
+            app_scheduler.ReservationManager = original[1]
+
+
+def test_dynamic_overcommit_per_worker_and_resource():
+    """El overcommit dinámico da más capacidad a los workers ociosos y la respeta al reservar."""
+    from database.overcommit import compute_overcommit
+
+    settings = {'default_factor': 2, 'percentile': 95, 'window_hours': 24, 'target_utilization': 0.8,
+                'min_factor': 1.0, 'max_ram': 2.0, 'max_vcpu': 4.0, 'min_samples': 3}
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        for nombre, worker, cpu in (('vm-ociosa', 1, 10), ('vm-ocupada', 2, 90)):
+            recurso = db.insert('recursos', {'ram': 1024, 'vcpu': 2, 'storage': 10})
+            vm_id = db.insert('vm', {'nombre': nombre, 'servidor_id_servidor': worker,
+                                     'topologia_id_topologia': slice_id, 'recursos_id_estado': recurso})
+            nodo = db.insert('nodo_cluster', {'nombre': nombre, 'worker_id': worker, 'vm_id': vm_id})
+            for _ in range(4):
+                db.insert('metricas_tiempo_real', {'nodo_id': nodo, 'tipo_metrica': 'cpu_usage', 'valor': cpu})
+                db.insert('metricas_tiempo_real', {'nodo_id': nodo, 'tipo_metrica': 'mem_usage', 'valor': 50})
+
+        factors = compute_overcommit(db, settings)
+        # CPU al 10%: 0.8/0.1 = 8, acotado a 4; RAM al 50%: 1.6; disco sin métrica: el por defecto
+        assert factors.for_worker(1) == (1.6, 2.0, 4.0)
+        # CPU al 90%: 0.8/0.9 < 1, acotado al mínimo
+        assert factors.for_worker(2) == (1.6, 2.0, 1.0)
+        assert factors.for_worker(3) == (2.0, 2.0, 2.0)
+        assert compute_overcommit(db, dict(settings, min_samples=5)).factors == {}
+
+        ledger = get_capacity_ledger(db.db_path)
+        before = ledger.snapshot('zona-a', factors).rows
+        assert before[0][1:] == (8192 * 1.6, 200.0, 16.0, 8192 * 1.6, 200.0, 16.0)
+        assert before[1][3] == 4.0
+
+        reservas = ReservationManager(db, ttl=60)
+        token = reservas.hold('ledger', [{'nodo': 'n1', 'worker_id': 1, 'ram': 1600, 'disk': 20, 'vcpu': 8}],
+                              factor=factors)
+        disponible = db.execute_query("SELECT ram_available, storage_available, vcpu_available "
+                                      "FROM recursos r JOIN servidor s ON s.id_recurso = r.id_recursos "
+                                      "WHERE s.id_servidor = 1")[0]
+        assert tuple(disponible) == (8192 - 1000, 90, 2)
+        assert ledger.snapshot('zona-a', factors).rows[0][1:4] == (8192 * 1.6 - 1600, 180.0, 8.0)
+
+        assert reservas.release(token) == 1
+        assert ledger.snapshot('zona-a', factors).rows == before
+
+
+def _collect(db, servers, count=1):
+    """Registra `count` intervalos del recolector de métricas con la capacidad disponible dada."""
+    import datetime
+    from drivers.metrics_collector import MetricsCollector
+
+    collector = MetricsCollector(db, sources=[], interval=60, timeout=1, jitter=0)
+    now = datetime.datetime.utcnow()
+    for minutes in range(count):
+        collector.write_samples(servers, (now - datetime.timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def test_dynamic_overcommit_from_collector_samples():
+    """Sin métricas por VM, el overcommit usa el uso de cada worker que registra el recolector."""
+    from database.overcommit import compute_overcommit
+
+    settings = {'default_factor': 2, 'percentile': 95, 'window_hours': 24, 'target_utilization': 0.8,
+                'min_factor': 1.0, 'max_ram': 2.0, 'max_vcpu': 4.0, 'min_samples': 3}
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        for nombre, worker, ram, vcpu in (('vm-1', 1, 4096, 4), ('vm-2', 2, 1024, 2)):
+            recurso = db.insert('recursos', {'ram': ram, 'vcpu': vcpu, 'storage': 10})
+            db.insert('vm', {'nombre': nombre, 'servidor_id_servidor': worker,
+                             'topologia_id_topologia': slice_id, 'recursos_id_estado': recurso})
+
+        # w1 (8192 MB, 4 vCPU) usa 2048 MB y 1 vCPU; w2 (4096 MB, 4 vCPU) está lleno; w3 sin muestras
+        _collect(db, {'w1': {'ram': 6144, 'vcpu': 3, 'storage': 90},
+                      'w2': {'ram': 0, 'vcpu': 0, 'storage': 50}}, count=3)
+
+        factors = compute_overcommit(db, settings)
+        # w1: RAM 2048/4096 asignados = 0.5 -> 1.6; CPU 1/4 = 0.25 -> 3.2
+        assert factors.for_worker(1) == (1.6, 2.0, 3.2)
+        # w2: usa más de lo asignado, acotado al mínimo
+        assert factors.for_worker(2) == (1.0, 2.0, 1.0)
+        assert factors.for_worker(3) == (2.0, 2.0, 2.0)
+        assert factors.to_dict()['workers'][1] == {'ram': 1.6, 'disco': 2.0, 'vcpu': 3.2,
+                                                   'uso_ram': 0.5, 'uso_vcpu': 0.25}
+        assert compute_overcommit(db, dict(settings, min_samples=4)).factors == {}
+
+
+def test_simulator_modes_agree():
+    """El simulador en memoria y scheduler_main de punta a punta dan el mismo resultado."""
+    from scheduler.simulator import run_simulation
+
+    params = dict(workers=6, zones=2, slices=60, max_size=6, lifetime=30.0,
+                  flavor_mix={'large': 1, 'xlarge': 1}, seed=3)
+    db_path = config.get('DB_PATH')
+    offline = run_simulation(['coeficiente', 'ffd'], mode='offline', **params)
+    end_to_end = run_simulation(['coeficiente', 'ffd'], mode='scheduler_main', **params)
+    assert config.get('DB_PATH') == db_path
+
+    for nombre in ('coeficiente', 'ffd'):
+        a, b = offline['results'][nombre], end_to_end['results'][nombre]
+        assert a['slices'] == 60
+        assert 0 < a['slices_rejected'] < 60, nombre
+        for key in ('slices_accepted', 'vms_placed', 'rejection_rate', 'utilization', 'fragmentation'):
+            assert a[key] == b[key], (nombre, key)
+        assert set(a['latency_ms']) == {'p50', 'p99', 'mean'}
+
+    # Por lotes (scheduler_batch de punta a punta) también coinciden
+    offline = run_simulation(['best_fit'], mode='offline', batch_window=5.0, **params)
+    end_to_end = run_simulation(['best_fit'], mode='scheduler_main', batch_window=5.0, **params)
+    a, b = offline['results']['best_fit'], end_to_end['results']['best_fit']
+    assert 0 < a['slices_accepted'] < 60
+    for key in ('slices_accepted', 'vms_placed', 'utilization', 'fragmentation'):
+        assert a[key] == b[key], key
+
+
+def test_rebalancer_cools_hot_spots_and_frees_workers():
+    """El planificador de rebalanceo enfría workers calientes y vacía los que requieren menos movimientos."""
+    from scheduler.rebalancer import RebalancePlanner, load_cluster_state
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        for nombre, worker, vcpu, cpu in (('vm-a', 1, 2, 90), ('vm-b', 1, 2, 90), ('vm-c', 2, 1, 10)):
+            recurso = db.insert('recursos', {'ram': 1024, 'vcpu': vcpu, 'storage': 10})
+            vm_id = db.insert('vm', {'nombre': nombre, 'servidor_id_servidor': worker,
+                                     'topologia_id_topologia': slice_id, 'recursos_id_estado': recurso})
+            nodo = db.insert('nodo_cluster', {'nombre': nombre, 'worker_id': worker, 'vm_id': vm_id})
+            db.insert('metricas_tiempo_real', {'nodo_id': nodo, 'tipo_metrica': 'cpu_usage', 'valor': cpu})
+            db.insert('metricas_tiempo_real', {'nodo_id': nodo, 'tipo_metrica': 'mem_usage', 'valor': 50})
+
+        state = load_cluster_state(db, zona='zona-a', factor=2)
+        assert state.medidas == 3
+
+        # w1 está al 90% de CPU: una VM pasa a w2 y ningún worker puede vaciarse
+        plan = RebalancePlanner(max_moves=5, moves_per_minute=1, hot_threshold=0.85).plan(state)
+        assert [(m['vm'], m['origen'], m['destino'], m['motivo']) for m in plan['movimientos']] == \
+            [('vm-a', 1, 2, 'punto_caliente')]
+        assert plan['ganancia']['puntos_calientes'] == {'antes': 1, 'despues': 0}
+        assert plan['workers_liberados'] == []
+
+        # Sin puntos calientes, la VM de w2 se consolida en w1
+        plan = RebalancePlanner(max_moves=5, moves_per_minute=1, hot_threshold=1.0).plan(state)
+        assert [(m['vm'], m['destino'], m['motivo']) for m in plan['movimientos']] == \
+            [('vm-c', 1, 'liberar_worker')]
+        assert plan['workers_liberados'] == [2]
+        assert plan['ganancia']['workers_activos'] == {'antes': 2, 'despues': 1}
+
+        # El límite de movimientos se respeta
+        assert RebalancePlanner(max_moves=0, hot_threshold=0.85).plan(state)['movimientos'] == []
+
+
+def test_rebalancer_uses_collector_samples():
+    """Sin métricas por VM, la carga sale del uso de cada worker que registra el recolector."""
+    import numpy as np
+    from scheduler.rebalancer import RebalancePlanner, load_cluster_state
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db, slice_id = temp_database(workdir)
+        for nombre, worker, ram, vcpu in (('vm-a', 1, 1024, 2), ('vm-b', 1, 512, 1), ('vm-c', 2, 1024, 1)):
+            recurso = db.insert('recursos', {'ram': ram, 'vcpu': vcpu, 'storage': 10})
+            db.insert('vm', {'nombre': nombre, 'servidor_id_servidor': worker,
+                             'topologia_id_topologia': slice_id, 'recursos_id_estado': recurso})
+
+        # w1 al 90% de CPU y 25% de RAM; w2 no reporta métricas
+        _collect(db, {'w1': {'ram': 6144, 'vcpu': 0.4, 'storage': 80}})
+
+        state = load_cluster_state(db, zona='zona-a', factor=2)
+        assert state.medidas == 2
+        cargas = {vm['nombre']: vm['carga'] for vm in state.vms}
+        # 3.6 núcleos y 2048 MB repartidos por lo asignado; vm-c no suma carga
+        assert np.allclose(cargas['vm-a'], [2.4, 2048 * 2 / 3]) and np.allclose(cargas['vm-b'], [1.2, 2048 / 3])
+        assert np.allclose(cargas['vm-c'], [0, 0])
+
+        plan = RebalancePlanner(max_moves=5, moves_per_minute=1, hot_threshold=0.85).plan(state)
+        assert [(m['vm'], m['origen'], m['destino'], m['motivo']) for m in plan['movimientos']] == \
+            [('vm-b', 1, 2, 'punto_caliente')]
+        assert plan['ganancia']['puntos_calientes'] == {'antes': 1, 'despues': 0}
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
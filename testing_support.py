@@ -0,0 +1,68 @@
+"""
+===================================================================
+UTILIDADES DE PRUEBAS
+===================================================================
+
+Piezas compartidas por los módulos test_*.py: una base de datos
+temporal con el esquema completo y el ejecutor que usan al correrse
+como scripts (python test_database.py), que descubre solo las
+funciones test_* del módulo.
+
+Versión: 3.1
+===================================================================
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+
+from database import DatabaseInitializer, DatabaseManager
+
+
+def temp_database(workdir):
+    """Base de datos temporal con dos zonas y tres workers."""
+    db_path = str(Path(workdir) / "ledger.db")
+    initializer = DatabaseInitializer()
+    assert initializer.execute_schema(Path(db_path), initializer.load_schema_file(initializer.schema_path))
+    db = DatabaseManager(db_path)
+    for zona in ('zona-a', 'zona-b'):
+        db.insert('zona_disponibilidad', {'nombre': zona})
+    for nombre, zona, ram in (('w1', 1, 8192), ('w2', 1, 4096), ('w3', 2, 2048)):
+        recurso = db.insert('recursos', {'ram': ram, 'vcpu': 4, 'storage': 100, 'ram_available': ram,
+                                         'vcpu_available': 4, 'storage_available': 100})
+        db.insert('servidor', {'nombre': nombre, 'id_zona': zona, 'id_recurso': recurso})
+    slice_id = db.insert('slice', {'nombre': 'ledger', 'tipo': 'linux_cluster'})
+    return db, slice_id
+
+
+def available(db, worker_id):
+    """Capacidad disponible (ram, storage, vcpu) de un worker."""
+    row = db.execute_query(
+        "SELECT r.ram_available, r.storage_available, r.vcpu_available FROM recursos r "
+        "JOIN servidor s ON s.id_recurso = r.id_recursos WHERE s.id_servidor = ?", (worker_id,)
+    )[0]
+    return tuple(row)
+
+
+def run_tests(namespace) -> int:
+    """
+    Ejecuta las funciones test_* de un módulo en orden de definición.
+
+    Args:
+        namespace: globals() del módulo de pruebas
+
+    Returns:
+        int: 0 si pasaron todas, 1 si alguna falló
+    """
+    tests = [value for name, value in namespace.items() if name.startswith('test_') and callable(value)]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0